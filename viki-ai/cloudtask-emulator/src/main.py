@@ -55,6 +55,9 @@ class CreateTaskRequest(BaseModel):
 task_queue: List[Task] = []
 task_history: List[Dict[str, Any]] = []
 
+# Creation time of every task name, per queue, to reject duplicates like Cloud Tasks does
+task_names: Dict[str, datetime] = {}
+
 class CloudTaskEmulator:
     """
     Emulates Google Cloud Tasks behavior for local development.
@@ -330,8 +333,20 @@ async def create_task(
     request: CreateTaskRequest
 ):
     """Create a new task (emulates Cloud Tasks API)."""
+    task = request.task
+
+    # Cloud Tasks rejects a name used in the queue within the last hour or so with ALREADY_EXISTS
+    now = datetime.utcnow()
+    retention = timedelta(seconds=settings.TASK_NAME_RETENTION_SECONDS)
+    for name in [name for name, created_at in task_names.items() if now - created_at >= retention]:
+        del task_names[name]
+    task_path = f"projects/{project}/locations/{location}/queues/{queue}/tasks/{task.name}"
+    if task_path in task_names:
+        logger.info(f"Task {task.name} already exists in queue {queue}")
+        raise HTTPException(status_code=409, detail=f"Task {task_path} already exists")
+    task_names[task_path] = now
+
     try:
-        task = request.task
         
         # Set default schedule time if not provided
         if task.schedule_time is None:
@@ -401,6 +416,7 @@ async def clear_tasks():
     """Clear all tasks (for testing)."""
     task_queue.clear()
     task_history.clear()
+    task_names.clear()
     return {"message": "All tasks cleared"}
 
 if __name__ == "__main__":
@@ -9,6 +9,7 @@ CLOUDTASK_EMULATOR_HOST: str = os.getenv("CLOUDTASK_EMULATOR_HOST", "0.0.0.0")
 MAX_RETRIES: int = int(os.getenv("CLOUDTASK_MAX_RETRIES", "3"))
 RETRY_BASE_DELAY: int = int(os.getenv("CLOUDTASK_RETRY_BASE_DELAY", "2"))
 MAX_RETRY_DELAY: int = int(os.getenv("CLOUDTASK_MAX_RETRY_DELAY", "60"))
+TASK_NAME_RETENTION_SECONDS: int = int(os.getenv("CLOUDTASK_TASK_NAME_RETENTION_SECONDS", "3600"))
 
 # Worker Configuration
 WORKER_CHECK_INTERVAL: float = float(os.getenv("CLOUDTASK_WORKER_CHECK_INTERVAL", "0.1"))
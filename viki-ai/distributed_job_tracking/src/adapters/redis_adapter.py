@@ -1,13 +1,57 @@
 import json
 import redis.asyncio as redis
-from typing import Optional, List, Dict, Any
-from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Tuple, Union
+from datetime import datetime, timedelta, timezone
 import logging
 
 import settings
 
 logger = logging.getLogger(__name__)
 
+# Upper bounds (seconds) of the execution time histogram kept in the hourly rollups
+EXECUTION_TIME_BUCKETS = [1, 5, 15, 60, 300, 900, 3600]
+
+# Set once the time indexes hold every job; jobs stored before they existed are indexed by rebuild_time_indexes()
+TIME_INDEXES_MARKER_KEY = "jobs:time_indexes"
+# Held by the process rebuilding the time indexes; expires so a crashed rebuild is taken over by another process
+TIME_INDEXES_LOCK_KEY = "jobs:time_indexes:lock"
+TIME_INDEXES_LOCK_SECONDS = 600
+# Until the marker is set: the time the first live update counted a job (the rebuild's rollup cutoff), and the jobs
+# already counted by a live update or the rebuild, so the rebuild and the live updates never count a job twice
+TIME_INDEXES_SINCE_KEY = "jobs:time_indexes:since"
+TIME_INDEXES_REBUILT_KEY = "jobs:time_indexes:rebuilt"
+# Kept this long after the rebuild, for live updates that checked for the marker just before it was set
+TIME_INDEXES_REBUILT_TTL_SECONDS = 86400
+_time_indexes_checked = False
+
+
+def to_timestamp(value: Union[datetime, str, None]) -> Optional[float]:
+    """Epoch seconds of a job timestamp; naive datetimes are UTC like everything the job service stores."""
+    if not value:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def index_value(value: Any) -> Any:
+    """Enum members (JobStatus etc.) format as "JobStatus.X" in f-strings; index keys use their value."""
+    return getattr(value, "value", value)
+
+
+def rollup_key(timestamp: float) -> str:
+    """Key of the hourly rollup hash for the hour containing timestamp."""
+    return f"jobs:rollup:{datetime.fromtimestamp(timestamp, tz=timezone.utc):%Y%m%d%H}"
+
+
+def execution_time_bucket(seconds: float) -> str:
+    for bound in EXECUTION_TIME_BUCKETS:
+        if seconds <= bound:
+            return f"execution_le_{bound}"
+    return "execution_le_inf"
+
 
 class RedisAdapter:
     """Redis adapter for job storage and retrieval"""
@@ -123,12 +167,11 @@ class RedisAdapter:
             return []
     
     async def get_all_job_ids(self) -> List[str]:
-        """Get all job IDs"""
+        """Get all job IDs; walks the keyspace with SCAN, prefer the time indexes for anything on a request path"""
         try:
             pattern = "job:*"
-            keys = await self.redis_client.keys(pattern)
             # Extract job IDs from keys
-            job_ids = [key.replace("job:", "") for key in keys]
+            job_ids = [key.replace("job:", "", 1) async for key in self.redis_client.scan_iter(match=pattern, count=1000)]
             return job_ids
         except Exception as e:
             logger.error(f"Failed to get all job IDs: {e}")
@@ -179,30 +222,44 @@ class RedisAdapter:
     async def _add_to_indexes(self, job_id: str, job_data: Dict[str, Any]):
         """Add job to various indexes"""
         try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            
             # Status index
-            status = job_data.get("status")
+            status = index_value(job_data.get("status"))
             if status:
-                await self.redis_client.sadd(f"jobs:status:{status}", job_id)
+                pipe.sadd(f"jobs:status:{status}", job_id)
             
             # Type index
-            job_type = job_data.get("job_type")
+            job_type = index_value(job_data.get("job_type"))
             if job_type:
-                await self.redis_client.sadd(f"jobs:type:{job_type}", job_id)
+                pipe.sadd(f"jobs:type:{job_type}", job_id)
             
             # Priority index
-            priority = job_data.get("priority")
+            priority = index_value(job_data.get("priority"))
             if priority:
-                await self.redis_client.sadd(f"jobs:priority:{priority}", job_id)
+                pipe.sadd(f"jobs:priority:{priority}", job_id)
             
             # Parent job index
             parent_job_id = job_data.get("parent_job_id")
             if parent_job_id:
-                await self.redis_client.sadd(f"jobs:parent:{parent_job_id}", job_id)
+                pipe.sadd(f"jobs:parent:{parent_job_id}", job_id)
             
             # Worker index
             worker_id = job_data.get("worker_id")
             if worker_id:
-                await self.redis_client.sadd(f"jobs:worker:{worker_id}", job_id)
+                pipe.sadd(f"jobs:worker:{worker_id}", job_id)
+            
+            # Time indexes: all jobs and jobs per status by creation time, completed jobs by completion time
+            created_at = to_timestamp(job_data.get("created_at"))
+            if created_at is not None:
+                pipe.zadd("jobs:created_at", {job_id: created_at})
+                if status:
+                    pipe.zadd(f"jobs:created_at:{status}", {job_id: created_at})
+            completed_at = to_timestamp(job_data.get("completed_at"))
+            if status == "completed" and completed_at is not None:
+                pipe.zadd("jobs:completed_at", {job_id: completed_at})
+            
+            await pipe.execute()
                 
         except Exception as e:
             logger.error(f"Failed to add job {job_id} to indexes: {e}")
@@ -210,44 +267,361 @@ class RedisAdapter:
     async def _remove_from_indexes(self, job_id: str, job_data: Dict[str, Any]):
         """Remove job from various indexes"""
         try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            
             # Status index
-            status = job_data.get("status")
+            status = index_value(job_data.get("status"))
             if status:
-                await self.redis_client.srem(f"jobs:status:{status}", job_id)
+                pipe.srem(f"jobs:status:{status}", job_id)
+                pipe.zrem(f"jobs:created_at:{status}", job_id)
             
             # Type index
-            job_type = job_data.get("job_type")
+            job_type = index_value(job_data.get("job_type"))
             if job_type:
-                await self.redis_client.srem(f"jobs:type:{job_type}", job_id)
+                pipe.srem(f"jobs:type:{job_type}", job_id)
             
             # Priority index
-            priority = job_data.get("priority")
+            priority = index_value(job_data.get("priority"))
             if priority:
-                await self.redis_client.srem(f"jobs:priority:{priority}", job_id)
+                pipe.srem(f"jobs:priority:{priority}", job_id)
             
             # Parent job index
             parent_job_id = job_data.get("parent_job_id")
             if parent_job_id:
-                await self.redis_client.srem(f"jobs:parent:{parent_job_id}", job_id)
+                pipe.srem(f"jobs:parent:{parent_job_id}", job_id)
             
             # Worker index
             worker_id = job_data.get("worker_id")
             if worker_id:
-                await self.redis_client.srem(f"jobs:worker:{worker_id}", job_id)
+                pipe.srem(f"jobs:worker:{worker_id}", job_id)
+                if status == "running" and await self._is_counted(job_id):
+                    pipe.hincrby("jobs:running_by_worker", worker_id, -1)
+            
+            # Time indexes; the hourly rollups keep the job as history
+            pipe.zrem("jobs:created_at", job_id)
+            pipe.zrem("jobs:completed_at", job_id)
+            
+            await pipe.execute()
                 
         except Exception as e:
             logger.error(f"Failed to remove job {job_id} from indexes: {e}")
     
-    async def update_job_status(self, job_id: str, old_status: str, new_status: str):
-        """Update job status in indexes"""
+    async def _is_counted(self, job_id: str) -> bool:
+        """
+        Whether the rollups and running counts already hold the job's current state, so a live update may take
+        it out of them.  Always true once the time indexes are built.  Until then only jobs a live update or the
+        rebuild counted before are; the job is marked counted, so the rebuild leaves it to the live updates, and
+        the first live update fixes the rebuild's rollup cutoff.
+        """
+        global _time_indexes_checked
+        if _time_indexes_checked:
+            return True
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.exists(TIME_INDEXES_MARKER_KEY)
+        pipe.set(TIME_INDEXES_SINCE_KEY, datetime.now(timezone.utc).isoformat(), nx=True)
+        pipe.sadd(TIME_INDEXES_REBUILT_KEY, job_id)
+        pipe.expire(TIME_INDEXES_REBUILT_KEY, TIME_INDEXES_REBUILT_TTL_SECONDS)
+        built, _, newly_counted, _ = await pipe.execute()
+        if built:
+            _time_indexes_checked = True
+            return True
+        return not newly_counted
+    
+    async def update_job_status(self, job_id: str, old_status: str, new_status: str, job_data: Optional[Dict[str, Any]] = None):
+        """
+        Update job status in indexes, and the rollups and worker counts that follow status transitions.
+        job_data is the job after the change; it is read from Redis when not given.
+        """
         try:
+            old_status = index_value(old_status)
+            new_status = index_value(new_status)
+            if job_data is None:
+                job_data = await self.get_job(job_id) or {}
+            counted = await self._is_counted(job_id)
+            
+            pipe = self.redis_client.pipeline(transaction=False)
             # Remove from old status index
-            await self.redis_client.srem(f"jobs:status:{old_status}", job_id)
+            pipe.srem(f"jobs:status:{old_status}", job_id)
+            pipe.zrem(f"jobs:created_at:{old_status}", job_id)
             # Add to new status index
-            await self.redis_client.sadd(f"jobs:status:{new_status}", job_id)
+            pipe.sadd(f"jobs:status:{new_status}", job_id)
+            created_at = to_timestamp(job_data.get("created_at"))
+            if created_at is not None:
+                pipe.zadd(f"jobs:created_at:{new_status}", {job_id: created_at})
+            
+            # Execution times of completed jobs, rolled up by the hour the job was created
+            execution_seconds = self._execution_seconds(job_data)
+            if "completed" in (old_status, new_status) and old_status != new_status:
+                entering = new_status == "completed"
+                if entering:
+                    completed_at = to_timestamp(job_data.get("completed_at"))
+                    if completed_at is not None:
+                        pipe.zadd("jobs:completed_at", {job_id: completed_at})
+                else:
+                    pipe.zrem("jobs:completed_at", job_id)
+                if created_at is not None and execution_seconds is not None and (entering or counted):
+                    self._add_execution_rollup(pipe, created_at, execution_seconds, 1 if entering else -1)
+            
+            # Running jobs per worker
+            worker_id = job_data.get("worker_id")
+            if worker_id and "running" in (old_status, new_status) and old_status != new_status:
+                if new_status == "running":
+                    pipe.hincrby("jobs:running_by_worker", worker_id, 1)
+                elif counted:
+                    pipe.hincrby("jobs:running_by_worker", worker_id, -1)
+            
+            await pipe.execute()
         except Exception as e:
             logger.error(f"Failed to update job status indexes for {job_id}: {e}")
     
+    async def update_job_worker(self, job_id: str, old_worker_id: Optional[str], new_worker_id: Optional[str], status: str):
+        """
+        Move a job to another worker in the worker index, and its running count when it is running.
+        status is the job's status before the update; update_job_status() follows a status change afterwards.
+        """
+        try:
+            status = index_value(status)
+            counted = await self._is_counted(job_id)
+            pipe = self.redis_client.pipeline(transaction=False)
+            if old_worker_id:
+                pipe.srem(f"jobs:worker:{old_worker_id}", job_id)
+                if status == "running" and counted:
+                    pipe.hincrby("jobs:running_by_worker", old_worker_id, -1)
+            if new_worker_id:
+                pipe.sadd(f"jobs:worker:{new_worker_id}", job_id)
+                if status == "running":
+                    pipe.hincrby("jobs:running_by_worker", new_worker_id, 1)
+            await pipe.execute()
+        except Exception as e:
+            logger.error(f"Failed to update worker indexes for {job_id}: {e}")
+    
+    def _execution_seconds(self, job_data: Dict[str, Any]) -> Optional[float]:
+        started_at = to_timestamp(job_data.get("started_at"))
+        completed_at = to_timestamp(job_data.get("completed_at"))
+        if started_at is None or completed_at is None:
+            return None
+        return completed_at - started_at
+    
+    def _add_execution_rollup(self, pipe, created_at: float, execution_seconds: float, sign: int):
+        key = rollup_key(created_at)
+        pipe.hincrby(key, "executions", sign)
+        pipe.hincrbyfloat(key, "execution_seconds", sign * execution_seconds)
+        pipe.hincrby(key, execution_time_bucket(execution_seconds), sign)
+        pipe.expire(key, settings.JOB_METRICS_ROLLUP_TTL)
+    
+    async def get_jobs(self, job_ids: List[str]) -> List[Dict[str, Any]]:
+        """Retrieve several jobs in one round trip; missing jobs are left out"""
+        if not job_ids:
+            return []
+        try:
+            values = await self.redis_client.mget([f"job:{job_id}" for job_id in job_ids])
+            return [json.loads(value) for value in values if value]
+        except Exception as e:
+            logger.error(f"Failed to get {len(job_ids)} jobs: {e}")
+            return []
+    
+    async def count_jobs_created_since(self, since: datetime, status: Optional[str] = None) -> int:
+        """Count jobs created since the given time, optionally only those currently in status"""
+        key = f"jobs:created_at:{status}" if status else "jobs:created_at"
+        return await self.redis_client.zcount(key, to_timestamp(since), "+inf")
+    
+    async def get_job_ids_created_since(self, since: datetime, status: Optional[str] = None) -> List[str]:
+        """IDs of jobs created since the given time, oldest first, optionally only those currently in status"""
+        key = f"jobs:created_at:{status}" if status else "jobs:created_at"
+        return await self.redis_client.zrangebyscore(key, to_timestamp(since), "+inf")
+    
+    async def count_jobs_completed_since(self, since: datetime) -> int:
+        """Count completed jobs whose completion time is since the given time"""
+        return await self.redis_client.zcount("jobs:completed_at", to_timestamp(since), "+inf")
+    
+    async def get_execution_rollup(self, since: datetime) -> Dict[str, Any]:
+        """
+        Execution times of completed jobs created since the given time, summed over the hourly rollups.
+        The hour containing `since` is included whole.
+        """
+        start = int(to_timestamp(since)) // 3600 * 3600
+        end = to_timestamp(datetime.now(timezone.utc))
+        pipe = self.redis_client.pipeline(transaction=False)
+        hour = start
+        while hour <= end:
+            pipe.hgetall(rollup_key(hour))
+            hour += 3600
+        
+        executions = 0
+        execution_seconds = 0.0
+        histogram = {execution_time_bucket(bound): 0 for bound in EXECUTION_TIME_BUCKETS + [float("inf")]}
+        for rollup in await pipe.execute():
+            executions += int(rollup.get("executions", 0))
+            execution_seconds += float(rollup.get("execution_seconds", 0))
+            for bucket in histogram:
+                histogram[bucket] += int(rollup.get(bucket, 0))
+        
+        return {
+            "executions": executions,
+            "execution_seconds": execution_seconds,
+            "histogram": histogram
+        }
+    
+    async def get_job_index(
+        self,
+        status: Optional[str] = None,
+        job_type: Optional[str] = None,
+        priority: Optional[str] = None,
+        parent_job_id: Optional[str] = None
+    ) -> str:
+        """
+        Key of a sorted set of the jobs matching the filters, scored by creation time.  Filters other than
+        status are intersected on the server into a jobs:query:* key kept for JOB_LIST_QUERY_TTL seconds,
+        so paging through a listing reuses it.
+        """
+        status = index_value(status)
+        index_key = f"jobs:created_at:{status}" if status else "jobs:created_at"
+        filter_keys = []
+        if job_type:
+            filter_keys.append(f"jobs:type:{index_value(job_type)}")
+        if priority:
+            filter_keys.append(f"jobs:priority:{index_value(priority)}")
+        if parent_job_id:
+            filter_keys.append(f"jobs:parent:{parent_job_id}")
+        if not filter_keys:
+            return index_key
+        
+        query_key = "jobs:query:" + "|".join([index_key] + filter_keys)
+        if not await self.redis_client.exists(query_key):
+            pipe = self.redis_client.pipeline(transaction=False)
+            # Set members score 1 x weight 0, so each job keeps its creation time
+            pipe.zinterstore(query_key, {index_key: 1, **{key: 0 for key in filter_keys}}, aggregate="SUM")
+            pipe.expire(query_key, settings.JOB_LIST_QUERY_TTL)
+            await pipe.execute()
+        return query_key
+    
+    async def get_job_ids_page(
+        self,
+        index_key: str,
+        limit: int,
+        cursor: Optional[str] = None,
+        offset: int = 0
+    ) -> Tuple[List[str], int, Optional[str]]:
+        """
+        Newest first page of a job index: (job IDs, total jobs in the index, cursor of the next page or None).
+        A cursor ("{created_at score}:{job_id}" of the last job returned) continues after that job; without
+        one the page starts at offset.
+        """
+        if cursor:
+            cursor_score, cursor_job_id = cursor.split(":", 1)
+            cursor_score = float(cursor_score)
+            # Jobs created in the same instant as the cursor's are ordered by descending ID
+            num = limit + 1
+            while True:
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.zcard(index_key)
+                pipe.zrevrangebyscore(index_key, cursor_score, "-inf", start=0, num=num, withscores=True)
+                total, fetched = await pipe.execute()
+                entries = [(job_id, score) for job_id, score in fetched
+                           if score < cursor_score or job_id < cursor_job_id]
+                if len(entries) > limit or len(fetched) < num:
+                    break
+                num *= 2
+        else:
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.zcard(index_key)
+            pipe.zrevrange(index_key, offset, offset + limit, withscores=True)
+            total, entries = await pipe.execute()
+        
+        has_next = len(entries) > limit
+        entries = entries[:limit]
+        next_cursor = f"{entries[-1][1]!r}:{entries[-1][0]}" if has_next else None
+        return [job_id for job_id, _ in entries], total, next_cursor
+    
+    async def get_running_jobs_by_worker(self) -> Dict[str, int]:
+        """Number of running jobs per worker"""
+        counts = await self.redis_client.hgetall("jobs:running_by_worker")
+        return {worker_id: int(count) for worker_id, count in counts.items() if int(count) > 0}
+    
+    async def ensure_time_indexes(self):
+        """
+        Index the jobs stored before the time indexes existed, once per deployment: the process holding
+        TIME_INDEXES_LOCK_KEY rebuilds them and sets TIME_INDEXES_MARKER_KEY once the rebuild succeeded.
+        Other processes keep checking on later calls until the marker is set.
+        """
+        global _time_indexes_checked
+        if _time_indexes_checked:
+            return
+        if await self.redis_client.exists(TIME_INDEXES_MARKER_KEY):
+            _time_indexes_checked = True
+            return
+        if not await self.redis_client.set(TIME_INDEXES_LOCK_KEY, "1", nx=True, ex=TIME_INDEXES_LOCK_SECONDS):
+            return
+        try:
+            # A rebuild taken over from a crashed process keeps its cutoff
+            await self.redis_client.set(TIME_INDEXES_SINCE_KEY, datetime.now(timezone.utc).isoformat(), nx=True)
+            indexed_since = datetime.fromisoformat(await self.redis_client.get(TIME_INDEXES_SINCE_KEY))
+            await self.rebuild_time_indexes(indexed_since)
+            await self.redis_client.set(TIME_INDEXES_MARKER_KEY, indexed_since.isoformat())
+            await self.redis_client.delete(TIME_INDEXES_SINCE_KEY)
+            _time_indexes_checked = True
+        finally:
+            await self.redis_client.delete(TIME_INDEXES_LOCK_KEY)
+    
+    async def rebuild_time_indexes(self, indexed_since: datetime, batch_size: int = 500) -> int:
+        """
+        Add every stored job to the time indexes, and jobs completed before indexed_since to the rollups
+        (later completions were rolled up when they happened).  Uses SCAN, so Redis keeps serving meanwhile.
+        Jobs are counted in the rollups and running counts only if no live update or earlier attempt of the
+        rebuild counted them (TIME_INDEXES_REBUILT_KEY), so each job is counted once.
+        """
+        cutoff = to_timestamp(indexed_since)
+        indexed = 0
+        keys = []
+        
+        async def index_batch(batch: List[str]):
+            values = await self.redis_client.mget(batch)
+            jobs = []
+            for key, value in zip(batch, values):
+                if not value:
+                    continue
+                job_data = json.loads(value)
+                created_at = to_timestamp(job_data.get("created_at"))
+                if created_at is not None:
+                    jobs.append((key[len("job:"):], job_data, created_at))
+            if not jobs:
+                return 0
+            
+            pipe = self.redis_client.pipeline(transaction=False)
+            for job_id, _, _ in jobs:
+                pipe.sadd(TIME_INDEXES_REBUILT_KEY, job_id)
+            first_counts = await pipe.execute()
+            
+            pipe = self.redis_client.pipeline(transaction=False)
+            for (job_id, job_data, created_at), first_count in zip(jobs, first_counts):
+                status = index_value(job_data.get("status"))
+                pipe.zadd("jobs:created_at", {job_id: created_at})
+                if status:
+                    pipe.zadd(f"jobs:created_at:{status}", {job_id: created_at})
+                completed_at = to_timestamp(job_data.get("completed_at"))
+                if status == "completed" and completed_at is not None:
+                    pipe.zadd("jobs:completed_at", {job_id: completed_at})
+                    execution_seconds = self._execution_seconds(job_data)
+                    if first_count and execution_seconds is not None and completed_at < cutoff:
+                        self._add_execution_rollup(pipe, created_at, execution_seconds, 1)
+                worker_id = job_data.get("worker_id")
+                if first_count and status == "running" and worker_id:
+                    pipe.hincrby("jobs:running_by_worker", worker_id, 1)
+            await pipe.execute()
+            return len(jobs)
+        
+        async for key in self.redis_client.scan_iter(match="job:*", count=batch_size):
+            keys.append(key)
+            if len(keys) >= batch_size:
+                indexed += await index_batch(keys)
+                keys = []
+        if keys:
+            indexed += await index_batch(keys)
+        await self.redis_client.expire(TIME_INDEXES_REBUILT_KEY, TIME_INDEXES_REBUILT_TTL_SECONDS)
+        
+        logger.info(f"Rebuilt job time indexes for {indexed} jobs")
+        return indexed
+    
     async def close(self):
         """Close Redis connection"""
         if self.redis_client:
@@ -0,0 +1,142 @@
+"""
+Lua scripts run server side by the services, so a read-modify-write of several keys is one atomic round trip.
+"""
+
+# The whole pipeline status upsert for one or more updates of a run in one round trip: creates the job when it
+# does not exist yet, detects the run's first status, writes the pipeline status entries, refreshes TTLs and
+# maintains the run's status counters, so run completion is known without reading every pipeline hash.  Updates
+# of a run are serialized by Redis, so exactly one of them sees the first status and the counters never lose a
+# transition.  A batch is applied in order and checked for completion once, after its last update.
+#
+# KEYS: [1] pipeline list djt::{run_id}:pipeline_list, [2] run status counters djt::{run_id}:status_counts,
+#       [3] job hash djt::{run_id}, [4..] pipeline hashes djt::{run_id}:pipelines:{pipeline_id}
+# ARGV: [1] TTL in seconds, [2] job JSON stored when the job is missing, then 6 per update:
+#       index in KEYS of its pipeline hash, hash field (page number or "document"), pipeline_id,
+#       pipeline JSON stored when the entry is new, new status, updated_at as a JSON value
+#
+# An existing entry keeps its JSON and only gets the new status and updated_at.  Pipeline JSON is written by
+# pydantic in field order, so the first "status" is the pipeline's own and updated_at is the last field
+# (checked by tests/test_pipeline_service.py::TestStoredPipelineJson).
+#
+# Counters (fields of the counters hash): status:{STATUS} entries per status across the run; pages:{pipeline_id},
+# completed_pages:{pipeline_id} and max_page:{pipeline_id} for page entries.  The run is FAILED when any entry
+# failed and COMPLETED when no entry is FAILED, IN_PROGRESS, QUEUED or NOT_STARTED, some entry completed, and
+# every page-level pipeline has exactly pages 1..{job pages}, all COMPLETED.  published_status remembers the
+# final status last reported, so it is reported once each time the run reaches it.
+#
+# Runs whose pipelines were written before the counters existed are flagged legacy; their completion is still
+# checked by listing the pipelines.
+#
+# Returns {status to publish or "", legacy 0/1, job created 0/1, first status 0/1, then per update: old status
+# or "", stored JSON}
+RECORD_PIPELINE_STATUS = """
+local list_key, counts_key, job_key = KEYS[1], KEYS[2], KEYS[3]
+local ttl, job_json = tonumber(ARGV[1]), ARGV[2]
+
+local job_created = 0
+if redis.call('HSETNX', job_key, 'job', job_json) == 1 then
+    redis.call('EXPIRE', job_key, ttl)
+    job_created = 1
+end
+
+local pipeline_count = redis.call('SCARD', list_key)
+local first_status = pipeline_count == 0 and 1 or 0
+if pipeline_count > 0 and redis.call('EXISTS', counts_key) == 0 then
+    redis.call('HSET', counts_key, 'legacy', 1)
+end
+
+local updates = {}
+for i = 3, #ARGV, 6 do
+    local pipeline_key = KEYS[tonumber(ARGV[i])]
+    local field, pipeline_id, new_json, new_status, updated_at = ARGV[i + 1], ARGV[i + 2], ARGV[i + 3], ARGV[i + 4], ARGV[i + 5]
+
+    local old = redis.call('HGET', pipeline_key, field)
+    local old_status = ''
+    local value = new_json
+    if old then
+        old_status = string.match(old, '"status":"([%w_]+)"') or ''
+        value = string.gsub(old, '"status":"[%w_]*"', '"status":"' .. new_status .. '"', 1)
+        value = string.gsub(value, '"updated_at":[^,}]*}$', '"updated_at":' .. updated_at .. '}')
+    end
+
+    redis.call('HSET', pipeline_key, field, value)
+    redis.call('EXPIRE', pipeline_key, ttl)
+    redis.call('SADD', list_key, pipeline_id)
+
+    if old_status ~= new_status then
+        if old_status ~= '' then
+            redis.call('HINCRBY', counts_key, 'status:' .. old_status, -1)
+        end
+        redis.call('HINCRBY', counts_key, 'status:' .. new_status, 1)
+    end
+
+    local page = tonumber(field)
+    if page then
+        if not old then
+            redis.call('HINCRBY', counts_key, 'pages:' .. pipeline_id, 1)
+            local max_page = tonumber(redis.call('HGET', counts_key, 'max_page:' .. pipeline_id) or '0')
+            if page > max_page then
+                redis.call('HSET', counts_key, 'max_page:' .. pipeline_id, page)
+            end
+        end
+        if (old_status == 'COMPLETED') ~= (new_status == 'COMPLETED') then
+            redis.call('HINCRBY', counts_key, 'completed_pages:' .. pipeline_id, new_status == 'COMPLETED' and 1 or -1)
+        end
+    end
+
+    table.insert(updates, old_status)
+    table.insert(updates, value)
+end
+redis.call('EXPIRE', list_key, ttl)
+redis.call('EXPIRE', counts_key, ttl)
+
+local function count(name)
+    return tonumber(redis.call('HGET', counts_key, name) or '0')
+end
+
+local function run_status()
+    if count('status:FAILED') > 0 then
+        return 'FAILED'
+    end
+    if count('status:IN_PROGRESS') > 0 or count('status:QUEUED') > 0 or count('status:NOT_STARTED') > 0
+            or count('status:COMPLETED') == 0 then
+        return ''
+    end
+    local total_pages = 0
+    local stored_job = redis.call('HGET', job_key, 'job')
+    if stored_job then
+        total_pages = tonumber(cjson.decode(stored_job)['pages']) or 0
+    end
+    if total_pages > 0 then
+        for _, id in ipairs(redis.call('SMEMBERS', list_key)) do
+            local pages = count('pages:' .. id)
+            if pages > 0 and (pages ~= total_pages or count('completed_pages:' .. id) ~= total_pages
+                    or count('max_page:' .. id) > total_pages) then
+                return ''
+            end
+        end
+    end
+    return 'COMPLETED'
+end
+
+local legacy = count('legacy')
+local publish = ''
+if legacy == 0 then
+    local status = run_status()
+    local published = redis.call('HGET', counts_key, 'published_status') or ''
+    if status ~= published then
+        if status == '' then
+            redis.call('HDEL', counts_key, 'published_status')
+        else
+            redis.call('HSET', counts_key, 'published_status', status)
+            publish = status
+        end
+    end
+end
+
+local result = {publish, legacy, job_created, first_status}
+for _, item in ipairs(updates) do
+    table.insert(result, item)
+end
+return result
+"""
@@ -49,6 +49,8 @@ class JobUpdate(BaseModel):
     result: Optional[Dict[str, Any]] = None
     error_message: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = None
+    worker_id: Optional[str] = Field(None, description="ID of worker processing the job")
+    worker_host: Optional[str] = Field(None, description="Host of worker processing the job")
 
 
 class Job(BaseModel):
@@ -119,6 +121,7 @@ class JobListResponse(BaseModel):
     page_size: int = 50
     has_next: bool = False
     has_prev: bool = False
+    next_cursor: Optional[str] = Field(default=None, description="Cursor of the next page, when there is one")
 
 
 # Enable forward references for self-referencing models
@@ -42,6 +42,22 @@ class PipelineResponse(BaseModel):
     message: str = "Operation completed successfully"
 
 
+class PipelineStatusBatchItem(PipelineStatusUpdate):
+    """Model for one pipeline status update of a batch"""
+    pipeline_id: str = Field(..., description="Pipeline identifier")
+
+
+class PipelineStatusBatch(BaseModel):
+    """Model for updating several pipeline statuses of a run at once"""
+    updates: List[PipelineStatusBatchItem] = Field(..., min_length=1, max_length=500, description="Status updates, applied in order")
+
+
+class PipelineBatchResponse(BaseModel):
+    """Response model for batched pipeline operations"""
+    pipelines: List[Pipeline] = Field(..., description="Pipelines as stored, in the order of the updates")
+    message: str = "Operation completed successfully"
+
+
 class PipelineListItem(BaseModel):
     """Model for individual pipeline in list response"""
     id: str = Field(..., description="Pipeline identifier")
@@ -3,7 +3,7 @@ from fastapi.responses import JSONResponse
 from typing import Dict, Any
 
 from models.simple_job import SimpleJobCreate, SimpleJobResponse, SimpleJobUpdate
-from models.pipeline import PipelineStatusUpdate, PipelineResponse, PipelineListResponse
+from models.pipeline import PipelineStatusUpdate, PipelineResponse, PipelineListResponse, PipelineStatusBatch, PipelineBatchResponse
 from usecases.simple_job_service import SimpleJobService
 from usecases.pipeline_service import PipelineService
 
@@ -182,6 +182,39 @@ async def list_pipelines(
         await pipeline_service.close()
         
 
+@router.post("/{job_id}/pipelines/status", response_model=PipelineBatchResponse)
+async def update_pipeline_statuses(
+    job_id: str,
+    batch: PipelineStatusBatch,
+    request: Request,
+    pipeline_service: PipelineService = Depends(get_pipeline_service)
+):
+    """
+    Update several pipeline statuses for a job at once.
+    
+    Each update carries its pipeline_id along with the fields of a single pipeline status update.  The updates
+    are applied in order in one Redis transaction and the run's completion is checked once, after the last one.
+    
+    The job_id parameter is used as the run_id for Redis key generation.
+    If the job doesn't exist, it will be auto-created using the job creation fields of the first update.
+    """
+    try:
+        updates = [
+            (item.pipeline_id, PipelineStatusUpdate(**item.model_dump(exclude={"pipeline_id"})))
+            for item in batch.updates
+        ]
+        pipelines = await pipeline_service.update_pipeline_statuses(job_id, updates)
+        return PipelineBatchResponse(pipelines=pipelines, message=f"{len(pipelines)} pipeline statuses updated successfully")
+    except HTTPException as e:
+        LOGGER.warning(f"HTTPException occurred: {str(e)}", extra={"error": exceptionToMap(e)})
+        raise
+    except Exception as e:
+        LOGGER.error(f"Error occurred while updating pipeline statuses: {str(e)}", extra={"error": exceptionToMap(e)})
+        raise HTTPException(status_code=500, detail=f"Failed to update pipeline statuses: {str(e)}")
+    finally:
+        await pipeline_service.close()
+
+
 @router.post("/{job_id}/pipelines/{pipeline_id}/status", response_model=PipelineResponse)
 async def update_pipeline_status(
     job_id: str,
@@ -42,6 +42,8 @@ LOGGING_CHATTY_LOGGERS = to_list_of_strings(os.getenv('LOGGING_CHATTY_LOGGERS',
 REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379')
 REDIS_DB = to_int(os.getenv('REDIS_DB', '0'))
 DJT_REDIS_TTL_DEFAULT = to_int(os.getenv('DJT_REDIS_TTL_DEFAULT', '43200'))  # 12 hours in seconds
+JOB_METRICS_ROLLUP_TTL = to_int(os.getenv('JOB_METRICS_ROLLUP_TTL', '691200'))  # 8 days in seconds, longer than the longest metrics window (168 hours)
+JOB_LIST_QUERY_TTL = to_int(os.getenv('JOB_LIST_QUERY_TTL', '30'))  # seconds a filtered job listing's intersection is reused for paging
 
 # Google Cloud configuration - critical settings use getenv_or_die
 GCP_PROJECT_ID = getenv_or_die('GCP_PROJECT_ID')
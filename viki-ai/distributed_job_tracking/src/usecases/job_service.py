@@ -129,8 +129,9 @@ class JobService:
             if not job:
                 return None
             
-            # Track old status for index updates
+            # Track old status and worker for index updates
             old_status = job.status
+            old_worker_id = job.worker_id
             
             # Update fields
             update_data = job_update.dict(exclude_unset=True)
@@ -153,9 +154,11 @@ class JobService:
             if not success:
                 raise Exception("Failed to update job in Redis")
             
-            # Update status indexes if status changed
+            # Move the job to its new worker, then update status indexes if status changed
+            if job.worker_id != old_worker_id:
+                await self.redis_adapter.update_job_worker(job_id, old_worker_id, job.worker_id, old_status)
             if job_update.status and old_status != job_update.status:
-                await self.redis_adapter.update_job_status(job_id, old_status, job_update.status)
+                await self.redis_adapter.update_job_status(job_id, old_status, job_update.status, job_dict)
             
             logger.info(f"Updated job {job_id}")
             return job
@@ -195,40 +198,31 @@ class JobService:
         priority: Optional[JobPriority] = None,
         parent_job_id: Optional[str] = None,
         page: int = 1,
-        page_size: int = 50
+        page_size: int = 50,
+        cursor: Optional[str] = None
     ) -> JobListResponse:
-        """List jobs with filtering and pagination"""
+        """
+        List jobs with filtering and pagination, newest first.
+        Pass the previous response's next_cursor to continue a listing; page is used when no cursor is given.
+        """
         try:
-            job_ids = []
+            await self.redis_adapter.ensure_time_indexes()
             
             # Apply filters
-            if status:
-                job_ids = await self.redis_adapter.get_jobs_by_status(status.value)
-            elif job_type:
-                job_ids = await self.redis_adapter.get_jobs_by_type(job_type.value)
-            elif priority:
-                job_ids = await self.redis_adapter.get_jobs_by_priority(priority.value)
-            elif parent_job_id:
-                job_ids = await self.redis_adapter.get_jobs_by_parent(parent_job_id)
-            else:
-                job_ids = await self.redis_adapter.get_all_job_ids()
+            index_key = await self.redis_adapter.get_job_index(status, job_type, priority, parent_job_id)
             
             # Apply pagination
-            total = len(job_ids)
             start_idx = (page - 1) * page_size
-            end_idx = start_idx + page_size
-            paginated_job_ids = job_ids[start_idx:end_idx]
+            job_ids, total, next_cursor = await self.redis_adapter.get_job_ids_page(
+                index_key, page_size, cursor=cursor, offset=start_idx
+            )
             
             # Get job objects
-            jobs = []
-            for job_id in paginated_job_ids:
-                job = await self.get_job(job_id)
-                if job:
-                    jobs.append(job)
+            jobs = [Job(**job_data) for job_data in await self.redis_adapter.get_jobs(job_ids)]
             
             # Calculate pagination info
-            has_next = end_idx < total
-            has_prev = page > 1
+            has_next = next_cursor is not None
+            has_prev = cursor is not None or page > 1
             
             return JobListResponse(
                 jobs=jobs,
@@ -236,7 +230,8 @@ class JobService:
                 page=page,
                 page_size=page_size,
                 has_next=has_next,
-                has_prev=has_prev
+                has_prev=has_prev,
+                next_cursor=next_cursor
             )
             
         except Exception as e:
@@ -1,9 +1,11 @@
 import json
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional, Tuple
 import redis.asyncio as redis
 from models.pipeline import Pipeline, PipelineStatusUpdate, PipelineListResponse, PipelineListItem, PipelineStatus
 from models.metric import Metric
+from models.simple_job import SimpleJob
+from adapters.redis_scripts import RECORD_PIPELINE_STATUS
 import settings
 from util.custom_logger import getLogger, set_job_context
 from util.date_utils import now_utc
@@ -22,6 +24,7 @@ class PipelineService:
             db=settings.REDIS_DB,
             decode_responses=True
         )
+        self._record_pipeline_status_script = self.redis_client.register_script(RECORD_PIPELINE_STATUS)
     
     async def close(self):
         """Close Redis connection"""
@@ -35,6 +38,10 @@ class PipelineService:
         """Generate Redis key for pipelines hash"""
         return f"djt::{run_id}:pipelines:{pipeline_id}"
     
+    def _get_status_counts_key(self, run_id: str) -> str:
+        """Generate Redis key for the run's status counters"""
+        return f"djt::{run_id}:status_counts"
+    
     def _get_pipeline_hash_field(self, page_number: Optional[int]) -> str:
         """Generate hash field for pipeline data"""
         if page_number is None:
@@ -42,100 +49,99 @@ class PipelineService:
         return str(page_number)
     
     async def update_pipeline_status(self, run_id: str, pipeline_id: str, pipeline_data: PipelineStatusUpdate) -> Pipeline:
-        """Update pipeline status using Redis pipeline for atomic operations. Auto-creates job if it doesn't exist."""
+        """
+        Upsert the pipeline status in one atomic script (see RECORD_PIPELINE_STATUS): auto-creates the job if it
+        doesn't exist, detects the run's first status, and updates the run's status counters.
+        """
+        pipelines = await self.update_pipeline_statuses(run_id, [(pipeline_id, pipeline_data)])
+        return pipelines[0]
+    
+    async def update_pipeline_statuses(self, run_id: str, updates: List[Tuple[str, PipelineStatusUpdate]]) -> List[Pipeline]:
+        """
+        Apply (pipeline_id, status update) pairs of a run in order, in one atomic script, and check the run's
+        completion once afterwards.  The job is auto-created from the first update if it doesn't exist.
+        Returns the stored pipelines in the order of the updates.
+        """
         # Set job context for logging
         set_job_context(run_id=run_id, job_type="pipeline", status="updating")
         
-        page_display = pipeline_data.page_number if pipeline_data.page_number is not None else "document"
-        
-        # Check if job exists, and create it if it doesn't
-        await self._ensure_job_exists(run_id, pipeline_data)
-        
-        # Check if this is the first status for this run
-        is_first_status = await self._is_first_status_for_run(run_id)
-        
-        # Check if pipeline already exists
-        pipelines_hash_key = self._get_pipelines_hash_key(run_id, pipeline_id)
-        pipeline_hash_field = self._get_pipeline_hash_field(pipeline_data.page_number)
-        existing_pipeline_json = await self.redis_client.hget(pipelines_hash_key, pipeline_hash_field)
-        
-        if existing_pipeline_json:
-            # Pipeline exists - update status and updated_at only
-            self.logger.info("Updating existing pipeline status with run_id: %s, pipeline_id: %s, page: %s", 
-                            run_id, pipeline_id, page_display)
-            
-            # Parse existing pipeline data
-            existing_pipeline_data = json.loads(existing_pipeline_json)
-            existing_pipeline = Pipeline(**existing_pipeline_data)
-            
-            # Update only status and updated_at
-            existing_pipeline.status = pipeline_data.status
-            existing_pipeline.updated_at = now_utc()
-            
-            # Store updated pipeline with TTL
-            updated_pipeline_json = existing_pipeline.model_dump_json()
-            await self.redis_client.hset(pipelines_hash_key, pipeline_hash_field, updated_pipeline_json)
-            await self.redis_client.expire(pipelines_hash_key, settings.DJT_REDIS_TTL_DEFAULT)
-            
-            self.logger.info("Pipeline status updated successfully", extra={
-                "run_id": run_id,
-                "pipeline_id": pipeline_id,
-                "page_number": pipeline_data.page_number,
-                "old_status": existing_pipeline_data.get("status"),
-                "new_status": pipeline_data.status,
-                "operation": "update_pipeline_status"
-            })
-            
-            # Check overall run status after update
-            await self._check_and_publish_run_completion(run_id)
-            
-            return existing_pipeline
-        else:
-            # Pipeline doesn't exist - create new one
-            self.logger.info("Creating new pipeline with run_id: %s, pipeline_id: %s, page: %s", 
-                            run_id, pipeline_id, page_display)
-            
-            # Create pipeline with timestamps
+        # Each update's pipeline as stored if this is its first status; an existing one only gets the new status and updated_at
+        pipeline_keys = []
+        args = [settings.DJT_REDIS_TTL_DEFAULT, self._build_auto_created_job(run_id, updates[0][1]).model_dump_json()]
+        for pipeline_id, pipeline_data in updates:
+            pipelines_hash_key = self._get_pipelines_hash_key(run_id, pipeline_id)
+            if pipelines_hash_key not in pipeline_keys:
+                pipeline_keys.append(pipelines_hash_key)
             pipeline_data.id = pipeline_id
-            pipeline = Pipeline(
+            now = now_utc()
+            new_pipeline = Pipeline(
                 **pipeline_data.model_dump(),
-                created_at=now_utc(),
-                updated_at=now_utc()
+                created_at=now,
+                updated_at=now
             )
-            
-            # Use Redis pipeline for atomic operations
-            redis_pipeline = self.redis_client.pipeline()
-            
-            # a) Add pipeline_id to set at djt::{run_id}:pipeline_list
-            pipeline_list_key = self._get_pipeline_list_key(run_id)
-            redis_pipeline.sadd(pipeline_list_key, pipeline_id)
-            redis_pipeline.expire(pipeline_list_key, settings.DJT_REDIS_TTL_DEFAULT)
-            
-            # b) Create hash at key djt::{run_id}:pipelines:{pipeline_id} with hash key {page_number} or "document"
-            pipeline_json = pipeline.model_dump_json()
-            redis_pipeline.hset(pipelines_hash_key, pipeline_hash_field, pipeline_json)
-            redis_pipeline.expire(pipelines_hash_key, settings.DJT_REDIS_TTL_DEFAULT)
-            
-            # Execute the pipeline
-            await redis_pipeline.execute()
-            
-            self.logger.info("Pipeline created successfully using keys '%s' and '%s'", 
-                            pipeline_list_key, pipelines_hash_key, extra={
+            args.extend([
+                pipeline_keys.index(pipelines_hash_key) + 4,
+                self._get_pipeline_hash_field(pipeline_data.page_number),
+                pipeline_id,
+                new_pipeline.model_dump_json(),
+                pipeline_data.status.value,
+                json.dumps(new_pipeline.model_dump(mode="json")["updated_at"])
+            ])
+        
+        result = await self._record_pipeline_status_script(
+            keys=[
+                self._get_pipeline_list_key(run_id),
+                self._get_status_counts_key(run_id),
+                f"djt::{run_id}"
+            ] + pipeline_keys,
+            args=args,
+            client=self.redis_client
+        )
+        publish_status, legacy, job_created, is_first_status = result[:4]
+        
+        if job_created:
+            self.logger.info("Job auto-created successfully", extra={
                 "run_id": run_id,
-                "pipeline_id": pipeline_id,
-                "page_number": pipeline_data.page_number,
-                "status": pipeline_data.status,
-                "operation": "create_pipeline"
+                "operation": "update_pipeline_status"
             })
+        
+        pipelines = []
+        first_status_published = False
+        for (pipeline_id, pipeline_data), old_status, pipeline_json in zip(updates, result[4::2], result[5::2]):
+            pipelines.append(Pipeline(**json.loads(pipeline_json)))
+            page_display = pipeline_data.page_number if pipeline_data.page_number is not None else "document"
             
-            # If this is the first status for the run, notify paperglass
-            if is_first_status:
-                await self._publish_first_status(run_id, pipeline_data)
-            
-            # Check overall run status after creation
+            if old_status:
+                self.logger.info("Pipeline status updated successfully", extra={
+                    "run_id": run_id,
+                    "pipeline_id": pipeline_id,
+                    "page_number": pipeline_data.page_number,
+                    "old_status": old_status,
+                    "new_status": pipeline_data.status,
+                    "operation": "update_pipeline_status"
+                })
+            else:
+                self.logger.info("Pipeline created successfully with run_id: %s, pipeline_id: %s, page: %s",
+                                run_id, pipeline_id, page_display, extra={
+                    "run_id": run_id,
+                    "pipeline_id": pipeline_id,
+                    "page_number": pipeline_data.page_number,
+                    "status": pipeline_data.status,
+                    "operation": "create_pipeline"
+                })
+                
+                # If this is the first status for the run, notify paperglass
+                if is_first_status and not first_status_published:
+                    first_status_published = True
+                    await self._publish_first_status(run_id, pipeline_data)
+        
+        if legacy:
+            # Run started before the status counters existed: check completion by listing its pipelines
             await self._check_and_publish_run_completion(run_id)
-            
-            return pipeline
+        elif publish_status:
+            await self._publish_run_completion(run_id, PipelineStatus(publish_status))
+        
+        return pipelines
     
     async def get_pipeline(self, run_id: str, pipeline_id: str, page_number: Optional[int]) -> Optional[Pipeline]:
         """Get a pipeline by run_id, pipeline_id, and page_number"""
@@ -518,9 +524,26 @@ class PipelineService:
         # Default to unknown for any unrecognized statuses
         return PipelineStatus.UNKNOWN
     
+    async def _publish_run_completion(self, run_id: str, status: PipelineStatus) -> None:
+        """
+        Publish the final status the run's status counters reported.  The pipelines are only listed here, for
+        the notification payload.
+        """
+        try:
+            run_status_data = await self.list_pipelines_for_run(run_id)
+            await self.publish_status(run_id, status, run_status_data)
+        except Exception as e:
+            self.logger.error("Error publishing run completion status", extra={
+                "run_id": run_id,
+                "status": status,
+                "error": exceptionToMap(e),
+                "operation": "_publish_run_completion"
+            })
+    
     async def _check_and_publish_run_completion(self, run_id: str) -> None:
         """
-        Check if the overall run is complete and publish status if needed.
+        Check if the overall run is complete by listing all its pipelines and publish status if needed.
+        Only used for runs without status counters.
         """
         try:
             # Get the overall status of all pipelines for this run
@@ -570,8 +593,9 @@ class PipelineService:
             # Use Redis pipeline for atomic deletion
             redis_pipeline = self.redis_client.pipeline()
             
-            # Delete the pipeline list set
+            # Delete the pipeline list set and the run's status counters
             redis_pipeline.delete(pipeline_list_key)
+            redis_pipeline.delete(self._get_status_counts_key(run_id))
             
             # Delete each pipeline hash
             for pipeline_id in pipeline_ids:
@@ -731,45 +755,22 @@ class PipelineService:
             })
             # Don't re-raise the exception as first status publication failure shouldn't fail the main operation
 
-    async def _ensure_job_exists(self, run_id: str, pipeline_data: PipelineStatusUpdate) -> None:
+    def _build_auto_created_job(self, run_id: str, pipeline_data: PipelineStatusUpdate) -> SimpleJob:
         """
-        Ensure that a job exists for the given run_id. If not, create it using the pipeline data.
+        The job stored for run_id when a pipeline status arrives before the job was created.
         """
-        job_key = f"djt::{run_id}"
-        job_exists = await self.redis_client.hexists(job_key, "job")
-        
-        if not job_exists:
-            self.logger.info("Job does not exist, auto-creating job", extra={
-                "run_id": run_id,
-                "operation": "_ensure_job_exists"
-            })
-            
-            # Create job data from pipeline data
-            from models.simple_job import SimpleJob
-            
-            job = SimpleJob(
-                app_id=pipeline_data.app_id,
-                tenant_id=pipeline_data.tenant_id,
-                patient_id=pipeline_data.patient_id,
-                document_id=pipeline_data.document_id,
-                run_id=run_id,
-                name=f"Auto-created job for {run_id}",  # Default job name
-                pages=pipeline_data.pages,
-                metadata=pipeline_data.metadata,  # Use pipeline metadata for job metadata
-                created_at=now_utc(),
-                updated_at=now_utc()
-            )
-            
-            # Store job in Redis with TTL
-            job_json = job.model_dump_json()
-            await self.redis_client.hset(job_key, "job", job_json)
-            await self.redis_client.expire(job_key, settings.DJT_REDIS_TTL_DEFAULT)
-            
-            self.logger.info("Job auto-created successfully", extra={
-                "run_id": run_id,
-                "job_name": job.name,
-                "operation": "_ensure_job_exists"
-            })
+        return SimpleJob(
+            app_id=pipeline_data.app_id,
+            tenant_id=pipeline_data.tenant_id,
+            patient_id=pipeline_data.patient_id,
+            document_id=pipeline_data.document_id,
+            run_id=run_id,
+            name=f"Auto-created job for {run_id}",  # Default job name
+            pages=pipeline_data.pages,
+            metadata=pipeline_data.metadata,  # Use pipeline metadata for job metadata
+            created_at=now_utc(),
+            updated_at=now_utc()
+        )
 
     async def publish_status(self, run_id: str, status: PipelineStatus, run_data: PipelineListResponse) -> None:
         """
@@ -912,8 +913,9 @@ class PipelineService:
             pipeline_list_key = self._get_pipeline_list_key(run_id)
             pipeline_ids = await self.redis_client.smembers(pipeline_list_key)
             
-            # Update TTL for pipeline list
+            # Update TTL for pipeline list and status counters
             await self.redis_client.expire(pipeline_list_key, settings.STATUS_POST_COMPLETE_TTL)  
+            await self.redis_client.expire(self._get_status_counts_key(run_id), settings.STATUS_POST_COMPLETE_TTL)
             
             # Update TTL for each pipeline hash
             for pipeline_id in pipeline_ids:
@@ -1,3 +1,4 @@
+import asyncio
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 import logging
@@ -76,40 +77,23 @@ class TrackingService:
     async def get_performance_metrics(self, hours: int = 24) -> Dict[str, Any]:
         """Get performance metrics for the specified time period"""
         try:
-            # Get all jobs
-            all_job_ids = await self.redis_adapter.get_all_job_ids()
-            
-            # Filter jobs by time period
+            await self.redis_adapter.ensure_time_indexes()
             cutoff_time = datetime.utcnow() - timedelta(hours=hours)
-            recent_jobs = []
             
-            for job_id in all_job_ids:
-                job_data = await self.redis_adapter.get_job(job_id)
-                if job_data:
-                    created_at = datetime.fromisoformat(job_data.get("created_at", ""))
-                    if created_at >= cutoff_time:
-                        recent_jobs.append(job_data)
-            
-            # Calculate metrics
-            total_jobs = len(recent_jobs)
-            completed_jobs = [j for j in recent_jobs if j.get("status") == "completed"]
-            failed_jobs = [j for j in recent_jobs if j.get("status") == "failed"]
+            # Jobs created in the period, by their current status, from the creation time indexes
+            total_jobs, completed_jobs, failed_jobs, rollup = await asyncio.gather(
+                self.redis_adapter.count_jobs_created_since(cutoff_time),
+                self.redis_adapter.count_jobs_created_since(cutoff_time, "completed"),
+                self.redis_adapter.count_jobs_created_since(cutoff_time, "failed"),
+                self.redis_adapter.get_execution_rollup(cutoff_time)
+            )
             
             # Calculate average execution time for completed jobs
-            execution_times = []
-            for job in completed_jobs:
-                started_at = job.get("started_at")
-                completed_at = job.get("completed_at")
-                if started_at and completed_at:
-                    start_time = datetime.fromisoformat(started_at)
-                    end_time = datetime.fromisoformat(completed_at)
-                    execution_time = (end_time - start_time).total_seconds()
-                    execution_times.append(execution_time)
-            
-            avg_execution_time = sum(execution_times) / len(execution_times) if execution_times else 0
+            executions = rollup["executions"]
+            avg_execution_time = rollup["execution_seconds"] / executions if executions else 0
             
             # Calculate success rate
-            success_rate = len(completed_jobs) / total_jobs * 100 if total_jobs > 0 else 0
+            success_rate = completed_jobs / total_jobs * 100 if total_jobs > 0 else 0
             
             # Calculate throughput (jobs per hour)
             throughput = total_jobs / hours if hours > 0 else 0
@@ -117,10 +101,11 @@ class TrackingService:
             return {
                 "time_period_hours": hours,
                 "total_jobs": total_jobs,
-                "completed_jobs": len(completed_jobs),
-                "failed_jobs": len(failed_jobs),
+                "completed_jobs": completed_jobs,
+                "failed_jobs": failed_jobs,
                 "success_rate_percent": round(success_rate, 2),
                 "average_execution_time_seconds": round(avg_execution_time, 2),
+                "execution_time_histogram": rollup["histogram"],
                 "throughput_jobs_per_hour": round(throughput, 2),
                 "timestamp": datetime.utcnow().isoformat()
             }
@@ -149,19 +134,11 @@ class TrackingService:
     async def get_failed_jobs(self, hours: int = 24) -> List[Dict[str, Any]]:
         """Get failed jobs within the specified time period"""
         try:
-            failed_job_ids = await self.redis_adapter.get_jobs_by_status("failed")
-            
+            await self.redis_adapter.ensure_time_indexes()
             cutoff_time = datetime.utcnow() - timedelta(hours=hours)
-            recent_failed_jobs = []
-            
-            for job_id in failed_job_ids:
-                job_data = await self.redis_adapter.get_job(job_id)
-                if job_data:
-                    created_at = datetime.fromisoformat(job_data.get("created_at", ""))
-                    if created_at >= cutoff_time:
-                        recent_failed_jobs.append(job_data)
             
-            return recent_failed_jobs
+            failed_job_ids = await self.redis_adapter.get_job_ids_created_since(cutoff_time, "failed")
+            return await self.redis_adapter.get_jobs(failed_job_ids)
             
         except Exception as e:
             logger.error(f"Failed to get failed jobs: {e}")
@@ -179,21 +156,10 @@ class TrackingService:
     async def get_throughput(self, hours: int = 24) -> Dict[str, Any]:
         """Get job throughput for the specified time period"""
         try:
-            completed_job_ids = await self.redis_adapter.get_jobs_by_status("completed")
-            
+            await self.redis_adapter.ensure_time_indexes()
             cutoff_time = datetime.utcnow() - timedelta(hours=hours)
-            recent_completed_jobs = []
             
-            for job_id in completed_job_ids:
-                job_data = await self.redis_adapter.get_job(job_id)
-                if job_data:
-                    completed_at = job_data.get("completed_at")
-                    if completed_at:
-                        completion_time = datetime.fromisoformat(completed_at)
-                        if completion_time >= cutoff_time:
-                            recent_completed_jobs.append(job_data)
-            
-            total_completed = len(recent_completed_jobs)
+            total_completed = await self.redis_adapter.count_jobs_completed_since(cutoff_time)
             throughput_per_hour = total_completed / hours if hours > 0 else 0
             
             return {
@@ -210,27 +176,12 @@ class TrackingService:
     async def get_worker_stats(self) -> Dict[str, Any]:
         """Get statistics about workers"""
         try:
-            # Get all running jobs to see active workers
-            running_job_ids = await self.redis_adapter.get_jobs_by_status("running")
-            
-            worker_jobs = {}
-            active_workers = set()
-            
-            for job_id in running_job_ids:
-                job_data = await self.redis_adapter.get_job(job_id)
-                if job_data:
-                    worker_id = job_data.get("worker_id")
-                    if worker_id:
-                        active_workers.add(worker_id)
-                        if worker_id not in worker_jobs:
-                            worker_jobs[worker_id] = []
-                        worker_jobs[worker_id].append(job_data)
+            await self.redis_adapter.ensure_time_indexes()
+            worker_job_distribution = await self.redis_adapter.get_running_jobs_by_worker()
             
             return {
-                "active_workers": len(active_workers),
-                "worker_job_distribution": {
-                    worker_id: len(jobs) for worker_id, jobs in worker_jobs.items()
-                },
+                "active_workers": len(worker_job_distribution),
+                "worker_job_distribution": worker_job_distribution,
                 "timestamp": datetime.utcnow().isoformat()
             }
             
@@ -0,0 +1,141 @@
+import pytest
+import uuid
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock
+import sys
+import os
+
+# Add the src directory to the path so we can import our modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from adapters.redis_adapter import RedisAdapter
+from models.job import JobStatus, JobType, JobPriority
+from usecases.job_service import JobService
+
+
+@pytest.mark.integration
+class TestJobListingIntegration:
+    """Integration tests for listing jobs from the sorted indexes"""
+
+    @pytest.fixture
+    async def redis_adapter(self):
+        """Create a Redis adapter that must not read jobs one at a time or scan the keyspace"""
+        adapter = RedisAdapter()
+        
+        # Test connection
+        is_connected = await adapter.ping()
+        if not is_connected:
+            pytest.skip("Redis is not available for integration testing")
+        
+        await adapter.ensure_time_indexes()
+        adapter.created_job_ids = []
+        
+        yield adapter
+        
+        # Cleanup, with the adapter's own methods again
+        adapter.__dict__.pop("get_job", None)
+        adapter.__dict__.pop("get_all_job_ids", None)
+        for job_id in adapter.created_job_ids:
+            await adapter.delete_job(job_id)
+        await adapter.close()
+
+    @pytest.fixture
+    async def parent_job_id(self, redis_adapter):
+        """Jobs of each test are sub-jobs of a unique parent, so other jobs in Redis don't affect listings"""
+        redis_adapter.get_job = AsyncMock(side_effect=AssertionError("list_jobs must fetch jobs in bulk"))
+        redis_adapter.get_all_job_ids = AsyncMock(side_effect=AssertionError("list_jobs must not scan all jobs"))
+        return str(uuid.uuid4())
+
+    async def store_jobs(self, redis_adapter, parent_job_id, specs, created_at=None):
+        job_ids = []
+        base_time = datetime.utcnow() - timedelta(hours=1)
+        for i, (status, priority) in enumerate(specs):
+            job_id = str(uuid.uuid4())
+            job_data = {
+                "id": job_id,
+                "name": f"Listing Test Job {i}",
+                "job_type": "custom",
+                "status": status,
+                "priority": priority,
+                "payload": {},
+                "metadata": {},
+                "created_at": (created_at or base_time + timedelta(seconds=i)).isoformat(),
+                "parent_job_id": parent_job_id
+            }
+            await redis_adapter.set_job(job_id, job_data)
+            redis_adapter.created_job_ids.append(job_id)
+            job_ids.append(job_id)
+        return job_ids
+
+    async def list_all(self, job_service, page_size, **filters):
+        pages = []
+        response = await job_service.list_jobs(page_size=page_size, **filters)
+        pages.append(response)
+        while response.next_cursor:
+            response = await job_service.list_jobs(page_size=page_size, cursor=response.next_cursor, **filters)
+            pages.append(response)
+        return pages
+
+    @pytest.mark.asyncio
+    async def test_cursor_pages_cover_all_jobs_newest_first(self, redis_adapter, parent_job_id):
+        """Following next_cursor returns every job once, newest first"""
+        job_ids = await self.store_jobs(redis_adapter, parent_job_id, [("pending", "normal")] * 7)
+        job_service = JobService(redis_adapter)
+        
+        pages = await self.list_all(job_service, 3, parent_job_id=parent_job_id)
+        
+        assert [len(page.jobs) for page in pages] == [3, 3, 1]
+        assert [job.id for page in pages for job in page.jobs] == list(reversed(job_ids))
+        assert all(page.total == 7 for page in pages)
+        assert pages[0].has_prev is False and pages[0].has_next is True
+        assert pages[-1].has_next is False
+
+    @pytest.mark.asyncio
+    async def test_page_number_pagination(self, redis_adapter, parent_job_id):
+        """page/page_size without a cursor still pages by offset"""
+        job_ids = await self.store_jobs(redis_adapter, parent_job_id, [("pending", "normal")] * 5)
+        job_service = JobService(redis_adapter)
+        
+        response = await job_service.list_jobs(parent_job_id=parent_job_id, page=2, page_size=2)
+        
+        assert [job.id for job in response.jobs] == [job_ids[2], job_ids[1]]
+        assert response.has_prev is True and response.has_next is True
+
+    @pytest.mark.asyncio
+    async def test_combined_filters(self, redis_adapter, parent_job_id):
+        """Status, type, priority and parent filters are intersected"""
+        job_ids = await self.store_jobs(redis_adapter, parent_job_id, [
+            ("failed", "high"),
+            ("failed", "normal"),
+            ("completed", "high"),
+            ("failed", "high")
+        ])
+        job_service = JobService(redis_adapter)
+        
+        response = await job_service.list_jobs(
+            status=JobStatus.FAILED,
+            job_type=JobType.CUSTOM,
+            priority=JobPriority.HIGH,
+            parent_job_id=parent_job_id
+        )
+        
+        assert [job.id for job in response.jobs] == [job_ids[3], job_ids[0]]
+        assert response.total == 2
+
+    @pytest.mark.asyncio
+    async def test_cursor_with_jobs_created_at_the_same_time(self, redis_adapter, parent_job_id):
+        """Jobs sharing a creation time are neither skipped nor repeated across pages"""
+        job_ids = await self.store_jobs(redis_adapter, parent_job_id, [("pending", "normal")] * 5,
+                                        created_at=datetime.utcnow() - timedelta(minutes=5))
+        job_service = JobService(redis_adapter)
+        
+        pages = await self.list_all(job_service, 2, parent_job_id=parent_job_id)
+        
+        listed = [job.id for page in pages for job in page.jobs]
+        assert sorted(listed) == sorted(job_ids)
+        assert len(listed) == len(job_ids)
+
+
+if __name__ == "__main__":
+    # Run the tests
+    pytest.main([__file__, "-v", "-m", "integration"])
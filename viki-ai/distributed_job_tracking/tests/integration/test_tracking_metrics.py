@@ -0,0 +1,247 @@
+import pytest
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock
+import sys
+import os
+
+# Add the src directory to the path so we can import our modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from adapters import redis_adapter as redis_adapter_module
+from adapters.redis_adapter import (
+    RedisAdapter,
+    TIME_INDEXES_MARKER_KEY,
+    TIME_INDEXES_REBUILT_KEY,
+    TIME_INDEXES_SINCE_KEY,
+    rollup_key,
+)
+from models.job import JobCreate, JobUpdate, JobStatus, JobType
+from usecases.job_service import JobService
+from usecases.tracking_service import TrackingService
+
+
+@pytest.mark.integration
+class TestTrackingMetricsIntegration:
+    """Integration tests for the time indexes and hourly rollups behind the tracking metrics"""
+
+    @pytest.fixture
+    async def redis_adapter(self):
+        """Create a Redis adapter whose full key scan must not be used by the metrics"""
+        adapter = RedisAdapter()
+        
+        # Test connection
+        is_connected = await adapter.ping()
+        if not is_connected:
+            pytest.skip("Redis is not available for integration testing")
+        
+        adapter.get_all_job_ids = AsyncMock(side_effect=AssertionError("metrics must not scan all jobs"))
+        await adapter.ensure_time_indexes()
+        job_ids = []
+        adapter.created_job_ids = job_ids
+        
+        yield adapter
+        
+        # Cleanup
+        for job_id in job_ids:
+            await adapter.delete_job(job_id)
+        await adapter.close()
+
+    async def create_job(self, redis_adapter, job_service, status: JobStatus):
+        job = await job_service.create_job(JobCreate(name="Metrics Test Job", job_type=JobType.CUSTOM))
+        redis_adapter.created_job_ids.append(job.id)
+        await job_service.update_job(job.id, JobUpdate(status=JobStatus.RUNNING))
+        return await job_service.update_job(job.id, JobUpdate(status=status))
+
+    @pytest.mark.asyncio
+    async def test_metrics_follow_job_state_changes(self, redis_adapter):
+        """Completing and failing jobs shows up in performance, throughput and failed job queries"""
+        job_service = JobService(redis_adapter)
+        tracking_service = TrackingService(redis_adapter)
+        
+        performance_before = await tracking_service.get_performance_metrics(1)
+        throughput_before = await tracking_service.get_throughput(1)
+        
+        await self.create_job(redis_adapter, job_service, JobStatus.COMPLETED)
+        failed_job = await self.create_job(redis_adapter, job_service, JobStatus.FAILED)
+        
+        performance = await tracking_service.get_performance_metrics(1)
+        throughput = await tracking_service.get_throughput(1)
+        failed_jobs = await tracking_service.get_failed_jobs(1)
+        
+        assert performance["total_jobs"] == performance_before["total_jobs"] + 2
+        assert performance["completed_jobs"] == performance_before["completed_jobs"] + 1
+        assert performance["failed_jobs"] == performance_before["failed_jobs"] + 1
+        assert performance["execution_time_histogram"]["execution_le_1"] == performance_before["execution_time_histogram"]["execution_le_1"] + 1
+        assert throughput["completed_jobs"] == throughput_before["completed_jobs"] + 1
+        assert failed_job.id in [job["id"] for job in failed_jobs]
+
+    @pytest.mark.asyncio
+    async def test_retried_job_leaves_failed_jobs(self, redis_adapter):
+        """A job moving out of a status is no longer counted in it"""
+        job_service = JobService(redis_adapter)
+        tracking_service = TrackingService(redis_adapter)
+        
+        failed_job = await self.create_job(redis_adapter, job_service, JobStatus.FAILED)
+        await job_service.retry_job(failed_job.id)
+        
+        failed_jobs = await tracking_service.get_failed_jobs(1)
+        assert failed_job.id not in [job["id"] for job in failed_jobs]
+
+    @pytest.mark.asyncio
+    async def test_worker_stats_count_running_jobs(self, redis_adapter):
+        """Running jobs are counted per worker until they finish"""
+        tracking_service = TrackingService(redis_adapter)
+        job_id = str(uuid.uuid4())
+        worker_id = f"worker-{uuid.uuid4()}"
+        redis_adapter.created_job_ids.append(job_id)
+        job_data = {
+            "id": job_id,
+            "name": "Worker Test Job",
+            "job_type": "custom",
+            "status": "pending",
+            "priority": "normal",
+            "created_at": datetime.utcnow().isoformat(),
+            "worker_id": worker_id
+        }
+        await redis_adapter.set_job(job_id, job_data)
+        
+        await redis_adapter.set_job(job_id, {**job_data, "status": "running"})
+        await redis_adapter.update_job_status(job_id, "pending", "running")
+        stats = await tracking_service.get_worker_stats()
+        assert stats["worker_job_distribution"][worker_id] == 1
+        
+        await redis_adapter.set_job(job_id, {**job_data, "status": "completed"})
+        await redis_adapter.update_job_status(job_id, "running", "completed")
+        stats = await tracking_service.get_worker_stats()
+        assert worker_id not in stats["worker_job_distribution"]
+
+    @pytest.mark.asyncio
+    async def test_running_count_follows_the_worker(self, redis_adapter):
+        """A running job moved to another worker is counted for that worker only"""
+        job_service = JobService(redis_adapter)
+        tracking_service = TrackingService(redis_adapter)
+        first_worker, second_worker = f"worker-{uuid.uuid4()}", f"worker-{uuid.uuid4()}"
+        job = await job_service.create_job(JobCreate(name="Worker Move Job", job_type=JobType.CUSTOM))
+        redis_adapter.created_job_ids.append(job.id)
+        
+        await job_service.update_job(job.id, JobUpdate(status=JobStatus.RUNNING, worker_id=first_worker))
+        await job_service.update_job(job.id, JobUpdate(worker_id=second_worker))
+        distribution = (await tracking_service.get_worker_stats())["worker_job_distribution"]
+        assert first_worker not in distribution
+        assert distribution[second_worker] == 1
+        assert await redis_adapter.redis_client.sismember(f"jobs:worker:{first_worker}", job.id) == 0
+        
+        await job_service.update_job(job.id, JobUpdate(status=JobStatus.COMPLETED))
+        assert second_worker not in (await tracking_service.get_worker_stats())["worker_job_distribution"]
+
+    @pytest.mark.asyncio
+    async def test_rebuild_after_a_failed_rebuild_counts_jobs_once(self, redis_adapter):
+        """Jobs a failed rebuild already counted are not counted again when the rebuild is run again"""
+        tracking_service = TrackingService(redis_adapter)
+        job_id = str(uuid.uuid4())
+        worker_id = f"worker-{uuid.uuid4()}"
+        redis_adapter.created_job_ids.append(job_id)
+        job_data = {
+            "id": job_id,
+            "name": "Unindexed Running Job",
+            "job_type": "custom",
+            "status": "running",
+            "priority": "normal",
+            "created_at": datetime.utcnow().isoformat(),
+            "worker_id": worker_id
+        }
+        await redis_adapter.redis_client.set(f"job:{job_id}", json.dumps(job_data))
+        
+        # As left by a rebuild that counted the job and then failed
+        await redis_adapter.redis_client.hincrby("jobs:running_by_worker", worker_id, 1)
+        await redis_adapter.redis_client.sadd(TIME_INDEXES_REBUILT_KEY, job_id)
+        
+        await redis_adapter.rebuild_time_indexes(datetime.utcnow())
+        assert (await tracking_service.get_worker_stats())["worker_job_distribution"][worker_id] == 1
+        assert await redis_adapter.redis_client.ttl(TIME_INDEXES_REBUILT_KEY) > 0
+
+    @pytest.mark.asyncio
+    async def test_status_changes_before_the_rebuild_are_counted_once(self, redis_adapter, monkeypatch):
+        """Jobs changing status between deploy and the first rebuild are counted once in the rollups and running counts"""
+        # As right after deploy: the indexes are not built yet and no live update has happened
+        monkeypatch.setattr(redis_adapter_module, "_time_indexes_checked", False)
+        await redis_adapter.redis_client.delete(TIME_INDEXES_MARKER_KEY, TIME_INDEXES_SINCE_KEY, TIME_INDEXES_REBUILT_KEY)
+        
+        # Created in an hour of its own, so its rollup holds only this test's jobs
+        created_at = datetime(2001, 1, 1) + timedelta(hours=uuid.uuid4().int % 100000)
+        started_at = datetime.utcnow() - timedelta(seconds=30)
+        
+        async def store(status, worker_id, **fields):
+            job_id = str(uuid.uuid4())
+            redis_adapter.created_job_ids.append(job_id)
+            job_data = {
+                "id": job_id,
+                "name": "Deploy Window Job",
+                "job_type": "custom",
+                "status": status,
+                "priority": "normal",
+                "created_at": created_at.isoformat(),
+                "worker_id": worker_id,
+                **fields
+            }
+            # Stored before deploy: not in the rollups or running counts
+            await redis_adapter.redis_client.set(f"job:{job_id}", json.dumps(job_data))
+            return job_id, job_data
+        
+        finishing_worker, starting_worker, completing_worker = (f"worker-{uuid.uuid4()}" for _ in range(3))
+        finishing_id, finishing = await store("running", finishing_worker, started_at=started_at.isoformat())
+        starting_id, starting = await store("pending", starting_worker)
+        completing_id, completing = await store("pending", completing_worker)
+        
+        # Running before deploy, finishes before the rebuild
+        finishing.update(status="completed", completed_at=datetime.utcnow().isoformat())
+        await redis_adapter.set_job(finishing_id, finishing)
+        await redis_adapter.update_job_status(finishing_id, "running", "completed", finishing)
+        # Starts running before the rebuild
+        starting.update(status="running", started_at=started_at.isoformat())
+        await redis_adapter.set_job(starting_id, starting)
+        await redis_adapter.update_job_status(starting_id, "pending", "running", starting)
+        # Starts and completes before the rebuild
+        completing.update(status="running", started_at=started_at.isoformat())
+        await redis_adapter.set_job(completing_id, completing)
+        await redis_adapter.update_job_status(completing_id, "pending", "running", completing)
+        completing.update(status="completed", completed_at=datetime.utcnow().isoformat())
+        await redis_adapter.set_job(completing_id, completing)
+        await redis_adapter.update_job_status(completing_id, "running", "completed", completing)
+        
+        await redis_adapter.ensure_time_indexes()
+        
+        distribution = await redis_adapter.redis_client.hgetall("jobs:running_by_worker")
+        assert int(distribution.get(finishing_worker, 0)) == 0
+        assert int(distribution[starting_worker]) == 1
+        assert int(distribution.get(completing_worker, 0)) == 0
+        assert int(await redis_adapter.redis_client.hget(rollup_key(created_at.replace(tzinfo=timezone.utc).timestamp()), "executions")) == 2
+        assert await redis_adapter.redis_client.exists(TIME_INDEXES_MARKER_KEY) == 1
+
+    @pytest.mark.asyncio
+    async def test_rebuild_indexes_jobs_stored_before_the_indexes(self, redis_adapter):
+        """Jobs written without time indexes are found after a rebuild"""
+        job_id = str(uuid.uuid4())
+        redis_adapter.created_job_ids.append(job_id)
+        created_at = datetime.utcnow() - timedelta(minutes=30)
+        job_data = {
+            "id": job_id,
+            "name": "Unindexed Job",
+            "job_type": "custom",
+            "status": "failed",
+            "priority": "normal",
+            "created_at": created_at.isoformat()
+        }
+        await redis_adapter.redis_client.set(f"job:{job_id}", json.dumps(job_data))
+        await redis_adapter.redis_client.sadd("jobs:status:failed", job_id)
+        
+        assert job_id not in await redis_adapter.get_job_ids_created_since(created_at - timedelta(minutes=1), "failed")
+        await redis_adapter.rebuild_time_indexes(datetime.utcnow())
+        assert job_id in await redis_adapter.get_job_ids_created_since(created_at - timedelta(minutes=1), "failed")
+
+
+if __name__ == "__main__":
+    # Run the tests
+    pytest.main([__file__, "-v", "-m", "integration"])
@@ -145,21 +145,14 @@ class TestFirstStatusNotification:
         # Verify adapter was still closed
         mock_adapter_instance.close.assert_called_once()
 
-    @patch('src.usecases.pipeline_service.CloudTaskAdapter')
+    @patch('adapters.cloud_tasks.CloudTaskAdapter')
     async def test_update_pipeline_status_calls_first_status_notification(self, mock_cloud_task_adapter, pipeline_service, sample_pipeline_data, sample_job_data):
         """Test that update_pipeline_status calls first status notification when appropriate"""
         # Mock Redis responses
-        pipeline_service.redis_client.hexists.return_value = True  # Job exists
-        pipeline_service.redis_client.scard.return_value = 0  # No pipelines exist (first status)
-        pipeline_service.redis_client.hget.side_effect = [
-            json.dumps(sample_job_data),  # For job data in _publish_first_status
-            None  # For pipeline check (pipeline doesn't exist)
-        ]
-        
-        # Mock Redis pipeline operations
-        mock_redis_pipeline = AsyncMock()
-        pipeline_service.redis_client.pipeline.return_value = mock_redis_pipeline
-        mock_redis_pipeline.execute.return_value = [1, True, 1, True]  # Success responses
+        pipeline_service.redis_client.hget.return_value = json.dumps(sample_job_data)  # For job data in _publish_first_status
+        
+        # Mock the status script: the pipeline is new, it is the run's first status and the run is not finished
+        pipeline_service._record_pipeline_status_script = AsyncMock(side_effect=lambda keys, args, client: ["", 0, 0, 1, "", args[5]])
         
         # Mock CloudTaskAdapter
         mock_adapter_instance = AsyncMock()
@@ -186,15 +179,8 @@ class TestFirstStatusNotification:
 
     async def test_update_pipeline_status_skips_first_status_when_not_first(self, pipeline_service, sample_pipeline_data, sample_job_data):
         """Test that update_pipeline_status skips first status notification when not the first status"""
-        # Mock Redis responses
-        pipeline_service.redis_client.hexists.return_value = True  # Job exists
-        pipeline_service.redis_client.scard.return_value = 2  # Pipelines already exist (not first status)
-        pipeline_service.redis_client.hget.return_value = None  # Pipeline doesn't exist
-        
-        # Mock Redis pipeline operations
-        mock_redis_pipeline = AsyncMock()
-        pipeline_service.redis_client.pipeline.return_value = mock_redis_pipeline
-        mock_redis_pipeline.execute.return_value = [1, True, 1, True]  # Success responses
+        # Mock the status script: the pipeline is new but other pipelines already exist (not first status)
+        pipeline_service._record_pipeline_status_script = AsyncMock(side_effect=lambda keys, args, client: ["", 0, 0, 0, "", args[5]])
         
         # Mock other methods to avoid side effects
         pipeline_service._check_and_publish_run_completion = AsyncMock()
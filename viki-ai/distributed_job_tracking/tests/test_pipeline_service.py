@@ -0,0 +1,145 @@
+import json
+import re
+import pytest
+from unittest.mock import AsyncMock
+
+from src.usecases.pipeline_service import PipelineService
+from src.models.pipeline import Pipeline, PipelineStatusUpdate, PipelineStatus
+
+
+@pytest.fixture
+async def pipeline_service():
+    """Create a PipelineService with its Redis calls mocked"""
+    service = PipelineService()
+    service.redis_client = AsyncMock()
+    service._publish_run_completion = AsyncMock()
+    service._check_and_publish_run_completion = AsyncMock()
+    yield service
+    await service.close()
+
+
+@pytest.fixture
+def page_update():
+    return PipelineStatusUpdate(
+        status=PipelineStatus.COMPLETED,
+        page_number=3,
+        app_id="test_app",
+        tenant_id="test_tenant",
+        patient_id="test_patient",
+        document_id="test_document",
+        pages=3
+    )
+
+
+def script_result(old_status: str, publish: str = "", legacy: int = 0, job_created: int = 0, first_status: int = 0):
+    """The status script's result, with every update's entry having had old_status before"""
+    def record(keys, args, client):
+        updates = [[old_status, args[i + 3]] for i in range(2, len(args), 6)]
+        return [publish, legacy, job_created, first_status] + [item for update in updates for item in update]
+    return AsyncMock(side_effect=record)
+
+
+class TestRunStatusCounters:
+    """update_pipeline_status decides run completion from the status script's result"""
+
+    async def test_publishes_status_reported_by_script(self, pipeline_service, page_update):
+        pipeline_service._record_pipeline_status_script = script_result("IN_PROGRESS", publish="COMPLETED")
+
+        pipeline = await pipeline_service.update_pipeline_status("test_run_123", "test_pipeline", page_update)
+
+        assert pipeline.status == PipelineStatus.COMPLETED
+        pipeline_service._publish_run_completion.assert_awaited_once_with("test_run_123", PipelineStatus.COMPLETED)
+        pipeline_service._check_and_publish_run_completion.assert_not_called()
+        pipeline_service.redis_client.hgetall.assert_not_called()
+
+        keys, args = pipeline_service._record_pipeline_status_script.call_args.kwargs["keys"], pipeline_service._record_pipeline_status_script.call_args.kwargs["args"]
+        assert keys == [
+            "djt::test_run_123:pipeline_list",
+            "djt::test_run_123:status_counts",
+            "djt::test_run_123",
+            "djt::test_run_123:pipelines:test_pipeline"
+        ]
+        assert args[2:5] == [4, "3", "test_pipeline"]
+        assert args[6] == "COMPLETED"
+
+    async def test_no_listing_while_run_is_unfinished(self, pipeline_service, page_update):
+        pipeline_service._record_pipeline_status_script = script_result("IN_PROGRESS")
+
+        await pipeline_service.update_pipeline_status("test_run_123", "test_pipeline", page_update)
+
+        pipeline_service._publish_run_completion.assert_not_called()
+        pipeline_service._check_and_publish_run_completion.assert_not_called()
+
+    async def test_legacy_run_checks_completion_by_listing(self, pipeline_service, page_update):
+        pipeline_service._record_pipeline_status_script = script_result("IN_PROGRESS", legacy=1)
+
+        await pipeline_service.update_pipeline_status("test_run_123", "test_pipeline", page_update)
+
+        pipeline_service._check_and_publish_run_completion.assert_awaited_once_with("test_run_123")
+        pipeline_service._publish_run_completion.assert_not_called()
+
+    async def test_update_is_a_single_round_trip(self, pipeline_service, page_update):
+        pipeline_service._record_pipeline_status_script = script_result("", job_created=1)
+        pipeline_service._publish_first_status = AsyncMock()
+
+        await pipeline_service.update_pipeline_status("test_run_123", "test_pipeline", page_update)
+
+        # Job auto-create and first status detection are part of the script
+        assert pipeline_service.redis_client.mock_calls == []
+        pipeline_service._publish_first_status.assert_not_called()
+        job = json.loads(pipeline_service._record_pipeline_status_script.call_args.kwargs["args"][1])
+        assert job["run_id"] == "test_run_123"
+        assert job["pages"] == 3
+
+    async def test_batch_is_one_script_call_with_one_completion_check(self, pipeline_service, page_update):
+        pipeline_service._record_pipeline_status_script = script_result("IN_PROGRESS", publish="COMPLETED")
+        document_update = page_update.model_copy(update={"page_number": None})
+        other_update = page_update.model_copy(update={"page_number": 1})
+
+        pipelines = await pipeline_service.update_pipeline_statuses("test_run_123", [
+            ("test_pipeline", page_update),
+            ("test_pipeline", document_update),
+            ("other_pipeline", other_update)
+        ])
+
+        assert [pipeline.page_number for pipeline in pipelines] == [3, None, 1]
+        pipeline_service._record_pipeline_status_script.assert_awaited_once()
+        pipeline_service._publish_run_completion.assert_awaited_once_with("test_run_123", PipelineStatus.COMPLETED)
+
+        keys, args = pipeline_service._record_pipeline_status_script.call_args.kwargs["keys"], pipeline_service._record_pipeline_status_script.call_args.kwargs["args"]
+        assert keys[3:] == ["djt::test_run_123:pipelines:test_pipeline", "djt::test_run_123:pipelines:other_pipeline"]
+        assert [args[i:i + 3] for i in range(2, len(args), 6)] == [
+            [4, "3", "test_pipeline"],
+            [4, "document", "test_pipeline"],
+            [5, "1", "other_pipeline"]
+        ]
+
+
+class TestStoredPipelineJson:
+    """RECORD_PIPELINE_STATUS rewrites a stored pipeline's JSON in place and relies on pydantic's field order"""
+
+    def test_script_patterns_replace_only_status_and_updated_at(self, page_update):
+        stored = Pipeline(
+            **page_update.model_copy(update={
+                "status": PipelineStatus.IN_PROGRESS,
+                "metadata": {"status": "QUEUED", "updated_at": "metadata", "tags": []}
+            }).model_dump(),
+            updated_at="2024-01-01T00:00:00Z"
+        ).model_dump_json()
+
+        # Python equivalents of the script's Lua patterns
+        old_status = re.search(r'"status":"(\w+)"', stored).group(1)
+        value = re.sub(r'"status":"\w*"', '"status":"COMPLETED"', stored, count=1)
+        value = re.sub(r'"updated_at":[^,}]*}$', '"updated_at":' + json.dumps("2024-01-02T00:00:00Z") + '}', value)
+
+        assert old_status == "IN_PROGRESS"
+        assert json.loads(value) == {
+            **json.loads(stored),
+            "status": "COMPLETED",
+            "updated_at": "2024-01-02T00:00:00Z"
+        }
+
+    def test_status_precedes_metadata_and_updated_at_is_last(self):
+        fields = list(Pipeline.model_fields)
+        assert fields.index("status") < fields.index("metadata")
+        assert fields[-1] == "updated_at"
@@ -0,0 +1,66 @@
+import pytest
+from unittest.mock import AsyncMock
+
+from src.adapters import redis_adapter as redis_adapter_module
+from src.adapters.redis_adapter import (
+    RedisAdapter,
+    TIME_INDEXES_LOCK_KEY,
+    TIME_INDEXES_MARKER_KEY,
+    TIME_INDEXES_SINCE_KEY,
+)
+
+
+@pytest.fixture
+async def redis_adapter(monkeypatch):
+    """Create a RedisAdapter with its Redis calls mocked and the time indexes not checked yet"""
+    monkeypatch.setattr(redis_adapter_module, "_time_indexes_checked", False)
+    adapter = RedisAdapter()
+    adapter.redis_client = AsyncMock()
+    adapter.redis_client.exists.return_value = 0
+    adapter.redis_client.get.return_value = "2024-01-01T00:00:00+00:00"
+    adapter.rebuild_time_indexes = AsyncMock(return_value=0)
+    yield adapter
+
+
+def set_keys(adapter):
+    return [call.args[0] for call in adapter.redis_client.set.call_args_list]
+
+
+class TestEnsureTimeIndexes:
+    """ensure_time_indexes rebuilds under a lock and marks the indexes built only once the rebuild succeeded"""
+
+    async def test_marker_is_set_after_the_rebuild(self, redis_adapter):
+        await redis_adapter.ensure_time_indexes()
+
+        redis_adapter.rebuild_time_indexes.assert_awaited_once()
+        assert set_keys(redis_adapter) == [TIME_INDEXES_LOCK_KEY, TIME_INDEXES_SINCE_KEY, TIME_INDEXES_MARKER_KEY]
+        redis_adapter.redis_client.delete.assert_any_await(TIME_INDEXES_LOCK_KEY)
+        assert redis_adapter_module._time_indexes_checked
+
+    async def test_failed_rebuild_leaves_no_marker(self, redis_adapter):
+        redis_adapter.rebuild_time_indexes.side_effect = Exception("connection lost")
+
+        with pytest.raises(Exception):
+            await redis_adapter.ensure_time_indexes()
+
+        assert TIME_INDEXES_MARKER_KEY not in set_keys(redis_adapter)
+        redis_adapter.redis_client.delete.assert_awaited_once_with(TIME_INDEXES_LOCK_KEY)
+        assert not redis_adapter_module._time_indexes_checked
+
+    async def test_no_rebuild_while_another_process_holds_the_lock(self, redis_adapter):
+        redis_adapter.redis_client.set.return_value = None
+
+        await redis_adapter.ensure_time_indexes()
+
+        redis_adapter.rebuild_time_indexes.assert_not_called()
+        redis_adapter.redis_client.delete.assert_not_called()
+        assert not redis_adapter_module._time_indexes_checked
+
+    async def test_existing_marker_skips_the_rebuild(self, redis_adapter):
+        redis_adapter.redis_client.exists.return_value = 1
+
+        await redis_adapter.ensure_time_indexes()
+        await redis_adapter.ensure_time_indexes()
+
+        redis_adapter.rebuild_time_indexes.assert_not_called()
+        redis_adapter.redis_client.exists.assert_awaited_once_with(TIME_INDEXES_MARKER_KEY)
@@ -1,7 +1,13 @@
+import asyncio
+import hashlib
 import json
+import re
 from datetime import datetime
-from typing import Dict, Any, Optional, TYPE_CHECKING
-from util.custom_logger import getLogger
+from functools import partial
+from typing import Dict, Any, List, Optional, TYPE_CHECKING
+from pydantic import BaseModel, Field
+from util.custom_logger import getLogger, lazy
+from util.exception import TaskAlreadyExistsException
 from util.json_utils import JsonUtil
 import settings
 
@@ -10,6 +16,41 @@ if TYPE_CHECKING:
 
 LOGGER = getLogger(__name__)
 
+TASK_NAME_INVALID_CHARS = re.compile(r"[^A-Za-z0-9_-]")
+TASK_NAME_MAX_LENGTH = 500
+
+
+def next_step_task_name(task_id: str, task_parameters: 'TaskParameters', per_iteration: bool = True) -> str:
+    """
+    Deterministic task name of the next step of a run.  Submitting the same next task again (a fan-out
+    retried after a partial failure, a page task already streamed) is then rejected as a duplicate by
+    Cloud Tasks instead of running it twice.  The hash comes first to spread names over the queue's key
+    space, as Cloud Tasks recommends for named tasks.
+    
+    The pipeline start date is part of the name, so starting a pipeline again with a caller-supplied run_id
+    gets new names: Cloud Tasks keeps a name reserved for a while after its task ran, and a duplicate
+    within that window would otherwise be dropped silently.  Pass per_iteration=False for steps that a
+    retry of the submitting task must not start again (sub-pipelines queued in a loop).
+    """
+    identity = "|".join(str(value) for value in (
+        task_parameters.run_id,
+        task_parameters.pipeline_start_date.isoformat() if task_parameters.pipeline_start_date else None,
+        task_parameters.pipeline_scope,
+        task_parameters.pipeline_key,
+        task_id,
+        task_parameters.page_number,
+        task_parameters.task_iteration if per_iteration else None,
+    ))
+    digest = hashlib.sha256(identity.encode("utf-8")).hexdigest()[:16]
+    return f"{digest}-{TASK_NAME_INVALID_CHARS.sub('-', task_id)}"[:TASK_NAME_MAX_LENGTH]
+
+
+class TaskSubmissionReport(BaseModel):
+    """Outcome of a bulk submission, by task name."""
+    submitted: List[str] = Field(default_factory=list)
+    duplicates: List[str] = Field(default_factory=list)  # Already enqueued under the same name
+    failed: List[Dict[str, Any]] = Field(default_factory=list)
+
 
 class CloudTaskAdapter:
     """
@@ -20,6 +61,7 @@ class CloudTaskAdapter:
     def __init__(self, project_id: str = None):
         self.project_id = project_id or settings.GCP_PROJECT_ID
         self._emulator_client = None
+        self._cloud_client = None
         
     async def _get_emulator_client(self):
         """Get or create the emulator client."""
@@ -30,6 +72,13 @@ class CloudTaskAdapter:
             )
         return self._emulator_client
 
+    def _get_cloud_client(self):
+        """Get or create the Cloud Tasks client, reused for every task this adapter creates."""
+        if self._cloud_client is None:
+            from google.cloud import tasks_v2
+            self._cloud_client = tasks_v2.CloudTasksClient()
+        return self._cloud_client
+
     async def create_task(
         self,
         location: str,
@@ -61,7 +110,6 @@ class CloudTaskAdapter:
             "location": location,
             "queue": queue,
             "url": url,
-            "payload": payload,
             "task_name": task_name,
             "schedule_time": schedule_time.isoformat() if schedule_time else None,
             "cloud_provider": settings.CLOUD_PROVIDER,
@@ -69,6 +117,7 @@ class CloudTaskAdapter:
         }
         
         LOGGER.info(f"Creating task for queue: {queue}, url: {url}", extra=extra)
+        LOGGER.debug(f"Task payload for {task_name}", extra={"task_name": task_name, "payload": payload})
 
         if settings.CLOUD_PROVIDER == "local":
             return await self._create_task_emulator(
@@ -124,6 +173,8 @@ class CloudTaskAdapter:
             LOGGER.debug(f"Created task via emulator: {task_name}", extra=extra)
             return response
             
+        except TaskAlreadyExistsException:
+            raise
         except Exception as e:
             LOGGER.error(f"Error creating task via emulator: {str(e)}")
             raise
@@ -141,6 +192,7 @@ class CloudTaskAdapter:
     ) -> Dict[str, Any]:
         """Create a task using real Google Cloud Tasks."""
         try:
+            from google.api_core import exceptions as google_exceptions
             from google.cloud import tasks_v2
             from google.protobuf.timestamp_pb2 import Timestamp
             from proto.message import MessageToDict
@@ -157,7 +209,7 @@ class CloudTaskAdapter:
             
             LOGGER.info(f"Creating Cloud Task for queue: {queue}, url: {url}", extra=extra)
             
-            client = tasks_v2.CloudTasksClient()
+            client = self._get_cloud_client()
             parent = client.queue_path(self.project_id, location, queue)
             
             # Prepare headers
@@ -190,6 +242,8 @@ class CloudTaskAdapter:
             task = {
                 "http_request": http_request
             }
+            if task_name:
+                task["name"] = client.task_path(self.project_id, location, queue, task_name)
             
             # Add schedule time if provided
             if schedule_time:
@@ -197,8 +251,13 @@ class CloudTaskAdapter:
                 timestamp.FromDatetime(schedule_time)
                 task["schedule_time"] = timestamp
             
-            # Create the task
-            response = client.create_task(parent=parent, task=task)
+            # Create the task; the client is synchronous, so keep the RPC off the event loop
+            try:
+                response = await asyncio.get_event_loop().run_in_executor(
+                    None, partial(client.create_task, parent=parent, task=task)
+                )
+            except google_exceptions.AlreadyExists:
+                raise TaskAlreadyExistsException(f"Task {task_name} already exists")
             
             extra.update({
                 "task_name": response.name,
@@ -208,6 +267,8 @@ class CloudTaskAdapter:
             
             return MessageToDict(response._pb)
             
+        except TaskAlreadyExistsException:
+            raise
         except Exception as e:
             extra = {
                 "project_id": self.project_id,
@@ -225,7 +286,9 @@ class CloudTaskAdapter:
         task_parameters: 'TaskParameters',
         location: str = None,
         queue: str = None,
-        service_account_email: Optional[str] = None
+        service_account_email: Optional[str] = None,
+        task_name: Optional[str] = None,
+        schedule_time: Optional[datetime] = None
     ) -> Dict[str, Any]:
         """
         Convenience method for creating tasks for next pipeline steps.
@@ -235,6 +298,8 @@ class CloudTaskAdapter:
             task_parameters: TaskParameters object
             location: GCP location (uses settings default if None)
             queue: Queue name (uses settings default if None)
+            task_name: Task name (a unique one is generated if None)
+            schedule_time: When to execute the task (None for immediate)
             
         Returns:
             Task creation response
@@ -248,12 +313,13 @@ class CloudTaskAdapter:
         url = f"{base_url}/api/pipeline/{task_parameters.pipeline_scope}/{task_parameters.pipeline_key}/{task_id}/run"
         
         # Generate unique task name
-        import uuid
-        task_name = f"{task_id}-{task_parameters.run_id}-{uuid.uuid4().hex[:8]}"
+        if task_name is None:
+            import uuid
+            task_name = f"{task_id}-{task_parameters.run_id}-{uuid.uuid4().hex[:8]}"
 
-        LOGGER.debug(f"Creating task for next step: {task_id} with parameters: {task_parameters.dict()}", extra={
+        LOGGER.debug(f"Creating task for next step: {task_id}", extra={
             "task_id": task_id,
-            "task_parameters": task_parameters.dict(),
+            "task_parameters": lazy(task_parameters.dict),
             "location": location,
             "queue": queue,
             "url": url,
@@ -267,9 +333,76 @@ class CloudTaskAdapter:
             url=url,
             payload=task_parameters.dict(),
             task_name=task_name,
+            schedule_time=schedule_time,
             service_account_email=service_account_email
         )
 
+    async def create_tasks_for_next_steps(
+        self,
+        task_parameters: List['TaskParameters'],
+        location: str = None,
+        queue: str = None,
+        service_account_email: Optional[str] = None,
+        max_concurrency: Optional[int] = None
+    ) -> TaskSubmissionReport:
+        """
+        Create the next pipeline step task for each of the given TaskParameters, concurrently.
+        
+        Tasks are named with next_step_task_name, so submitting the same list again only creates the tasks
+        that are missing.  Every task is attempted; failures are reported rather than raised.  A name that
+        already exists is counted as a duplicate, not a failure: the name holds the pipeline start date, so
+        it can only come from this start of the run.
+        
+        Args:
+            task_parameters: TaskParameters of the next tasks
+            location: GCP location (uses settings default if None)
+            queue: Queue name (uses settings default if None)
+            max_concurrency: Tasks created at a time (uses CLOUD_TASK_SUBMIT_CONCURRENCY if None)
+            
+        Returns:
+            TaskSubmissionReport of the submission
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or settings.CLOUD_TASK_SUBMIT_CONCURRENCY)
+        report = TaskSubmissionReport()
+
+        async def submit(next_task: 'TaskParameters'):
+            task_id = next_task.task_config.id
+            task_name = next_step_task_name(task_id, next_task)
+            async with semaphore:
+                try:
+                    await self.create_task_for_next_step(
+                        task_id=task_id,
+                        task_parameters=next_task,
+                        location=location,
+                        queue=queue,
+                        service_account_email=service_account_email,
+                        task_name=task_name
+                    )
+                    report.submitted.append(task_name)
+                except TaskAlreadyExistsException:
+                    report.duplicates.append(task_name)
+                except Exception as e:
+                    report.failed.append({
+                        "task_id": task_id,
+                        "task_name": task_name,
+                        "page_number": next_task.page_number,
+                        "error": str(e)
+                    })
+
+        await asyncio.gather(*(submit(next_task) for next_task in task_parameters))
+
+        extra = {
+            "queue": queue,
+            "submitted": len(report.submitted),
+            "duplicates": len(report.duplicates),
+            "failed": report.failed
+        }
+        if report.failed:
+            LOGGER.warning(f"Failed to create {len(report.failed)} of {len(task_parameters)} next step task(s)", extra=extra)
+        else:
+            LOGGER.info(f"Created {len(report.submitted)} next step task(s), {len(report.duplicates)} already existed", extra=extra)
+        return report
+
     # Queue Management Methods
     
     async def queue_exists(self, queue_name: str, location: str = None) -> bool:
@@ -456,3 +589,6 @@ class CloudTaskAdapter:
         if self._emulator_client:
             await self._emulator_client.close()
             self._emulator_client = None
+        if self._cloud_client:
+            self._cloud_client.transport.close()
+            self._cloud_client = None
@@ -4,6 +4,7 @@ from datetime import datetime
 from typing import Dict, Any, Optional
 from util.custom_logger import getLogger
 from util.json_utils import DateTimeEncoder
+from util.exception import TaskAlreadyExistsException
 
 LOGGER = getLogger(__name__)
 
@@ -81,6 +82,8 @@ class CloudTaskEmulatorClient:
                 json=task_request
             )
             
+            if response.status_code == 409:
+                raise TaskAlreadyExistsException(f"Task {task_name} already exists")
             if response.status_code != 200:
                 raise Exception(f"Failed to create task: {response.status_code} - {response.text}")
             
@@ -89,6 +92,8 @@ class CloudTaskEmulatorClient:
         except httpx.ConnectError as e:
             LOGGER.error(f"Failed to connect to Cloud Task Emulator at {self.emulator_url}: {str(e)}")
             raise Exception(f"Cloud Task Emulator is not running at {self.emulator_url}. Please start the emulator service.")
+        except TaskAlreadyExistsException:
+            raise
         except Exception as e:
             LOGGER.error(f"Error creating task in emulator: {str(e)}")
             raise
@@ -0,0 +1,126 @@
+"""
+Pipeline context by reference.
+
+Every next task used to carry the full results of every prior task in its `context` and `entities`,
+once per page, through Cloud Tasks payloads, logs and GCS.  With ENTITYEXTRACTION_CONTEXT_BY_REFERENCE_ENABLED
+a task's results larger than ENTITYEXTRACTION_CONTEXT_REF_MIN_BYTES are written once to the context bucket
+and the hierarchical context/entities only hold a small reference:
+
+    {"__context_ref__": "gs://bucket/path/context.json", "sha256": "...", "size_bytes": 12345}
+
+Consumers that need the values (prompt templates that reference them, remote tasks, entity publishing)
+call hydrate() to resolve the references they hold.
+"""
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from adapters.storage import StorageAdapter, get_bucket_storage_adapter
+from util.custom_logger import getLogger
+from util.json_utils import JsonUtil
+import settings
+
+LOGGER = getLogger(__name__)
+
+CONTEXT_REF_KEY = "__context_ref__"
+
+
+def is_context_ref(value: Any) -> bool:
+    return isinstance(value, dict) and CONTEXT_REF_KEY in value
+
+
+def contains_context_ref(value: Any) -> bool:
+    if is_context_ref(value):
+        return True
+    if isinstance(value, dict):
+        return any(contains_context_ref(v) for v in value.values())
+    if isinstance(value, list):
+        return any(contains_context_ref(v) for v in value)
+    return False
+
+
+class ContextStore:
+    """
+    Writes large task results to the context bucket and resolves references to them.  Resolved values
+    are kept in a small in-process LRU keyed by URI and content hash.
+    """
+
+    def __init__(self, storage_adapter: Optional[StorageAdapter] = None, min_size_bytes: int = 4096, cache_size: int = 256):
+        self.storage_adapter = storage_adapter or get_bucket_storage_adapter(settings.ENTITYEXTRACTION_CONTEXT_GCS_BUCKET)
+        self.min_size_bytes = min_size_bytes
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+
+    def _remember(self, key: Tuple[str, str], value: Any):
+        self._cache[key] = value
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def put(self, document_path: str, value: Any) -> Any:
+        """
+        Store the value at document_path and return a reference to it, or the value itself when it is
+        smaller than min_size_bytes.
+        """
+        content = JsonUtil.dumps(value)
+        if len(content) < self.min_size_bytes:
+            return value
+
+        digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        uri = await self.storage_adapter.save_document(
+            document_path=document_path,
+            content=content,
+            content_type="application/json"
+        )
+        self._remember((uri, digest), value)
+        return {CONTEXT_REF_KEY: uri, "sha256": digest, "size_bytes": len(content)}
+
+    async def get(self, ref: Dict[str, Any]) -> Any:
+        uri = ref[CONTEXT_REF_KEY]
+        key = (uri, ref.get("sha256"))
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        document_path = uri.split("/", 3)[3] if uri.startswith("gs://") else uri
+        value = await self.storage_adapter.retrieve_json_document(document_path)
+        if value is None:
+            raise ValueError(f"Context reference {uri} not found")
+        self._remember(key, value)
+        return value
+
+    async def hydrate(self, value: Any) -> Any:
+        """A copy of value with every context reference in it replaced by the referenced value."""
+        if is_context_ref(value):
+            return await self.get(value)
+        if isinstance(value, dict):
+            if not contains_context_ref(value):
+                return value
+            keys = list(value.keys())
+            resolved = await asyncio.gather(*(self.hydrate(value[k]) for k in keys))
+            return dict(zip(keys, resolved))
+        if isinstance(value, list) and contains_context_ref(value):
+            return list(await asyncio.gather(*(self.hydrate(v) for v in value)))
+        return value
+
+
+_context_store: Optional[ContextStore] = None
+
+
+def get_context_store() -> ContextStore:
+    global _context_store
+    if _context_store is None:
+        _context_store = ContextStore(min_size_bytes=settings.ENTITYEXTRACTION_CONTEXT_REF_MIN_BYTES)
+    return _context_store
+
+
+def context_by_reference_enabled() -> bool:
+    return settings.ENTITYEXTRACTION_CONTEXT_BY_REFERENCE_ENABLED
+
+
+async def hydrate(value: Any) -> Any:
+    """A copy of value with its context references resolved; values without references are returned as is."""
+    if not contains_context_ref(value):
+        return value
+    return await get_context_store().hydrate(value)
@@ -5,8 +5,11 @@ This adapter handles communication with the distributed job tracking service,
 including authentication for cloud environments.
 """
 
+import asyncio
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 import httpx
-from typing import Dict, Any, Optional
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
 from util.custom_logger import getLogger
 from util.exception import exceptionToMap
 from util.google_oidc_auth import get_oidc_headers
@@ -15,6 +18,12 @@ import settings
 
 LOGGER = getLogger(__name__)
 
+# Most updates the DJT batch status endpoint takes in one request
+MAX_PIPELINE_STATUS_BATCH = 500
+
+# Buffer of the request being handled, see pipeline_status_request_scope()
+_request_status_buffer: ContextVar[Optional["PipelineStatusBuffer"]] = ContextVar("pipeline_status_buffer", default=None)
+
 class DistributedJobTracking:
     """Adapter for interacting with the Distributed Job Tracking service."""
     
@@ -202,6 +211,126 @@ class DistributedJobTracking:
             LOGGER.error(f"Unexpected error calling DJT API for pipeline status update: job_id: {job_id}, pipeline_id: {pipeline_id}", extra=extra)
             raise Exception(f"Error communicating with distributed job tracking service: {str(e)}")
 
+    async def pipeline_status_updates(self, job_id: str, updates: List[Tuple[str, PipelineStatusUpdate]]) -> Dict[str, Any]:
+        """
+        Update several pipeline statuses of a job in one request.
+        
+        DJT applies the updates in order in one Redis transaction and checks the run's completion once.
+        More than MAX_PIPELINE_STATUS_BATCH updates are sent as consecutive requests of at most that many.
+        Against a DJT without the batch endpoint (404/405) the updates are sent one by one.
+        
+        Args:
+            job_id: The job ID (used as run_id)
+            updates: (pipeline_id, PipelineStatusUpdate) pairs, in the order they happened
+            
+        Returns:
+            Dictionary containing the batch response, with the stored pipelines in the order of the updates
+            
+        Raises:
+            Exception: If there's an error communicating with the DJT service
+        """
+        if len(updates) > MAX_PIPELINE_STATUS_BATCH:
+            pipelines = []
+            for start in range(0, len(updates), MAX_PIPELINE_STATUS_BATCH):
+                result = await self.pipeline_status_updates(job_id, updates[start:start + MAX_PIPELINE_STATUS_BATCH])
+                pipelines.extend(result.get("pipelines", []))
+            return {"pipelines": pipelines}
+        
+        extra = {
+            "job_id": job_id,
+            "pipeline_ids": [pipeline_id for pipeline_id, _ in updates],
+            "djt_base_url": self.base_url,
+            "cloud_provider": self.cloud_provider,
+        }
+        
+        try:
+            # Construct the URL for the DJT API
+            url = f"{self.base_url}/api/v1/jobs/{job_id}/pipelines/status"
+            
+            LOGGER.info(f"Updating {len(updates)} pipeline statuses for job_id: {job_id}", extra)
+            
+            # Get headers with conditional authentication
+            headers = await self._get_headers()
+
+            body = {
+                "updates": [{**pipeline_data.model_dump(), "pipeline_id": pipeline_id} for pipeline_id, pipeline_data in updates]
+            }
+            
+            # Make HTTP request to distributed job tracking service
+            # Set timeout from settings
+            timeout = httpx.Timeout(settings.DJT_API_TIMEOUT, read=settings.DJT_API_TIMEOUT)
+            async with httpx.AsyncClient(timeout=timeout) as client:
+                response = await client.post(url, headers=headers, json=body)
+                
+                extra.update({
+                    "http_response": {
+                        "status_code": response.status_code,
+                        "response_text": response.text
+                    }
+                })
+                
+                # Check for successful response
+                if response.status_code == 200:
+                    try:
+                        result = await response.json()
+                    except TypeError:
+                        # Handle case where json() returns dict directly instead of coroutine
+                        result = response.json()
+                    LOGGER.debug(f"Successfully updated {len(updates)} pipeline statuses for job_id: {job_id}", extra)
+                    return result
+                elif response.status_code in [404, 405]:
+                    # DJT without the batch endpoint
+                    LOGGER.warning(f"DJT API has no batch status endpoint, sending {len(updates)} updates one by one: job_id: {job_id}", extra=extra)
+                    pipelines = []
+                    for pipeline_id, pipeline_data in updates:
+                        result = await self.pipeline_status_update(job_id, pipeline_id, pipeline_data)
+                        pipelines.append(result.get("pipeline"))
+                    return {"pipelines": pipelines}
+                else:
+                    # Log the error and raise an exception with the status code
+                    error_detail = f"DJT API returned status {response.status_code}: {response.text}"
+                    extra.update({"status_code": response.status_code, "response_text": response.text})
+                    LOGGER.warning(f"DJT API error for batch pipeline status update: job_id: {job_id}", extra=extra)
+                    
+                    # Create an exception that preserves the original status code
+                    error = Exception(error_detail)
+                    error.status_code = response.status_code
+                    error.response_text = response.text
+                    raise error
+                    
+        except httpx.RequestError as e:
+            extra.update({"error": exceptionToMap(e)})
+            LOGGER.error(f"Network error when calling DJT API for batch pipeline status update: job_id: {job_id}", extra=extra)
+            raise Exception(f"Unable to connect to distributed job tracking service: {str(e)}")
+        except Exception as e:
+            # If it's already our custom exception with status_code, re-raise it
+            if hasattr(e, 'status_code'):
+                raise e
+            
+            # Otherwise, log and wrap as a generic error
+            extra.update({"error": exceptionToMap(e)})
+            LOGGER.error(f"Unexpected error calling DJT API for batch pipeline status update: job_id: {job_id}", extra=extra)
+            raise Exception(f"Error communicating with distributed job tracking service: {str(e)}")
+
+    async def queue_pipeline_status_updates(self, job_id: str, updates: List[Tuple[str, PipelineStatusUpdate]]) -> Dict[str, Any]:
+        """
+        Queue pipeline status updates in the buffer of the current request (see pipeline_status_request_scope),
+        which sends them with other updates of the job.  Outside a request scope they are sent now.
+        
+        Args:
+            job_id: The job ID (used as run_id)
+            updates: (pipeline_id, PipelineStatusUpdate) pairs, in the order they happened
+            
+        Returns:
+            The batch response when sent now, else the number of updates queued
+        """
+        buffer = _request_status_buffer.get()
+        if buffer is None:
+            return await self.pipeline_status_updates(job_id, updates)
+        for pipeline_id, pipeline_data in updates:
+            await buffer.add(job_id, pipeline_id, pipeline_data)
+        return {"queued": len(updates)}
+    
     async def health_check(self) -> Dict[str, Any]:
         """
         Perform a health check against the DJT service.
@@ -263,6 +392,112 @@ class DistributedJobTracking:
             raise Exception(f"Error during DJT service health check: {str(e)}")
 
 
+class PipelineStatusBuffer:
+    """
+    Coalesces pipeline status updates into batch requests.
+    
+    Updates are queued per job and sent with pipeline_status_updates() when a job has max_updates queued, or
+    flush_interval_ms after the first update queued since the last flush.  Batches of a job are sent one after
+    the other in the order the updates were added.  Sending is fire-and-forget: failures are logged, not raised
+    to add().  Call flush() (or close()) before the request ends so queued updates are not lost.
+    """
+    
+    def __init__(self, client: DistributedJobTracking, max_updates: int = 50, flush_interval_ms: int = 200):
+        """
+        Args:
+            client: DJT client used to send the batches
+            max_updates: Number of queued updates of a job that triggers sending them, at most
+                MAX_PIPELINE_STATUS_BATCH
+            flush_interval_ms: Longest time an update waits in the buffer
+        """
+        self.client = client
+        self.max_updates = min(max(1, max_updates), MAX_PIPELINE_STATUS_BATCH)
+        self.flush_interval_ms = flush_interval_ms
+        self._pending: Dict[str, List[Tuple[str, PipelineStatusUpdate]]] = {}
+        self._sending: Dict[str, "asyncio.Task[None]"] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+    
+    async def add(self, job_id: str, pipeline_id: str, pipeline_data: PipelineStatusUpdate) -> None:
+        """
+        Queue a pipeline status update.  Waits for the job's batch to be sent when the update fills it.
+        """
+        updates = self._pending.setdefault(job_id, [])
+        updates.append((pipeline_id, pipeline_data))
+        if len(updates) >= self.max_updates:
+            await self._flush_job(job_id)
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.flush_interval_ms / 1000, self._on_timer)
+    
+    def _on_timer(self) -> None:
+        self._timer = None
+        for job_id in list(self._pending):
+            self._start_send(job_id)
+    
+    def _start_send(self, job_id: str) -> Optional["asyncio.Task[None]"]:
+        updates = self._pending.pop(job_id, None)
+        if not updates:
+            return None
+        task = asyncio.ensure_future(self._send(job_id, updates, self._sending.get(job_id)))
+        self._sending[job_id] = task
+        task.add_done_callback(lambda done: self._forget_send(job_id, done))
+        return task
+    
+    def _forget_send(self, job_id: str, task: "asyncio.Task[None]") -> None:
+        if self._sending.get(job_id) is task:
+            del self._sending[job_id]
+    
+    async def _send(self, job_id: str, updates: List[Tuple[str, PipelineStatusUpdate]], previous: Optional["asyncio.Task[None]"]) -> None:
+        if previous is not None:
+            # Keep the job's batches in order
+            await asyncio.wait([previous])
+        try:
+            await self.client.pipeline_status_updates(job_id, updates)
+        except Exception as e:
+            LOGGER.error(f"Failed to send {len(updates)} buffered pipeline status updates for job_id: {job_id}", extra={
+                "job_id": job_id,
+                "update_count": len(updates),
+                "error": exceptionToMap(e)
+            })
+    
+    async def _flush_job(self, job_id: str) -> None:
+        task = self._start_send(job_id)
+        if task is not None:
+            await task
+    
+    async def flush(self) -> None:
+        """Send every queued update and wait for all batches in flight."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for job_id in list(self._pending):
+            self._start_send(job_id)
+        if self._sending:
+            await asyncio.wait(list(self._sending.values()))
+    
+    async def close(self) -> None:
+        await self.flush()
+
+
+@asynccontextmanager
+async def pipeline_status_request_scope() -> AsyncIterator[PipelineStatusBuffer]:
+    """
+    Buffer the pipeline status updates queued while handling one request (queue_pipeline_status_updates) and
+    send what is left when the request ends, so nothing outlives the request.  The status posts of a task and
+    of the tasks it runs inline go out as one batch per run, at most DJT_STATUS_BUFFER_FLUSH_INTERVAL_MS late.
+    """
+    buffer = PipelineStatusBuffer(
+        get_djt_client(),
+        max_updates=settings.DJT_STATUS_BUFFER_MAX_UPDATES,
+        flush_interval_ms=settings.DJT_STATUS_BUFFER_FLUSH_INTERVAL_MS
+    )
+    token = _request_status_buffer.set(buffer)
+    try:
+        yield buffer
+    finally:
+        _request_status_buffer.reset(token)
+        await buffer.close()
+
+
 # Factory function for easy instantiation
 def get_djt_client(base_url: Optional[str] = None) -> DistributedJobTracking:
     """
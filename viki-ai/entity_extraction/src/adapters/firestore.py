@@ -2,11 +2,11 @@ import os
 from typing import Optional, Dict, Any
 from google.cloud import firestore
 from google.cloud.firestore_v1.base_query import FieldFilter
-from aiocache import cached, Cache, caches
 
+from adapters.pipeline_config_cache import PipelineConfigCache
 from models.pipeline_config import PipelineConfig, validate_pipeline_config
 from models.app_config import AppConfigCache
-from settings import GCP_PROJECT_ID, GCP_FIRESTORE_DB, FIRESTORE_EMULATOR_HOST
+from settings import GCP_PROJECT_ID, GCP_FIRESTORE_DB, FIRESTORE_EMULATOR_HOST, PIPELINE_CONFIG_CACHE_LISTENER_ENABLED, PIPELINE_CONFIG_CACHE_TTL
 from util.date_utils import now_utc
 from util.custom_logger import getLogger
 from util.exception import exceptionToMap
@@ -134,6 +134,18 @@ class FirestoreAdapter:
             LOGGER.error(f"Error searching pipeline config for scope '{scope}' and key '{pipeline_key}': {str(e)}", extra=extra)
             raise Exception(f"Error searching pipeline config for scope '{scope}' and key '{pipeline_key}': {str(e)}")
     
+    def watch_pipeline_configs(self, callback):
+        """
+        Listen for changes to the pipeline config collection.
+        
+        Args:
+            callback: Called on a background thread with (docs, changes, read_time) for every change
+            
+        Returns:
+            The Firestore watch; call unsubscribe() to stop listening
+        """
+        return self.client.collection(self.collection_name).on_snapshot(callback)
+    
     async def list_pipeline_configs(self, scope: Optional[str] = None) -> list[PipelineConfig]:
         """
         List all pipeline configurations, optionally filtered by scope.
@@ -671,11 +683,9 @@ async def get_pipeline_config(config_id: str) -> Optional[PipelineConfig]:
     return await adapter.get_pipeline_config(config_id)
 
 
-@cached(ttl=60, cache=Cache.MEMORY)
 async def search_pipeline_config(scope: str, pipeline_key: str) -> Optional[PipelineConfig]:
-    """Convenience function to search for a pipeline configuration."""
-    adapter = get_firestore_adapter()
-    return await adapter.search_pipeline_config(scope, pipeline_key)
+    """Convenience function to search for a pipeline configuration, served from the pipeline config cache."""
+    return await get_pipeline_config_cache().get(scope, pipeline_key)
 
 
 async def search_pipeline_config_no_cache(scope: str, pipeline_key: str) -> Optional[PipelineConfig]:
@@ -686,33 +696,31 @@ async def search_pipeline_config_no_cache(scope: str, pipeline_key: str) -> Opti
 
 async def invalidate_pipeline_config_cache(scope: str, pipeline_key: str) -> None:
     """Invalidate the cache for a specific pipeline configuration."""
-    try:
-        # Use aiocache's delete method to invalidate the specific cache entry
-        # The cache key is generated by aiocache based on function name and parameters
-        
-        # Generate the cache key that aiocache would use for this function call
-        # The format is typically: namespace:function_name:hash_of_args
-        import hashlib
-        import json
-        
-        # Create a consistent key based on function name and arguments
-        args_str = json.dumps([scope, pipeline_key], sort_keys=True)
-        args_hash = hashlib.md5(args_str.encode()).hexdigest()
-        cache_key = f"adapters.firestore:search_pipeline_config:{args_hash}"
-        
-        # Get the default cache instance
-        cache = caches.get("default") or Cache(Cache.MEMORY)
-        await cache.delete(cache_key)
-        LOGGER.info(f"Invalidated cache for pipeline config scope='{scope}', key='{pipeline_key}' with key: {cache_key}")
-    except Exception as e:
-        LOGGER.warning(f"Failed to invalidate cache for pipeline config scope='{scope}', key='{pipeline_key}': {str(e)}")
-        # Fallback: try to clear the entire cache
-        try:
-            cache = caches.get("default") or Cache(Cache.MEMORY)
-            await cache.clear()
-            LOGGER.info("Cleared entire cache as fallback")
-        except Exception as fallback_e:
-            LOGGER.error(f"Failed to clear cache entirely: {str(fallback_e)}")
+    get_pipeline_config_cache().invalidate(scope, pipeline_key)
+    LOGGER.info(f"Invalidated cache for pipeline config scope='{scope}', key='{pipeline_key}'")
+
+
+_pipeline_config_cache: Optional[PipelineConfigCache] = None
+
+def get_pipeline_config_cache() -> PipelineConfigCache:
+    """Get the process-wide pipeline config cache, listening for changes if PIPELINE_CONFIG_CACHE_LISTENER_ENABLED."""
+    global _pipeline_config_cache
+    if _pipeline_config_cache is None:
+        watcher = None
+        if PIPELINE_CONFIG_CACHE_LISTENER_ENABLED:
+            watcher = lambda callback: get_firestore_adapter().watch_pipeline_configs(callback)
+        _pipeline_config_cache = PipelineConfigCache(
+            loader=search_pipeline_config_no_cache,
+            watcher=watcher,
+            ttl=PIPELINE_CONFIG_CACHE_TTL
+        )
+    return _pipeline_config_cache
+
+
+def close_pipeline_config_cache() -> None:
+    """Stop the pipeline config cache's listener, if it was started."""
+    if _pipeline_config_cache is not None:
+        _pipeline_config_cache.close()
 
 
 async def list_pipeline_configs(scope: Optional[str] = None) -> list[PipelineConfig]:
@@ -16,6 +16,7 @@ from util.custom_logger import getLogger
 from util.exception import exceptionToMap
 from util.json_utils import DateTimeEncoder
 from util.tracing import trace_function, add_span_attributes, add_span_event
+from adapters.llm_cache import get_response_cache, is_cacheable_response
 
 LOGGER = getLogger(__name__)
 
@@ -191,7 +192,8 @@ class StandardPromptAdapter:
         schema: Optional[Dict[str, Any]] = None,
         metadata: Optional[Dict[str, Any]] = None,        
         stream: bool = True,
-        app_id: Optional[str] = "viki"
+        app_id: Optional[str] = "viki",
+        cache_response: Optional[bool] = None
     ) -> LLMResponse:
         """
         Generate content using the Google AI model with async support.
@@ -201,6 +203,7 @@ class StandardPromptAdapter:
         :param response_mime_type: Optional MIME type for structured responses
         :param metadata: Optional metadata for logging and tracking
         :param stream: Whether to use streaming response
+        :param cache_response: Whether to use the response cache for this prompt; None follows LLM_RESPONSE_CACHE_STEPS
         :return: LLMResponse object containing text and usage metadata
         """
         LOGGER.debug("LLM Metadata: %s", json.dumps(metadata or {}, indent=2, cls=DateTimeEncoder))
@@ -334,6 +337,31 @@ class StandardPromptAdapter:
             # Log billing labels for transparency
             LOGGER.debug(f"Using billing labels: {final_labels}", extra=extra)
 
+            # Identical temperature 0 prompts get the same answer: serve it from the response cache if we have it
+            response_cache = get_response_cache()
+            response_cache_key = None
+            if response_cache and self.temperature == 0:
+                step = (metadata or {}).get("task_config", {}).get("id")
+                if cache_response if cache_response is not None else response_cache.is_enabled_for(step):
+                    response_cache_key = response_cache.key(self.model_name, system_instruction, schema, {
+                        "max_output_tokens": self.max_tokens,
+                        "temperature": self.temperature,
+                        "top_p": self.top_p,
+                        "response_mime_type": config.response_mime_type,
+                        "safety_settings": self.safety_settings_dict
+                    }, items)
+                    cached = await response_cache.get(response_cache_key)
+                    if cached:
+                        usage_metadata = UsageMetadata(**cached["usage_metadata"]) if cached.get("usage_metadata") else None
+                        LOGGER.info("Prompt::generate_content_async served from response cache", extra={
+                            **extra,
+                            "response_cache_key": response_cache_key,
+                            "response_length": len(cached["text"]),
+                            "elapsed_time": (datetime.now() - start_time).total_seconds()
+                        })
+                        add_span_event("llm_response_cache_hit", {"response_cache_key": response_cache_key})
+                        return LLMResponse(text=cached["text"], usage_metadata=usage_metadata)
+
             # Use non-streaming approach to avoid JSON parsing issues with chunks
             response = await self.client.aio.models.generate_content(
                 model=self.model_name,
@@ -393,6 +421,11 @@ class StandardPromptAdapter:
             if settings.LLM_PROMPT_AUDIT_ENABLED:
                 await self._audit_prompt(items, result, prompt_stats=prompt_stats, metadata=metadata)
 
+            if response_cache_key and is_cacheable_response(response, config.response_mime_type):
+                await response_cache.set(response_cache_key, result,
+                                         usage_metadata=usage_metadata.model_dump() if usage_metadata else None,
+                                         model=self.model_name)
+
             # Return LLMResponse object with text and usage metadata
             return LLMResponse(
                 text=result,
@@ -0,0 +1,234 @@
+"""
+Content-addressed cache of LLM responses.
+
+Prompts run at temperature 0, so the same model, system instruction, schema, generation config and
+parts get the same answer.  Responses are cached under a hash of exactly those, so retries, recovery
+runs and re-orchestrations reuse the answer instead of paying for the call again.  URI parts are keyed
+by URI and mime type, which assumes the object at a URI is not rewritten with different content.
+
+Only complete responses are cached: the model stopped on its own (finish reason STOP, so not a
+MAX_TOKENS truncation) and JSON responses parse.  Entries expire after LLM_RESPONSE_CACHE_TTL and
+bumping LLM_RESPONSE_CACHE_VERSION invalidates all of them.  Backend errors are logged and count as
+misses.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from functools import partial
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import settings
+from util.custom_logger import getLogger
+
+LOGGER = getLogger(__name__)
+
+PromptItem = Union[str, Tuple[str, str], Tuple[bytes, str]]
+
+
+def _item_fingerprint(item: PromptItem) -> List[str]:
+    if isinstance(item, str):
+        return ["text", hashlib.sha256(item.encode("utf-8")).hexdigest()]
+    if isinstance(item[0], bytes):
+        return ["data", item[1], hashlib.sha256(item[0]).hexdigest()]
+    return ["uri", item[1], item[0]]
+
+
+def response_cache_key(version: str, model: str, system_instruction: Optional[str], schema: Optional[Dict[str, Any]],
+                       generation_config: Dict[str, Any], items: Iterable[PromptItem]) -> str:
+    value = json.dumps([
+        version,
+        model,
+        system_instruction,
+        schema,
+        generation_config,
+        [_item_fingerprint(item) for item in items],
+    ], sort_keys=True, default=str)
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+def is_cacheable_response(response: Any, response_mime_type: Optional[str] = None) -> bool:
+    """Whether a generate_content response is complete enough to be served again from the cache."""
+    try:
+        text = response.text
+        candidates = response.candidates or []
+    except Exception:
+        return False
+    if not text or not candidates:
+        return False
+    finish_reason = getattr(candidates[0], "finish_reason", None)
+    if getattr(finish_reason, "name", finish_reason) != "STOP":
+        return False
+    if response_mime_type and "json" in response_mime_type:
+        try:
+            json.loads(text)
+        except ValueError:
+            return False
+    return True
+
+
+class ILLMResponseCacheBackend:
+    """Where cached responses are kept.  Records carry their own `expires_at` (epoch seconds)."""
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def set(self, key: str, record: Dict[str, Any]):
+        raise NotImplementedError
+
+
+class MemoryLLMResponseCacheBackend(ILLMResponseCacheBackend):
+    """Per-process LRU."""
+
+    def __init__(self, max_size: int = 1000):
+        self.max_size = max_size
+        self._records: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        record = self._records.get(key)
+        if record is not None:
+            self._records.move_to_end(key)
+        return record
+
+    async def set(self, key: str, record: Dict[str, Any]):
+        self._records[key] = record
+        self._records.move_to_end(key)
+        while len(self._records) > self.max_size:
+            self._records.popitem(last=False)
+
+
+class DiskLLMResponseCacheBackend(ILLMResponseCacheBackend):
+    """One JSON file per key in a local directory, e.g. to replay the e2e suite without calling the model."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write(self, key: str, record: Dict[str, Any]):
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = f"{self._path(key)}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f)
+        os.replace(temp_path, self._path(key))
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.get_event_loop().run_in_executor(None, partial(self._read, key))
+
+    async def set(self, key: str, record: Dict[str, Any]):
+        await asyncio.get_event_loop().run_in_executor(None, partial(self._write, key, record))
+
+
+class GCSLLMResponseCacheBackend(ILLMResponseCacheBackend):
+    """
+    One JSON object per key under `prefix` in a bucket, shared by every instance.  A lifecycle rule on
+    the prefix can purge old objects; reads treat expired records as misses regardless.
+    """
+
+    def __init__(self, bucket_name: str, prefix: str):
+        from google.cloud import storage
+
+        self.bucket = storage.Client(project=settings.GCP_PROJECT_ID).bucket(bucket_name)
+        self.prefix = prefix.rstrip("/")
+
+    def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        from google.api_core import exceptions as google_exceptions
+
+        try:
+            return json.loads(self.bucket.blob(f"{self.prefix}/{key}.json").download_as_text())
+        except google_exceptions.NotFound:
+            return None
+
+    def _write(self, key: str, record: Dict[str, Any]):
+        self.bucket.blob(f"{self.prefix}/{key}.json").upload_from_string(json.dumps(record), content_type="application/json")
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.get_event_loop().run_in_executor(None, partial(self._read, key))
+
+    async def set(self, key: str, record: Dict[str, Any]):
+        await asyncio.get_event_loop().run_in_executor(None, partial(self._write, key, record))
+
+
+class LLMResponseCache:
+
+    def __init__(self, backend: ILLMResponseCacheBackend, ttl: int = 604800, version: str = "1", steps: Optional[Iterable[str]] = None):
+        self.backend = backend
+        self.ttl = ttl
+        self.version = version
+        self.steps = frozenset(step for step in (steps or []) if step)
+        self.stats = {"hits": 0, "misses": 0}
+
+    def is_enabled_for(self, step: Optional[str]) -> bool:
+        """Whether responses of the given prompt step are cached; with no steps configured, all are."""
+        return not self.steps or step in self.steps
+
+    def key(self, model: str, system_instruction: Optional[str], schema: Optional[Dict[str, Any]],
+            generation_config: Dict[str, Any], items: Iterable[PromptItem]) -> str:
+        return response_cache_key(self.version, model, system_instruction, schema, generation_config, items)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """The cached record ({"text", "usage_metadata", ...}) for the key, or None."""
+        try:
+            record = await self.backend.get(key)
+        except Exception as e:
+            LOGGER.warning("LLM response cache: error reading %s: %s", key, str(e))
+            record = None
+        if record and record.get("expires_at", 0) > time.time() and record.get("text"):
+            self.stats["hits"] += 1
+            return record
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, key: str, text: str, usage_metadata: Optional[Dict[str, Any]] = None, model: Optional[str] = None):
+        if not text:
+            return
+        created_at = time.time()
+        record = {
+            "text": text,
+            "usage_metadata": usage_metadata,
+            "model": model,
+            "created_at": created_at,
+            "expires_at": created_at + self.ttl,
+        }
+        try:
+            await self.backend.set(key, record)
+        except Exception as e:
+            LOGGER.warning("LLM response cache: error writing %s: %s", key, str(e))
+
+
+def create_backend() -> ILLMResponseCacheBackend:
+    """The backend selected by LLM_RESPONSE_CACHE_BACKEND: memory, disk or gcs."""
+    if settings.LLM_RESPONSE_CACHE_BACKEND == "gcs":
+        return GCSLLMResponseCacheBackend(settings.LLM_RESPONSE_CACHE_BUCKET, settings.LLM_RESPONSE_CACHE_PREFIX)
+    if settings.LLM_RESPONSE_CACHE_BACKEND == "disk":
+        return DiskLLMResponseCacheBackend(settings.LLM_RESPONSE_CACHE_DIR)
+    return MemoryLLMResponseCacheBackend(settings.LLM_RESPONSE_CACHE_MEMORY_SIZE)
+
+
+_cache: Optional[LLMResponseCache] = None
+
+
+def get_response_cache() -> Optional[LLMResponseCache]:
+    """The process-wide response cache, or None when LLM_RESPONSE_CACHE_ENABLED is off."""
+    global _cache
+    if not settings.LLM_RESPONSE_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        try:
+            backend = create_backend()
+        except Exception as e:
+            LOGGER.error("LLM response cache: %s backend unavailable, caching per process: %s", settings.LLM_RESPONSE_CACHE_BACKEND, str(e))
+            backend = MemoryLLMResponseCacheBackend(settings.LLM_RESPONSE_CACHE_MEMORY_SIZE)
+        _cache = LLMResponseCache(backend, ttl=settings.LLM_RESPONSE_CACHE_TTL, version=settings.LLM_RESPONSE_CACHE_VERSION,
+                                  steps=settings.LLM_RESPONSE_CACHE_STEPS)
+    return _cache
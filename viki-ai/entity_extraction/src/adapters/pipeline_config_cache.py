@@ -0,0 +1,151 @@
+"""
+In-memory cache of pipeline configurations.
+
+Every task looks up its pipeline config, so configs are kept in memory per (scope, key) and served from
+there until a change arrives: a Firestore snapshot listener on the config collection invalidates the
+entries of the documents it reports as added, modified or removed, on every instance.  The admin write
+path also invalidates the local entry directly.
+
+Concurrent lookups of a missing entry share a single load.  Each key has a generation that invalidation
+bumps, so a load that raced an invalidation is returned to its callers but not cached.  Without a live
+listener (disabled, failed to start, or closed) entries expire after `ttl` seconds instead.
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from models.pipeline_config import PipelineConfig
+from util.custom_logger import getLogger
+
+LOGGER = getLogger(__name__)
+
+CacheKey = Tuple[str, str]
+PipelineConfigLoader = Callable[[str, str], Awaitable[Optional[PipelineConfig]]]
+# Starts a listener calling back with (docs, changes, read_time) like Firestore's on_snapshot; returns the watch
+PipelineConfigWatcher = Callable[[Callable[[Any, Iterable[Any], Any], None]], Any]
+
+
+class PipelineConfigCacheEntry:
+
+    def __init__(self, config: Optional[PipelineConfig], generation: int):
+        self.config = config
+        self.generation = generation
+        self.loaded_at = time.monotonic()
+
+    @property
+    def version(self) -> Optional[str]:
+        return self.config.version if self.config else None
+
+
+class PipelineConfigCache:
+
+    def __init__(self, loader: PipelineConfigLoader, watcher: Optional[PipelineConfigWatcher] = None, ttl: int = 60):
+        self.loader = loader
+        self.watcher = watcher
+        self.ttl = ttl
+        self._entries: Dict[CacheKey, PipelineConfigCacheEntry] = {}
+        self._generations: Dict[CacheKey, int] = {}
+        self._loads: Dict[CacheKey, "asyncio.Future[Optional[PipelineConfig]]"] = {}
+        self._watch = None
+        self._watch_started_at: Optional[float] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stats = {"hits": 0, "loads": 0, "invalidations": 0}
+
+    def _listening(self) -> bool:
+        if self._watch is None:
+            return False
+        try:
+            return bool(self._watch.is_active)
+        except Exception:
+            return False
+
+    def _ensure_listener(self):
+        """Start the snapshot listener, or restart it at most once per ttl when it has stopped."""
+        if self.watcher is None or self._listening():
+            return
+        now = time.monotonic()
+        if self._watch_started_at is not None and now - self._watch_started_at < self.ttl:
+            return
+        self._watch_started_at = now
+        self._loop = asyncio.get_running_loop()
+        try:
+            self._watch = self.watcher(self._on_snapshot)
+            LOGGER.info("Pipeline config cache: listening for pipeline config changes")
+        except Exception as e:
+            self._watch = None
+            LOGGER.warning(f"Pipeline config cache: listener unavailable, expiring entries after {self.ttl}s: {str(e)}")
+
+    def _on_snapshot(self, docs, changes, read_time):
+        """Listener callback, called on the listener's thread."""
+        keys = set()
+        for change in changes:
+            data = change.document.to_dict() or {}
+            if data.get("key"):
+                keys.add((data.get("scope", "default"), data["key"]))
+        if keys and self._loop is not None:
+            for scope, key in keys:
+                self._loop.call_soon_threadsafe(self.invalidate, scope, key)
+
+    def _is_fresh(self, entry: PipelineConfigCacheEntry) -> bool:
+        return self._listening() or time.monotonic() - entry.loaded_at < self.ttl
+
+    async def get(self, scope: str, pipeline_key: str) -> Optional[PipelineConfig]:
+        self._ensure_listener()
+        cache_key = (scope, pipeline_key)
+
+        entry = self._entries.get(cache_key)
+        if entry is not None and entry.generation == self._generations.get(cache_key, 0) and self._is_fresh(entry):
+            self.stats["hits"] += 1
+            return entry.config
+
+        load = self._loads.get(cache_key)
+        if load is None:
+            load = asyncio.ensure_future(self._load(cache_key, self._generations.get(cache_key, 0)))
+            self._loads[cache_key] = load
+            load.add_done_callback(lambda done: self._forget_load(cache_key, done))
+        return await asyncio.shield(load)
+
+    def _forget_load(self, cache_key: CacheKey, load: "asyncio.Future[Optional[PipelineConfig]]"):
+        if self._loads.get(cache_key) is load:
+            del self._loads[cache_key]
+
+    async def _load(self, cache_key: CacheKey, generation: int) -> Optional[PipelineConfig]:
+        self.stats["loads"] += 1
+        config = await self.loader(*cache_key)
+        if self._generations.get(cache_key, 0) == generation:
+            self._entries[cache_key] = PipelineConfigCacheEntry(config, generation)
+        return config
+
+    def invalidate(self, scope: str, pipeline_key: str):
+        cache_key = (scope, pipeline_key)
+        self._generations[cache_key] = self._generations.get(cache_key, 0) + 1
+        entry = self._entries.pop(cache_key, None)
+        # Lookups from now on must not join a load that may have read the old config
+        self._loads.pop(cache_key, None)
+        self.stats["invalidations"] += 1
+        LOGGER.debug(f"Pipeline config cache: invalidated scope='{scope}', key='{pipeline_key}'", extra={
+            "scope": scope,
+            "pipeline_key": pipeline_key,
+            "cached_version": entry.version if entry else None,
+            "generation": self._generations[cache_key]
+        })
+
+    def clear(self):
+        for scope, pipeline_key in set(self._entries) | set(self._loads):
+            self.invalidate(scope, pipeline_key)
+
+    def close(self):
+        if self._watch is not None:
+            try:
+                self._watch.unsubscribe()
+            except Exception as e:
+                LOGGER.warning(f"Pipeline config cache: error closing listener: {str(e)}")
+            self._watch = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "listening": self._listening(),
+            "versions": {f"{scope}.{key}": entry.version for (scope, key), entry in self._entries.items()}
+        }
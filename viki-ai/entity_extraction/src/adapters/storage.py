@@ -4,9 +4,11 @@ from google.cloud import storage
 from google.cloud.exceptions import NotFound, GoogleCloudError
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
+import gzip
 import io
+import threading
 
-from settings import GCP_PROJECT_ID, GCS_BUCKET_NAME, USE_JSON_SAFE_LOADS
+from settings import GCP_PROJECT_ID, GCS_BUCKET_NAME, USE_JSON_SAFE_LOADS, GCS_IO_WORKERS
 from util.custom_logger import getLogger
 from util.exception import exceptionToMap
 from util.json_utils import safe_loads, JsonUtil
@@ -15,26 +17,54 @@ LOGGER = getLogger(__name__)
 
 STORAGE_SINGLETON_ENABLE = False
 
+# Process-wide GCS clients (one per project) and the thread pool their blocking calls run on
+_clients: Dict[str, storage.Client] = {}
+_clients_lock = threading.Lock()
+_io_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_storage_client(project_id: Optional[str] = None) -> storage.Client:
+    """Get the shared GCS client of the project, so its HTTP connections are reused across adapters."""
+    project_id = project_id or GCP_PROJECT_ID
+    with _clients_lock:
+        client = _clients.get(project_id)
+        if client is None:
+            client = storage.Client(project=project_id)
+            _clients[project_id] = client
+        return client
+
+
+def get_io_executor() -> ThreadPoolExecutor:
+    """Get the thread pool shared by all storage adapters, sized by GCS_IO_WORKERS."""
+    global _io_executor
+    with _clients_lock:
+        if _io_executor is None:
+            _io_executor = ThreadPoolExecutor(max_workers=GCS_IO_WORKERS, thread_name_prefix="gcs-io")
+        return _io_executor
+
+
 class StorageAdapter:
     """Adapter for interacting with Google Cloud Storage to manage documents."""
     
-    def __init__(self, project_id: Optional[str] = None, bucket_name: Optional[str] = None):
+    def __init__(self, project_id: Optional[str] = None, bucket_name: Optional[str] = None,
+                 client: Optional[storage.Client] = None):
         """
         Initialize the Storage adapter.
         
         Args:
             project_id: Google Cloud project ID. If None, uses settings value.
             bucket_name: GCS bucket name. If None, uses settings value.
+            client: GCS client to use, e.g. the shared one from get_storage_client(). If None, creates one.
         """
         self.project_id = project_id or GCP_PROJECT_ID
         self.bucket_name = bucket_name or GCS_BUCKET_NAME
         
         # Initialize GCS client
-        self.client = storage.Client(project=self.project_id)
+        self.client = client or storage.Client(project=self.project_id)
         self.bucket = self.client.bucket(self.bucket_name)
         
-        # Thread pool for async operations
-        self.executor = ThreadPoolExecutor(max_workers=10)
+        # Thread pool for async operations, shared by all adapters
+        self.executor = get_io_executor()
     
     def _run_in_executor(self, func, *args, **kwargs):
         """Run a synchronous function in the thread pool executor."""
@@ -45,7 +75,8 @@ class StorageAdapter:
                           document_path: str, 
                           content: Union[str, bytes], 
                           content_type: Optional[str] = None,
-                          metadata: Optional[Dict[str, str]] = None) -> str:
+                          metadata: Optional[Dict[str, str]] = None,
+                          compress: bool = False) -> str:
         """
         Save a document to Google Cloud Storage.
         
@@ -54,6 +85,8 @@ class StorageAdapter:
             content: The document content (string or bytes)
             content_type: MIME type of the content (e.g., 'text/plain', 'application/json')
             metadata: Optional metadata dictionary to attach to the document
+            compress: Store the content gzipped with Content-Encoding: gzip. GCS and its clients
+                decompress it transparently on download.
             
         Returns:
             The GCS URI of the saved document (gs://bucket/path)
@@ -66,7 +99,8 @@ class StorageAdapter:
                 "document_path": document_path,
                 "bucket_name": self.bucket_name,
                 "content_type": content_type,
-                "metadata": metadata
+                "metadata": metadata,
+                "compress": compress
             }
             
             LOGGER.debug(f"Saving document to GCS: {document_path}", extra=extra)
@@ -79,7 +113,11 @@ class StorageAdapter:
                     blob.metadata = metadata
                 
                 # Upload content
-                if isinstance(content, str):
+                if compress:
+                    data = content.encode("utf-8") if isinstance(content, str) else content
+                    blob.content_encoding = "gzip"
+                    blob.upload_from_string(gzip.compress(data, compresslevel=6), content_type=content_type)
+                elif isinstance(content, str):
                     blob.upload_from_string(content, content_type=content_type)
                 else:
                     blob.upload_from_string(content, content_type=content_type)
@@ -495,6 +533,16 @@ class StorageAdapter:
 
 # Singleton instance for easy access
 _storage_adapter: Optional[StorageAdapter] = None
+_bucket_storage_adapters: Dict[str, StorageAdapter] = {}
+
+
+def get_bucket_storage_adapter(bucket_name: str) -> StorageAdapter:
+    """Get the process-wide StorageAdapter of a bucket, backed by the shared client and executor."""
+    adapter = _bucket_storage_adapters.get(bucket_name)
+    if adapter is None:
+        adapter = StorageAdapter(bucket_name=bucket_name, client=get_storage_client())
+        _bucket_storage_adapters[bucket_name] = adapter
+    return adapter
 
 def get_storage_adapter() -> StorageAdapter:
     """Get a singleton instance of the StorageAdapter."""
@@ -44,6 +44,20 @@ async def startup_event():
         # Don't fail startup if tracing initialization fails
         logger.warning(f"Failed to initialize OpenTelemetry tracing: {e}")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """
+    Application shutdown event handler.
+    Waits for background task persistence writes, then stops the PDF page splitting process pool and the
+    pipeline config listener.
+    """
+    from util.background_queue import flush_task_persistence
+    from util.pdf_splitter import shutdown_process_pool
+    from adapters.firestore import close_pipeline_config_cache
+    await flush_task_persistence()
+    shutdown_process_pool()
+    close_pipeline_config_cache()
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
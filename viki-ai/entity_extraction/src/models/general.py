@@ -73,6 +73,29 @@ class TaskParameters(PipelineParameters):
             page_number=self.page_number
         )
 
+    def summary(self) -> Dict[str, Any]:
+        """
+        Compact view of the parameters for logging: ids and the sizes of the subject, context and
+        entities instead of their content, which can hold the results of every prior task.
+        """
+        return {
+            "task_id": self.task_config.id,
+            "task_type": self.task_config.type,
+            "task_iteration": self.task_iteration,
+            "app_id": self.app_id,
+            "tenant_id": self.tenant_id,
+            "patient_id": self.patient_id,
+            "document_id": self.document_id,
+            "page_number": self.page_number,
+            "page_count": self.page_count,
+            "pipeline_scope": self.pipeline_scope,
+            "pipeline_key": self.pipeline_key,
+            "run_id": self.run_id,
+            "subject_count": len(self.subject) if isinstance(self.subject, list) else int(self.subject is not None),
+            "context_keys": len(self.context or {}),
+            "entities_keys": len(self.entities or {}),
+        }
+
     @classmethod
     def from_pipeline_parameters(cls, pipeline_params: PipelineParameters, task_config: TaskConfig):
         """
@@ -1,5 +1,5 @@
 from typing import Dict, List, Optional, Any, Union, Literal
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, PrivateAttr
 from enum import Enum
 import uuid
 import json
@@ -28,6 +28,7 @@ class PromptConfig(BaseModel):
     safety_settings: Optional[dict] = None
     context: Optional[Dict[str, Any]] = {}
     is_add_document_uri_to_context: Optional[bool] = True
+    cache_response: Optional[bool] = None  # Reuse the response of an identical earlier prompt; None follows LLM_RESPONSE_CACHE_STEPS
 
 
 class ModuleConfig(BaseModel):
@@ -122,6 +123,20 @@ class PipelineConfig(AggBase):
     auto_publish_entities_enabled: Optional[bool] = True  # Most workflows will want to auto-pubish entities to paperglass.  This can be disabled for cases where intermediate entities are to be extracted for use in later tasks but the intermediates are not be be persisted to paperglass.
     labels: Optional[List[str]] = Field(default_factory=list)  # Array of string labels for filtering and categorization
     app_id: Optional[str] = None  # Application ID for filtering pipeline configurations
+    _task_indexes: Optional[Dict[str, int]] = PrivateAttr(default=None)
+    
+    def task_index(self, task_id: str) -> int:
+        """
+        Index of the task with the given ID in `tasks`, or -1 if there is none.  The ID to index map is
+        built on first use and rebuilt if `tasks` has changed since.
+        """
+        index = self._task_indexes.get(task_id) if self._task_indexes is not None else None
+        if index is None or index >= len(self.tasks) or self.tasks[index].id != task_id:
+            self._task_indexes = {}
+            for i, task in enumerate(self.tasks):
+                self._task_indexes.setdefault(task.id, i)
+            index = self._task_indexes.get(task_id, -1)
+        return index
     
     def model_dump(self, **kwargs):
         """Override model_dump method to ensure Task objects use their custom model_dump method."""
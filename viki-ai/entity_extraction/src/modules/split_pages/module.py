@@ -6,9 +6,11 @@ import pypdf
 from modules.imodule import IModule
 from models.general import TaskParameters, TaskResults
 from models.metric import Metric
-from adapters.storage import StorageAdapter
+from adapters.storage import StorageAdapter, get_storage_client
 from util.custom_logger import getLogger
 from util.exception import exceptionToMap
+from util.pdf_splitter import PageSplitError, split_pdf
+from util.page_stream import publish_page
 import settings
 
 
@@ -45,7 +47,7 @@ class SplitPages(IModule):
 
     def __init__(self):
         super().__init__()
-        self.storage_adapter = StorageAdapter()
+        self.storage_adapter = StorageAdapter(client=get_storage_client())
 
     def _get_base_path(self, task_params: TaskParameters) -> str:
         """
@@ -130,81 +132,88 @@ class SplitPages(IModule):
                     metadata=extra
                 )
 
-            # Split PDF into individual pages
-            pages = []
+            # Split PDF into individual pages: pages are sliced in a process pool and uploaded as they are ready
             base_path = self._get_base_path(task_params)
-            
-            for i in range(total_pages):
-                page_number = i + 1
+
+            async def upload_page(page_number: int, total_pages: int, page_raw_data: bytes) -> Page:
                 page_extra = {**extra, "page_number": page_number}
-                
-                try:
-                    LOGGER.debug(f"Processing page {page_number} of {total_pages}", extra=page_extra)
-                    
-                    # Extract the page
-                    page = pdf_reader.pages[i]
-                    writer = pypdf.PdfWriter()
-                    writer.add_page(page)
-                    
-                    # Convert to bytes
-                    page_raw_data = BytesIO()
-                    writer.write(page_raw_data)
-                    page_raw_data.seek(0)
-                    
-                    # Build the page path
-                    page_path = f"{base_path}/pages/{page_number}.pdf"
-                    
-                    # Save page to GCS
-                    page_uri = await self.storage_adapter.save_document(
-                        document_path=page_path,
-                        content=page_raw_data.getvalue(),
-                        content_type="application/pdf",
-                        metadata={
-                            "app_id": task_params.app_id,
-                            "tenant_id": task_params.tenant_id,
-                            "patient_id": task_params.patient_id,
-                            "document_id": task_params.document_id,
-                            "page_number": str(page_number),
-                            "total_pages": str(total_pages),
-                            "run_id": task_params.run_id,
-                            "source_document": document_storage_uri
-                        }
-                    )
-                    
-                    # Create Page object
-                    page_obj = Page(
-                        storage_uri=page_uri,
-                        page_number=page_number,
-                        total_pages=total_pages,
-                        run_id=task_params.run_id
-                    )
-                    pages.append(page_obj)
-                    
-                    # Emit page created metric for each individual page
-                    page_end_time = time.time()
-                    Metric.send(Metric.MetricType.DOCUMENT_PAGE_CREATED, {
-                        "page_number": i,  # 0-based index like medication_extraction
-                        "page_count": total_pages,
-                        "elapsed_time": page_end_time - start_time,
-                        "request": {
-                            "app_id": task_params.app_id,
-                            "tenant_id": task_params.tenant_id,
-                            "patient_id": task_params.patient_id,
-                            "document_id": task_params.document_id,
-                            "run_id": task_params.run_id
-                        }
-                    })
-                    
-                    LOGGER.debug(f"Successfully saved page {page_number} to {page_uri}", extra=page_extra)
-                    
-                except Exception as e:
-                    error_msg = f"Failed to process page {page_number}: {str(e)}"
-                    LOGGER.error(error_msg, extra=page_extra)
-                    return TaskResults(
-                        success=False,
-                        error_message=error_msg,
-                        metadata=page_extra
-                    )
+                page_start_time = time.time()
+
+                # Build the page path
+                page_path = f"{base_path}/pages/{page_number}.pdf"
+
+                # Save page to GCS
+                page_uri = await self.storage_adapter.save_document(
+                    document_path=page_path,
+                    content=page_raw_data,
+                    content_type="application/pdf",
+                    metadata={
+                        "app_id": task_params.app_id,
+                        "tenant_id": task_params.tenant_id,
+                        "patient_id": task_params.patient_id,
+                        "document_id": task_params.document_id,
+                        "page_number": str(page_number),
+                        "total_pages": str(total_pages),
+                        "run_id": task_params.run_id,
+                        "source_document": document_storage_uri
+                    }
+                )
+
+                # Emit page created metric for each individual page
+                page_end_time = time.time()
+                Metric.send(Metric.MetricType.DOCUMENT_PAGE_CREATED, {
+                    "page_number": page_number - 1,  # 0-based index like medication_extraction
+                    "page_count": total_pages,
+                    "elapsed_time": page_end_time - start_time,
+                    "upload_time": page_end_time - page_start_time,
+                    "page_size_bytes": len(page_raw_data),
+                    "request": {
+                        "app_id": task_params.app_id,
+                        "tenant_id": task_params.tenant_id,
+                        "patient_id": task_params.patient_id,
+                        "document_id": task_params.document_id,
+                        "run_id": task_params.run_id
+                    }
+                })
+
+                LOGGER.debug(f"Successfully saved page {page_number} to {page_uri}", extra=page_extra)
+
+                page = Page(
+                    storage_uri=page_uri,
+                    page_number=page_number,
+                    total_pages=total_pages,
+                    run_id=task_params.run_id
+                )
+
+                # Let the orchestrator start the page's next task while the rest of the document is split.  The
+                # elapsed time is the time so far, the final results report the time of the whole split.
+                await publish_page(page.to_dict(), {
+                    "total_pages": total_pages,
+                    "elapsed_time_seconds": time.time() - start_time,
+                    "base_path": base_path
+                })
+
+                return page
+
+            try:
+                pages = await split_pdf(
+                    raw_data,
+                    upload_page,
+                    total_pages=total_pages,
+                    workers=settings.PDF_SPLIT_WORKERS,
+                    chunk_pages=settings.PDF_SPLIT_CHUNK_PAGES,
+                    process_pool_min_pages=settings.PDF_SPLIT_PROCESS_POOL_MIN_PAGES,
+                    upload_concurrency=settings.PDF_SPLIT_UPLOAD_CONCURRENCY,
+                )
+            except PageSplitError as e:
+                page_extra = {**extra, "page_number": e.page_number}
+                error_msg = str(e)
+                LOGGER.error(error_msg, extra=page_extra)
+                return TaskResults(
+                    success=False,
+                    error_message=error_msg,
+                    metadata=page_extra
+                )
 
             end_time = time.time()
             elapsed_time = end_time - start_time
@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException, Request, Depends
 from usecases.pipeline_start import pipeline_start
 from usecases.task_orchestrator import TaskOrchestrator
 from usecases.pipeline_config import create_or_update_pipeline_config
+from adapters.djt_client import pipeline_status_request_scope
 from util.custom_logger import getLogger
 from util.exception import exceptionToMap
 from models.general import PipelineParameters, TaskParameters
@@ -34,7 +35,9 @@ async def start_pipeline(
     try:
         # Get the request body        
         LOGGER.debug(f"Starting pipeline for scope: {scope}, pipeline: {pipeline_key} with params: {pipeline_params.model_dump()}", extra=extra)
-        result = await pipeline_start(scope, pipeline_key, pipeline_params)
+        # DJT status updates queued while starting the pipeline are sent when this request ends
+        async with pipeline_status_request_scope():
+            result = await pipeline_start(scope, pipeline_key, pipeline_params)
         return result.dict()
         
     except ValueError as e:
@@ -75,8 +78,10 @@ async def run_pipeline_task(
         LOGGER.info(f"Running pipeline task '{task}' for scope: {scope}, pipeline: {pipeline_key}", extra=extra)
         
         # Use TaskOrchestrator to run the task and handle next tasks automatically
+        # DJT status updates queued while running the task are sent when this request ends
         orchestrator = TaskOrchestrator(task)
-        result = await orchestrator.run(task_parameters)
+        async with pipeline_status_request_scope():
+            result = await orchestrator.run(task_parameters)
         
         return result
         
@@ -62,10 +62,26 @@ INTRA_TASK_INVOCATION_DEFAULT_QUEUE = os.getenv("ENTITY_EXTRACTION_INTRA_TASK_IN
 
 ENTITYEXTRACTION_CONTEXT_GCS_BUCKET = os.getenv('ENTITYEXTRACTION_CONTEXT_GCS_BUCKET', f"entityextraction-context-{STAGE}")
 ENTITYEXTRACTION_TASK_PERSIST_GCS_ENABLED = to_bool(os.getenv("ENTITYEXTRACTION_TASK_PERSIST_GCS_ENABLED", "true"))
+ENTITYEXTRACTION_TASK_PERSIST_GZIP_ENABLED = to_bool(os.getenv("ENTITYEXTRACTION_TASK_PERSIST_GZIP_ENABLED", "false"))  # Store the persisted task JSON gzipped (Content-Encoding: gzip)
+ENTITYEXTRACTION_TASK_PERSIST_BACKGROUND_ENABLED = to_bool(os.getenv("ENTITYEXTRACTION_TASK_PERSIST_BACKGROUND_ENABLED", "false"))  # Write the persisted task JSON off the task's critical path; requires CPU outside requests (e.g. Cloud Run CPU always allocated)
+ENTITYEXTRACTION_TASK_PERSIST_MAX_PENDING = to_int(os.getenv("ENTITYEXTRACTION_TASK_PERSIST_MAX_PENDING", "64"))  # Background writes in flight before tasks wait for one to finish
+ENTITYEXTRACTION_TASK_PERSIST_FLUSH_TIMEOUT = to_int(os.getenv("ENTITYEXTRACTION_TASK_PERSIST_FLUSH_TIMEOUT", "20"))  # Seconds shutdown waits for background writes
+GCS_IO_WORKERS = to_int(os.getenv("GCS_IO_WORKERS", "32"))  # Threads running blocking GCS calls, shared by all storage adapters
+ENTITYEXTRACTION_CONTEXT_BY_REFERENCE_ENABLED = to_bool(os.getenv('ENTITYEXTRACTION_CONTEXT_BY_REFERENCE_ENABLED', 'false'))  # Store large task results once in the context bucket and pass references down the pipeline
+ENTITYEXTRACTION_CONTEXT_REF_MIN_BYTES = to_int(os.getenv('ENTITYEXTRACTION_CONTEXT_REF_MIN_BYTES', '4096'))  # Smaller task results stay inline
+
+# PDF Page Splitting Configuration
+PDF_SPLIT_WORKERS = to_int(os.getenv('PDF_SPLIT_WORKERS', '0'))  # Processes slicing pages; 0 uses the CPU count
+PDF_SPLIT_CHUNK_PAGES = to_int(os.getenv('PDF_SPLIT_CHUNK_PAGES', '8'))  # Fewest pages per process pool job; large documents get one page range per worker
+PDF_SPLIT_PROCESS_POOL_MIN_PAGES = to_int(os.getenv('PDF_SPLIT_PROCESS_POOL_MIN_PAGES', '16'))  # Smaller documents are sliced in a thread
+PDF_SPLIT_UPLOAD_CONCURRENCY = to_int(os.getenv('PDF_SPLIT_UPLOAD_CONCURRENCY', '16'))  # Max concurrent page uploads
+PIPELINE_PAGE_STREAMING_ENABLED = to_bool(os.getenv('PIPELINE_PAGE_STREAMING_ENABLED', 'false'))  # Submit each page's next task as soon as the page is written
 
 # Distributed Job Tracking API URL
 DJT_API_URL = getenv_or_die('DJT_API_URL')
 DJT_API_TIMEOUT = to_double(os.getenv('DJT_API_TIMEOUT', '60.0'))
+DJT_STATUS_BUFFER_MAX_UPDATES = to_int(os.getenv('DJT_STATUS_BUFFER_MAX_UPDATES', '50'))  # Queued status updates of a run that are sent at once
+DJT_STATUS_BUFFER_FLUSH_INTERVAL_MS = to_int(os.getenv('DJT_STATUS_BUFFER_FLUSH_INTERVAL_MS', '200'))  # Longest a status update waits; the rest is sent when the request ends
 
 # Use Docker service name when running in Docker, localhost otherwise
 CLOUDTASK_EMULATOR_ENABLED = to_bool(os.getenv("CLOUDTASK_EMULATOR_ENABLED", "false"))
@@ -73,8 +89,13 @@ CLOUDTASK_EMULATOR_URL = os.getenv("CLOUDTASK_EMULATOR_URL", "http://localhost:3
 
 # Cloud Tasks Configuration
 DEFAULT_TASK_QUEUE = os.getenv("DEFAULT_TASK_QUEUE", "default-queue")
+CLOUD_TASK_SUBMIT_CONCURRENCY = to_int(os.getenv("CLOUD_TASK_SUBMIT_CONCURRENCY", "16"))  # Next step tasks created at a time when fanning out
 MEDICATION_EXTRACTION_V4_STATUS_CHECK_QUEUE_NAME = getenv_or_die('MEDICATION_EXTRACTION_V4_STATUS_CHECK_QUEUE_NAME')
 
+# Pipeline config cache
+PIPELINE_CONFIG_CACHE_LISTENER_ENABLED = to_bool(os.getenv("PIPELINE_CONFIG_CACHE_LISTENER_ENABLED", "true"))  # Serve pipeline configs from memory until a Firestore listener reports a change
+PIPELINE_CONFIG_CACHE_TTL = to_int(os.getenv("PIPELINE_CONFIG_CACHE_TTL", "60"))  # Seconds before reloading a pipeline config when no listener is active
+
 # JSON utilities configuration
 JSON_CLEANERS = [
     {"type": "regex", "match": "(\\\\)", "replace": "\\\\\\\\"}
@@ -93,6 +114,15 @@ LLM_MAX_OUTPUT_TOKENS_DEFAULT = to_int(os.getenv('LLM_MAX_OUTPUT_TOKENS', '8192'
 LLM_TEMPERATURE_DEFAULT = to_double(os.getenv('LLM_TEMPERATURE', '0.0'))
 LLM_TOP_P_DEFAULT = to_double(os.getenv('LLM_TOP_P', '0.95'))
 LLM_PROMPT_AUDIT_ENABLED = to_bool(os.getenv('LLM_PROMPT_AUDIT_ENABLED', 'true'))
+LLM_RESPONSE_CACHE_ENABLED = to_bool(os.getenv('LLM_RESPONSE_CACHE_ENABLED', 'false'))  # Reuse responses of identical temperature 0 prompts
+LLM_RESPONSE_CACHE_BACKEND = os.getenv('LLM_RESPONSE_CACHE_BACKEND', 'memory')  # memory, disk or gcs
+LLM_RESPONSE_CACHE_STEPS = [step for step in to_list_of_strings(os.getenv('LLM_RESPONSE_CACHE_STEPS', '')) if step]  # Prompt task ids to cache; empty caches all (a prompt's cache_response overrides)
+LLM_RESPONSE_CACHE_VERSION = os.getenv('LLM_RESPONSE_CACHE_VERSION', '1')  # Bump to invalidate every cached response
+LLM_RESPONSE_CACHE_TTL = to_int(os.getenv('LLM_RESPONSE_CACHE_TTL', '604800'))  # Seconds a cached response stays valid
+LLM_RESPONSE_CACHE_MEMORY_SIZE = to_int(os.getenv('LLM_RESPONSE_CACHE_MEMORY_SIZE', '1000'))  # Max responses kept by the memory backend
+LLM_RESPONSE_CACHE_DIR = os.getenv('LLM_RESPONSE_CACHE_DIR', '/tmp/llm_response_cache')  # Directory of the disk backend
+LLM_RESPONSE_CACHE_BUCKET = os.getenv('LLM_RESPONSE_CACHE_BUCKET', ENTITYEXTRACTION_CONTEXT_GCS_BUCKET)  # Bucket of the gcs backend
+LLM_RESPONSE_CACHE_PREFIX = os.getenv('LLM_RESPONSE_CACHE_PREFIX', 'llm_response_cache')  # Object prefix of the gcs backend
 
 # OpenTelemetry Tracing Configuration
 ENABLE_GCP_TRACE_EXPORTER = to_bool(os.getenv('ENABLE_GCP_TRACE_EXPORTER', 'true'))
@@ -193,10 +193,9 @@ async def pipeline_start(scope: str, pipeline_key: str, pipeline_params: Pipelin
                 pages=pipeline_params.page_count
             )
             
-            await djt_client.pipeline_status_update(
+            await djt_client.queue_pipeline_status_updates(
                 job_id=run_id,
-                pipeline_id=f"{scope}:{pipeline_key}",
-                pipeline_data=pipeline_status_data
+                updates=[(f"{scope}:{pipeline_key}", pipeline_status_data)]
             )
             
             logger.info(f"Updated DJT pipeline status to IN_PROGRESS for run_id: {run_id}", extra=extra)
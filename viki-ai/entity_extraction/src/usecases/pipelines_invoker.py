@@ -1,9 +1,9 @@
 from models.general import TaskParameters, TaskResults, PipelineParameters
-from adapters.cloud_tasks import CloudTaskAdapter
+from adapters.cloud_tasks import CloudTaskAdapter, next_step_task_name
 from adapters.djt_client import get_djt_client
 from models.djt_models import PipelineStatusUpdate, PipelineStatus
 from util.custom_logger import getLogger
-from util.exception import exceptionToMap
+from util.exception import exceptionToMap, TaskAlreadyExistsException
 import settings
 
 LOGGER = getLogger(__name__)
@@ -32,6 +32,7 @@ class PipelinesInvoker:
             pipeline_names_list = ",".join(pipeline_names)
             
             pipeline_results = []
+            status_updates = []
             cloud_task_adapter = CloudTaskAdapter()
             
             try:
@@ -72,15 +73,22 @@ class PipelinesInvoker:
                     base_url = pipeline_ref.host or settings.SELF_API_URL
                     url = f"{base_url}/api/pipeline/{pipeline_scope}/{pipeline_id}/start"
                     
-                    # Create a cloud task to invoke the pipeline
-                    response = await cloud_task_adapter.create_task(
-                        location=settings.GCP_LOCATION_2,
-                        queue=pipeline_ref.queue or settings.DEFAULT_TASK_QUEUE,
-                        url=url,
-                        payload=pipeline_params.dict(),
-                        task_name=f"pipeline-{pipeline_ref.id}-{task_params.run_id}",
-                        service_account_email=settings.SERVICE_ACCOUNT_EMAIL
-                    )
+                    # Create a cloud task to invoke the pipeline.  The name is unique per page of this start of
+                    # the run but not per iteration, so a redelivery or a retry after a partial failure doesn't
+                    # start the sub-pipelines that were already queued again.
+                    task_name = next_step_task_name(f"pipeline-{pipeline_scope}-{pipeline_id}", task_params, per_iteration=False)
+                    try:
+                        response = await cloud_task_adapter.create_task(
+                            location=settings.GCP_LOCATION_2,
+                            queue=pipeline_ref.queue or settings.DEFAULT_TASK_QUEUE,
+                            url=url,
+                            payload=pipeline_params.dict(),
+                            task_name=task_name,
+                            service_account_email=settings.SERVICE_ACCOUNT_EMAIL
+                        )
+                    except TaskAlreadyExistsException:
+                        LOGGER.info(f"Pipeline {pipeline_ref.id} already queued as {task_name}", extra=extra)
+                        response = {"name": task_name, "duplicate": True}
                     
                     LOGGER.info(f"Successfully queued pipeline {pipeline_ref.id}", extra={
                         **extra,
@@ -88,56 +96,53 @@ class PipelinesInvoker:
                         "cloud_task_response": response
                     })
                     
-                    # Update pipeline status in DJT service
+                    # The DJT statuses of all sub-pipelines are sent as one batch below
+                    status_updates.append((f"{pipeline_scope}:{pipeline_id}", PipelineStatusUpdate(
+                        id=f"{pipeline_scope}.{pipeline_id}",
+                        status=PipelineStatus.IN_PROGRESS,
+                        page_number=task_params.page_number,
+                        metadata={
+                            "cloud_task_response": response,
+                            "queue": pipeline_ref.queue or settings.DEFAULT_TASK_QUEUE,
+                            "url": url,
+                            "pipeline_scope": pipeline_scope
+                        },
+                        app_id=task_params.app_id,
+                        tenant_id=task_params.tenant_id,
+                        patient_id=task_params.patient_id,
+                        document_id=task_params.document_id,
+                        pages=task_params.page_count or 1
+                    )))
+                    
+                    pipeline_results.append({
+                        "pipeline_id": pipeline_ref.id,
+                        "status": "queued",
+                        "message": f"Pipeline {pipeline_ref.id} queued successfully",
+                        "cloud_task_response": response
+                    })
+                    
+            finally:
+                await cloud_task_adapter.close()
+                # Update the status of the queued pipelines in DJT service, also when a later one failed to queue
+                if status_updates:
                     try:
                         djt_client = get_djt_client()
-                        
-                        # Create pipeline status update
-                        pipeline_status_update = PipelineStatusUpdate(
-                            id=f"{pipeline_scope}.{pipeline_id}",
-                            status=PipelineStatus.IN_PROGRESS,
-                            page_number=task_params.page_number,
-                            metadata={
-                                "cloud_task_response": response,
-                                "queue": pipeline_ref.queue or settings.DEFAULT_TASK_QUEUE,
-                                "url": url,
-                                "pipeline_scope": pipeline_scope
-                            },
-                            app_id=task_params.app_id,
-                            tenant_id=task_params.tenant_id,
-                            patient_id=task_params.patient_id,
-                            document_id=task_params.document_id,
-                            pages=task_params.page_count or 1
-                        )
-                        
-                        # Call DJT service to update pipeline status
-                        djt_response = await djt_client.pipeline_status_update(
+                        djt_response = await djt_client.queue_pipeline_status_updates(
                             job_id=task_params.run_id,
-                            pipeline_id=f"{pipeline_scope}:{pipeline_id}",
-                            pipeline_data=pipeline_status_update
+                            updates=status_updates
                         )
                         
-                        LOGGER.info(f"Successfully updated DJT pipeline status for {pipeline_ref.id}", extra={
+                        LOGGER.info(f"Successfully updated DJT pipeline status for {len(status_updates)} pipeline(s)", extra={
                             **extra,
                             "djt_response": djt_response
                         })
                         
                     except Exception as djt_error:
                         # Log DJT error but don't fail the entire pipeline operation
-                        LOGGER.warning(f"Failed to update DJT pipeline status for {pipeline_ref.id}: {str(djt_error)}", extra={
+                        LOGGER.warning(f"Failed to update DJT pipeline status for {len(status_updates)} pipeline(s): {str(djt_error)}", extra={
                             **extra,
                             "djt_error": exceptionToMap(djt_error)
                         })
-                    
-                    pipeline_results.append({
-                        "pipeline_id": pipeline_ref.id,
-                        "status": "queued",
-                        "message": f"Pipeline {pipeline_ref.id} queued successfully",
-                        "cloud_task_response": response
-                    })
-                    
-            finally:
-                await cloud_task_adapter.close()
             
             LOGGER.info("Pipelines task completed")
             
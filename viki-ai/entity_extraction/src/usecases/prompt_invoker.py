@@ -1,10 +1,12 @@
 from datetime import datetime
-from typing import List, Union, Tuple, Optional, Dict, Any
+from string import Formatter
+from typing import List, Union, Tuple, Optional, Dict, Any, Set
 import json
 
 from models.general import TaskParameters, TaskResults
 from models.metric import Metric
 from adapters.llm import StandardPromptAdapter, LLMResponse, UsageMetadata
+from adapters.context_store import hydrate
 from util.custom_logger import getLogger
 from util.exception import exceptionToMap
 
@@ -76,6 +78,13 @@ class PromptInvoker:
             
             # Prepare metadata for tracking and auditing
             metadata = task_params.model_dump()
+
+            # Prior results stored by reference are only fetched when a template actually uses them
+            templates = [prompt_config.prompt or ""] + list(getattr(prompt_config, 'system_instructions', None) or [])
+            referenced_fields = self._template_fields(templates)
+            for field in ("context", "entities", "subject"):
+                if field in referenced_fields:
+                    metadata[field] = await hydrate(metadata.get(field))
             
             # Add subject_uri to extra logging for debugging
             extra = {
@@ -178,7 +187,8 @@ class PromptInvoker:
                 schema=schema,
                 metadata=metadata,
                 stream=True,
-                app_id=task_params.app_id
+                app_id=task_params.app_id,
+                cache_response=getattr(prompt_config, 'cache_response', None)
             )
             
             # Process the response text
@@ -346,6 +356,24 @@ class PromptInvoker:
                 }
             )
     
+    def _template_fields(self, templates: List[str]) -> Set[str]:
+        """
+        Top-level names the templates reference, e.g. "context" for "{context[default][pipeline][task]}".
+        
+        :param templates: Prompt templates in str.format syntax
+        :return: Set of referenced names
+        """
+        fields = set()
+        for template in templates:
+            try:
+                for _, field_name, _, _ in Formatter().parse(template):
+                    if field_name:
+                        fields.add(field_name.split(".", 1)[0].split("[", 1)[0])
+            except ValueError:
+                # Malformed templates are left to _format_prompt_template to report
+                continue
+        return fields
+
     def _format_prompt_template(self, template: str, context: Dict[str, Any]) -> str:
         """
         Format a prompt template with context variables.
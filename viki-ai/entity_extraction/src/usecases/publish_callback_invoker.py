@@ -7,6 +7,7 @@ from pydantic import BaseModel
 
 from models.general import TaskParameters, TaskResults, EntityWrapper
 from models.pipeline_config import PublishCallbackConfig
+from adapters.context_store import hydrate
 from util.custom_logger import getLogger
 from util.exception import exceptionToMap
 
@@ -75,7 +76,7 @@ class PublishCallbackInvoker:
             LOGGER.info("Running publish callback task", extra=extra)
             
             # Find entities for the current pipeline scope and key
-            entities = self._extract_entities(task_params)
+            entities = self._extract_entities(task_params.model_copy(update={"entities": await hydrate(task_params.entities)}))
             
             if not entities:
                 LOGGER.info("No entities found to publish", extra=extra)
@@ -5,6 +5,7 @@ import aiohttp
 import asyncio
 
 from models.general import TaskParameters, TaskResults
+from adapters.context_store import hydrate
 from util.custom_logger import getLogger
 from util.exception import exceptionToMap
 
@@ -39,7 +40,11 @@ class RemoteInvoker:
             
             LOGGER.info(f"Running remote task: {method} {url}")
             
-            # Prepare the request payload
+            # Prepare the request payload, with prior results stored by reference resolved for the remote endpoint
+            task_params = task_params.model_copy(update={
+                "context": await hydrate(task_params.context),
+                "entities": await hydrate(task_params.entities)
+            })
             payload = self._prepare_payload(task_params, remote_config)
             
             # Set default content type if not specified
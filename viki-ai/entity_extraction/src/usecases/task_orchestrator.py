@@ -1,4 +1,5 @@
-from typing import List, Dict, Any
+import asyncio
+from typing import List, Dict, Any, Optional, Set
 from datetime import datetime, timedelta
 from models.general import TaskParameters, TaskResults, PipelineParameters, EntityWrapper
 from models.pipeline_config import TaskType, TaskConfig
@@ -8,14 +9,17 @@ from usecases.prompt_invoker import PromptInvoker
 from usecases.pipelines_invoker import PipelinesInvoker
 from usecases.remote_invoker import RemoteInvoker
 from usecases.publish_callback_invoker import PublishCallbackInvoker
-from adapters.storage import StorageAdapter
+from adapters.storage import StorageAdapter, get_bucket_storage_adapter
 from adapters.firestore import search_pipeline_config
-from adapters.cloud_tasks import CloudTaskAdapter
+from adapters.cloud_tasks import CloudTaskAdapter, next_step_task_name
 from adapters.djt_client import get_djt_client
+from adapters.context_store import context_by_reference_enabled, get_context_store, hydrate, is_context_ref
 from models.djt_models import PipelineStatusUpdate, PipelineStatus
-from util.custom_logger import getLogger, set_pipeline_context
-from util.exception import exceptionToMap
+from util.custom_logger import getLogger, lazy, set_pipeline_context
+from util.exception import exceptionToMap, OrchestrationException, TaskAlreadyExistsException
 from util.json_utils import JsonUtil
+from util.page_stream import set_page_sink, reset_page_sink
+from util.background_queue import get_task_persistence_queue
 from util.tracing import trace_function, trace_pipeline_step, add_span_attributes, add_span_event, traced_operation
 from decorators.task_metric import task_metric
 import settings
@@ -25,6 +29,63 @@ LOGGER = getLogger(__name__)
 QUEUE_DIRECT = "DIRECT"  # Pseudo queue for direct invocation
 QUEUE_DEFAULT = "DEFAULT"  # Default queue for task invocations
 
+class PageFanout:
+    """
+    Submits the next task of a `for_each: page` task for each page as soon as the running task publishes it
+    (see util.page_stream), so downstream page work starts while the document is still being split.
+
+    Pages whose submission fails are not recorded and are submitted with the remaining next tasks once the
+    task has finished.
+    """
+
+    def __init__(self, orchestrator: "TaskOrchestrator", task_params: TaskParameters, next_task: TaskConfig):
+        self.orchestrator = orchestrator
+        self.task_params = task_params
+        self.next_task = next_task
+        self.submitted: Set[int] = set()
+        self.cloud_task_adapter = CloudTaskAdapter()
+
+    async def submit(self, page: Dict[str, Any], results: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Submit the next task of a page.
+
+        Args:
+            page: The page, as it appears in the task's results
+            results: Document-level results of the task known so far (total_pages, base_path, ...)
+        """
+        page_number = page.get("page_number")
+        if page_number is None or page_number in self.submitted:
+            return
+
+        extra = {
+            "current_task_id": self.task_params.task_config.id,
+            "next_task_id": self.next_task.id,
+            "run_id": self.task_params.run_id,
+            "page_number": page_number
+        }
+        try:
+            if results is None:
+                results = {"total_pages": page.get("total_pages")}
+            for next_task in self.orchestrator._create_page_task_parameters(self.task_params, results, self.next_task, [page]):
+                try:
+                    await self.cloud_task_adapter.create_task_for_next_step(
+                        task_id=next_task.task_config.id,
+                        task_parameters=next_task,
+                        task_name=next_step_task_name(next_task.task_config.id, next_task)
+                    )
+                except TaskAlreadyExistsException:
+                    # Already queued by this start of the run (the name holds the pipeline start date)
+                    pass
+                self.submitted.add(page_number)
+                LOGGER.debug(f"Submitted streamed task {next_task.task_config.id} for page {page_number}", extra=extra)
+        except Exception as e:
+            extra.update({"error": exceptionToMap(e)})
+            LOGGER.warning(f"Failed to submit streamed task for page {page_number}, it will be submitted when the task completes: {str(e)}", extra=extra)
+
+    async def close(self) -> None:
+        await self.cloud_task_adapter.close()
+
+
 class TaskOrchestrator:
     """
     A class to orchestrate tasks based on the provided task parameters and type.
@@ -42,6 +103,29 @@ class TaskOrchestrator:
         page_number = task_params.page_number or "document"
         return f"{task_params.app_id}/{task_params.tenant_id}/{task_params.patient_id}/{task_params.document_id}/{task_params.run_id}/{page_number}/{task_params.pipeline_scope}/{task_params.pipeline_key}/{task_params.task_config.id}/{filename}"
     
+    async def _save_task_documents(self, storage_adapter: StorageAdapter, documents: List[Dict[str, Any]], extra: Dict[str, Any]) -> None:
+        """
+        Write the task's persisted JSON documents concurrently, or hand the writes to the background
+        persistence queue when ENTITYEXTRACTION_TASK_PERSIST_BACKGROUND_ENABLED.  The content must already
+        be serialized, since the task parameters keep changing after this returns.
+        """
+        async def _write():
+            saved = await asyncio.gather(*[
+                storage_adapter.save_document(
+                    content_type="application/json",
+                    compress=settings.ENTITYEXTRACTION_TASK_PERSIST_GZIP_ENABLED,
+                    **document
+                ) for document in documents
+            ], return_exceptions=True)
+            errors = [result for result in saved if isinstance(result, Exception)]
+            if errors:
+                raise errors[0]
+
+        if settings.ENTITYEXTRACTION_TASK_PERSIST_BACKGROUND_ENABLED:
+            await get_task_persistence_queue().submit(_write(), f"persistence of task {self.task_name}", extra)
+        else:
+            await _write()
+
     async def _persist_task_params_to_gcs(self, task_params: TaskParameters) -> None:
         """
         Persist TaskParameters to Google Cloud Storage.
@@ -49,9 +133,9 @@ class TaskOrchestrator:
         :param task_params: The task parameters to persist
         """
         try:
-            # Create storage adapter with custom bucket name
+            # Shared storage adapter of the context bucket
             bucket_name = f"entityextraction-context-{settings.STAGE}"
-            storage_adapter = StorageAdapter(bucket_name=bucket_name)
+            storage_adapter = get_bucket_storage_adapter(bucket_name)
             
             # Build path for input file
             input_path = self._build_gcs_path(task_params, "input.json")
@@ -68,18 +152,17 @@ class TaskOrchestrator:
             input_json = JsonUtil.dumps(task_params.model_dump())
             
             # Save to GCS
-            await storage_adapter.save_document(
-                document_path=input_path,
-                content=input_json,
-                content_type="application/json",
-                metadata={
+            await self._save_task_documents(storage_adapter, [{
+                "document_path": input_path,
+                "content": input_json,
+                "metadata": {
                     "task_name": self.task_name,
                     "task_type": str(task_params.task_config.type),
                     "run_id": task_params.run_id,
                     "app_id": task_params.app_id,
                     "tenant_id": task_params.tenant_id
                 }
-            )
+            }], extra)
             
             LOGGER.info(f"Successfully persisted task parameters to GCS for task {self.task_name}", extra=extra)
             
@@ -101,9 +184,9 @@ class TaskOrchestrator:
         extra = {}
 
         try:
-            # Create storage adapter with custom bucket name
+            # Shared storage adapter of the context bucket
             bucket_name = f"entityextraction-context-{settings.STAGE}"
-            storage_adapter = StorageAdapter(bucket_name=bucket_name)
+            storage_adapter = get_bucket_storage_adapter(bucket_name)
             
             # Build path for output file
             results_path = self._build_gcs_path(task_params, "results.json")
@@ -121,34 +204,20 @@ class TaskOrchestrator:
             results_json = JsonUtil.dumps(results.model_dump())
             output_json = JsonUtil.dumps(task_params.model_dump())
             
-            # Save to GCS
-            await storage_adapter.save_document(
-                document_path=output_path,
-                content=output_json,
-                content_type="application/json",
-                metadata={
-                    "task_name": self.task_name,
-                    "task_type": str(task_params.task_config.type),
-                    "run_id": task_params.run_id,
-                    "app_id": task_params.app_id,
-                    "tenant_id": task_params.tenant_id,
-                    "success": str(results.success)
-                }
-            )
+            metadata = {
+                "task_name": self.task_name,
+                "task_type": str(task_params.task_config.type),
+                "run_id": task_params.run_id,
+                "app_id": task_params.app_id,
+                "tenant_id": task_params.tenant_id,
+                "success": str(results.success)
+            }
 
-            await storage_adapter.save_document(
-                document_path=results_path,
-                content=results_json,
-                content_type="application/json",
-                metadata={
-                    "task_name": self.task_name,
-                    "task_type": str(task_params.task_config.type),
-                    "run_id": task_params.run_id,
-                    "app_id": task_params.app_id,
-                    "tenant_id": task_params.tenant_id,
-                    "success": str(results.success)
-                }
-            )
+            # Save both to GCS at once
+            await self._save_task_documents(storage_adapter, [
+                {"document_path": output_path, "content": output_json, "metadata": metadata},
+                {"document_path": results_path, "content": results_json, "metadata": metadata}
+            ], extra)
             
             LOGGER.info(f"Successfully persisted task output and results to GCS for task {self.task_name}", extra=extra)
             
@@ -272,20 +341,56 @@ class TaskOrchestrator:
             })
             # Don't re-raise as this shouldn't fail the task
 
+    async def _store_task_results_by_reference(self, task_params: TaskParameters, results: TaskResults) -> None:
+        """
+        Replace the task's entries in the context and entities with references to a single copy of them in
+        the context bucket, so next tasks (one per page) do not each carry the full results.
+        On error the results stay inline.
+
+        Args:
+            task_params: The task parameters whose context and entities hold the task's results
+            results: The task results, as next tasks see them in their context
+        """
+        task_id = task_params.task_config.id
+        try:
+            context_store = get_context_store()
+
+            pipeline_context = task_params.context[task_params.pipeline_scope][task_params.pipeline_key]
+            pipeline_context[task_id] = await context_store.put(self._build_gcs_path(task_params, "context.json"), results.model_dump())
+
+            pipeline_entities = ((task_params.entities or {}).get(task_params.pipeline_scope) or {}).get(task_params.pipeline_key) or {}
+            if task_id in pipeline_entities:
+                entity_data = pipeline_entities[task_id]
+                if isinstance(entity_data, EntityWrapper):
+                    entity_data = entity_data.model_dump()
+                pipeline_entities[task_id] = await context_store.put(self._build_gcs_path(task_params, "entities.json"), entity_data)
+
+            LOGGER.debug("Stored task results by reference", extra={
+                "task_id": task_id,
+                "context_by_reference": is_context_ref(pipeline_context[task_id]),
+                "entities_by_reference": is_context_ref(pipeline_entities.get(task_id))
+            })
+
+        except Exception as e:
+            LOGGER.warning(f"Failed to store results of task {task_id} by reference, keeping them inline: {str(e)}", extra={
+                "task_id": task_id,
+                "error": exceptionToMap(e)
+            })
+
     async def invoke(self, task_params: TaskParameters) -> TaskParameters:
         """
         Invokes the task based on the task name.
         """
 
-        LOGGER.info(f"Invoking task {self.task_name} with parameters: {task_params.model_dump()}")
-        
         extra = {
-            "task_params": task_params.model_dump()
+            "task_params": task_params.summary()
         }
 
+        LOGGER.debug(f"Invoking task {self.task_name}", extra={"task_params": lazy(task_params.model_dump)})
+
         if (settings.CLOUD_PROVIDER == "local" and not settings.CLOUDTASK_EMULATOR_ENABLED) or (task_params.task_config.invoke and task_params.task_config.invoke.queue_name==QUEUE_DIRECT) :
             # For local development, we can directly call the run method
-            LOGGER.info(f"Invoking task {self.task_name} directly", extra={"task_params": task_params.model_dump()})
+            LOGGER.info(f"Invoking task {self.task_name} directly", extra=extra)
             return await self.run(task_params)
         else:
             # For cloud environments, invoke the task using Cloud Task queue (or the emulator if enabled in local environment)
@@ -307,7 +412,7 @@ class TaskOrchestrator:
                 )
                 
                 LOGGER.info(f"Successfully created cloud task for {self.task_name}", extra={
-                    "task_params": task_params.model_dump(),
+                    "task_params": task_params.summary(),
                     "cloud_task_response": response
                 })
                 
@@ -358,7 +463,7 @@ class TaskOrchestrator:
         })
 
         extra = {
-            "task_params": task_params.model_dump()
+            "task_params": task_params.summary()
         }
         
         add_span_event("task_execution_started", {
@@ -366,7 +471,7 @@ class TaskOrchestrator:
             "task_type": str(task_type)
         })
         
-        LOGGER.debug(f"Running task {self.task_name} of type {task_type}", extra=extra)
+        LOGGER.debug(f"Running task {self.task_name} of type {task_type}", extra={"task_params": lazy(task_params.model_dump)})
         
         # Set task context for logging
         set_pipeline_context(
@@ -387,11 +492,30 @@ class TaskOrchestrator:
             await self._persist_task_params_to_gcs(task_params)
         
         try:
-            # Execute the main task logic
-            results = await self._execute_task(task_params, task_type, extra)
+            # With page streaming, the next task of each page is submitted as soon as the module publishes the page
+            page_fanout = await self._start_page_fanout(task_params)
+            token = set_page_sink(page_fanout.submit if page_fanout else None)
+            try:
+                # Execute the main task logic
+                results = await self._execute_task(task_params, task_type, extra)
+            finally:
+                reset_page_sink(token)
+                if page_fanout:
+                    await page_fanout.close()
+
+            # Pages streamed while the task ran already have their next task
+            streamed_pages = page_fanout.submitted if page_fanout else set()
+            if streamed_pages and not results.success:
+                # The run now expects page_count pages that the failed task never published.  Retry it (the page
+                # tasks already submitted are skipped as duplicates) or, past the retry limit, fail the pipeline.
+                raise OrchestrationException(
+                    f"Task failed after streaming {len(streamed_pages)} page task(s): {results.error_message}"
+                )
 
             # Add results to task parameters context for the next task
             self._add_task_results_to_context(task_params, results)
+            if context_by_reference_enabled():
+                await self._store_task_results_by_reference(task_params, results)
             
             # Persist the results to GCS
             if settings.ENTITYEXTRACTION_TASK_PERSIST_GCS_ENABLED:                
@@ -399,6 +523,13 @@ class TaskOrchestrator:
 
             # Determine next tasks to execute (this will now include the updated entities)
             next_tasks = await self._determine_next_tasks(task_params, results)
+
+            if streamed_pages:
+                next_tasks = [next_task for next_task in next_tasks if next_task.page_number not in streamed_pages]
+                if not results.metadata:
+                    results.metadata = {}
+                results.metadata["streamed_page_tasks"] = sorted(streamed_pages)
+                LOGGER.info(f"Submitted {len(streamed_pages)} page task(s) while the task ran, {len(next_tasks)} remaining", extra=extra)
             
             # Handle next tasks or pipeline completion
             if next_tasks:
@@ -417,18 +548,19 @@ class TaskOrchestrator:
                 # Submit next tasks via Cloud Tasks (emulator or real)
                 cloud_task_adapter = CloudTaskAdapter()
                 try:
-                    for next_task in next_tasks:                        
-                        LOGGER.info(f"Submitting next task: {next_task.task_config.id} (Type: {next_task.task_config.type}, Page: {next_task.page_number})", extra=extra)
-                        
-                        await cloud_task_adapter.create_task_for_next_step(
-                            task_id=next_task.task_config.id,
-                            task_parameters=next_task
-                        )
-                        
-                        LOGGER.debug(f"Successfully submitted task {next_task.task_config.id} to Cloud Tasks", extra=extra)
-                        
+                    submission = await cloud_task_adapter.create_tasks_for_next_steps(next_tasks)
                 finally:
                     await cloud_task_adapter.close()
+
+                if submission.failed:
+                    # The task is retried; its next tasks that were created are skipped as duplicates then
+                    raise OrchestrationException(
+                        f"Failed to submit {len(submission.failed)} of {len(next_tasks)} next task(s): {submission.failed[0]['error']}"
+                    )
+                LOGGER.debug(f"Submitted {len(submission.submitted)} next task(s) to Cloud Tasks, {len(submission.duplicates)} already submitted", extra=extra)
+            elif streamed_pages:
+                # The pipeline continues in the streamed page tasks, which report its completion
+                LOGGER.debug("All next tasks were submitted while the task ran", extra=extra)
             else:
                 LOGGER.info("No next tasks determined - pipeline may be complete", extra=extra)
                 
@@ -478,7 +610,7 @@ class TaskOrchestrator:
                 return []
 
             # Find current task index
-            current_task_index = self._find_task_index(pipeline_config.tasks, task_params.task_config.id)
+            current_task_index = pipeline_config.task_index(task_params.task_config.id)
             if current_task_index == -1:
                 LOGGER.warning(f"Task '{task_params.task_config.id}' not found in pipeline", extra=extra)
                 return []
@@ -498,6 +630,11 @@ class TaskOrchestrator:
             last_task_context_insertion_data = task_results.model_dump()
             last_task_context_task = {}
             last_task_context_task[task_params.task_config.id] = last_task_context_insertion_data
+
+            # Results stored by reference travel to the next tasks as that reference
+            stored_results = ((task_params.context or {}).get(task_params.pipeline_scope) or {}).get(task_params.pipeline_key, {}).get(task_params.task_config.id)
+            if is_context_ref(stored_results):
+                last_task_context_task[task_params.task_config.id] = stored_results
             last_task_context_pipeline = {}
             last_task_context_pipeline[task_params.pipeline_key] = last_task_context_task
             last_task_context_scope = {}
@@ -548,8 +685,9 @@ class TaskOrchestrator:
                 extra.update({"page_count": len(pages)})
                 LOGGER.debug(f"Creating {len(pages)} task instances for pages", extra=extra)
 
-                # Create TaskParameters for each page
-                return self._create_task_parameters_for_pages(pipeline_params, next_task, pages)
+                # Create TaskParameters for each page, like PageFanout does for a streamed page
+                results = task_results.results if isinstance(task_results.results, dict) else {}
+                return self._create_page_task_parameters(task_params, results, next_task, pages)
 
             else:
                 # No post-processing, create single task
@@ -562,21 +700,45 @@ class TaskOrchestrator:
             LOGGER.error(f"Error determining next tasks: {str(e)}", extra=extra)
             return []
 
-    def _find_task_index(self, tasks: List[TaskConfig], task_id: str) -> int:
+    async def _start_page_fanout(self, task_params: TaskParameters) -> Optional[PageFanout]:
         """
-        Find the index of a task in the task list by its ID.
-
-        Args:
-            tasks: List of Task objects
-            task_id: ID of the task to find
+        Prepare streaming of the next task per page for a `for_each: page` task, when
+        PIPELINE_PAGE_STREAMING_ENABLED is on and the pipeline has a next task.
 
         Returns:
-            Index of the task, or -1 if not found
+            The PageFanout to publish pages to, or None to fan out only once the task has finished
         """
-        for i, task in enumerate(tasks):
-            if task.id == task_id:
-                return i
-        return -1
+        post_processing = task_params.task_config.post_processing
+        if not post_processing or post_processing.for_each != "page" or not settings.PIPELINE_PAGE_STREAMING_ENABLED:
+            return None
+
+        extra = {
+            "current_task_id": task_params.task_config.id,
+            "pipeline_scope": task_params.pipeline_scope,
+            "pipeline_key": task_params.pipeline_key,
+            "run_id": task_params.run_id,
+            "operation": "start_page_fanout"
+        }
+
+        try:
+            pipeline_config = await search_pipeline_config(
+                task_params.pipeline_scope,
+                task_params.pipeline_key
+            )
+            if pipeline_config is None:
+                return None
+
+            current_task_index = pipeline_config.task_index(task_params.task_config.id)
+            if current_task_index == -1 or current_task_index + 1 >= len(pipeline_config.tasks):
+                return None
+
+            LOGGER.debug("Streaming next task per page", extra=extra)
+            return PageFanout(self, task_params, pipeline_config.tasks[current_task_index + 1])
+
+        except Exception as e:
+            extra.update({"error": exceptionToMap(e)})
+            LOGGER.warning(f"Page streaming unavailable, fanning out after the task completes: {str(e)}", extra=extra)
+            return None
 
     def _extract_pages_from_results(self, task_results: TaskResults) -> List[Dict[str, Any]]:
         """
@@ -627,6 +789,62 @@ class TaskOrchestrator:
             LOGGER.error(f"Error extracting pages from task results: {str(e)}")
             return []
 
+    def _create_page_task_parameters(self,
+                                     task_params: TaskParameters,
+                                     results: Dict[str, Any],
+                                     task_config: TaskConfig,
+                                     pages: List[Dict[str, Any]]) -> List[TaskParameters]:
+        """
+        Create the next task of each page of a `for_each: page` task.  Used both for pages streamed while the
+        task runs (PageFanout) and for the fan-out once it has finished, so a page task gets the same
+        parameters either way: the task's results cut down to its own page, with the document-level fields.
+
+        Args:
+            task_params: Parameters of the current task
+            results: The current task's results (or the document-level part known so far); "pages" is ignored
+            task_config: Configuration for the next task
+            pages: Pages to create a task for
+
+        Returns:
+            List of TaskParameters, one for each page
+        """
+        document_results = {key: value for key, value in results.items() if key != "pages"}
+
+        # Entity levels of the current task, as _add_task_results_to_context sets them once the task ran
+        entities = task_params.entities.copy() if task_params.entities else {}
+        entities[task_params.pipeline_scope] = {task_params.pipeline_key: {}, **entities.get(task_params.pipeline_scope, {})}
+
+        task_params_list = []
+        for page in pages:
+            page_results = TaskResults(success=True, results={**document_results, "pages": [page]}).model_dump()
+
+            context = task_params.context.copy() if task_params.context else {}
+            context.update({
+                task_params.pipeline_scope: {
+                    task_params.pipeline_key: {
+                        task_params.task_config.id: page_results
+                    }
+                }
+            })
+
+            pipeline_params = PipelineParameters(
+                app_id=task_params.app_id,
+                tenant_id=task_params.tenant_id,
+                patient_id=task_params.patient_id,
+                document_id=task_params.document_id,
+                page_number=task_params.page_number,
+                pipeline_scope=task_params.pipeline_scope,
+                pipeline_key=task_params.pipeline_key,
+                pipeline_start_date=task_params.pipeline_start_date,
+                run_id=task_params.run_id,
+                subject=page_results,
+                context=context,
+                entities=entities
+            )
+            task_params_list.extend(self._create_task_parameters_for_pages(pipeline_params, task_config, [page]))
+
+        return task_params_list
+
     def _create_task_parameters_for_pages(self, 
                                         pipeline_params: PipelineParameters, 
                                         task_config: TaskConfig, 
@@ -655,6 +873,8 @@ class TaskOrchestrator:
                 # Create TaskParameters for this page
                 task_params = TaskParameters.from_pipeline_parameters(pipeline_params, task_config)
                 task_params.page_number = page_number
+                if page.get("total_pages"):
+                    task_params.page_count = page.get("total_pages")
 
                 # Add page-specific context
                 if not task_params.context:
@@ -884,10 +1104,9 @@ class TaskOrchestrator:
             )
             
             # Call DJT service to update pipeline status to failed
-            djt_response = await djt_client.pipeline_status_update(
+            djt_response = await djt_client.queue_pipeline_status_updates(
                 job_id=task_params.run_id,
-                pipeline_id=f"{task_params.pipeline_scope}:{task_params.pipeline_key}",
-                pipeline_data=pipeline_status_update
+                updates=[(f"{task_params.pipeline_scope}:{task_params.pipeline_key}", pipeline_status_update)]
             )
             
             LOGGER.error(f"Successfully updated DJT pipeline status to FAILED for {task_params.pipeline_scope}.{task_params.pipeline_key}", extra={
@@ -943,12 +1162,8 @@ class TaskOrchestrator:
                 pages=task_params.page_count or 1
             )
             
-            # Call DJT service to update pipeline status to completed
-            djt_response = await djt_client.pipeline_status_update(
-                job_id=task_params.run_id,
-                pipeline_id=f"{task_params.pipeline_scope}:{task_params.pipeline_key}",
-                pipeline_data=pipeline_status_update
-            )
+            pipeline_id = f"{task_params.pipeline_scope}:{task_params.pipeline_key}"
+            updates = [(pipeline_id, pipeline_status_update)]
 
             # If this was a page-level task, also log the document level is complete
             if task_params.page_number:
@@ -970,12 +1185,14 @@ class TaskOrchestrator:
                     pages=task_params.page_count or 1
                 )
                 
-                # Call DJT service to update pipeline status to completed
-                djt_response = await djt_client.pipeline_status_update(
-                    job_id=task_params.run_id,
-                    pipeline_id=f"{task_params.pipeline_scope}:{task_params.pipeline_key}",
-                    pipeline_data=pipeline_status_update
-                )
+                updates.append((pipeline_id, pipeline_status_update))
+            
+            # Call DJT service to update pipeline status to completed, page and document level in one request
+            # (batched with the other status updates of the run sent while handling this request)
+            djt_response = await djt_client.queue_pipeline_status_updates(
+                job_id=task_params.run_id,
+                updates=updates
+            )
             
             LOGGER.info(f"Successfully updated DJT pipeline status to COMPLETED for {task_params.pipeline_scope}.{task_params.pipeline_key}", extra={
                 **extra,
@@ -1044,7 +1261,8 @@ class TaskOrchestrator:
             
             # Extract EntityWrapper objects from the entities structure
             entity_wrappers = []
-            for scope_key, scope_data in task_params.entities.items():
+            entities = await hydrate(task_params.entities)
+            for scope_key, scope_data in entities.items():
                 for pipeline_key, pipeline_data in scope_data.items():
                     for task_id, entity_data in pipeline_data.items():
                         if isinstance(entity_data, EntityWrapper):
@@ -0,0 +1,81 @@
+"""
+Fire-and-forget work that must still finish before the process exits.
+
+Coroutines submitted to a BackgroundQueue run as tasks of the current event loop; failures are logged, not
+raised.  At most `max_pending` run at a time: submitting more waits until one finishes, so a slow backend
+slows its producers down instead of piling up memory.  flush() waits for whatever is still running and is
+called on application shutdown.
+"""
+import asyncio
+from typing import Any, Awaitable, Dict, Optional, Set
+
+from util.custom_logger import getLogger
+from util.exception import exceptionToMap
+import settings
+
+LOGGER = getLogger(__name__)
+
+
+class BackgroundQueue:
+
+    def __init__(self, name: str, max_pending: int = 64):
+        self.name = name
+        self.max_pending = max(1, max_pending)
+        self._tasks: Set["asyncio.Task[None]"] = set()
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0}
+
+    def _loop_tasks(self) -> Set["asyncio.Task[None]"]:
+        loop = asyncio.get_running_loop()
+        return {task for task in self._tasks if task.get_loop() is loop}
+
+    async def submit(self, work: Awaitable[Any], description: str, extra: Optional[Dict[str, Any]] = None):
+        """Run work in the background, first waiting for a free slot when max_pending are running."""
+        pending = self._loop_tasks()
+        while len(pending) >= self.max_pending:
+            await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            pending = self._loop_tasks()
+
+        task = asyncio.ensure_future(self._run(work, description, extra or {}))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        self.stats["submitted"] += 1
+
+    async def _run(self, work: Awaitable[Any], description: str, extra: Dict[str, Any]):
+        try:
+            await work
+            self.stats["completed"] += 1
+        except Exception as e:
+            self.stats["failed"] += 1
+            LOGGER.error(f"{self.name}: background {description} failed: {str(e)}", extra={**extra, "error": exceptionToMap(e)})
+
+    async def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the running work.  Returns False if some was still running after timeout seconds."""
+        pending = self._loop_tasks()
+        if not pending:
+            return True
+        LOGGER.info(f"{self.name}: waiting for {len(pending)} background job(s)")
+        _, not_done = await asyncio.wait(pending, timeout=timeout)
+        if not_done:
+            LOGGER.warning(f"{self.name}: {len(not_done)} background job(s) still running after {timeout}s")
+        return not not_done
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "pending": len(self._tasks)}
+
+
+_task_persistence_queue: Optional[BackgroundQueue] = None
+
+
+def get_task_persistence_queue() -> BackgroundQueue:
+    """The queue of background task persistence writes (ENTITYEXTRACTION_TASK_PERSIST_BACKGROUND_ENABLED)."""
+    global _task_persistence_queue
+    if _task_persistence_queue is None:
+        _task_persistence_queue = BackgroundQueue("Task persistence", max_pending=settings.ENTITYEXTRACTION_TASK_PERSIST_MAX_PENDING)
+    return _task_persistence_queue
+
+
+async def flush_task_persistence() -> bool:
+    """Wait for background task persistence writes, up to ENTITYEXTRACTION_TASK_PERSIST_FLUSH_TIMEOUT seconds."""
+    if _task_persistence_queue is None:
+        return True
+    return await _task_persistence_queue.flush(timeout=settings.ENTITYEXTRACTION_TASK_PERSIST_FLUSH_TIMEOUT)
@@ -1,7 +1,6 @@
 """
-Cache utilities for managing aiocache instances.
+Cache utilities for managing in-memory caches.
 """
-from aiocache import Cache
 from util.custom_logger import getLogger
 
 logger = getLogger(__name__)
@@ -13,8 +12,8 @@ async def clear_pipeline_config_cache():
     This can be used when pipeline configurations are updated and need to be refreshed.
     """
     try:
-        cache = Cache.MEMORY
-        await cache.clear()
+        from adapters.firestore import get_pipeline_config_cache
+        get_pipeline_config_cache().clear()
         logger.info("Pipeline configuration cache cleared successfully")
     except Exception as e:
         logger.error(f"Error clearing pipeline configuration cache: {str(e)}")
@@ -29,10 +28,9 @@ async def get_cache_stats():
         Dict containing cache statistics
     """
     try:
-        cache = Cache.MEMORY
-        # Note: aiocache doesn't provide built-in stats, but we can add custom tracking if needed
+        from adapters.firestore import get_pipeline_config_cache
         logger.info("Cache statistics requested")
-        return {"status": "cache_active", "type": "memory"}
+        return {"status": "cache_active", "type": "memory", "pipeline_config": get_pipeline_config_cache().get_stats()}
     except Exception as e:
         logger.error(f"Error getting cache statistics: {str(e)}")
         return {"status": "error", "error": str(e)}
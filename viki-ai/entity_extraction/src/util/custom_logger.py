@@ -30,10 +30,35 @@ from settings import (
 # Simple DateTimeEncoder for JSON serialization
 class DateTimeEncoder(json.JSONEncoder):
     def default(self, obj):
+        if isinstance(obj, LazyPayload):
+            return obj.resolve()
         if hasattr(obj, 'isoformat'):
             return obj.isoformat()
         return super().default(obj)
 
+class LazyPayload:
+    """
+    A log extra value that is only computed when the record is actually emitted, e.g.
+
+    >>> LOGGER.debug("Running task", extra={"task_params": lazy(task_params.model_dump)})
+
+    The factory is called at most once, when the extra is serialized.
+    """
+    _UNRESOLVED = object()
+
+    def __init__(self, factory):
+        self.factory = factory
+        self._value = LazyPayload._UNRESOLVED
+
+    def resolve(self):
+        if self._value is LazyPayload._UNRESOLVED:
+            self._value = self.factory()
+        return self._value
+
+
+def lazy(factory) -> LazyPayload:
+    return LazyPayload(factory)
+
 # Default to INFO level for everything
 logging.basicConfig(
     level=logging.INFO,
@@ -390,6 +415,9 @@ class CustomLogger:
         return kwargs
 
     def debug(self, msg, *args, **kwargs):
+        # Don't build (and serialize) the extra payload of records that would be dropped anyway
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
         kwargs = self._wrap_extra(kwargs)
 
         # Use utility function to format message with extra data when structured logging is not available
@@ -400,6 +428,8 @@ class CustomLogger:
             self.logger.debug(msg, *args, **kwargs)
 
     def info(self, msg, *args, **kwargs):
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
         kwargs = self._wrap_extra(kwargs)
 
         # Use utility function to format message with extra data when structured logging is not available
@@ -410,6 +440,8 @@ class CustomLogger:
             self.logger.info(msg, *args, **kwargs)
 
     def warning(self, msg, *args, **kwargs):
+        if not self.logger.isEnabledFor(logging.WARNING):
+            return
         kwargs = self._wrap_extra(kwargs)
 
         # Use utility function to format message with extra data when structured logging is not available
@@ -420,6 +452,8 @@ class CustomLogger:
             self.logger.warning(msg, *args, **kwargs)
         
     def warn(self, msg, *args, **kwargs):
+        if not self.logger.isEnabledFor(logging.WARNING):
+            return
         kwargs = self._wrap_extra(kwargs)
 
         # Use utility function to format message with extra data when structured logging is not available
@@ -430,6 +464,8 @@ class CustomLogger:
             self.logger.warning(msg, *args, **kwargs)
 
     def error(self, msg, *args, **kwargs):
+        if not self.logger.isEnabledFor(logging.ERROR):
+            return
         kwargs = self._wrap_extra(kwargs)
         
         # Use utility function to format message with extra data for errors when structured logging is not available
@@ -440,6 +476,8 @@ class CustomLogger:
             self.logger.error(msg, *args, **kwargs)
 
     def critical(self, msg, *args, **kwargs):
+        if not self.logger.isEnabledFor(logging.CRITICAL):
+            return
         kwargs = self._wrap_extra(kwargs)
 
         # Use utility function to format message with extra data when structured logging is not available
@@ -450,6 +488,8 @@ class CustomLogger:
             self.logger.critical(msg, *args, **kwargs)
 
     def exception(self, msg, *args, **kwargs):
+        if not self.logger.isEnabledFor(logging.ERROR):
+            return
         kwargs = self._wrap_extra(kwargs)
         
         # Use utility function to format message with extra data for exceptions when structured logging is not available
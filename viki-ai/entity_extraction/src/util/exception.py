@@ -45,3 +45,7 @@ class OrchestrationExceptionWithContext(OrchestrationException):
 class JobException(Exception):
     def __init__(self, message):
         self.message = message
+
+class TaskAlreadyExistsException(Exception):
+    def __init__(self, message):
+        self.message = message
@@ -0,0 +1,36 @@
+"""
+Hands pages to a consumer as soon as a module has produced them.
+
+TaskOrchestrator installs a page sink around a `for_each: page` task so it can submit the next task for a
+page while the rest of the document is still being split.  Modules call publish_page for every page they
+write, with the document-level part of their results known so far; when no sink is installed (streaming
+disabled, or the module runs outside the orchestrator) it is a no-op.
+"""
+from contextvars import ContextVar, Token
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+PageSink = Callable[[Dict[str, Any], Optional[Dict[str, Any]]], Awaitable[None]]
+
+_page_sink: ContextVar[Optional[PageSink]] = ContextVar("page_sink", default=None)
+
+
+def set_page_sink(sink: Optional[PageSink]) -> Token:
+    return _page_sink.set(sink)
+
+
+def reset_page_sink(token: Token):
+    _page_sink.reset(token)
+
+
+async def publish_page(page: Dict[str, Any], results: Optional[Dict[str, Any]] = None) -> bool:
+    """
+    Hand a written page to the installed sink.  Returns whether there was one.
+
+    results holds the fields of the module's results other than the pages (total_pages, base_path, ...), so the
+    page's next task gets the same parameters as when it is created from the final results.
+    """
+    sink = _page_sink.get()
+    if sink is None:
+        return False
+    await sink(page, results)
+    return True
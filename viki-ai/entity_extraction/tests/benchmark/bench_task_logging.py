@@ -0,0 +1,69 @@
+"""
+Micro-benchmark: per-task logging overhead of the orchestrator against the size of the pipeline context.
+
+Compares logging the full TaskParameters.model_dump() (as invoke and run used to, three times per task) with
+the summary and the lazy full payload they log now, with the logger at INFO as in production.
+
+    PYTHONPATH=src:tests python tests/benchmark/bench_task_logging.py
+"""
+import logging
+import timeit
+
+import test_env  # noqa: F401
+
+from models.general import TaskParameters
+from models.pipeline_config import TaskConfig, TaskType
+from util.custom_logger import getLogger, lazy
+
+PAGES = [1, 10, 50, 200]
+ENTITIES_PER_PAGE = 20
+ROUNDS = 50
+
+LOGGER = getLogger("entity_extraction.bench")
+
+
+def make_task_params(pages: int) -> TaskParameters:
+    page_results = {
+        str(page): {
+            "entities": [
+                {"name": f"entity {page}-{i}", "text": "lorem ipsum dolor sit amet " * 8, "page_number": page}
+                for i in range(ENTITIES_PER_PAGE)
+            ]
+        }
+        for page in range(1, pages + 1)
+    }
+    return TaskParameters(
+        app_id="app", tenant_id="tenant", patient_id="patient", document_id="document",
+        task_config=TaskConfig(id="extract", type=TaskType.PROMPT),
+        context={"split_pages": {"pages": list(range(pages))}, "extract": page_results},
+        entities={"extract": page_results},
+    )
+
+
+def main():
+    logging.getLogger("entity_extraction.bench").setLevel(logging.INFO)
+    logging.getLogger("entity_extraction.bench").propagate = False
+    logging.getLogger("entity_extraction.bench").addHandler(logging.NullHandler())
+
+    for pages in PAGES:
+        task_params = make_task_params(pages)
+
+        def eager():
+            LOGGER.info(f"Invoking task extract with parameters: {task_params.model_dump()}")
+            LOGGER.info("Invoking task extract directly", extra={"task_params": task_params.model_dump()})
+            LOGGER.debug("Running task extract", extra={"task_params": task_params.model_dump()})
+
+        def summarized():
+            extra = {"task_params": task_params.summary()}
+            LOGGER.debug("Invoking task extract", extra={"task_params": lazy(task_params.model_dump)})
+            LOGGER.info("Invoking task extract directly", extra=extra)
+            LOGGER.debug("Running task extract", extra={"task_params": lazy(task_params.model_dump)})
+
+        eager_time = min(timeit.repeat(eager, number=ROUNDS, repeat=5)) / ROUNDS
+        summarized_time = min(timeit.repeat(summarized, number=ROUNDS, repeat=5)) / ROUNDS
+        print(f"{pages:>4} page(s) in context: full model_dump {eager_time * 1000:8.3f} ms/task, "
+              f"summary + lazy {summarized_time * 1000:6.3f} ms/task ({eager_time / summarized_time:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
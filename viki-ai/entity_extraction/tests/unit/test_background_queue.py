@@ -0,0 +1,71 @@
+import asyncio
+import os
+import sys
+
+# Import test environment setup first
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import test_env
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from util.background_queue import BackgroundQueue
+
+
+class TestBackgroundQueue:
+
+    async def test_submit_runs_in_background_and_flush_waits(self):
+        queue = BackgroundQueue("test")
+        release = asyncio.Event()
+        done = []
+
+        async def work():
+            await release.wait()
+            done.append(True)
+
+        await queue.submit(work(), "write")
+        assert done == []
+        assert queue.get_stats()["pending"] == 1
+
+        release.set()
+        assert await queue.flush(timeout=5)
+        assert done == [True]
+        assert queue.get_stats() == {"submitted": 1, "completed": 1, "failed": 0, "pending": 0}
+
+    async def test_failures_are_counted_not_raised(self):
+        queue = BackgroundQueue("test")
+
+        async def work():
+            raise Exception("GCS Error")
+
+        await queue.submit(work(), "write")
+        assert await queue.flush(timeout=5)
+        assert queue.get_stats()["failed"] == 1
+
+    async def test_submit_waits_when_full(self):
+        queue = BackgroundQueue("test", max_pending=2)
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+
+        await queue.submit(work(), "write")
+        await queue.submit(work(), "write")
+        third = asyncio.create_task(queue.submit(work(), "write"))
+        await asyncio.sleep(0.01)
+        assert not third.done()
+
+        release.set()
+        await third
+        assert await queue.flush(timeout=5)
+        assert queue.get_stats()["completed"] == 3
+
+    async def test_flush_times_out(self):
+        queue = BackgroundQueue("test")
+        release = asyncio.Event()
+
+        await queue.submit(release.wait(), "write")
+        assert await queue.flush(timeout=0.01) is False
+
+        release.set()
+        assert await queue.flush(timeout=5)
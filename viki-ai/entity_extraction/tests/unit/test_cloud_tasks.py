@@ -1,3 +1,4 @@
+import asyncio
 import pytest
 from unittest.mock import Mock, patch, AsyncMock
 from datetime import datetime
@@ -7,7 +8,8 @@ import httpx
 # Import and setup test environment first
 
 # Now import the modules that depend on environment variables
-from src.adapters.cloud_tasks import CloudTaskAdapter
+from src.adapters.cloud_tasks import CloudTaskAdapter, TaskSubmissionReport, next_step_task_name
+from util.exception import TaskAlreadyExistsException
 
 
 @pytest.fixture
@@ -229,4 +231,96 @@ async def test_create_task_cloud_with_schedule_time(adapter, mock_logger):
         task_args = mock_client_instance.create_task.call_args[1]
         assert task_args['parent'] == "test-queue-path"
         assert 'schedule_time' in task_args['task']
-        mock_to_dict.assert_any_call(mock_response._pb)
\ No newline at end of file
+        mock_to_dict.assert_any_call(mock_response._pb)
+def _next_task(page_number, task_id="next-task"):
+    task_params = Mock()
+    task_params.task_config.id = task_id
+    task_params.run_id = "test-run"
+    task_params.pipeline_start_date = datetime(2024, 1, 1, 12, 0, 0)
+    task_params.pipeline_scope = "test-scope"
+    task_params.pipeline_key = "test-key"
+    task_params.page_number = page_number
+    task_params.task_iteration = 0
+    return task_params
+
+def test_next_step_task_name():
+    name = next_step_task_name("next task/1", _next_task(1))
+
+    assert name == next_step_task_name("next task/1", _next_task(1))
+    assert name != next_step_task_name("next task/1", _next_task(2))
+    assert name.endswith("-next-task-1")
+    assert all(c.isalnum() or c in "-_" for c in name)
+
+def test_next_step_task_name_of_a_restarted_run():
+    """A run started again with the same run_id must not collide with the names of its first start."""
+    first_start = _next_task(1)
+    restart = _next_task(1)
+    restart.pipeline_start_date = datetime(2024, 1, 1, 12, 5, 0)
+
+    assert next_step_task_name("next-task", first_start) != next_step_task_name("next-task", restart)
+
+def test_next_step_task_name_without_iteration():
+    retry = _next_task(1)
+    retry.task_iteration = 1
+
+    assert next_step_task_name("next-task", retry) != next_step_task_name("next-task", _next_task(1))
+    assert next_step_task_name("next-task", retry, per_iteration=False) == next_step_task_name("next-task", _next_task(1), per_iteration=False)
+
+@pytest.mark.asyncio
+async def test_create_tasks_for_next_steps(adapter, mock_logger):
+    in_flight = 0
+    max_in_flight = 0
+
+    async def create_task_for_next_step(task_id, task_parameters, **kwargs):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if task_parameters.page_number == 2:
+            raise TaskAlreadyExistsException("exists")
+        if task_parameters.page_number == 3:
+            raise Exception("queue unavailable")
+        return {"name": kwargs["task_name"]}
+
+    next_tasks = [_next_task(page_number) for page_number in range(1, 7)]
+    with patch.object(adapter, 'create_task_for_next_step', side_effect=create_task_for_next_step) as mock_create:
+        report = await adapter.create_tasks_for_next_steps(next_tasks, max_concurrency=2)
+
+    assert mock_create.call_count == 6
+    assert max_in_flight == 2
+    assert isinstance(report, TaskSubmissionReport)
+    assert sorted(report.submitted) == sorted(next_step_task_name("next-task", next_tasks[i]) for i in (0, 3, 4, 5))
+    assert report.duplicates == [next_step_task_name("next-task", next_tasks[1])]
+    assert report.failed == [{
+        "task_id": "next-task",
+        "task_name": next_step_task_name("next-task", next_tasks[2]),
+        "page_number": 3,
+        "error": "queue unavailable"
+    }]
+
+@pytest.mark.asyncio
+async def test_create_task_cloud_named_and_already_exists(adapter, mock_logger):
+    from google.api_core import exceptions as google_exceptions
+
+    with patch('src.adapters.cloud_tasks.settings.CLOUD_PROVIDER', "gcp"), \
+         patch('google.cloud.tasks_v2.CloudTasksClient') as mock_tasks_client:
+        mock_client_instance = mock_tasks_client.return_value
+        mock_client_instance.task_path.return_value = "test-task-path"
+        mock_client_instance.create_task.side_effect = google_exceptions.AlreadyExists("exists")
+
+        for _ in range(2):
+            with pytest.raises(TaskAlreadyExistsException):
+                await adapter.create_task(
+                    location="test-location",
+                    queue="test-queue",
+                    url="http://test.com",
+                    payload={"key": "value"},
+                    task_name="test-task"
+                )
+
+    # The client is created once and reused
+    mock_tasks_client.assert_called_once()
+    mock_client_instance.task_path.assert_called_with("test-project", "test-location", "test-queue", "test-task")
+    assert mock_client_instance.create_task.call_args[1]['task']['name'] == "test-task-path"
+    mock_logger.error.assert_not_called()
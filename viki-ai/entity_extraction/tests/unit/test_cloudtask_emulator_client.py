@@ -20,6 +20,7 @@ settings_mock.LOGGING_CHATTY_LOGGERS = []
 
 # Now import application modules after environment is set up
 from src.adapters.cloudtask_emulator_client import CloudTaskEmulatorClient
+from util.exception import TaskAlreadyExistsException
 
 @pytest.fixture
 def client():
@@ -68,6 +69,26 @@ async def test_create_task_success(client, mock_response, monkeypatch):
     
     assert result == {"status": "success"}
 
+@pytest.mark.asyncio
+async def test_create_task_already_exists(client, mock_response, monkeypatch):
+    mock_response.status_code = 409
+    mock_response.text = "Task already exists"
+
+    async def mock_post(*args, **kwargs):
+        return mock_response
+
+    monkeypatch.setattr(client.client, "post", mock_post)
+
+    with pytest.raises(TaskAlreadyExistsException):
+        await client.create_task(
+            project="test-project",
+            location="us-central1",
+            queue="test-queue",
+            task_name="test-task",
+            url="http://example.com",
+            payload={"key": "value"}
+        )
+
 @pytest.mark.asyncio
 async def test_create_task_with_schedule_time(client, mock_response, monkeypatch):
     schedule_time = datetime(2023, 1, 1, 12, 0)
@@ -0,0 +1,138 @@
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+# Import test environment setup first
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import test_env
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from adapters.context_store import CONTEXT_REF_KEY, ContextStore, contains_context_ref, hydrate, is_context_ref
+from models.general import TaskParameters, TaskResults
+from models.pipeline_config import TaskConfig, TaskType, ModuleConfig, PipelineConfig
+from usecases.task_orchestrator import TaskOrchestrator
+from util.json_utils import JsonUtil
+
+
+class FakeStorageAdapter:
+    """In-memory stand-in for StorageAdapter."""
+
+    def __init__(self):
+        self.documents = {}
+        self.reads = 0
+
+    async def save_document(self, document_path, content, content_type=None, metadata=None):
+        self.documents[document_path] = content
+        return f"gs://context-bucket/{document_path}"
+
+    async def retrieve_json_document(self, document_path):
+        self.reads += 1
+        content = self.documents.get(document_path)
+        return JsonUtil.loads(content) if content is not None else None
+
+
+LARGE_RESULTS = {"success": True, "results": {"entities": ["x" * 100] * 100}}
+
+
+class TestContextStore:
+    """Test suite for ContextStore."""
+
+    async def test_small_values_stay_inline(self):
+        store = ContextStore(FakeStorageAdapter(), min_size_bytes=4096)
+        assert await store.put("a/context.json", {"success": True}) == {"success": True}
+
+    async def test_large_values_are_stored_by_reference(self):
+        storage = FakeStorageAdapter()
+        store = ContextStore(storage, min_size_bytes=4096)
+
+        ref = await store.put("a/context.json", LARGE_RESULTS)
+
+        assert is_context_ref(ref)
+        assert ref[CONTEXT_REF_KEY] == "gs://context-bucket/a/context.json"
+        assert "a/context.json" in storage.documents
+
+        # Another instance resolves the reference from storage
+        assert await ContextStore(storage).get(ref) == LARGE_RESULTS
+        assert storage.reads == 1
+
+    async def test_hydrate_resolves_references_anywhere_in_the_tree(self):
+        storage = FakeStorageAdapter()
+        ref = await ContextStore(storage, min_size_bytes=10).put("a/context.json", LARGE_RESULTS)
+        context = {"page_info": {"page_number": 1}, "default": {"pipeline": {"split": ref, "other": {"inline": True}}}}
+
+        hydrated = await ContextStore(storage).hydrate(context)
+
+        assert hydrated["default"]["pipeline"]["split"] == LARGE_RESULTS
+        assert hydrated["default"]["pipeline"]["other"] == {"inline": True}
+        assert hydrated["page_info"] is context["page_info"]
+        # The original tree keeps the reference
+        assert contains_context_ref(context)
+        assert not contains_context_ref(hydrated)
+
+    async def test_hydrate_missing_reference_raises(self):
+        ref = {CONTEXT_REF_KEY: "gs://context-bucket/missing.json", "sha256": "abc"}
+        with pytest.raises(ValueError):
+            await ContextStore(FakeStorageAdapter()).hydrate({"task": ref})
+
+    async def test_module_hydrate_without_references_does_not_create_store(self):
+        with patch('adapters.context_store.get_context_store') as mock_get_store:
+            context = {"default": {"pipeline": {"task": {"success": True}}}}
+            assert await hydrate(context) is context
+            mock_get_store.assert_not_called()
+
+
+class TestTaskOrchestratorContextByReference:
+    """Test suite for passing task results to next tasks by reference."""
+
+    def setup_method(self):
+        self.orchestrator = TaskOrchestrator("split")
+        self.task_params = TaskParameters(
+            app_id="test-app",
+            tenant_id="test-tenant",
+            patient_id="test-patient",
+            document_id="test-document",
+            pipeline_scope="default",
+            pipeline_key="pipeline",
+            run_id="test-run-123",
+            task_config=TaskConfig(id="split", type=TaskType.MODULE, module=ModuleConfig(type="split_pages"))
+        )
+
+    @patch('usecases.task_orchestrator.search_pipeline_config')
+    async def test_next_tasks_carry_reference_to_results(self, mock_search_config):
+        storage = FakeStorageAdapter()
+        results = TaskResults(success=True, results=LARGE_RESULTS["results"])
+        mock_search_config.return_value = PipelineConfig(
+            key="pipeline",
+            version="1.0",
+            name="Test Pipeline",
+            tasks=[self.task_params.task_config, TaskConfig(id="next", type=TaskType.MODULE, module=ModuleConfig(type="next_module"))]
+        )
+
+        self.orchestrator._add_task_results_to_context(self.task_params, results)
+        with patch('usecases.task_orchestrator.get_context_store', return_value=ContextStore(storage, min_size_bytes=1024)):
+            await self.orchestrator._store_task_results_by_reference(self.task_params, results)
+        next_tasks = await self.orchestrator._determine_next_tasks(self.task_params, results)
+
+        ref = next_tasks[0].context["default"]["pipeline"]["split"]
+        assert is_context_ref(ref)
+        assert len(JsonUtil.dumps(next_tasks[0].context)) < 1024
+        assert await ContextStore(storage).get(ref) == results.model_dump()
+
+    async def test_store_failure_keeps_results_inline(self):
+        results = TaskResults(success=True, results=LARGE_RESULTS["results"])
+        self.orchestrator._add_task_results_to_context(self.task_params, results)
+
+        storage = FakeStorageAdapter()
+
+        async def fail(*args, **kwargs):
+            raise Exception("bucket unavailable")
+        storage.save_document = fail
+
+        with patch('usecases.task_orchestrator.get_context_store', return_value=ContextStore(storage, min_size_bytes=10)):
+            await self.orchestrator._store_task_results_by_reference(self.task_params, results)
+
+        assert self.task_params.context["default"]["pipeline"]["split"] == results.model_dump()
@@ -17,7 +17,7 @@ import test_env
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
 
 from util.custom_logger import (
-    DateTimeEncoder, CustomLogger, Context, getLogger, labels, command_to_extra,
+    DateTimeEncoder, CustomLogger, Context, getLogger, labels, command_to_extra, lazy,
     set_pipeline_context, get_pipeline_context, clear_pipeline_context,
     log_elapsed_time, _context_instance
 )
@@ -624,6 +624,30 @@ class TestCustomLogger:
             result = self.logger.isEnabledFor(logging.DEBUG)
             assert result is True
 
+    def test_disabled_level_skips_wrap_extra(self):
+        """Test that records below the logger level are dropped before the extra is built."""
+        factory = MagicMock(return_value={"big": "payload"})
+        with patch.object(self.logger, '_wrap_extra') as mock_wrap:
+            with patch.object(self.logger.logger, 'isEnabledFor', return_value=False):
+                self.logger.debug("Test message", extra={"payload": lazy(factory)})
+
+                mock_wrap.assert_not_called()
+                factory.assert_not_called()
+
+    @patch('util.custom_logger.has_structured_logging', True)
+    @patch('util.custom_logger.LOGGING_INJECT_GLOBAL_CONTEXT_ENABLED', False)
+    def test_wrap_extra_resolves_lazy_payload(self):
+        """Test that a lazy extra value is computed once, when the extra is serialized."""
+        factory = MagicMock(return_value={"big": "payload"})
+        payload = lazy(factory)
+        factory.assert_not_called()
+
+        result = self.logger._wrap_extra({"extra": {"payload": payload}})
+
+        assert result["extra"] == {"json_fields": {"payload": {"big": "payload"}}}
+        assert payload.resolve() == {"big": "payload"}
+        factory.assert_called_once()
+
     def test_addLabels(self):
         """Test addLabels method."""
         result = self.logger.addLabels(key1="value1", key2="value2")
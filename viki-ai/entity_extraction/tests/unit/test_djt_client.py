@@ -8,7 +8,7 @@ import pytest
 from unittest.mock import patch, AsyncMock
 import httpx
 
-from adapters.djt_client import DistributedJobTracking, get_djt_client
+from adapters.djt_client import DistributedJobTracking, get_djt_client, MAX_PIPELINE_STATUS_BATCH, pipeline_status_request_scope
 from models.djt_models import PipelineStatusUpdate, PipelineStatus
 
 class TestDistributedJobTracking:
@@ -358,6 +358,124 @@ class TestDistributedJobTracking:
         assert exc_info.value.status_code == 400
         assert "DJT API returned status 400" in str(exc_info.value)
 
+    @patch('adapters.djt_client.settings.CLOUD_PROVIDER', 'gcp')
+    @patch('adapters.djt_client.settings.DJT_API_URL', 'http://test-djt-api')
+    @patch('adapters.djt_client.get_oidc_headers')
+    @patch('adapters.djt_client.httpx.AsyncClient')
+    async def test_pipeline_status_updates_success(self, mock_client, mock_auth_headers):
+        """Test that several pipeline status updates are sent in one batch request."""
+        mock_auth_headers.return_value = {"Content-Type": "application/json"}
+        
+        mock_response = AsyncMock()
+        mock_response.status_code = 200
+        mock_response.json = AsyncMock(return_value={"pipelines": [{"page_number": 1}, {"page_number": None}], "message": "2 pipeline statuses updated successfully"})
+        
+        mock_client_instance = AsyncMock()
+        mock_client_instance.post.return_value = mock_response
+        mock_client.return_value.__aenter__.return_value = mock_client_instance
+        
+        djt_client = DistributedJobTracking()
+        page_data = PipelineStatusUpdate(
+            status=PipelineStatus.COMPLETED,
+            page_number=1,
+            app_id="test-app",
+            tenant_id="test-tenant",
+            patient_id="test-patient",
+            document_id="test-doc",
+            pages=5
+        )
+        document_data = page_data.model_copy(update={"page_number": None})
+        
+        result = await djt_client.pipeline_status_updates("test-job-id", [("test-pipeline-id", page_data), ("test-pipeline-id", document_data)])
+        
+        assert len(result["pipelines"]) == 2
+        mock_client_instance.post.assert_called_once_with(
+            "http://test-djt-api/api/v1/jobs/test-job-id/pipelines/status",
+            headers={"Content-Type": "application/json"},
+            json={"updates": [
+                {**page_data.model_dump(), "pipeline_id": "test-pipeline-id"},
+                {**document_data.model_dump(), "pipeline_id": "test-pipeline-id"}
+            ]}
+        )
+    
+    @patch('adapters.djt_client.settings.CLOUD_PROVIDER', 'local')
+    @patch('adapters.djt_client.settings.DJT_API_URL', 'http://test-djt-api')
+    @patch('adapters.djt_client.get_oidc_headers')
+    @patch('adapters.djt_client.httpx.AsyncClient')
+    async def test_pipeline_status_updates_without_batch_endpoint(self, mock_client, mock_auth_headers):
+        """Test that updates are sent one by one when DJT has no batch endpoint."""
+        mock_auth_headers.return_value = {"Content-Type": "application/json"}
+        
+        not_found = AsyncMock()
+        not_found.status_code = 404
+        not_found.text = "Not Found"
+        updated = AsyncMock()
+        updated.status_code = 200
+        updated.json = AsyncMock(return_value={"pipeline": {"status": "COMPLETED"}, "message": "Pipeline status updated successfully"})
+        
+        mock_client_instance = AsyncMock()
+        mock_client_instance.post.side_effect = [not_found, updated, updated]
+        mock_client.return_value.__aenter__.return_value = mock_client_instance
+        
+        djt_client = DistributedJobTracking()
+        pipeline_data = PipelineStatusUpdate(
+            status=PipelineStatus.COMPLETED,
+            page_number=1,
+            app_id="test-app",
+            tenant_id="test-tenant",
+            patient_id="test-patient",
+            document_id="test-doc",
+            pages=5
+        )
+        
+        result = await djt_client.pipeline_status_updates("test-job-id", [("pipeline-a", pipeline_data), ("pipeline-b", pipeline_data)])
+        
+        assert result == {"pipelines": [{"status": "COMPLETED"}, {"status": "COMPLETED"}]}
+        urls = [call.args[0] for call in mock_client_instance.post.call_args_list]
+        assert urls == [
+            "http://test-djt-api/api/v1/jobs/test-job-id/pipelines/status",
+            "http://test-djt-api/api/v1/jobs/test-job-id/pipelines/pipeline-a/status",
+            "http://test-djt-api/api/v1/jobs/test-job-id/pipelines/pipeline-b/status"
+        ]
+    
+    @patch('adapters.djt_client.settings.CLOUD_PROVIDER', 'local')
+    @patch('adapters.djt_client.settings.DJT_API_URL', 'http://test-djt-api')
+    @patch('adapters.djt_client.get_oidc_headers')
+    @patch('adapters.djt_client.httpx.AsyncClient')
+    async def test_pipeline_status_updates_are_split_at_the_batch_limit(self, mock_client, mock_auth_headers):
+        """Test that more updates than the batch endpoint takes are sent as consecutive requests."""
+        mock_auth_headers.return_value = {"Content-Type": "application/json"}
+        
+        async def post(url, headers, json):
+            response = AsyncMock()
+            response.status_code = 200
+            response.json = AsyncMock(return_value={"pipelines": [{"page_number": update["page_number"]} for update in json["updates"]]})
+            return response
+        
+        mock_client_instance = AsyncMock()
+        mock_client_instance.post.side_effect = post
+        mock_client.return_value.__aenter__.return_value = mock_client_instance
+        
+        djt_client = DistributedJobTracking()
+        updates = [
+            ("test-pipeline-id", PipelineStatusUpdate(
+                status=PipelineStatus.COMPLETED,
+                page_number=page,
+                app_id="test-app",
+                tenant_id="test-tenant",
+                patient_id="test-patient",
+                document_id="test-doc",
+                pages=1000
+            ))
+            for page in range(1, MAX_PIPELINE_STATUS_BATCH + 3)
+        ]
+        
+        result = await djt_client.pipeline_status_updates("test-job-id", updates)
+        
+        batch_sizes = [len(call.kwargs["json"]["updates"]) for call in mock_client_instance.post.call_args_list]
+        assert batch_sizes == [MAX_PIPELINE_STATUS_BATCH, 2]
+        assert [pipeline["page_number"] for pipeline in result["pipelines"]] == list(range(1, MAX_PIPELINE_STATUS_BATCH + 3))
+    
     @patch('adapters.djt_client.settings.DJT_API_URL', 'http://test-djt-api')
     def test_djt_client_initialization(self):
         """Test DJT client initialization."""
@@ -368,3 +486,51 @@ class TestDistributedJobTracking:
         # Test with custom base URL
         client_custom = DistributedJobTracking(base_url="http://custom-url")
         assert client_custom.base_url == "http://custom-url"
+
+
+def _status_update(page_number=None):
+    return PipelineStatusUpdate(
+        status=PipelineStatus.IN_PROGRESS,
+        page_number=page_number,
+        app_id="test-app",
+        tenant_id="test-tenant",
+        patient_id="test-patient",
+        document_id="test-doc",
+        pages=3
+    )
+
+
+class TestPipelineStatusRequestScope:
+    
+    @patch('adapters.djt_client.settings.DJT_API_URL', 'http://test-djt-api')
+    @patch.object(DistributedJobTracking, 'pipeline_status_updates', new_callable=AsyncMock)
+    async def test_queued_updates_are_sent_now_outside_a_request_scope(self, mock_updates):
+        """Test that queued updates are sent right away when no request scope is active."""
+        mock_updates.return_value = {"pipelines": []}
+        
+        result = await DistributedJobTracking().queue_pipeline_status_updates("test-job-id", [("scope:pipeline", _status_update(1))])
+        
+        assert result == {"pipelines": []}
+        mock_updates.assert_awaited_once()
+    
+    @patch('adapters.djt_client.settings.DJT_API_URL', 'http://test-djt-api')
+    @patch('adapters.djt_client.settings.DJT_STATUS_BUFFER_MAX_UPDATES', 50)
+    @patch('adapters.djt_client.settings.DJT_STATUS_BUFFER_FLUSH_INTERVAL_MS', 60000)
+    @patch.object(DistributedJobTracking, 'pipeline_status_updates', new_callable=AsyncMock)
+    async def test_updates_of_a_request_are_sent_as_one_batch_when_it_ends(self, mock_updates):
+        """Test that the updates queued during a request go out in one batch per job when the scope exits."""
+        djt_client = get_djt_client()
+        
+        async with pipeline_status_request_scope():
+            await djt_client.queue_pipeline_status_updates("test-job-id", [("scope:pipeline", _status_update(1))])
+            await djt_client.queue_pipeline_status_updates("test-job-id", [("scope:a", _status_update(1)), ("scope:b", _status_update(1))])
+            mock_updates.assert_not_awaited()
+        
+        mock_updates.assert_awaited_once()
+        job_id, updates = mock_updates.await_args.args
+        assert job_id == "test-job-id"
+        assert [pipeline_id for pipeline_id, _ in updates] == ["scope:pipeline", "scope:a", "scope:b"]
+        
+        # Past the scope updates are sent right away again
+        await djt_client.queue_pipeline_status_updates("test-job-id", [("scope:pipeline", _status_update(None))])
+        assert mock_updates.await_count == 2
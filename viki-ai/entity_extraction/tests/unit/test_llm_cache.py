@@ -0,0 +1,140 @@
+import os
+import sys
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+# Import test environment setup first
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import test_env
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from adapters.llm import StandardPromptAdapter
+from adapters.llm_cache import (
+    DiskLLMResponseCacheBackend,
+    LLMResponseCache,
+    MemoryLLMResponseCacheBackend,
+    is_cacheable_response,
+)
+
+CONFIG = {"max_output_tokens": 8192, "temperature": 0.0, "top_p": 0.95, "response_mime_type": "application/json"}
+ITEMS = ["Extract the entities", ("gs://bucket/page/1.pdf", "application/pdf")]
+
+
+class TestLLMResponseCache:
+    """Test suite for LLMResponseCache."""
+
+    def test_key_depends_on_every_input(self):
+        cache = LLMResponseCache(MemoryLLMResponseCacheBackend())
+        key = cache.key("model-a", "system", {"type": "OBJECT"}, CONFIG, ITEMS)
+        assert key == cache.key("model-a", "system", {"type": "OBJECT"}, dict(CONFIG), list(ITEMS))
+        assert key != cache.key("model-b", "system", {"type": "OBJECT"}, CONFIG, ITEMS)
+        assert key != cache.key("model-a", None, {"type": "OBJECT"}, CONFIG, ITEMS)
+        assert key != cache.key("model-a", "system", None, CONFIG, ITEMS)
+        assert key != cache.key("model-a", "system", {"type": "OBJECT"}, {**CONFIG, "top_p": 0.5}, ITEMS)
+        assert key != cache.key("model-a", "system", {"type": "OBJECT"}, CONFIG, ["Extract the entities", (b"%PDF-1", "application/pdf")])
+        assert key != LLMResponseCache(MemoryLLMResponseCacheBackend(), version="2").key("model-a", "system", {"type": "OBJECT"}, CONFIG, ITEMS)
+
+    async def test_get_returns_stored_response_until_it_expires(self):
+        cache = LLMResponseCache(MemoryLLMResponseCacheBackend(), ttl=60)
+        await cache.set("key", "text", usage_metadata={"prompt_token_count": 10})
+        assert (await cache.get("key"))["usage_metadata"] == {"prompt_token_count": 10}
+
+        with patch("adapters.llm_cache.time.time", return_value=time.time() + 61):
+            assert await cache.get("key") is None
+
+    async def test_backend_errors_count_as_misses(self):
+        backend = MemoryLLMResponseCacheBackend()
+        backend.get = AsyncMock(side_effect=Exception("unavailable"))
+        backend.set = AsyncMock(side_effect=Exception("unavailable"))
+        cache = LLMResponseCache(backend)
+
+        await cache.set("key", "text")
+        assert await cache.get("key") is None
+
+    async def test_disk_backend_round_trip(self, tmp_path):
+        await LLMResponseCache(DiskLLMResponseCacheBackend(str(tmp_path))).set("key", "text")
+        assert (await LLMResponseCache(DiskLLMResponseCacheBackend(str(tmp_path))).get("key"))["text"] == "text"
+
+    def test_only_complete_responses_are_cacheable(self):
+        def response(text, finish_reason):
+            return MagicMock(text=text, candidates=[MagicMock(finish_reason=finish_reason)])
+
+        assert is_cacheable_response(response('{"entities": []}', "STOP"), "application/json")
+        assert is_cacheable_response(response("plain text", "STOP"), "text/plain")
+        assert not is_cacheable_response(response('{"entities": [', "MAX_TOKENS"), "application/json")
+        assert not is_cacheable_response(response('{"entities": [', "STOP"), "application/json")
+        assert not is_cacheable_response(response("", "STOP"), "text/plain")
+        assert not is_cacheable_response(MagicMock(text="plain text", candidates=[]), "text/plain")
+
+
+class TestStandardPromptAdapterResponseCache:
+    """Test suite for the response cache in StandardPromptAdapter.generate_content_async."""
+
+    def _adapter(self, mock_client_class, temperature=0.0, text='{"entities": []}', finish_reason="STOP"):
+        mock_client = MagicMock()
+        mock_client.aio.models.generate_content = AsyncMock(return_value=MagicMock(
+            text=text,
+            candidates=[MagicMock(finish_reason=finish_reason)],
+            usage_metadata=MagicMock(prompt_token_count=120, candidates_token_count=7, total_token_count=127, cached_content_token_count=None)
+        ))
+        mock_client_class.return_value = mock_client
+        return StandardPromptAdapter(model_name="gemini-2.0-flash", temperature=temperature), mock_client
+
+    @patch('adapters.llm.settings.LLM_PROMPT_AUDIT_ENABLED', False)
+    @patch('adapters.llm.genai.Client')
+    async def test_identical_prompt_is_served_from_cache(self, mock_client_class):
+        adapter, mock_client = self._adapter(mock_client_class)
+        cache = LLMResponseCache(MemoryLLMResponseCacheBackend())
+        metadata = {"task_config": {"id": "extract"}}
+
+        with patch('adapters.llm.get_response_cache', return_value=cache):
+            first = await adapter.generate_content_async(items=ITEMS, metadata=metadata)
+            second = await adapter.generate_content_async(items=ITEMS, metadata=metadata)
+
+        assert first.text == second.text == '{"entities": []}'
+        assert second.usage_metadata.prompt_token_count == 120
+        assert mock_client.aio.models.generate_content.await_count == 1
+
+    @patch('adapters.llm.settings.LLM_PROMPT_AUDIT_ENABLED', False)
+    @patch('adapters.llm.genai.Client')
+    async def test_cache_respects_steps_and_prompt_override(self, mock_client_class):
+        adapter, mock_client = self._adapter(mock_client_class)
+        cache = LLMResponseCache(MemoryLLMResponseCacheBackend(), steps=["classify"])
+        metadata = {"task_config": {"id": "extract"}}
+
+        with patch('adapters.llm.get_response_cache', return_value=cache):
+            await adapter.generate_content_async(items=ITEMS, metadata=metadata)
+            await adapter.generate_content_async(items=ITEMS, metadata=metadata)
+            assert mock_client.aio.models.generate_content.await_count == 2
+
+            await adapter.generate_content_async(items=ITEMS, metadata=metadata, cache_response=True)
+            await adapter.generate_content_async(items=ITEMS, metadata=metadata, cache_response=True)
+            assert mock_client.aio.models.generate_content.await_count == 3
+
+    @patch('adapters.llm.settings.LLM_PROMPT_AUDIT_ENABLED', False)
+    @patch('adapters.llm.genai.Client')
+    async def test_sampled_prompt_is_not_cached(self, mock_client_class):
+        adapter, mock_client = self._adapter(mock_client_class, temperature=0.7)
+        cache = LLMResponseCache(MemoryLLMResponseCacheBackend())
+
+        with patch('adapters.llm.get_response_cache', return_value=cache):
+            await adapter.generate_content_async(items=ITEMS)
+            await adapter.generate_content_async(items=ITEMS)
+
+        assert mock_client.aio.models.generate_content.await_count == 2
+
+    @patch('adapters.llm.settings.LLM_PROMPT_AUDIT_ENABLED', False)
+    @patch('adapters.llm.genai.Client')
+    async def test_truncated_response_is_not_cached(self, mock_client_class):
+        adapter, mock_client = self._adapter(mock_client_class, text='{"entities": [', finish_reason="MAX_TOKENS")
+        cache = LLMResponseCache(MemoryLLMResponseCacheBackend())
+
+        with patch('adapters.llm.get_response_cache', return_value=cache):
+            await adapter.generate_content_async(items=ITEMS)
+            await adapter.generate_content_async(items=ITEMS)
+
+        assert mock_client.aio.models.generate_content.await_count == 2
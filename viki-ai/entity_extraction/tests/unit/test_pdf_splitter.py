@@ -0,0 +1,119 @@
+import asyncio
+import os
+import sys
+from io import BytesIO
+
+import pypdf
+import pytest
+
+# Import test environment setup first
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import test_env
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from util.pdf_splitter import PageSplitError, count_pages, page_ranges, shutdown_process_pool, split_pdf
+
+
+def make_pdf(page_count: int) -> bytes:
+    writer = pypdf.PdfWriter()
+    for i in range(page_count):
+        # Distinct page widths identify the pages after splitting
+        writer.add_blank_page(width=100 + i, height=200)
+    data = BytesIO()
+    writer.write(data)
+    return data.getvalue()
+
+
+def page_width(page_bytes: bytes) -> int:
+    reader = pypdf.PdfReader(BytesIO(page_bytes))
+    assert len(reader.pages) == 1
+    return int(reader.pages[0].mediabox.width)
+
+
+@pytest.fixture(autouse=True)
+def process_pool():
+    yield
+    shutdown_process_pool()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("process_pool_min_pages", [1, 100])
+async def test_split_pdf_returns_pages_in_order(process_pool_min_pages):
+    raw_data = make_pdf(7)
+    in_flight = 0
+    max_in_flight = 0
+
+    async def upload(page_number, total_pages, page_bytes):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return page_number, total_pages, page_width(page_bytes)
+
+    results = await split_pdf(raw_data, upload, workers=2, chunk_pages=2,
+                              process_pool_min_pages=process_pool_min_pages, upload_concurrency=3)
+
+    assert results == [(i + 1, 7, 100 + i) for i in range(7)]
+    assert max_in_flight == 3
+    assert count_pages(raw_data) == 7
+
+
+def test_page_ranges():
+    assert page_ranges(10, 3) == [(0, 4), (4, 7), (7, 10)]
+    assert page_ranges(2, 4) == [(0, 1), (1, 2)]
+    assert page_ranges(5, 0) == [(0, 5)]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("process_pool_min_pages, chunk_pages, expected_ranges", [
+    (1, 2, [(0, 20), (20, 40)]),  # one range per worker
+    (1, 30, [(0, 40)]),  # no range smaller than chunk_pages
+    (100, 2, [(0, 40)]),  # a single range in a thread
+])
+async def test_split_pdf_parses_the_document_once_per_job(monkeypatch, process_pool_min_pages, chunk_pages, expected_ranges):
+    loop = asyncio.get_running_loop()
+    run_in_executor = loop.run_in_executor
+    ranges = []
+
+    def record_job(executor, func, raw_data, start, end):
+        ranges.append((start, end))
+        return run_in_executor(executor, func, raw_data, start, end)
+
+    monkeypatch.setattr(loop, "run_in_executor", record_job)
+
+    async def upload(page_number, total_pages, page_bytes):
+        return page_width(page_bytes)
+
+    results = await split_pdf(make_pdf(40), upload, workers=2, chunk_pages=chunk_pages,
+                              process_pool_min_pages=process_pool_min_pages)
+
+    assert results == [100 + i for i in range(40)]
+    assert sorted(ranges) == expected_ranges
+
+
+@pytest.mark.asyncio
+async def test_split_pdf_reports_failed_page():
+    async def upload(page_number, total_pages, page_bytes):
+        if page_number == 4:
+            raise RuntimeError("upload failed")
+        return page_number
+
+    with pytest.raises(PageSplitError) as exc_info:
+        await split_pdf(make_pdf(5), upload, chunk_pages=2, process_pool_min_pages=100)
+
+    assert exc_info.value.page_number == 4
+    assert "upload failed" in str(exc_info.value)
+
+
+@pytest.mark.asyncio
+async def test_split_pdf_reports_unreadable_document():
+    async def upload(page_number, total_pages, page_bytes):
+        return page_number
+
+    with pytest.raises(PageSplitError) as exc_info:
+        await split_pdf(b"not a pdf", upload, total_pages=3, chunk_pages=2, process_pool_min_pages=100)
+
+    assert exc_info.value.page_number in (1, 3)
@@ -0,0 +1,155 @@
+import asyncio
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# Import test environment setup first
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import test_env
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from adapters.pipeline_config_cache import PipelineConfigCache
+from models.pipeline_config import PipelineConfig, TaskConfig, TaskType, ModuleConfig
+
+
+def make_config(version: str = "1.0.0", key: str = "test-pipeline") -> PipelineConfig:
+    return PipelineConfig(
+        key=key,
+        version=version,
+        name="Test Pipeline",
+        scope="test-scope",
+        tasks=[TaskConfig(id="task1", type=TaskType.MODULE, module=ModuleConfig(type="module1"))]
+    )
+
+
+class FakeLoader:
+
+    def __init__(self):
+        self.versions = {}
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def __call__(self, scope, pipeline_key):
+        self.calls += 1
+        version = self.versions.get((scope, pipeline_key), "1.0.0")
+        await self.release.wait()
+        return make_config(version, pipeline_key)
+
+
+def snapshot_change(scope, key):
+    change = MagicMock()
+    change.document.to_dict.return_value = {"scope": scope, "key": key}
+    return change
+
+
+class TestPipelineConfigCache:
+
+    async def test_serves_from_memory_while_listening(self):
+        loader = FakeLoader()
+        watch = MagicMock(is_active=True)
+        cache = PipelineConfigCache(loader, watcher=lambda callback: watch, ttl=0)
+
+        first = await cache.get("test-scope", "test-pipeline")
+        second = await cache.get("test-scope", "test-pipeline")
+
+        assert first is second
+        assert loader.calls == 1
+        assert cache.get_stats()["versions"] == {"test-scope.test-pipeline": "1.0.0"}
+
+    async def test_concurrent_misses_share_one_load(self):
+        loader = FakeLoader()
+        loader.release.clear()
+        cache = PipelineConfigCache(loader, ttl=60)
+
+        gets = [asyncio.create_task(cache.get("test-scope", "test-pipeline")) for _ in range(5)]
+        await asyncio.sleep(0)
+        loader.release.set()
+        results = await asyncio.gather(*gets)
+
+        assert loader.calls == 1
+        assert all(result is results[0] for result in results)
+
+    async def test_snapshot_change_invalidates_entry(self):
+        loader = FakeLoader()
+        callbacks = []
+        cache = PipelineConfigCache(loader, watcher=lambda callback: callbacks.append(callback) or MagicMock(is_active=True), ttl=60)
+
+        assert (await cache.get("test-scope", "test-pipeline")).version == "1.0.0"
+        loader.versions[("test-scope", "test-pipeline")] = "1.0.1"
+        # Listener callbacks arrive on the listener's thread
+        await asyncio.to_thread(callbacks[0], [], [snapshot_change("test-scope", "test-pipeline")], None)
+        await asyncio.sleep(0)
+
+        assert (await cache.get("test-scope", "test-pipeline")).version == "1.0.1"
+        assert loader.calls == 2
+
+    async def test_load_racing_invalidation_is_not_cached(self):
+        loader = FakeLoader()
+        loader.release.clear()
+        cache = PipelineConfigCache(loader, ttl=60)
+
+        get = asyncio.create_task(cache.get("test-scope", "test-pipeline"))
+        await asyncio.sleep(0)
+        cache.invalidate("test-scope", "test-pipeline")
+        loader.release.set()
+        await get
+
+        await cache.get("test-scope", "test-pipeline")
+        assert loader.calls == 2
+
+    async def test_entries_expire_without_listener(self):
+        loader = FakeLoader()
+        watch = MagicMock(is_active=False)
+        cache = PipelineConfigCache(loader, watcher=lambda callback: watch, ttl=60)
+
+        await cache.get("test-scope", "test-pipeline")
+        await cache.get("test-scope", "test-pipeline")
+        assert loader.calls == 1
+
+        with patch('adapters.pipeline_config_cache.time.monotonic', return_value=10 ** 9):
+            await cache.get("test-scope", "test-pipeline")
+        assert loader.calls == 2
+
+    async def test_listener_failure_falls_back_to_ttl(self):
+        loader = FakeLoader()
+
+        def watcher(callback):
+            raise Exception("permission denied")
+
+        cache = PipelineConfigCache(loader, watcher=watcher, ttl=60)
+
+        assert (await cache.get("test-scope", "test-pipeline")).version == "1.0.0"
+        assert cache.get_stats()["listening"] is False
+
+    async def test_load_error_is_raised_and_not_cached(self):
+        calls = []
+
+        async def loader(scope, pipeline_key):
+            calls.append(pipeline_key)
+            if len(calls) == 1:
+                raise Exception("firestore unavailable")
+            return make_config()
+
+        cache = PipelineConfigCache(loader, ttl=60)
+
+        with pytest.raises(Exception, match="firestore unavailable"):
+            await cache.get("test-scope", "test-pipeline")
+        assert (await cache.get("test-scope", "test-pipeline")).version == "1.0.0"
+
+
+def test_task_index():
+    config = make_config()
+    config.tasks.append(TaskConfig(id="task2", type=TaskType.MODULE, module=ModuleConfig(type="module2")))
+
+    assert config.task_index("task1") == 0
+    assert config.task_index("task2") == 1
+    assert config.task_index("nonexistent") == -1
+
+    # The map follows changes to the task list
+    config.tasks.insert(0, TaskConfig(id="task0", type=TaskType.MODULE, module=ModuleConfig(type="module0")))
+    assert config.task_index("task2") == 2
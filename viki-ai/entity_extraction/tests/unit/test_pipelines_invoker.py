@@ -2,7 +2,9 @@ import pytest
 from unittest.mock import AsyncMock, MagicMock, patch, ANY
 from src.models.general import TaskParameters, TaskResults, PipelineParameters
 from src.models.pipeline_config import TaskConfig, PipelineReference, TaskType
+from src.usecases import pipelines_invoker
 from src.usecases.pipelines_invoker import PipelinesInvoker
+from src.adapters.cloud_tasks import next_step_task_name
 from src.models.djt_models import PipelineStatusUpdate, PipelineStatus
 from src.util.exception import exceptionToMap
 
@@ -70,7 +72,7 @@ class TestPipelinesInvoker:
 
         # Setup DJT client mock
         mock_djt_client = AsyncMock()
-        mock_djt_client.pipeline_status_update.return_value = {"status": "updated"}
+        mock_djt_client.queue_pipeline_status_updates.return_value = {"status": "updated"}
         mock_get_djt_client.return_value = mock_djt_client
 
         # Execute
@@ -95,7 +97,7 @@ class TestPipelinesInvoker:
         assert call_args.kwargs["location"] == "us-central1"
         assert call_args.kwargs["queue"] == "test-queue"
         assert call_args.kwargs["url"] == "https://api.example.com/api/pipeline/test-scope/test-pipeline/start"
-        assert call_args.kwargs["task_name"] == "pipeline-test-pipeline-test-run-123"
+        assert call_args.kwargs["task_name"] == next_step_task_name("pipeline-test-scope-test-pipeline", task_params, per_iteration=False)
         assert call_args.kwargs["service_account_email"] == "test@example.com"
 
         # Verify payload contains merged context
@@ -104,10 +106,10 @@ class TestPipelinesInvoker:
         assert payload["context"]["key"] == "value"
 
         # Verify DJT client was called
-        mock_djt_client.pipeline_status_update.assert_called_once()
-        djt_call_args = mock_djt_client.pipeline_status_update.call_args
+        mock_djt_client.queue_pipeline_status_updates.assert_called_once()
+        djt_call_args = mock_djt_client.queue_pipeline_status_updates.call_args
         assert djt_call_args.kwargs["job_id"] == "test-run-123"
-        assert djt_call_args.kwargs["pipeline_id"] == "test-scope:test-pipeline"
+        assert [pipeline_id for pipeline_id, _ in djt_call_args.kwargs["updates"]] == ["test-scope:test-pipeline"]
 
         # Verify adapter cleanup
         mock_adapter_instance.close.assert_called_once()
@@ -147,7 +149,7 @@ class TestPipelinesInvoker:
         mock_cloud_task_adapter.return_value = mock_adapter_instance
 
         mock_djt_client = AsyncMock()
-        mock_djt_client.pipeline_status_update.return_value = {"status": "updated"}
+        mock_djt_client.queue_pipeline_status_updates.return_value = {"status": "updated"}
         mock_get_djt_client.return_value = mock_djt_client
 
         # Execute
@@ -161,7 +163,45 @@ class TestPipelinesInvoker:
 
         # Verify both pipelines were processed
         assert mock_adapter_instance.create_task.call_count == 2
-        assert mock_djt_client.pipeline_status_update.call_count == 2
+        # Both statuses go to DJT in one call
+        mock_djt_client.queue_pipeline_status_updates.assert_called_once()
+        updates = mock_djt_client.queue_pipeline_status_updates.call_args.kwargs["updates"]
+        assert [pipeline_id for pipeline_id, _ in updates] == ["scope1:pipeline1", "scope2:pipeline2"]
+
+    @patch('src.usecases.pipelines_invoker.CloudTaskAdapter')
+    @patch('src.usecases.pipelines_invoker.get_djt_client')
+    @patch('src.usecases.pipelines_invoker.settings')
+    async def test_run_same_pipeline_for_two_pages_of_a_run(self, mock_settings, mock_get_djt_client, mock_cloud_task_adapter, invoker, task_params):
+        """Test that each page of a run queues its own sub-pipeline task and a redelivery or retry is deduplicated."""
+        mock_settings.SELF_API_URL = "https://api.example.com"
+        mock_settings.GCP_LOCATION_2 = "us-central1"
+        mock_settings.DEFAULT_TASK_QUEUE = "default-queue"
+        mock_settings.SERVICE_ACCOUNT_EMAIL = "test@example.com"
+
+        # Behave like Cloud Tasks: a task name can only be used once
+        queued_names = []
+
+        async def create_task(**kwargs):
+            if kwargs["task_name"] in queued_names:
+                raise pipelines_invoker.TaskAlreadyExistsException(f"Task {kwargs['task_name']} already exists")
+            queued_names.append(kwargs["task_name"])
+            return {"name": kwargs["task_name"]}
+
+        mock_adapter_instance = AsyncMock()
+        mock_adapter_instance.create_task.side_effect = create_task
+        mock_cloud_task_adapter.return_value = mock_adapter_instance
+        mock_get_djt_client.return_value = AsyncMock()
+
+        page_1 = await invoker.run(task_params)
+        page_2 = await invoker.run(task_params.model_copy(update={"page_number": 2}))
+        page_2_retry = await invoker.run(task_params.model_copy(update={"page_number": 2, "task_iteration": 1}))
+        page_2_redelivered = await invoker.run(task_params.model_copy(update={"page_number": 2}))
+
+        assert all(result.success for result in (page_1, page_2, page_2_retry, page_2_redelivered))
+        assert len(queued_names) == 2
+        # A retry of the task (next iteration) must not start the already queued sub-pipeline again
+        assert page_2_retry.metadata["pipeline_results"][0]["cloud_task_response"]["duplicate"] is True
+        assert page_2_redelivered.metadata["pipeline_results"][0]["cloud_task_response"]["duplicate"] is True
 
     @patch('src.usecases.pipelines_invoker.CloudTaskAdapter')
     @patch('src.usecases.pipelines_invoker.get_djt_client')
@@ -196,7 +236,7 @@ class TestPipelinesInvoker:
         mock_cloud_task_adapter.return_value = mock_adapter_instance
 
         mock_djt_client = AsyncMock()
-        mock_djt_client.pipeline_status_update.return_value = {"status": "updated"}
+        mock_djt_client.queue_pipeline_status_updates.return_value = {"status": "updated"}
         mock_get_djt_client.return_value = mock_djt_client
 
         # Execute
@@ -239,7 +279,7 @@ class TestPipelinesInvoker:
         mock_cloud_task_adapter.return_value = mock_adapter_instance
 
         mock_djt_client = AsyncMock()
-        mock_djt_client.pipeline_status_update.return_value = {"status": "updated"}
+        mock_djt_client.queue_pipeline_status_updates.return_value = {"status": "updated"}
         mock_get_djt_client.return_value = mock_djt_client
 
         # Execute
@@ -270,7 +310,7 @@ class TestPipelinesInvoker:
 
         # DJT client fails
         mock_djt_client = AsyncMock()
-        mock_djt_client.pipeline_status_update.side_effect = Exception("DJT service unavailable")
+        mock_djt_client.queue_pipeline_status_updates.side_effect = Exception("DJT service unavailable")
         mock_get_djt_client.return_value = mock_djt_client
 
         # Execute
@@ -314,6 +354,43 @@ class TestPipelinesInvoker:
         # Verify adapter cleanup still happens
         mock_adapter_instance.close.assert_called_once()
 
+    @patch('src.usecases.pipelines_invoker.CloudTaskAdapter')
+    @patch('src.usecases.pipelines_invoker.get_djt_client')
+    @patch('src.usecases.pipelines_invoker.settings')
+    async def test_run_reports_queued_pipelines_when_a_later_one_fails(self, mock_settings, mock_get_djt_client, mock_cloud_task_adapter, invoker):
+        """Test that the DJT status of pipelines queued before a failure is still sent."""
+        task_config = TaskConfig(id="test-task-config", type=TaskType.PIPELINE, pipelines=[
+            PipelineReference(id="pipeline1", scope="scope1"),
+            PipelineReference(id="pipeline2", scope="scope2")
+        ])
+        task_params = TaskParameters(
+            app_id="test-app",
+            tenant_id="test-tenant",
+            patient_id="test-patient",
+            document_id="test-doc",
+            run_id="test-run-123",
+            task_config=task_config.model_dump()
+        )
+
+        mock_settings.SELF_API_URL = "https://api.example.com"
+        mock_settings.GCP_LOCATION_2 = "us-central1"
+        mock_settings.DEFAULT_TASK_QUEUE = "default-queue"
+        mock_settings.SERVICE_ACCOUNT_EMAIL = "test@example.com"
+
+        mock_adapter_instance = AsyncMock()
+        mock_adapter_instance.create_task.side_effect = [{"task_id": "task-1"}, Exception("Cloud Tasks API error")]
+        mock_cloud_task_adapter.return_value = mock_adapter_instance
+
+        mock_djt_client = AsyncMock()
+        mock_get_djt_client.return_value = mock_djt_client
+
+        result = await invoker.run(task_params)
+
+        assert result.success is False
+        mock_djt_client.queue_pipeline_status_updates.assert_called_once()
+        updates = mock_djt_client.queue_pipeline_status_updates.call_args.kwargs["updates"]
+        assert [pipeline_id for pipeline_id, _ in updates] == ["scope1:pipeline1"]
+
     @patch('src.usecases.pipelines_invoker.CloudTaskAdapter')
     @patch('src.usecases.pipelines_invoker.settings')
     async def test_run_uses_default_settings(self, mock_settings, mock_cloud_task_adapter, invoker):
@@ -369,15 +446,15 @@ class TestPipelinesInvoker:
         mock_cloud_task_adapter.return_value = mock_adapter_instance
 
         mock_djt_client = AsyncMock()
-        mock_djt_client.pipeline_status_update.return_value = {"status": "updated"}
+        mock_djt_client.queue_pipeline_status_updates.return_value = {"status": "updated"}
         mock_get_djt_client.return_value = mock_djt_client
 
         # Execute
         await invoker.run(task_params)
 
         # Verify DJT status update call
-        djt_call_args = mock_djt_client.pipeline_status_update.call_args
-        pipeline_data = djt_call_args.kwargs["pipeline_data"]
+        djt_call_args = mock_djt_client.queue_pipeline_status_updates.call_args
+        [(_, pipeline_data)] = djt_call_args.kwargs["updates"]
         
         # The pipeline_data should be a PipelineStatusUpdate instance
         assert pipeline_data.id == "test-scope.test-pipeline"
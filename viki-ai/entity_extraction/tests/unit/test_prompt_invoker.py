@@ -48,6 +48,18 @@ class TestPromptInvoker:
             assert result == template
             mock_logger.warning.assert_called()
 
+    def test_template_fields(self):
+        """Test that only the top-level names a template references are reported."""
+        invoker = PromptInvoker()
+
+        templates = [
+            "Summarize {context[default][pipeline][split][results]} for {document_id}",
+            "Use {subject.results} and {{literal braces}}",
+            "Malformed {"
+        ]
+
+        assert invoker._template_fields(templates) == {"context", "document_id", "subject"}
+
     def test_format_prompt_template_exception(self):
         """Test template formatting with general exception."""
         invoker = PromptInvoker()
@@ -13,7 +13,7 @@ import test_env
 # Add the src directory to the Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
 
-from adapters.storage import StorageAdapter, get_storage_adapter, STORAGE_SINGLETON_ENABLE
+from adapters.storage import StorageAdapter, get_storage_adapter, STORAGE_SINGLETON_ENABLE, get_storage_client, get_bucket_storage_adapter
 
 
 class TestStorageAdapter:
@@ -98,6 +98,31 @@ class TestStorageAdapter:
         assert mock_blob.metadata == metadata
         mock_blob.upload_from_string.assert_called_once_with(content, content_type=content_type)
 
+    @patch('adapters.storage.storage.Client')
+    async def test_save_document_compressed(self, mock_storage_client):
+        """Test saving a gzipped document."""
+        import gzip
+
+        mock_client = MagicMock()
+        mock_bucket = MagicMock()
+        mock_blob = MagicMock()
+        mock_blob.name = "test/document.json"
+
+        mock_client.bucket.return_value = mock_bucket
+        mock_bucket.blob.return_value = mock_blob
+        mock_storage_client.return_value = mock_client
+
+        adapter = StorageAdapter(project_id=self.project_id, bucket_name=self.bucket_name)
+
+        content = '{"key": "value"}'
+        await adapter.save_document(document_path="test/document.json", content=content,
+                                    content_type="application/json", compress=True)
+
+        assert mock_blob.content_encoding == "gzip"
+        uploaded = mock_blob.upload_from_string.call_args[0][0]
+        assert gzip.decompress(uploaded).decode("utf-8") == content
+        assert mock_blob.upload_from_string.call_args[1] == {"content_type": "application/json"}
+
     @patch('adapters.storage.storage.Client')
     async def test_save_document_bytes_content(self, mock_storage_client):
         """Test saving a document with bytes content."""
@@ -963,3 +988,35 @@ class TestGetStorageAdapter:
             project_id='test-project',
             bucket_name='test-bucket'
         )
+
+
+class TestSharedStorageClient:
+    """Test suite for the shared client, executor and per-bucket adapters."""
+
+    def setup_method(self):
+        import adapters.storage
+        adapters.storage._clients.clear()
+        adapters.storage._bucket_storage_adapters.clear()
+
+    def teardown_method(self):
+        self.setup_method()
+
+    @patch('adapters.storage.storage.Client')
+    def test_get_storage_client_is_shared(self, mock_storage_client):
+        """Test that one client is created per project."""
+        assert get_storage_client("project-a") is get_storage_client("project-a")
+        get_storage_client("project-b")
+
+        assert mock_storage_client.call_count == 2
+
+    @patch('adapters.storage.storage.Client')
+    def test_adapters_share_client_and_executor(self, mock_storage_client):
+        """Test that adapters of different buckets reuse the client and the executor."""
+        first = get_bucket_storage_adapter("bucket-a")
+        second = get_bucket_storage_adapter("bucket-b")
+
+        assert get_bucket_storage_adapter("bucket-a") is first
+        assert first.client is second.client
+        assert first.executor is second.executor
+        assert StorageAdapter(client=first.client).executor is first.executor
+        mock_storage_client.assert_called_once()
@@ -12,6 +12,8 @@ import test_env
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
 
 from usecases.task_orchestrator import TaskOrchestrator
+from adapters.cloud_tasks import TaskSubmissionReport, next_step_task_name
+from util.background_queue import BackgroundQueue
 from models.general import TaskParameters, TaskResults, PipelineParameters
 from models.pipeline_config import TaskConfig, TaskType, ModuleConfig, PromptConfig, PipelineReference, PipelineConfig
 
@@ -57,6 +59,20 @@ class TestTaskOrchestrator:
         result = self.orchestrator._build_gcs_path(self.task_params, filename)
         assert result == expected_path
 
+    def test_task_params_summary(self):
+        """Test the compact logging view of TaskParameters."""
+        summary = self.task_params.summary()
+
+        assert summary["task_id"] == "test-task"
+        assert summary["task_type"] == "module"
+        assert summary["document_id"] == "test-document"
+        assert summary["page_number"] == 1
+        assert summary["run_id"] == "test-run-123"
+        assert summary["context_keys"] == 1
+        assert summary["entities_keys"] == 0
+        assert summary["subject_count"] == 0
+        assert "context" not in summary
+
     def test_build_gcs_path_no_page_number(self):
         """Test GCS path building when page_number is None."""
         self.task_params.page_number = None
@@ -66,13 +82,15 @@ class TestTaskOrchestrator:
         result = self.orchestrator._build_gcs_path(self.task_params, filename)
         assert result == expected_path
 
-    @patch('usecases.task_orchestrator.StorageAdapter')
+    @patch('usecases.task_orchestrator.get_bucket_storage_adapter')
     @patch('usecases.task_orchestrator.JsonUtil')
     @patch('usecases.task_orchestrator.settings')
     async def test_persist_task_params_to_gcs_success(self, mock_settings, mock_json_util, mock_storage_adapter):
         """Test successful persistence of task parameters to GCS."""
         # Setup mocks
         mock_settings.STAGE = "test"
+        mock_settings.ENTITYEXTRACTION_TASK_PERSIST_GZIP_ENABLED = False
+        mock_settings.ENTITYEXTRACTION_TASK_PERSIST_BACKGROUND_ENABLED = False
         mock_json_util.dumps.return_value = '{"test": "data"}'
         mock_storage = AsyncMock()
         mock_storage_adapter.return_value = mock_storage
@@ -81,13 +99,14 @@ class TestTaskOrchestrator:
         await self.orchestrator._persist_task_params_to_gcs(self.task_params)
         
         # Verify
-        mock_storage_adapter.assert_called_once_with(bucket_name="entityextraction-context-test")
+        mock_storage_adapter.assert_called_once_with("entityextraction-context-test")
         mock_storage.save_document.assert_called_once()
         call_args = mock_storage.save_document.call_args
         assert call_args[1]['content_type'] == "application/json"
+        assert call_args[1]['compress'] is False
         assert call_args[1]['metadata']['task_name'] == self.task_name
 
-    @patch('usecases.task_orchestrator.StorageAdapter')
+    @patch('usecases.task_orchestrator.get_bucket_storage_adapter')
     @patch('usecases.task_orchestrator.LOGGER')
     async def test_persist_task_params_to_gcs_failure(self, mock_logger, mock_storage_adapter):
         """Test handling of GCS persistence failure."""
@@ -102,13 +121,15 @@ class TestTaskOrchestrator:
         # Verify error was logged
         mock_logger.error.assert_called()
 
-    @patch('usecases.task_orchestrator.StorageAdapter')
+    @patch('usecases.task_orchestrator.get_bucket_storage_adapter')
     @patch('usecases.task_orchestrator.JsonUtil')
     @patch('usecases.task_orchestrator.settings')
     async def test_persist_task_results_to_gcs_success(self, mock_settings, mock_json_util, mock_storage_adapter):
         """Test successful persistence of task results to GCS."""
         # Setup mocks
         mock_settings.STAGE = "test"
+        mock_settings.ENTITYEXTRACTION_TASK_PERSIST_GZIP_ENABLED = True
+        mock_settings.ENTITYEXTRACTION_TASK_PERSIST_BACKGROUND_ENABLED = False
         mock_json_util.dumps.return_value = '{"success": true}'
         mock_storage = AsyncMock()
         mock_storage_adapter.return_value = mock_storage
@@ -120,8 +141,9 @@ class TestTaskOrchestrator:
         await self.orchestrator._persist_task_results_to_gcs(self.task_params, results)
         
         # Verify
-        mock_storage_adapter.assert_called_once_with(bucket_name="entityextraction-context-test")
+        mock_storage_adapter.assert_called_once_with("entityextraction-context-test")
         assert mock_storage.save_document.call_count == 2
+        assert all(c[1]['compress'] is True for c in mock_storage.save_document.call_args_list)
         
         # Verify first call (output.json)
         output_call = mock_storage.save_document.call_args_list[0]
@@ -135,6 +157,27 @@ class TestTaskOrchestrator:
         assert results_call[1]['content_type'] == "application/json"
         assert results_call[1]['metadata']['success'] == "True"
 
+    @patch('usecases.task_orchestrator.get_task_persistence_queue')
+    @patch('usecases.task_orchestrator.get_bucket_storage_adapter')
+    @patch('usecases.task_orchestrator.settings')
+    async def test_persist_task_params_to_gcs_in_background(self, mock_settings, mock_storage_adapter, mock_get_queue):
+        """Test that background persistence serializes the parameters before the task goes on."""
+        mock_settings.STAGE = "test"
+        mock_settings.ENTITYEXTRACTION_TASK_PERSIST_GZIP_ENABLED = False
+        mock_settings.ENTITYEXTRACTION_TASK_PERSIST_BACKGROUND_ENABLED = True
+        mock_storage = AsyncMock()
+        mock_storage_adapter.return_value = mock_storage
+        queue = BackgroundQueue("test")
+        mock_get_queue.return_value = queue
+
+        await self.orchestrator._persist_task_params_to_gcs(self.task_params)
+        self.task_params.context["added_later"] = "value"
+
+        assert await queue.flush(timeout=5)
+        mock_storage.save_document.assert_called_once()
+        assert "added_later" not in mock_storage.save_document.call_args[1]['content']
+        assert queue.get_stats()["completed"] == 1
+
     @patch('usecases.task_orchestrator.settings')
     async def test_invoke_local_development(self, mock_settings):
         """Test invoke method in local development mode."""
@@ -327,6 +370,7 @@ class TestTaskOrchestrator:
         )
         
         mock_adapter = AsyncMock()
+        mock_adapter.create_tasks_for_next_steps.return_value = TaskSubmissionReport(submitted=["next-task"])
         mock_cloud_task_adapter.return_value = mock_adapter
         
         with patch.object(self.orchestrator, '_determine_next_tasks') as mock_next_tasks:
@@ -339,9 +383,39 @@ class TestTaskOrchestrator:
             assert result.success is True
             assert "next_tasks" in result.metadata
             assert len(result.metadata["next_tasks"]) == 1
-            mock_adapter.create_task_for_next_step.assert_called_once()
+            mock_adapter.create_tasks_for_next_steps.assert_called_once_with([next_task_params])
             mock_adapter.close.assert_called_once()
 
+    @patch('usecases.task_orchestrator.CloudTaskAdapter')
+    @patch('usecases.task_orchestrator.ModuleInvoker')
+    @patch('usecases.task_orchestrator.set_pipeline_context')
+    @patch('usecases.task_orchestrator.settings')
+    async def test_run_next_task_submission_partially_failed(self, mock_settings, mock_set_context, mock_module_invoker, mock_cloud_task_adapter):
+        """Test that a task whose next tasks were not all submitted is handled as failed, to be retried."""
+        mock_settings.ENTITYEXTRACTION_TASK_PERSIST_GCS_ENABLED = False
+        mock_invoker = AsyncMock()
+        mock_invoker.run.return_value = TaskResults(success=True, results={"output": "data"})
+        mock_module_invoker.return_value = mock_invoker
+
+        mock_adapter = AsyncMock()
+        mock_adapter.create_tasks_for_next_steps.return_value = TaskSubmissionReport(
+            submitted=["page-1"],
+            failed=[{"task_id": "next-task", "task_name": "page-2", "page_number": 2, "error": "queue unavailable"}]
+        )
+        mock_cloud_task_adapter.return_value = mock_adapter
+
+        with patch.object(self.orchestrator, '_determine_next_tasks') as mock_next_tasks, \
+             patch.object(self.orchestrator, '_handle_task_failure') as mock_handle_failure:
+            mock_next_tasks.return_value = [self.task_params, self.task_params]
+            mock_handle_failure.return_value = TaskResults(success=False, error_message="retry")
+
+            result = await self.orchestrator.run(self.task_params)
+
+        assert result.success is False
+        error = mock_handle_failure.call_args[0][1]
+        assert "Failed to submit 1 of 2 next task(s): queue unavailable" in str(error)
+        mock_adapter.close.assert_called_once()
+
     @patch('usecases.task_orchestrator.search_pipeline_config')
     async def test_determine_next_tasks_no_pipeline_config(self, mock_search_config):
         """Test _determine_next_tasks when pipeline config is not found."""
@@ -413,22 +487,6 @@ class TestTaskOrchestrator:
         assert len(next_tasks) == 1
         assert next_tasks[0].task_config.id == "next-task"
 
-    def test_find_task_index(self):
-        """Test _find_task_index method."""
-        tasks = [
-            TaskConfig(id="task1", type=TaskType.MODULE, module=ModuleConfig(type="mod1")),
-            TaskConfig(id="task2", type=TaskType.MODULE, module=ModuleConfig(type="mod2")),
-            TaskConfig(id="task3", type=TaskType.MODULE, module=ModuleConfig(type="mod3"))
-        ]
-        
-        # Test finding existing tasks
-        assert self.orchestrator._find_task_index(tasks, "task1") == 0
-        assert self.orchestrator._find_task_index(tasks, "task2") == 1
-        assert self.orchestrator._find_task_index(tasks, "task3") == 2
-        
-        # Test finding non-existing task
-        assert self.orchestrator._find_task_index(tasks, "nonexistent") == -1
-
     def test_extract_pages_from_results_success(self):
         """Test _extract_pages_from_results with successful results."""
         pages_data = [
@@ -586,7 +644,7 @@ class TestTaskOrchestrator:
                 assert result.success is False
                 assert "Task execution failed" in result.error_message
 
-    @patch('usecases.task_orchestrator.StorageAdapter')
+    @patch('usecases.task_orchestrator.get_bucket_storage_adapter')
     @patch('usecases.task_orchestrator.LOGGER')
     async def test_persist_task_results_to_gcs_failure(self, mock_logger, mock_storage_adapter):
         """Test handling of GCS persistence failure for task results."""
@@ -879,3 +937,213 @@ class TestTaskOrchestrator:
             task_parameters=self.task_params,
             queue="mapped-default-queue"
         )
+
+    def _page_streaming_pipeline(self):
+        """A split task with `for_each: page` followed by a page task."""
+        from models.pipeline_config import PostProcessing
+
+        self.task_params.task_config.post_processing = PostProcessing(for_each="page")
+        self.task_params.page_number = None
+        next_task = TaskConfig(
+            id="next-task",
+            type=TaskType.MODULE,
+            module=ModuleConfig(type="next_module")
+        )
+        return PipelineConfig(
+            key="test-pipeline",
+            version="1.0",
+            name="Test Pipeline",
+            tasks=[self.task_params.task_config, next_task]
+        )
+
+    @patch('usecases.task_orchestrator.search_pipeline_config')
+    @patch('usecases.task_orchestrator.CloudTaskAdapter')
+    @patch('usecases.task_orchestrator.ModuleInvoker')
+    @patch('usecases.task_orchestrator.set_pipeline_context')
+    @patch('usecases.task_orchestrator.settings')
+    async def test_run_streams_page_tasks(self, mock_settings, mock_set_context, mock_module_invoker, mock_cloud_task_adapter, mock_search_config):
+        """Test that page tasks are submitted as pages are published and only the rest afterwards."""
+        from util.page_stream import publish_page
+
+        mock_settings.ENTITYEXTRACTION_TASK_PERSIST_GCS_ENABLED = False
+        mock_settings.PIPELINE_PAGE_STREAMING_ENABLED = True
+        mock_search_config.return_value = self._page_streaming_pipeline()
+
+        pages = [{"page_number": n, "storage_uri": f"gs://bucket/{n}.pdf", "total_pages": 3} for n in (1, 2, 3)]
+        submitted_while_running = []
+
+        async def run_module(task_params):
+            # Page 3 is not published, as when its streamed submission was never made
+            for page in pages[:2]:
+                await publish_page(page)
+            submitted_while_running.extend(call.kwargs["task_parameters"].page_number for call in mock_adapter.create_task_for_next_step.call_args_list)
+            return TaskResults(success=True, results={"pages": pages, "total_pages": 3})
+
+        mock_invoker = AsyncMock()
+        mock_invoker.run.side_effect = run_module
+        mock_module_invoker.return_value = mock_invoker
+
+        mock_adapter = AsyncMock()
+        mock_adapter.create_tasks_for_next_steps.return_value = TaskSubmissionReport(submitted=["page-3"])
+        mock_cloud_task_adapter.return_value = mock_adapter
+
+        with patch.object(self.orchestrator, '_update_status') as mock_update_status:
+            result = await self.orchestrator.run(self.task_params)
+
+        assert result.success is True
+        assert submitted_while_running == [1, 2]
+        assert result.metadata["streamed_page_tasks"] == [1, 2]
+        assert [t["page_number"] for t in result.metadata["next_tasks"]] == [3]
+
+        streamed = [call.kwargs["task_parameters"] for call in mock_adapter.create_task_for_next_step.call_args_list]
+        # Streamed tasks are named like the bulk fan-out names them, so either submission of a page dedupes the other
+        assert [call.kwargs["task_name"] for call in mock_adapter.create_task_for_next_step.call_args_list] == \
+            [next_step_task_name("next-task", t) for t in streamed]
+        submitted = streamed + mock_adapter.create_tasks_for_next_steps.call_args[0][0]
+        assert [t.page_number for t in submitted] == [1, 2, 3]
+        assert all(t.page_count == 3 for t in submitted)
+        # A streamed page task sees only its own page as the split task's results
+        assert submitted[0].subject["results"]["pages"] == [pages[0]]
+        assert submitted[0].context["page_storage_uri"] == "gs://bucket/1.pdf"
+        mock_update_status.assert_not_called()
+
+    @patch('usecases.task_orchestrator.search_pipeline_config')
+    @patch('usecases.task_orchestrator.CloudTaskAdapter')
+    @patch('usecases.task_orchestrator.ModuleInvoker')
+    @patch('usecases.task_orchestrator.set_pipeline_context')
+    @patch('usecases.task_orchestrator.settings')
+    async def test_run_all_pages_streamed_does_not_complete_pipeline(self, mock_settings, mock_set_context, mock_module_invoker, mock_cloud_task_adapter, mock_search_config):
+        """Test that a task whose pages were all streamed does not report the pipeline complete."""
+        from util.page_stream import publish_page
+
+        mock_settings.ENTITYEXTRACTION_TASK_PERSIST_GCS_ENABLED = False
+        mock_settings.PIPELINE_PAGE_STREAMING_ENABLED = True
+        mock_search_config.return_value = self._page_streaming_pipeline()
+
+        pages = [{"page_number": n, "storage_uri": f"gs://bucket/{n}.pdf", "total_pages": 2} for n in (1, 2)]
+
+        async def run_module(task_params):
+            for page in pages:
+                await publish_page(page)
+            return TaskResults(success=True, results={"pages": pages, "total_pages": 2})
+
+        mock_invoker = AsyncMock()
+        mock_invoker.run.side_effect = run_module
+        mock_module_invoker.return_value = mock_invoker
+
+        mock_adapter = AsyncMock()
+        mock_cloud_task_adapter.return_value = mock_adapter
+
+        with patch.object(self.orchestrator, '_on_pipeline_complete') as mock_complete, \
+             patch.object(self.orchestrator, '_update_status') as mock_update_status:
+            result = await self.orchestrator.run(self.task_params)
+
+        assert result.metadata["streamed_page_tasks"] == [1, 2]
+        assert "next_tasks" not in result.metadata
+        assert mock_adapter.create_task_for_next_step.call_count == 2
+        mock_complete.assert_not_called()
+        mock_update_status.assert_not_called()
+
+    @patch('usecases.task_orchestrator.search_pipeline_config')
+    @patch('usecases.task_orchestrator.CloudTaskAdapter')
+    @patch('usecases.task_orchestrator.ModuleInvoker')
+    @patch('usecases.task_orchestrator.set_pipeline_context')
+    @patch('usecases.task_orchestrator.settings')
+    async def test_run_streamed_pages_then_failure_is_retried(self, mock_settings, mock_set_context, mock_module_invoker, mock_cloud_task_adapter, mock_search_config):
+        """Test that a task failing after it streamed some pages is retried instead of leaving the run waiting on pages."""
+        from util.page_stream import publish_page
+
+        mock_settings.ENTITYEXTRACTION_TASK_PERSIST_GCS_ENABLED = False
+        mock_settings.PIPELINE_PAGE_STREAMING_ENABLED = True
+        mock_search_config.return_value = self._page_streaming_pipeline()
+
+        async def run_module(task_params):
+            await publish_page({"page_number": 1, "storage_uri": "gs://bucket/1.pdf", "total_pages": 3})
+            return TaskResults(success=False, error_message="page 2 could not be split")
+
+        mock_invoker = AsyncMock()
+        mock_invoker.run.side_effect = run_module
+        mock_module_invoker.return_value = mock_invoker
+
+        mock_adapter = AsyncMock()
+        mock_cloud_task_adapter.return_value = mock_adapter
+
+        with patch.object(self.orchestrator, '_on_pipeline_complete') as mock_complete, \
+             patch.object(self.orchestrator, '_update_status') as mock_update_status, \
+             patch.object(self.orchestrator, '_retry_task') as mock_retry, \
+             patch.object(self.orchestrator, '_mark_pipeline_failed') as mock_mark_failed:
+            result = await self.orchestrator.run(self.task_params)
+
+        assert result.success is False
+        assert result.metadata["retry_initiated"] is True
+        assert "page 2 could not be split" in str(mock_retry.call_args[0][1])
+        mock_complete.assert_not_called()
+        mock_update_status.assert_not_called()
+        mock_mark_failed.assert_not_called()
+
+        # Past the retry limit the pipeline is marked failed in DJT
+        self.task_params.task_iteration = self.task_params.task_retry_count
+        with patch.object(self.orchestrator, '_update_status') as mock_update_status, \
+             patch.object(self.orchestrator, '_mark_pipeline_failed') as mock_mark_failed:
+            result = await self.orchestrator.run(self.task_params)
+
+        assert result.metadata["pipeline_marked_failed"] is True
+        mock_mark_failed.assert_called_once()
+        mock_update_status.assert_not_called()
+
+    @patch('usecases.task_orchestrator.search_pipeline_config')
+    @patch('usecases.task_orchestrator.CloudTaskAdapter')
+    async def test_streamed_page_task_matches_page_task_created_after_task(self, mock_cloud_task_adapter, mock_search_config):
+        """Test that a streamed page task gets the same parameters as the one the fan-out creates after the task."""
+        mock_search_config.return_value = self._page_streaming_pipeline()
+        mock_adapter = AsyncMock()
+        mock_cloud_task_adapter.return_value = mock_adapter
+
+        pages = [{"page_number": n, "storage_uri": f"gs://bucket/{n}.pdf", "total_pages": 2} for n in (1, 2)]
+        document_results = {"total_pages": 2, "elapsed_time_seconds": 1.5, "base_path": "gs://bucket/run"}
+
+        with patch('usecases.task_orchestrator.settings') as mock_settings:
+            mock_settings.PIPELINE_PAGE_STREAMING_ENABLED = True
+            page_fanout = await self.orchestrator._start_page_fanout(self.task_params)
+        await page_fanout.submit(pages[0], document_results)
+        streamed = mock_adapter.create_task_for_next_step.call_args.kwargs["task_parameters"]
+
+        results = TaskResults(success=True, results={"pages": pages, **document_results}, execution_time_ms=1500)
+        self.orchestrator._add_task_results_to_context(self.task_params, results)
+        after_task = (await self.orchestrator._determine_next_tasks(self.task_params, results))[0]
+
+        assert streamed.model_dump(exclude={"task_queue_date"}) == after_task.model_dump(exclude={"task_queue_date"})
+        assert streamed.subject["results"] == {"pages": [pages[0]], **document_results}
+
+    @patch('usecases.task_orchestrator.search_pipeline_config')
+    @patch('usecases.task_orchestrator.CloudTaskAdapter')
+    async def test_page_fanout_failed_submission_is_retried_after_task(self, mock_cloud_task_adapter, mock_search_config):
+        """Test that a page whose streamed submission failed is left for the regular fan-out."""
+        mock_search_config.return_value = self._page_streaming_pipeline()
+        mock_adapter = AsyncMock()
+        mock_adapter.create_task_for_next_step.side_effect = [Exception("queue unavailable"), {"task_id": "2"}]
+        mock_cloud_task_adapter.return_value = mock_adapter
+
+        with patch('usecases.task_orchestrator.settings') as mock_settings:
+            mock_settings.PIPELINE_PAGE_STREAMING_ENABLED = True
+            page_fanout = await self.orchestrator._start_page_fanout(self.task_params)
+
+        await page_fanout.submit({"page_number": 1, "total_pages": 2})
+        await page_fanout.submit({"page_number": 2, "total_pages": 2})
+        await page_fanout.submit({"page_number": 2, "total_pages": 2})
+
+        assert page_fanout.submitted == {2}
+        assert mock_adapter.create_task_for_next_step.call_count == 2
+
+    @patch('usecases.task_orchestrator.search_pipeline_config')
+    async def test_start_page_fanout_disabled(self, mock_search_config):
+        """Test that no fan-out is prepared when streaming is off or the task is not `for_each: page`."""
+        with patch('usecases.task_orchestrator.settings') as mock_settings:
+            mock_settings.PIPELINE_PAGE_STREAMING_ENABLED = True
+            assert await self.orchestrator._start_page_fanout(self.task_params) is None
+
+            self._page_streaming_pipeline()
+            mock_settings.PIPELINE_PAGE_STREAMING_ENABLED = False
+            assert await self.orchestrator._start_page_fanout(self.task_params) is None
+
+        mock_search_config.assert_not_called()
@@ -1,9 +1,13 @@
+import asyncio
+import time
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict
+from typing import Any, Awaitable, Callable, List, Optional, Dict
+from adapters.circuit_breaker_state import ICircuitBreakerStateStore, RollingWindow, create_state_store
 from adapters.pgvector_adapter import MedispanPgVectorAdapter
 from adapters.firestore_vector_adapter import MedispanFirestoreVectorAdapter
 from models import MedispanDrug
 from model_metric import Metric
+import settings
 from utils.custom_logger import getLogger
 from utils.date import now_utc
 from utils.exception import exceptionToMap
@@ -11,11 +15,25 @@ from utils.exception import exceptionToMap
 LOGGER = getLogger(__name__)
 
 # Time to wait between recovery attempts
-RECOVERY_PROBE_INTERVAL = timedelta(minutes=1)
+RECOVERY_PROBE_INTERVAL = timedelta(seconds=settings.CIRCUIT_BREAKER_RECOVERY_PROBE_INTERVAL)
 
 class CircuitBreakerAdapter:
+    """
+    Serves Medispan searches from AlloyDB, falling back to Firestore.
+
+    The circuit trips (opens) when the primary's error rate or p95 latency over a rolling window
+    crosses its threshold.  While open, searches go straight to the fallback.  After
+    RECOVERY_PROBE_INTERVAL the circuit is half-open: a single probe request is let through to the
+    primary and closes the circuit on success or re-opens it on failure.  With a shared state store
+    configured, a trip on one instance opens the circuit on every instance.
+
+    With hedging, a search the fallback answered first counts as a primary failure: the primary is
+    cancelled and never reports back, so a stalled primary would otherwise never open the circuit.
+    """
     _instances: Dict[str, 'CircuitBreakerAdapter'] = {}
     _states: Dict[str, Dict] = {}
+    _store: Optional[ICircuitBreakerStateStore] = None
+    _store_initialized = False
 
     def __new__(cls, app_id: str, catalog: str):
         instance_key = f"{app_id}:{catalog}"
@@ -23,7 +41,11 @@ class CircuitBreakerAdapter:
             cls._instances[instance_key] = super(CircuitBreakerAdapter, cls).__new__(cls)
             cls._states[instance_key] = {
                 'is_failed': False,
-                'last_failure': None
+                'last_failure': None,
+                'updated_at': None,
+                'window': RollingWindow(settings.CIRCUIT_BREAKER_WINDOW_SECONDS),
+                'probing': False,
+                'synced_at': 0.0,
             }
         return cls._instances[instance_key]
 
@@ -36,6 +58,17 @@ class CircuitBreakerAdapter:
             self.primary_adapter = MedispanPgVectorAdapter(app_id=app_id, catalog=catalog)
             self.fallback_adapter = MedispanFirestoreVectorAdapter(app_id=app_id, catalog=catalog)
 
+    @classmethod
+    def _get_store(cls) -> Optional[ICircuitBreakerStateStore]:
+        if not cls._store_initialized:
+            cls._store_initialized = True
+            try:
+                cls._store = create_state_store()
+            except Exception as e:
+                LOGGER.error("Circuit breaker: shared state store unavailable, keeping state per process: %s", str(e))
+                cls._store = None
+        return cls._store
+
     def _get_state(self) -> tuple[bool, Optional[datetime]]:
         """Get circuit breaker state from class state dictionary."""
         state = self._states[self.instance_key]
@@ -43,57 +76,186 @@ class CircuitBreakerAdapter:
 
     def _set_state(self, is_failed: bool, last_failure: Optional[datetime] = None):
         """Set circuit breaker state in class state dictionary."""
-        self._states[self.instance_key] = {
+        self._states[self.instance_key].update({
             'is_failed': is_failed,
-            'last_failure': last_failure
-        }
+            'last_failure': last_failure,
+            'updated_at': now_utc(),
+        })
 
-    async def search_medications(self, search_term: str, **kwargs) -> List[MedispanDrug]:
+    async def _sync_state(self):
+        """Adopt the shared state if another instance changed it since we last did."""
+        store = self._get_store()
+        state = self._states[self.instance_key]
+        if not store or time.monotonic() - state['synced_at'] < settings.CIRCUIT_BREAKER_STATE_SYNC_INTERVAL:
+            return
+        state['synced_at'] = time.monotonic()
+        try:
+            remote = await store.get(self.instance_key)
+        except Exception as e:
+            LOGGER.warning("Circuit breaker: error reading shared state for %s: %s", self.instance_key, str(e))
+            return
+        if remote and remote.get('updated_at') and (not state['updated_at'] or remote['updated_at'] > state['updated_at']):
+            state.update({
+                'is_failed': remote.get('is_failed', False),
+                'last_failure': remote.get('last_failure'),
+                'updated_at': remote['updated_at'],
+            })
+
+    async def _publish_state(self):
+        store = self._get_store()
+        if not store:
+            return
+        state = self._states[self.instance_key]
+        try:
+            await store.set(self.instance_key, {
+                'is_failed': state['is_failed'],
+                'last_failure': state['last_failure'],
+                'updated_at': state['updated_at'],
+            })
+        except Exception as e:
+            LOGGER.warning("Circuit breaker: error writing shared state for %s: %s", self.instance_key, str(e))
+
+    def _should_trip(self) -> Optional[str]:
+        """The reason the rolling window says the primary is unhealthy, if it does."""
+        window: RollingWindow = self._states[self.instance_key]['window']
+        count = window.count()
+        error_rate = window.error_rate()
+        if count >= settings.CIRCUIT_BREAKER_MIN_REQUESTS and error_rate > 0 and error_rate >= settings.CIRCUIT_BREAKER_ERROR_RATE_THRESHOLD:
+            return "error_rate"
+        if (settings.CIRCUIT_BREAKER_P95_LATENCY_THRESHOLD > 0 and count >= settings.CIRCUIT_BREAKER_LATENCY_MIN_SAMPLES
+                and window.p95() > settings.CIRCUIT_BREAKER_P95_LATENCY_THRESHOLD):
+            return "p95_latency"
+        return None
+
+    async def _record_primary(self, latency: float, is_error: bool, probe: bool) -> Optional[str]:
+        """Record a primary outcome and move the circuit accordingly.  Returns the trip reason if it opened."""
+        state = self._states[self.instance_key]
+        window: RollingWindow = state['window']
+        window.record(latency, is_error)
+
+        if probe:
+            state['probing'] = False
+            if is_error:
+                self._set_state(True, now_utc())
+                await self._publish_state()
+                return "probe_failed"
+            window.reset()
+            self._set_state(False, None)
+            await self._publish_state()
+            return None
+
+        reason = self._should_trip()
+        if reason and not state['is_failed']:
+            self._set_state(True, now_utc())
+            await self._publish_state()
+        return reason
+
+    async def _call_primary(self, primary: Callable[[], Awaitable[Any]], fallback: Callable[[], Awaitable[Any]], hedge: bool):
+        """
+        Run the primary call, or with hedging, start the fallback once the primary exceeds the latency budget
+        and return whichever answers first.
+
+        Returns (result, served_by, primary_latency, primary_error, fallback_task).  served_by is None when
+        the primary failed; fallback_task is the already started hedge request, if any.
+        """
+        start_time = time.monotonic()
+        primary_task = asyncio.ensure_future(primary())
+        if hedge:
+            done, _ = await asyncio.wait({primary_task}, timeout=settings.CIRCUIT_BREAKER_HEDGE_LATENCY_BUDGET)
+            if not done:
+                fallback_task = asyncio.ensure_future(fallback())
+                done, _ = await asyncio.wait({primary_task, fallback_task}, return_when=asyncio.FIRST_COMPLETED)
+                if fallback_task in done and not fallback_task.exception():
+                    primary_task.cancel()
+                    return fallback_task.result(), "firestore-hedged", time.monotonic() - start_time, None, None
+                try:
+                    results = await primary_task
+                except Exception as e:
+                    return None, None, time.monotonic() - start_time, e, fallback_task
+                if not fallback_task.done():
+                    fallback_task.cancel()
+                return results, "alloydb", time.monotonic() - start_time, None, None
+        try:
+            results = await primary_task
+        except Exception as e:
+            return None, None, time.monotonic() - start_time, e, None
+        return results, "alloydb", time.monotonic() - start_time, None, None
+
+    async def _search(self, primary: Callable[[], Awaitable[Any]], fallback: Callable[[], Awaitable[Any]], extra: Dict[str, Any], description: str):
+        await self._sync_state()
+        state = self._states[self.instance_key]
         is_failed, last_failure = self._get_state()
 
-        extra = {
-            "app_id": self.app_id,
-            "catalog": self.catalog,
-            "search_term": search_term
-        }
-        
-        # Check if we should attempt recovery
-        if is_failed and last_failure:
-            if now_utc() - last_failure > RECOVERY_PROBE_INTERVAL:
-                is_failed = False
-                self._set_state(False, None)
-        
+        # Half-open: let a single probe through to the primary once the recovery interval has passed
+        probe = False
+        if is_failed and last_failure and now_utc() - last_failure > RECOVERY_PROBE_INTERVAL and not state['probing']:
+            state['probing'] = True
+            probe = True
+
         # If circuit is open (failed), go straight to fallback
-        if is_failed:
+        if is_failed and not probe:
             extra.update({
                 "circuit_state": "open",
                 "last_failure": last_failure.isoformat() if last_failure else None,
                 "adapter": "firestore",
                 "is_tripping_event": False,
-            })            
+            })
             Metric.send("EXTRACTION::MEDDB::SEARCH::CIRCUITBREAKER", branch="firestore", tags=extra)
-            return await self.fallback_adapter.search_medications(search_term, **kwargs)
-        
-        # Try primary adapter
+            return await fallback()
+
+        hedge = settings.CIRCUIT_BREAKER_HEDGE_ENABLED and not probe
         try:
-            results = await self.primary_adapter.search_medications(search_term, **kwargs)
-            extra.update({
-                "circuit_state": "closed",
-                "last_failure": last_failure.isoformat() if last_failure else None,
-                "adapter": "alloydb",
-                "is_tripping_event": False,
-            })
-            Metric.send("EXTRACTION::MEDDB::SEARCH::CIRCUITBREAKER", branch="alloydb", tags=extra)
+            results, served_by, latency, error, fallback_task = await self._call_primary(primary, fallback, hedge)
+        except BaseException:
+            if probe:
+                state['probing'] = False
+            raise
+
+        # A hedge lost to the fallback is a failure; its latency is the time until the fallback answered
+        window: RollingWindow = state['window']
+        trip_reason = await self._record_primary(latency, error is not None or served_by == "firestore-hedged", probe)
+        extra.update({
+            "circuit_state": "half_open" if probe else ("open" if trip_reason else "closed"),
+            "last_failure": last_failure.isoformat() if last_failure else None,
+            "is_tripping_event": bool(trip_reason),
+            "trip_reason": trip_reason,
+            "error_rate": window.error_rate(),
+            "p95_latency": window.p95(),
+            "primary_latency": latency,
+        })
+
+        if error is None:
+            extra["adapter"] = served_by
+            Metric.send("EXTRACTION::MEDDB::SEARCH::CIRCUITBREAKER", branch=served_by, tags=extra)
             return results
-        except Exception as e:
-            extra.update({
-                "circuit_state": "open",
-                "last_failure": last_failure.isoformat() if last_failure else None,
-                "adapter": "firestore",
-                "is_tripping_event": True,
-                "error": exceptionToMap(e)
-            })
-            LOGGER.warning("AlloyDB search failed, falling back to Firestore: %s", str(e), extra=extra)
-            self._set_state(True, now_utc())            
-            Metric.send("EXTRACTION::MEDDB::SEARCH::CIRCUITBREAKER", branch="firestore", tags=extra)
-            return await self.fallback_adapter.search_medications(search_term, **kwargs)
+
+        extra.update({
+            "adapter": "firestore",
+            "error": exceptionToMap(error)
+        })
+        LOGGER.warning("AlloyDB %s failed, falling back to Firestore: %s", description, str(error), extra=extra)
+        Metric.send("EXTRACTION::MEDDB::SEARCH::CIRCUITBREAKER", branch="firestore", tags=extra)
+        if fallback_task:
+            # The hedged fallback request is already in flight
+            return await fallback_task
+        return await fallback()
+
+    async def search_medications(self, search_term: str, **kwargs) -> List[MedispanDrug]:
+        extra = {
+            "app_id": self.app_id,
+            "catalog": self.catalog,
+            "search_term": search_term
+        }
+        return await self._search(lambda: self.primary_adapter.search_medications(search_term, **kwargs),
+                                  lambda: self.fallback_adapter.search_medications(search_term, **kwargs),
+                                  extra, "search")
+
+    async def search_medications_batch(self, search_terms: List[str]) -> Dict[str, List[MedispanDrug]]:
+        extra = {
+            "app_id": self.app_id,
+            "catalog": self.catalog,
+            "search_term_count": len(search_terms)
+        }
+        return await self._search(lambda: self.primary_adapter.search_medications_batch(search_terms),
+                                  lambda: self.fallback_adapter.search_medications_batch(search_terms),
+                                  extra, "batch search")
@@ -0,0 +1,91 @@
+"""
+Rolling health windows and pluggable state stores for CircuitBreakerAdapter.
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from functools import partial
+from typing import Any, Deque, Dict, Optional, Tuple
+
+import settings
+from utils.custom_logger import getLogger
+
+LOGGER = getLogger(__name__)
+
+
+class RollingWindow:
+    """Outcome and latency of the primary calls made during the last `window_seconds`."""
+
+    def __init__(self, window_seconds: float):
+        self.window_seconds = window_seconds
+        self._samples: Deque[Tuple[float, float, bool]] = deque()
+
+    def _evict(self, now: float):
+        while self._samples and now - self._samples[0][0] > self.window_seconds:
+            self._samples.popleft()
+
+    def record(self, latency: float, is_error: bool, now: Optional[float] = None):
+        now = time.monotonic() if now is None else now
+        self._samples.append((now, latency, is_error))
+        self._evict(now)
+
+    def reset(self):
+        self._samples.clear()
+
+    def count(self) -> int:
+        self._evict(time.monotonic())
+        return len(self._samples)
+
+    def error_rate(self) -> float:
+        self._evict(time.monotonic())
+        if not self._samples:
+            return 0.0
+        return sum(1 for _, _, is_error in self._samples if is_error) / len(self._samples)
+
+    def p95(self) -> float:
+        """95th percentile latency in seconds (nearest rank), or 0 for an empty window."""
+        self._evict(time.monotonic())
+        if not self._samples:
+            return 0.0
+        latencies = sorted(latency for _, latency, _ in self._samples)
+        return latencies[max(0, math.ceil(0.95 * len(latencies)) - 1)]
+
+
+class ICircuitBreakerStateStore:
+    """Store that shares the open/closed state of a circuit across instances."""
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def set(self, key: str, state: Dict[str, Any]):
+        raise NotImplementedError
+
+
+class FirestoreCircuitBreakerStateStore(ICircuitBreakerStateStore):
+    """One Firestore document per circuit, holding is_failed, last_failure and updated_at."""
+
+    def __init__(self, collection: str):
+        from google.cloud import firestore
+
+        self.collection = collection
+        self.db = firestore.Client(
+            project=settings.GCP_PROJECT_ID,
+            database=settings.GCP_FIRESTORE_DB
+        )
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        document = self.db.collection(self.collection).document(key)
+        snapshot = await asyncio.get_event_loop().run_in_executor(None, document.get)
+        return snapshot.to_dict() if snapshot.exists else None
+
+    async def set(self, key: str, state: Dict[str, Any]):
+        document = self.db.collection(self.collection).document(key)
+        await asyncio.get_event_loop().run_in_executor(None, partial(document.set, state))
+
+
+def create_state_store() -> Optional[ICircuitBreakerStateStore]:
+    """The shared state store selected by CIRCUIT_BREAKER_STATE_STORE, or None to keep state per process."""
+    if settings.CIRCUIT_BREAKER_STATE_STORE == "firestore":
+        return FirestoreCircuitBreakerStateStore(settings.CIRCUIT_BREAKER_STATE_COLLECTION)
+    return None
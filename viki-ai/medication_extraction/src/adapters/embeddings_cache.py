@@ -0,0 +1,188 @@
+"""
+Two-tier cache for text embeddings: a bounded in-memory LRU in front of an optional persistent store.
+Both tiers hold float32 vectors, so an embedding reads back the same from either tier.
+"""
+import asyncio
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+import settings
+from utils.custom_logger import getLogger
+
+LOGGER = getLogger(__name__)
+
+try:
+    import redis.asyncio as aioredis
+
+    has_redis = True
+except ImportError:  # pragma: no cover
+    has_redis = False
+
+
+def normalize_text(text: str) -> str:
+    """Case-fold and collapse whitespace so trivially different spellings share a cache entry."""
+    return re.sub(r"\s+", " ", text or "").strip().lower()
+
+
+def cache_key(model_name: str, normalized_text: str) -> str:
+    return hashlib.sha256(f"{model_name}:{normalized_text}".encode("utf-8")).hexdigest()
+
+
+def as_float32(embedding: Iterable[float]) -> List[float]:
+    """Round an embedding to the float32 precision the cache stores it at."""
+    return array("f", embedding).tolist()
+
+
+def _pack(embedding: Iterable[float]) -> bytes:
+    return array("f", embedding).tobytes()
+
+
+def _unpack(value: bytes) -> "array[float]":
+    embedding = array("f")
+    embedding.frombytes(value)
+    return embedding
+
+
+class IEmbeddingsStore:
+    """Persistent key/value store for packed embeddings."""
+
+    async def get_many(self, keys: List[str]) -> Dict[str, "array[float]"]:
+        raise NotImplementedError
+
+    async def set_many(self, items: Dict[str, Iterable[float]]):
+        raise NotImplementedError
+
+
+class LocalEmbeddingsStore(IEmbeddingsStore):
+    """SQLite file store.  Survives process restarts on the same instance or a mounted volume."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, value BLOB NOT NULL)")
+        self._connection.commit()
+
+    def _get_many(self, keys: List[str]) -> Dict[str, "array[float]"]:
+        placeholders = ",".join("?" * len(keys))
+        with self._lock:
+            rows = self._connection.execute(f"SELECT key, value FROM embeddings WHERE key IN ({placeholders})", keys).fetchall()
+        return {key: _unpack(value) for key, value in rows}
+
+    def _set_many(self, items: Dict[str, Iterable[float]]):
+        with self._lock:
+            self._connection.executemany("INSERT OR REPLACE INTO embeddings (key, value) VALUES (?, ?)",
+                                         [(key, _pack(value)) for key, value in items.items()])
+            self._connection.commit()
+
+    async def get_many(self, keys: List[str]) -> Dict[str, "array[float]"]:
+        if not keys:
+            return {}
+        return await asyncio.get_event_loop().run_in_executor(None, self._get_many, keys)
+
+    async def set_many(self, items: Dict[str, Iterable[float]]):
+        if items:
+            await asyncio.get_event_loop().run_in_executor(None, self._set_many, items)
+
+
+class RedisEmbeddingsStore(IEmbeddingsStore):
+    """Redis (or any Redis-protocol compatible server such as Memorystore/Valkey) store shared across instances."""
+
+    KEY_PREFIX = "embeddings:"
+
+    def __init__(self, url: str, ttl: int):
+        if not has_redis:
+            raise ImportError("redis package is required for the redis embeddings cache store")
+        self.client = aioredis.from_url(url)
+        self.ttl = ttl
+
+    async def get_many(self, keys: List[str]) -> Dict[str, "array[float]"]:
+        if not keys:
+            return {}
+        values = await self.client.mget([self.KEY_PREFIX + key for key in keys])
+        return {key: _unpack(value) for key, value in zip(keys, values) if value is not None}
+
+    async def set_many(self, items: Dict[str, Iterable[float]]):
+        if not items:
+            return
+        pipeline = self.client.pipeline(transaction=False)
+        for key, value in items.items():
+            pipeline.set(self.KEY_PREFIX + key, _pack(value), ex=self.ttl or None)
+        await pipeline.execute()
+
+
+class EmbeddingsCache:
+    """
+    In-memory LRU backed by an optional persistent store.  Store failures are logged and treated
+    as misses so a cache outage never fails a search.
+
+    The LRU keeps each embedding as a packed float32 array (about 3KB for a 768 dimension vector
+    rather than ~25KB as a list of Python floats) and hands out lists.
+    """
+
+    def __init__(self, max_size: int, store: Optional[IEmbeddingsStore] = None):
+        self.max_size = max_size
+        self.store = store
+        self._memory: "OrderedDict[str, array[float]]" = OrderedDict()
+        self.stats = {"memory_hits": 0, "store_hits": 0, "misses": 0}
+
+    def _remember(self, key: str, embedding: "array[float]"):
+        if self.max_size <= 0:
+            return
+        self._memory[key] = embedding
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        missing = []
+        for key in dict.fromkeys(keys):
+            embedding = self._memory.get(key)
+            if embedding is not None:
+                self._memory.move_to_end(key)
+                found[key] = embedding.tolist()
+            else:
+                missing.append(key)
+        self.stats["memory_hits"] += len(found)
+
+        stored: Dict[str, array] = {}
+        if missing and self.store:
+            try:
+                stored = await self.store.get_many(missing)
+            except Exception as e:
+                LOGGER.warning("Embeddings cache: store lookup failed: %s", str(e))
+            for key, embedding in stored.items():
+                self._remember(key, embedding)
+                found[key] = embedding.tolist()
+            self.stats["store_hits"] += len(stored)
+
+        self.stats["misses"] += len(missing) - len(stored)
+        return found
+
+    async def set_many(self, items: Dict[str, Iterable[float]]):
+        for key, embedding in items.items():
+            self._remember(key, array("f", embedding))
+        if self.store:
+            try:
+                await self.store.set_many(items)
+            except Exception as e:
+                LOGGER.warning("Embeddings cache: store write failed: %s", str(e))
+
+
+def create_store() -> Optional[IEmbeddingsStore]:
+    store_type = settings.EMBEDDINGS_CACHE_STORE
+    if store_type == "local":
+        return LocalEmbeddingsStore(settings.EMBEDDINGS_CACHE_LOCAL_PATH)
+    elif store_type == "redis":
+        return RedisEmbeddingsStore(settings.EMBEDDINGS_CACHE_REDIS_URL, settings.EMBEDDINGS_CACHE_TTL)
+    return None
@@ -1,6 +1,7 @@
 """
 Firestore adapter for vector search.
 """
+import asyncio
 import time
 import logging
 from typing import List, Dict, Any, Optional
@@ -108,6 +109,24 @@ class MedispanFirestoreVectorAdapter:
 
         return medications
     
+    async def search_medications_batch(self, search_terms: List[str]) -> Dict[str, List[MedispanDrug]]:
+        """
+        Search for many medications at once.
+
+        Firestore has no multi-term keyword or multi-vector nearest-neighbour query, so each
+        distinct term is searched independently and the searches run concurrently.
+
+        Args:
+            search_terms: The search terms to resolve; duplicates are searched once
+
+        Returns:
+            Dictionary of search term to the list of matching MedispanDrug objects, or to the
+            exception raised by that term's search
+        """
+        unique_terms = list(dict.fromkeys(search_terms))
+        results = await asyncio.gather(*[self.search_medications(term) for term in unique_terms], return_exceptions=True)
+        return dict(zip(unique_terms, results))
+
     async def keyword_search(self, description: str, dosage_form: str = None, route: str = None, limit: int = 15) -> List[Dict[str, Any]]:
         """
         Search for drugs by name description using Firestore.
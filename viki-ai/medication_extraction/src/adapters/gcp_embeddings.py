@@ -1,10 +1,16 @@
 # Configure logging
 import logging
-from typing import List
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
 
 from google import genai
 from google.genai import types
 
+from adapters.embeddings_cache import EmbeddingsCache, as_float32, cache_key, create_store, normalize_text
+from model_metric import Metric
+import settings
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s [%(levelname)s] %(message)s",
@@ -12,49 +18,126 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+_clients: Dict[Tuple[str, str], genai.Client] = {}
+_cache: Optional[EmbeddingsCache] = None
+_lock = threading.Lock()
+
+
+def get_client(project_id: str, location: str) -> genai.Client:
+    """Return the process-wide genai client for the project/location, creating it on first use."""
+    key = (project_id, location)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = genai.Client(
+                    vertexai=True,
+                    project=project_id,
+                    location=location,
+                    http_options=types.HttpOptions(api_version="v1"),
+                )
+                _clients[key] = client
+    return client
+
+
+def get_cache() -> Optional[EmbeddingsCache]:
+    """Return the process-wide embeddings cache, or None if caching is disabled."""
+    global _cache
+    if not settings.EMBEDDINGS_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _lock:
+            if _cache is None:
+                try:
+                    store = create_store()
+                except Exception as e:
+                    logger.warning("Embeddings cache: persistent store unavailable, using memory only: %s", str(e))
+                    store = None
+                _cache = EmbeddingsCache(settings.EMBEDDINGS_CACHE_MEMORY_SIZE, store)
+    return _cache
+
 
 class GcpEmbeddingsAdapter:
     """
     Google Cloud Platform implementation of the IEmbeddingsPort interface.
     Uses Vertex AI for generating text embeddings.
     """
-    
+
     async def get_embeddings(self, text: str, model_name: str, project_id: str, location: str) -> List[float]:
         """
         Generate embeddings for the given text using GCP Vertex AI.
-        
+
         Args:
             text: The text to generate embeddings for
             model_name: The name of the embedding model to use
             project_id: The GCP project ID
             location: The GCP location
-            
+
         Returns:
             A list of float values representing the embedding vector
         """
+        embeddings = await self.get_embeddings_batch([text], model_name, project_id, location)
+        return embeddings[0]
+
+    async def get_embeddings_batch(self, texts: List[str], model_name: str, project_id: str, location: str) -> List[List[float]]:
+        """
+        Generate embeddings for many texts.  Cached embeddings are served from the embeddings cache and
+        the remaining texts are sent to Vertex AI in batches of GCP_EMBEDDING_BATCH_SIZE.
+
+        Args:
+            texts: The texts to generate embeddings for
+            model_name: The name of the embedding model to use
+            project_id: The GCP project ID
+            location: The GCP location
+
+        Returns:
+            One embedding vector per input text, in input order (empty list if none was generated)
+        """
+        start_time = time.time()
+        keys = [cache_key(model_name, normalize_text(text)) for text in texts]
+
+        cache = get_cache()
+        found = await cache.get_many(keys) if cache else {}
+
+        # Embed the first original spelling seen for each uncached key
+        pending: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in pending:
+                pending[key] = text
 
-        http_options = types.HttpOptions(
-            api_version="v1",
-        )
+        generated: Dict[str, List[float]] = {}
+        if pending:
+            client = get_client(project_id, location)
+            pending_keys = list(pending.keys())
+            batch_size = max(1, settings.GCP_EMBEDDING_BATCH_SIZE)
+            for i in range(0, len(pending_keys), batch_size):
+                batch_keys = pending_keys[i:i + batch_size]
+                result = await client.aio.models.embed_content(
+                    model=model_name,
+                    contents=[pending[key] for key in batch_keys]
+                )
+                # Rounded to the cache's float32 precision so fresh and cached embeddings agree
+                for key, embedding in zip(batch_keys, result.embeddings or []):
+                    if embedding.values:
+                        generated[key] = as_float32(embedding.values)
 
-        client = genai.Client(
-            vertexai=True,
-            project=project_id,
-            location=location,
-            http_options=http_options
-        )
+            if cache and generated:
+                await cache.set_many(generated)
+            found.update(generated)
 
-        result = client.models.embed_content(
-            model=model_name,
-            contents=text
-        )
+        extra = {
+            "model_name": model_name,
+            "text_count": len(texts),
+            "cached_count": len(texts) - sum(1 for key in keys if key in pending),
+            "embedded_count": len(pending),
+            "elapsed_time": time.time() - start_time,
+        }
+        if cache:
+            extra.update(cache.stats)
+        Metric.send("EXTRACTION::EMBEDDINGS::CACHE", tags=extra)
 
-        # Return the first embedding (since we only sent one text)
-        if result.embeddings and len(result.embeddings[0].values) > 0:
-            return list(result.embeddings[0].values)
-        
-        # Return empty list if no embeddings were generated
-        return []
+        return [found.get(key, []) for key in keys]
 
 
 # Legacy function for backward compatibility
@@ -65,3 +148,8 @@ async def get_embeddings(text: str, model_name: str, project_id: str, location:
     """
     adapter = GcpEmbeddingsAdapter()
     return await adapter.get_embeddings(text, model_name, project_id, location)
+
+
+async def get_embeddings_batch(texts: List[str], model_name: str, project_id: str, location: str) -> List[List[float]]:
+    adapter = GcpEmbeddingsAdapter()
+    return await adapter.get_embeddings_batch(texts, model_name, project_id, location)
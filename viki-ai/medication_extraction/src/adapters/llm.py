@@ -25,6 +25,7 @@ from settings import (
     GCS_BUCKET_NAME,
     LOADTEST_LLM_EMULATOR_ENABLED,
     LLM_PROMPT_AUDIT_ENABLED,
+    LLM_PRECOUNT_TOKENS_ENABLED,
     LLM_RESPONSE_INTERPRET_NOTJSON_ENABLED
 )
 
@@ -34,6 +35,7 @@ from utils.custom_logger import getLogger
 
 from adapters.storage import StorageAdapter
 from adapters.cloud_tasks import CloudTaskAdapter
+from adapters.llm_cache import get_response_cache, is_cacheable_response
 
 LOGGER = getLogger(__name__)
 
@@ -56,6 +58,13 @@ from google.genai.types import GenerateContentConfig, SafetySetting, HarmCategor
 DEFAULT_RESPONSE_MIME_TYPE = "application/json"
 
 
+class PromptLatency(BaseModel):
+    """Where the time of a prompt call went, in seconds."""
+    queue_time: float  # Call start until the request is sent (request building, optional token pre-count)
+    first_byte_time: float  # Request sent until the response is received
+    total_time: float  # Call start until the response is processed
+
+
 class PromptStats(BaseModel):
     model_name: str
     max_output_tokens: int
@@ -65,10 +74,12 @@ class PromptStats(BaseModel):
     prompt_tokens: int
     billing_total_tokens: Optional[int] = None
     billing_total_billable_characters: Optional[int] = None
+    billing_output_tokens: Optional[int] = None
     burndown_rate: Optional[int] = None
     response_length: int
     response_tokens: int
     elapsed_time: float
+    latency: Optional[PromptLatency] = None
     hasImage: Optional[bool] = False
     hasBinaryData: Optional[bool] = False
     input: Optional[List[Union[str, Tuple[str, str], Tuple[bytes, str]]]] = None
@@ -316,7 +327,15 @@ class StandardPromptAdapter:
 
         try:
             start_time = datetime.now(datetime_base.timezone.utc)
+            start_clock = time.monotonic()
             prompt_stats = None
+            result = None
+            latency = None
+            billable_tokens = {
+                "total_tokens": None,
+                "total_billable_characters": None,
+                "output_tokens": None
+            }
             burndown_rate = None
             elapsed_time = None
             generation_config = {
@@ -353,15 +372,36 @@ class StandardPromptAdapter:
             LOGGER.debug("Performing multi_modal_predict2 with model %s, max_output_tokens: %s, temperature: %s, top_p: %s", model, self.max_tokens, self.temperature, self.top_p, extra=extra)
             LOGGER.debug("Prompt: %s", prompt_text, extra=extra)
             
-            billable_tokens_obj = await self.genai_client.aio.models.count_tokens(
-                model=model,
-                contents=parts
-            )
-            billable_tokens = {
-                "total_tokens": billable_tokens_obj.total_tokens,
-                "total_billable_characters": None
-            }
+            # Identical temperature 0 prompts get the same answer: serve it from the response cache if we have it
+            response_cache = get_response_cache()
+            response_cache_key = None
+            step = metadata.get("step") if metadata else None
+            if response_cache and self.temperature == 0 and response_cache.is_enabled_for(step):
+                response_cache_key = response_cache.key(model, system_instruction, schema, {
+                    **generation_config,
+                    "response_mime_type": effective_response_mime_type,
+                    "thinking_budget": thinking_budget,
+                }, items)
+                cached = await response_cache.get(response_cache_key)
+                if cached:
+                    LOGGER.info("Prompt::multi_modal_predict2 served from response cache", extra={
+                        **(metadata or {}),
+                        "model": {"name": model},
+                        "response_cache_key": response_cache_key,
+                        "response_length": len(cached["text"]),
+                        "elapsed_time": time.monotonic() - start_clock,
+                    })
+                    return cached["text"]
+
+            # Token counts normally come from the response's usage_metadata; pre-counting costs an extra round trip
+            if LLM_PRECOUNT_TOKENS_ENABLED:
+                billable_tokens_obj = await self.genai_client.aio.models.count_tokens(
+                    model=model,
+                    contents=parts
+                )
+                billable_tokens["total_tokens"] = billable_tokens_obj.total_tokens
 
+            request_clock = time.monotonic()
             if STAGE == "prod" or not LOADTEST_LLM_EMULATOR_ENABLED:
                 result = await self.genai_client.aio.models.generate_content(
                     model = model,
@@ -373,10 +413,22 @@ class StandardPromptAdapter:
                 LOGGER.warning("Using DummyPromptAdapter for load testing")
                 dummy = DummyPromptAdapter()
                 result = await dummy.multi_modal_predict_2(items, model, system_prompts, response_mime_type, metadata)
+            response_clock = time.monotonic()
 
             LOGGER.debug("Result: %s", result.text, extra=extra)
 
+            usage_metadata = getattr(result, "usage_metadata", None)
+            if usage_metadata:
+                if billable_tokens["total_tokens"] is None:
+                    billable_tokens["total_tokens"] = usage_metadata.prompt_token_count
+                billable_tokens["output_tokens"] = usage_metadata.candidates_token_count
+
             elapsed_time = datetime.now(datetime_base.timezone.utc) - start_time
+            latency = PromptLatency(
+                queue_time=request_clock - start_clock,
+                first_byte_time=response_clock - request_clock,
+                total_time=time.monotonic() - start_clock
+            )
 
             
             try:
@@ -394,10 +446,12 @@ class StandardPromptAdapter:
                 prompt_tokens=len(prompt_text.split()) if prompt_text else 0,
                 billing_total_tokens=billable_tokens["total_tokens"],
                 billing_total_billable_characters=billable_tokens["total_billable_characters"],
+                billing_output_tokens=billable_tokens["output_tokens"],
                 burndown_rate=burndown_rate,
                 response_length=len(result.text) if result.text else 0,
                 response_tokens=len(result.text.split()) if result.text else 0,
                 elapsed_time=elapsed_time.total_seconds(),
+                latency=latency,
                 hasImage=hasImage,
                 hasBinaryData=hasBinaryData,
             )
@@ -408,6 +462,12 @@ class StandardPromptAdapter:
             if LLM_PROMPT_AUDIT_ENABLED:
                 await self.audit_prompt(items, result.text, prompt_stats=prompt_stats, metadata=metadata)
 
+            if response_cache_key and is_cacheable_response(result, effective_response_mime_type):
+                await response_cache.set(response_cache_key, result.text, usage_metadata={
+                    "prompt_token_count": billable_tokens["total_tokens"],
+                    "candidates_token_count": billable_tokens["output_tokens"],
+                }, model=model)
+
             return result.text
 
         except Exception as e:
@@ -425,14 +485,16 @@ class StandardPromptAdapter:
                     prompt_tokens=len(prompt_text.split()) if prompt_text else 0,
                     billing_total_tokens=billable_tokens["total_tokens"],
                     billing_total_billable_characters=billable_tokens["total_billable_characters"],
+                    billing_output_tokens=billable_tokens["output_tokens"],
                     burndown_rate=burndown_rate,
-                    response_length=len(result) if result else 0,
-                    response_tokens=len(result.split()) if result else 0,
+                    response_length=len(result.text) if result and result.text else 0,
+                    response_tokens=len(result.text.split()) if result and result.text else 0,
                     elapsed_time=elapsed_time.total_seconds() if elapsed_time else 0,
+                    latency=latency,
                     hasImage=hasImage,
                     hasBinaryData=hasBinaryData,
                 )  
-            await self.audit_prompt(items, result, prompt_stats=prompt_stats, metadata=metadata, error=err)
+            await self.audit_prompt(items, result.text if result else None, prompt_stats=prompt_stats, metadata=metadata, error=err)
             raise e
     
     def create_key(self, step_id: str, page_number:int, iteration:int):
@@ -0,0 +1,230 @@
+"""
+In-process index over a Medispan/Merative catalog table for keyword matching without a database round trip.
+
+The catalog is loaded once from AlloyDB and indexed with trigram postings over the lowercased
+name description, so a `LIKE '%term%'` lookup becomes an intersection of a few posting lists plus a
+substring check on the survivors.  Dosage form and route are kept as facets (distinct value -> rows).
+The loaded snapshot is tagged with a catalog version and rebuilt in the background when it changes.
+"""
+import asyncio
+import sys
+import time
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+from psycopg2 import sql
+
+from adapters.pgvector_pool import PgVectorConnectionPool
+from model_metric import Metric
+import settings
+from utils.custom_logger import getLogger
+
+LOGGER = getLogger(__name__)
+
+CATALOG_COLUMNS = ("id", "namedescription", "genericname", "route", "strength", "strengthunit", "dosageform")
+
+
+def _trigrams(text: str) -> set:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class MedispanCatalogIndex:
+    """
+    Immutable snapshot of a catalog table.  Rows are stored as tuples in catalog order and
+    referenced everywhere else by their integer position.
+    """
+
+    def __init__(self, rows: List[Dict[str, Any]], version: Optional[str] = None):
+        self.version = version
+        self.loaded_at = time.time()
+        self._rows: List[Tuple] = [tuple(row.get(column) for column in CATALOG_COLUMNS) for row in rows]
+        self._names: List[str] = [(row.get("namedescription") or "").lower() for row in rows]
+
+        postings: Dict[str, List[int]] = {}
+        for position, name in enumerate(self._names):
+            for trigram in _trigrams(name):
+                postings.setdefault(trigram, []).append(position)
+        self._postings: Dict[str, array] = {trigram: array("I", positions) for trigram, positions in postings.items()}
+
+        self._dosage_forms = self._build_facet(rows, "dosageform")
+        self._routes = self._build_facet(rows, "route")
+
+    @staticmethod
+    def _build_facet(rows: List[Dict[str, Any]], column: str) -> Dict[str, array]:
+        facet: Dict[str, List[int]] = {}
+        for position, row in enumerate(rows):
+            facet.setdefault((row.get(column) or "").lower(), []).append(position)
+        return {value: array("I", positions) for value, positions in facet.items()}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @staticmethod
+    def _facet_filter(facet: Dict[str, array], value: Optional[str]) -> Optional[set]:
+        # Matches the database filter: LOWER(column) LIKE '%value%'
+        if not value:
+            return None
+        value = value.lower()
+        allowed = set()
+        for facet_value, positions in facet.items():
+            if value in facet_value:
+                allowed.update(positions)
+        return allowed
+
+    def _candidates(self, term: str):
+        trigrams = _trigrams(term)
+        if not trigrams:
+            # Too short for trigrams; scan every name
+            return range(len(self._rows))
+        postings = []
+        for trigram in trigrams:
+            posting = self._postings.get(trigram)
+            if posting is None:
+                return []
+            postings.append(posting)
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                break
+        return sorted(candidates)
+
+    def search(self, description: str, dosage_form: str = None, route: str = None, limit: int = 15) -> List[Dict[str, Any]]:
+        """
+        Equivalent of MedispanPgVectorAdapter.keyword_search against the snapshot.
+
+        Args:
+            description: Description to search for (case-insensitive substring of the name description)
+            dosage_form: Optional dosage form filter (case-insensitive substring)
+            route: Optional route filter (case-insensitive substring)
+            limit: Maximum number of results to return
+
+        Returns:
+            List of matching drug records in catalog order
+        """
+        term = (description or "").lower()
+        dosage_forms = self._facet_filter(self._dosage_forms, dosage_form)
+        routes = self._facet_filter(self._routes, route)
+
+        results = []
+        for position in self._candidates(term):
+            if term not in self._names[position]:
+                continue
+            if dosage_forms is not None and position not in dosage_forms:
+                continue
+            if routes is not None and position not in routes:
+                continue
+            results.append(dict(zip(CATALOG_COLUMNS, self._rows[position])))
+            if limit and len(results) >= limit:
+                break
+        return results
+
+    def memory_report(self) -> Dict[str, Any]:
+        """Approximate memory held by the snapshot, in bytes, broken down by structure."""
+        rows_bytes = sys.getsizeof(self._rows) + sum(
+            sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row) for row in self._rows)
+        names_bytes = sys.getsizeof(self._names) + sum(sys.getsizeof(name) for name in self._names)
+        postings_bytes = sys.getsizeof(self._postings) + sum(
+            sys.getsizeof(trigram) + sys.getsizeof(posting) for trigram, posting in self._postings.items())
+        facets_bytes = sum(
+            sys.getsizeof(facet) + sum(sys.getsizeof(value) + sys.getsizeof(positions) for value, positions in facet.items())
+            for facet in (self._dosage_forms, self._routes))
+        return {
+            "row_count": len(self._rows),
+            "trigram_count": len(self._postings),
+            "dosage_form_count": len(self._dosage_forms),
+            "route_count": len(self._routes),
+            "rows_bytes": rows_bytes,
+            "names_bytes": names_bytes,
+            "postings_bytes": postings_bytes,
+            "facets_bytes": facets_bytes,
+            "total_bytes": rows_bytes + names_bytes + postings_bytes + facets_bytes,
+        }
+
+
+class MedispanCatalogIndexHolder:
+    """
+    Owns the current snapshot for one catalog table and keeps it in step with the catalog version.
+    Searches never wait on a load; until the first snapshot is ready `get()` returns None and
+    callers use the database.
+    """
+
+    def __init__(self, table_name: str, refresh_interval: float):
+        self.table_name = table_name
+        self.refresh_interval = refresh_interval
+        self.index: Optional[MedispanCatalogIndex] = None
+        self._last_checked = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _get_version(self, pool: PgVectorConnectionPool) -> str:
+        # Derived from the rows themselves, so it is the same on every instance and read replica and only
+        # changes with the data: the row count and newest row version (xmin) catch inserts, updates and
+        # deletes, and a checksum of the indexed columns guards against anything those miss.
+        query = sql.SQL(
+            "SELECT count(*) AS row_count, max(xmin::text::bigint) AS max_xmin, "
+            "sum(hashtextextended(ROW({columns})::text, 0)) AS checksum FROM {table}"
+        ).format(
+            columns=sql.SQL(", ").join(sql.Identifier(column) for column in CATALOG_COLUMNS),
+            table=sql.Identifier(*self.table_name.split(".")),
+        )
+        rows = await pool.execute(query)
+        if not rows:
+            return self.table_name
+        row = rows[0]
+        return f"{self.table_name}:{row['row_count']}:{row['max_xmin']}:{row['checksum']}"
+
+    async def refresh(self, pool: PgVectorConnectionPool, force: bool = False):
+        """Load the catalog if it is not loaded yet or its version changed since the last load."""
+        self._last_checked = time.monotonic()
+        version = await self._get_version(pool)
+        if not force and self.index and self.index.version == version:
+            return
+
+        start_time = time.time()
+        query = sql.SQL("SELECT {columns} FROM {table}").format(
+            columns=sql.SQL(", ").join(sql.Identifier(column) for column in CATALOG_COLUMNS),
+            table=sql.Identifier(*self.table_name.split(".")),
+        )
+        rows = await pool.execute(query)
+        loop = asyncio.get_running_loop()
+        self.index = await loop.run_in_executor(None, MedispanCatalogIndex, rows, version)
+
+        extra = {
+            "table_name": self.table_name,
+            "version": version,
+            "elapsed_time": time.time() - start_time,
+        }
+        extra.update(self.index.memory_report())
+        LOGGER.info("Medispan catalog index loaded for %s", self.table_name, extra=extra)
+        Metric.send("EXTRACTION::MEDDB::INDEX::LOADED", tags=extra)
+
+    async def _refresh_safely(self, pool: PgVectorConnectionPool):
+        try:
+            await self.refresh(pool)
+        except Exception as e:
+            LOGGER.error("Medispan catalog index refresh failed for %s: %s", self.table_name, str(e))
+
+    def get(self, pool: PgVectorConnectionPool) -> Optional[MedispanCatalogIndex]:
+        """Return the current snapshot, scheduling a background version check when one is due."""
+        due = time.monotonic() - self._last_checked >= self.refresh_interval
+        if (self.index is None or due) and (self._task is None or self._task.done()):
+            self._last_checked = time.monotonic()
+            self._task = asyncio.get_running_loop().create_task(self._refresh_safely(pool))
+        return self.index
+
+
+_holders: Dict[str, MedispanCatalogIndexHolder] = {}
+
+
+def get_index_holder(table_name: str) -> MedispanCatalogIndexHolder:
+    holder = _holders.get(table_name)
+    if holder is None:
+        holder = MedispanCatalogIndexHolder(table_name, settings.MEDDB_CATALOG_INDEX_REFRESH_INTERVAL)
+        _holders[table_name] = holder
+    return holder
+
+
+def memory_report() -> Dict[str, Dict[str, Any]]:
+    """Memory footprint of every loaded catalog snapshot in the process, keyed by table name."""
+    return {table_name: holder.index.memory_report() for table_name, holder in _holders.items() if holder.index}
@@ -0,0 +1,206 @@
+"""
+Cross-document memo of Medispan match results.
+
+The LLM match of an extracted medication depends only on its name, strength, form and route (what is
+searched, reranked and shown to the LLM), the catalog searched, and the prompt and model used.  A match
+is memoized under a key built from exactly those, scoped to the app and tenant, so the same medication
+recurring on other pages and documents reuses the prior MedispanMedicationValue instead of being
+searched and matched again.
+
+Entries expire after MEDISPAN_MATCH_MEMO_TTL and bumping MEDISPAN_MATCH_MEMO_VERSION invalidates all of
+them.  The Firestore collection and key scheme are shared with paperglass
+(paperglass/infrastructure/adapters/medispan_match_memo.py); keep the two in step.
+"""
+import asyncio
+import hashlib
+import re
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import settings
+from models import MedicationValue, MedispanMedicationValue, MedispanStatus
+from utils.custom_logger import getLogger
+from utils.date import now_utc
+
+LOGGER = getLogger(__name__)
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+# Only confirmed matches are memoized: an unmatched result may come from a malformed LLM response
+MEMOIZED_STATUSES = frozenset([MedispanStatus.MATCHED])
+
+MemoEntry = Tuple[MedispanStatus, Optional[MedispanMedicationValue]]
+
+
+def normalize(value: Optional[str]) -> str:
+    return WHITESPACE_PATTERN.sub(" ", value or "").strip().lower()
+
+
+def medication_signature(medication: MedicationValue) -> str:
+    """Normalized name|strength|form|route of an extracted medication."""
+    return "|".join(normalize(x) for x in (medication.name, medication.strength, medication.form, medication.route))
+
+
+def prompt_version(prompt_template: str) -> str:
+    return hashlib.sha256((prompt_template or "").encode("utf-8")).hexdigest()[:16]
+
+
+def memo_key(version: str, scope: str, catalog: str, model: str, prompt_template: str, signature: str) -> str:
+    value = "|".join([version, scope, catalog or "", model or "", prompt_version(prompt_template), signature])
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+class IMedispanMatchMemoStore:
+    """Persistent tier of the memo, shared across instances and services."""
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def set_many(self, records: Dict[str, Dict[str, Any]]):
+        raise NotImplementedError
+
+
+class FirestoreMedispanMatchMemoStore(IMedispanMatchMemoStore):
+    """
+    One Firestore document per memo key.  A TTL policy on the `expires_at` field lets Firestore purge
+    expired documents; reads treat them as misses regardless.
+    """
+
+    def __init__(self, collection: str):
+        from google.cloud import firestore
+
+        self.collection = collection
+        self.db = firestore.Client(
+            project=settings.GCP_PROJECT_ID,
+            database=settings.GCP_FIRESTORE_DB
+        )
+
+    def _get_all(self, keys):
+        references = [self.db.collection(self.collection).document(key) for key in keys]
+        return {snapshot.id: snapshot.to_dict() for snapshot in self.db.get_all(references) if snapshot.exists}
+
+    def _set_all(self, records):
+        batch = self.db.batch()
+        for key, record in records.items():
+            batch.set(self.db.collection(self.collection).document(key), record)
+        batch.commit()
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        keys = list(keys)
+        if not keys:
+            return {}
+        return await asyncio.get_event_loop().run_in_executor(None, partial(self._get_all, keys))
+
+    async def set_many(self, records: Dict[str, Dict[str, Any]]):
+        if records:
+            await asyncio.get_event_loop().run_in_executor(None, partial(self._set_all, records))
+
+
+class MedispanMatchMemo:
+    """In-process LRU in front of an optional shared store.  Store errors are logged and count as misses."""
+
+    def __init__(self, store: Optional[IMedispanMatchMemoStore] = None, max_size: int = 10000,
+                 ttl: int = 604800, version: str = "1"):
+        self.store = store
+        self.max_size = max_size
+        self.ttl = timedelta(seconds=ttl)
+        self.version = version
+        self._entries: "OrderedDict[str, Tuple[datetime, MemoEntry]]" = OrderedDict()
+        self.stats = {"memory_hits": 0, "store_hits": 0, "misses": 0}
+
+    def key(self, scope: str, catalog: str, model: str, prompt_template: str, medication: MedicationValue) -> str:
+        return memo_key(self.version, scope, catalog, model, prompt_template, medication_signature(medication))
+
+    def _remember(self, key: str, expires_at: datetime, entry: MemoEntry):
+        self._entries[key] = (expires_at, entry)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _from_record(self, record: Dict[str, Any]) -> Optional[Tuple[datetime, MemoEntry]]:
+        expires_at = record.get("expires_at")
+        if record.get("memo_version") != self.version or not expires_at or expires_at <= now_utc():
+            return None
+        medication = record.get("medispan_medication")
+        return expires_at, (MedispanStatus(record["medispan_status"]),
+                            MedispanMedicationValue(**medication) if medication else None)
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, MemoEntry]:
+        now = now_utc()
+        found: Dict[str, MemoEntry] = {}
+        missing = []
+        for key in dict.fromkeys(keys):
+            cached = self._entries.get(key)
+            if cached and cached[0] > now:
+                self._entries.move_to_end(key)
+                found[key] = cached[1]
+            else:
+                self._entries.pop(key, None)
+                missing.append(key)
+        self.stats["memory_hits"] += len(found)
+
+        store_hits = 0
+        if missing and self.store:
+            try:
+                records = await self.store.get_many(missing)
+            except Exception as e:
+                LOGGER.warning("Medispan match memo: error reading store: %s", str(e))
+                records = {}
+            for key, record in records.items():
+                try:
+                    value = self._from_record(record)
+                except Exception as e:
+                    LOGGER.warning("Medispan match memo: ignoring unreadable entry %s: %s", key, str(e))
+                    continue
+                if value:
+                    self._remember(key, *value)
+                    found[key] = value[1]
+                    store_hits += 1
+
+        self.stats["store_hits"] += store_hits
+        self.stats["misses"] += len(missing) - store_hits
+        return found
+
+    async def set_many(self, entries: Dict[str, MemoEntry]):
+        """Memoize the given (status, matched medication) entries; statuses other than MATCHED are ignored."""
+        entries = {key: entry for key, entry in entries.items() if entry[0] in MEMOIZED_STATUSES}
+        if not entries:
+            return
+        created_at = now_utc()
+        expires_at = created_at + self.ttl
+        records = {}
+        for key, (status, medication) in entries.items():
+            self._remember(key, expires_at, (status, medication))
+            records[key] = {
+                "memo_version": self.version,
+                "medispan_status": status.value,
+                "medispan_medication": medication.dict() if medication else None,
+                "created_at": created_at,
+                "expires_at": expires_at,
+            }
+        if self.store:
+            try:
+                await self.store.set_many(records)
+            except Exception as e:
+                LOGGER.warning("Medispan match memo: error writing store: %s", str(e))
+
+
+_memo: Optional[MedispanMatchMemo] = None
+
+
+def get_memo() -> Optional[MedispanMatchMemo]:
+    """The process-wide memo, or None when MEDISPAN_MATCH_MEMO_ENABLED is off."""
+    global _memo
+    if not settings.MEDISPAN_MATCH_MEMO_ENABLED:
+        return None
+    if _memo is None:
+        try:
+            store = FirestoreMedispanMatchMemoStore(settings.MEDISPAN_MATCH_MEMO_COLLECTION)
+        except Exception as e:
+            LOGGER.error("Medispan match memo: shared store unavailable, memoizing per process: %s", str(e))
+            store = None
+        _memo = MedispanMatchMemo(store, max_size=settings.MEDISPAN_MATCH_MEMO_MEMORY_SIZE,
+                                  ttl=settings.MEDISPAN_MATCH_MEMO_TTL, version=settings.MEDISPAN_MATCH_MEMO_VERSION)
+    return _memo
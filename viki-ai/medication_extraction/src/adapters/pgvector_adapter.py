@@ -3,11 +3,12 @@ PGVector adapter for vector search.
 """
 import logging
 import time
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional
 
-import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2 import sql
 
+from adapters.medispan_catalog_index import MedispanCatalogIndex, get_index_holder
+from adapters.pgvector_pool import PgVectorConnectionPool, get_pool
 from models import MedispanDrug
 from model_metric import Metric
 import settings
@@ -20,6 +21,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Column carrying the originating search term in multi-term (lateral join) queries
+BATCH_TERM_COLUMN = "batch_search_term"
+
 
 class MedispanPgVectorAdapter:
     """
@@ -41,21 +45,34 @@ class MedispanPgVectorAdapter:
             "connect_timeout": settings.PGVECTOR_CONNECTION_TIMEOUT
         }        
     
-    def _get_connection(self) -> Tuple[Any, Any]:
+    def _get_pool(self) -> PgVectorConnectionPool:
         """
-        Get a connection to the PostgreSQL database.
+        Get the process-wide connection pool for this adapter's connection parameters.
         
         Returns:
-            A tuple containing (connection, cursor)
+            The shared PgVectorConnectionPool
         """
         try:
-            connection = psycopg2.connect(**self.connection_params)
-            cursor = connection.cursor(cursor_factory=RealDictCursor)
-            return connection, cursor
+            return get_pool(self.connection_params)
         except Exception as e:
             logger.error(f"Error connecting to PostgreSQL: {str(e)}")
             raise
 
+    def _get_catalog_index(self) -> Optional[MedispanCatalogIndex]:
+        """
+        Get the in-process catalog index for this adapter's table, if the index is enabled and loaded.
+        
+        Returns:
+            The current MedispanCatalogIndex snapshot or None to search the database
+        """
+        if not settings.MEDDB_CATALOG_INDEX_ENABLED:
+            return None
+        return get_index_holder(self._get_tablename()).get(self._get_pool())
+
+    async def load_catalog_index(self):
+        """Load (or reload, if the catalog version changed) the in-process catalog index for this adapter's table."""
+        await get_index_holder(self._get_tablename()).refresh(self._get_pool())
+
     def _get_catalog_id(self, app_id:str) -> str:
         """
         Get the catalog ID for a given app ID.
@@ -131,15 +148,7 @@ class MedispanPgVectorAdapter:
             embeddings = await get_embeddings(search_term, settings.GCP_EMBEDDING_MODEL, settings.GCP_PROJECT_ID, settings.GCP_LOCATION_3)
             results = await self.search_by_vector(embeddings, similarity_threshold=settings.MEDDB_SIMILARIY_THRESHOLD, max_results=settings.MEDDB_TOP_K)
         
-        medications = [MedispanDrug(
-                id=str(medication.get('id')),
-                NameDescription=medication.get('namedescription'),
-                GenericName=medication.get('genericname'),
-                Route=medication.get('route'),
-                Strength=medication.get('strength'),
-                StrengthUnitOfMeasure=medication.get('strengthunit'),
-                Dosage_Form=medication.get('dosageform'),
-                ) for medication in results]
+        medications = [self._to_medispan_drug(medication) for medication in results]
         
         elapsed_time = time.time() - start_time
         extra.update({          
@@ -147,6 +156,66 @@ class MedispanPgVectorAdapter:
         })
         Metric.send("EXTRACTION::MEDDB::ELAPSEDTIME", branch="alloydb", tags=extra)
         return medications
+
+    async def search_medications_batch(self, search_terms: List[str]) -> Dict[str, List[MedispanDrug]]:
+        """
+        Search for many medications at once.  Keyword lookups for every term run as one query,
+        and the terms without a keyword hit are resolved together in one vector query.
+        
+        Args:
+            search_terms: The search terms to resolve; duplicates are searched once
+            
+        Returns:
+            Dictionary of search term to the list of matching MedispanDrug objects
+        """
+        start_time = time.time()
+        from adapters.gcp_embeddings import get_embeddings_batch
+
+        unique_terms = list(dict.fromkeys(search_terms))
+        results: Dict[str, List[Dict[str, Any]]] = {term: [] for term in unique_terms}
+
+        extra = {
+            "adapter": "alloydb",
+            "search_term_count": len(unique_terms),
+        }
+
+        if unique_terms and not settings.PGVECTOR_FORCE_ONLY_EMBEDDING_SEARCH:
+            results.update(await self.keyword_search_batch(unique_terms))
+
+        missed_terms = [term for term in unique_terms if not results[term]]
+        if missed_terms:
+            embeddings = await get_embeddings_batch(missed_terms, settings.GCP_EMBEDDING_MODEL, settings.GCP_PROJECT_ID, settings.GCP_LOCATION_3)
+            results.update(await self.search_by_vector_batch(dict(zip(missed_terms, embeddings)),
+                                                             similarity_threshold=settings.MEDDB_SIMILARIY_THRESHOLD,
+                                                             max_results=settings.MEDDB_TOP_K))
+
+        medications = {term: [self._to_medispan_drug(medication) for medication in rows] for term, rows in results.items()}
+
+        extra.update({
+            "vector_search_term_count": len(missed_terms),
+            "elapsed_time": time.time() - start_time,
+        })
+        Metric.send("EXTRACTION::MEDDB::BATCH::ELAPSEDTIME", branch="alloydb", tags=extra)
+        return medications
+
+    @staticmethod
+    def _to_medispan_drug(medication: Dict[str, Any]) -> MedispanDrug:
+        return MedispanDrug(
+                id=str(medication.get('id')),
+                NameDescription=medication.get('namedescription'),
+                GenericName=medication.get('genericname'),
+                Route=medication.get('route'),
+                Strength=medication.get('strength'),
+                StrengthUnitOfMeasure=medication.get('strengthunit'),
+                Dosage_Form=medication.get('dosageform'),
+                )
+
+    @staticmethod
+    def _group_by_term(rows: List[Dict[str, Any]], search_terms: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        grouped: Dict[str, List[Dict[str, Any]]] = {term: [] for term in search_terms}
+        for row in rows:
+            grouped[row.pop(BATCH_TERM_COLUMN)].append(row)
+        return grouped
     
     async def keyword_search(self, description: str, dosage_form:str=None,route:str=None, limit: int = 15) -> List[Dict[str, Any]]:
         """
@@ -159,22 +228,65 @@ class MedispanPgVectorAdapter:
         Returns:
             List of matching drug records
         """
+        catalog_index = self._get_catalog_index()
+        if catalog_index:
+            return catalog_index.search(description, dosage_form, route, limit)
+
         table_name = self._get_tablename()
+        statement_name = f"keyword_search_{table_name}"
 
-        query = f"""
+        # Optional filters are folded into the statement so a single prepared plan serves every call
+        prepare = sql.SQL("""
+        PREPARE {statement} (text, text, text, integer) AS
         SELECT *
-        FROM {table_name}
-        WHERE LOWER(namedescription) LIKE LOWER('%{description}%')
+        FROM {table}
+        WHERE LOWER(namedescription) LIKE '%' || LOWER($1) || '%'
+        AND ($2::text IS NULL OR LOWER(dosageform) LIKE '%' || LOWER($2) || '%')
+        AND ($3::text IS NULL OR LOWER(route) LIKE '%' || LOWER($3) || '%')
+        LIMIT $4
+        """).format(statement=sql.Identifier(statement_name), table=sql.Identifier(*table_name.split(".")))
+
+        logger.debug(f"keyword_search statement: {statement_name} description: {description} dosageform: {dosage_form} route: {route} limit: {limit}")
+
+        return await self._get_pool().execute_prepared(statement_name, prepare, (description, dosage_form or None, route or None, limit or None))
+    
+    async def keyword_search_batch(self, descriptions: List[str], limit: int = 15) -> Dict[str, List[Dict[str, Any]]]:
         """
+        Search for drugs by name description for many descriptions in a single round trip.
         
-        query = query + f" AND LOWER(dosageform) LIKE LOWER('%{dosage_form}%')" if dosage_form else query
-        query = query + f" AND LOWER(route) LIKE LOWER('%{route}%')" if route else query
-        query = query + f" LIMIT {limit}" if limit else query    
+        Args:
+            descriptions: Descriptions to search for
+            limit: Maximum number of results to return per description
+            
+        Returns:
+            Dictionary of description to its matching drug records
+        """
+        catalog_index = self._get_catalog_index()
+        if catalog_index:
+            return {description: catalog_index.search(description, limit=limit) for description in descriptions}
+
+        table_name = self._get_tablename()
+        statement_name = f"keyword_search_batch_{table_name}"
+
+        prepare = sql.SQL("""
+        PREPARE {statement} (text[], integer) AS
+        SELECT t.term AS {term_column}, m.*
+        FROM unnest($1) AS t(term)
+        CROSS JOIN LATERAL (
+            SELECT *
+            FROM {table}
+            WHERE LOWER(namedescription) LIKE '%' || LOWER(t.term) || '%'
+            LIMIT $2
+        ) m
+        """).format(statement=sql.Identifier(statement_name),
+                    term_column=sql.Identifier(BATCH_TERM_COLUMN),
+                    table=sql.Identifier(*table_name.split(".")))
+
+        logger.debug(f"keyword_search_batch statement: {statement_name} descriptions: {len(descriptions)} limit: {limit}")
+
+        rows = await self._get_pool().execute_prepared(statement_name, prepare, (list(descriptions), limit or None))
+        return self._group_by_term(rows, descriptions)
 
-        logger.debug(f"keyword_search query: {query} description: {description} dosageform: {dosage_form} route: {route} limit: {limit}")
-        
-        return await self.execute_query(query)
-    
     async def execute_query(self, query: str, params: Optional[tuple] = None) -> List[Dict[str, Any]]:
         """
         Execute a SQL query and return results.
@@ -187,16 +299,7 @@ class MedispanPgVectorAdapter:
             List of dictionaries containing the query results
         """
         try:
-            connection, cursor = self._get_connection()
-            
-            cursor.execute(query, params)
-            results = cursor.fetchall()
-            result_list = [dict(row) for row in results]
-            
-            cursor.close()
-            connection.close()
-            
-            return result_list
+            return await self._get_pool().execute(query, params)
         except Exception as e:
             logger.error(f"Error executing query: {str(e)}")
             raise
@@ -222,46 +325,63 @@ class MedispanPgVectorAdapter:
         function_name = self._get_functionname()
 
         try:
-            # Get database connection and cursor
-            connection, cursor = self._get_connection()
-            
-            # Convert embedding list to PostgreSQL array format
+            # Convert embedding list to PostgreSQL vector literal format
             embedding_str = "[" + ",".join(map(str, embedding)) + "]"
-            
-            # Call the vector_search function
-            # query = f"""
-            # SELECT * FROM {self.table_name}
-            # ORDER BY embedding <=> '{embedding_str}'::vector
-            # LIMIT {max_results};
-            # """
-            
-            # Execute the query
-            #cursor.execute(query)
+
+            # Parameter types are inferred from the search function's signature
+            statement_name = f"search_by_vector_{function_name}"
+            prepare = sql.SQL("PREPARE {statement} AS SELECT * FROM {function}($1, $2, $3)").format(
+                statement=sql.Identifier(statement_name),
+                function=sql.Identifier(*function_name.split(".")),
+            )
 
             logger.debug(f"search_by_vector: function_name: {function_name} similarity_threshold: {similarity_threshold} max_results: {max_results}")
-            
-            cursor.callproc(function_name, (embedding_str, similarity_threshold, max_results))
-                        
-            # Fetch all results
-            results = cursor.fetchall()
-            
-            #results = sorted(results, key=lambda x: int(x['id']), reverse=False)
-            
-            # Convert results to list of dictionaries
-            result_list = [dict(row) for row in results]
-            
-            # if not result_list:
-            #     cursor.callproc("vector_search_gcp_768_2_euclidean", (embedding_str, similarity_threshold, max_results))
-            #     results = cursor.fetchall()
-            #     result_list = [dict(row) for row in results]
-            
-            # Close cursor and connection
-            cursor.close()
-            connection.close()
-            
-            return result_list
+
+            return await self._get_pool().execute_prepared(statement_name, prepare, (embedding_str, similarity_threshold, max_results))
             
         except Exception as e:
             logger.error(f"Error performing vector search using function {function_name}: {str(e)}")
             # Return empty list on error
             raise e
+
+    async def search_by_vector_batch(
+        self,
+        embeddings: Dict[str, List[float]],
+        similarity_threshold: float = 0.7,
+        max_results: int = 5
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Search by vector similarity for many embeddings in a single round trip.
+        
+        Args:
+            embeddings: Dictionary of search term to its embedding vector
+            similarity_threshold: Minimum similarity score (0-1) for results
+            max_results: Maximum number of results to return per embedding
+            
+        Returns:
+            Dictionary of search term to its matching items with their similarity scores
+        """
+        function_name = self._get_functionname()
+        search_terms = list(embeddings.keys())
+
+        try:
+            embedding_strs = ["[" + ",".join(map(str, embedding)) + "]" for embedding in embeddings.values()]
+
+            statement_name = f"search_by_vector_batch_{function_name}"
+            prepare = sql.SQL("""
+            PREPARE {statement} (text[], text[], float8, integer) AS
+            SELECT t.term AS {term_column}, r.*
+            FROM unnest($1, $2) AS t(term, embedding)
+            CROSS JOIN LATERAL {function}(t.embedding::vector, $3, $4) r
+            """).format(statement=sql.Identifier(statement_name),
+                        term_column=sql.Identifier(BATCH_TERM_COLUMN),
+                        function=sql.Identifier(*function_name.split(".")))
+
+            logger.debug(f"search_by_vector_batch: function_name: {function_name} embeddings: {len(search_terms)} similarity_threshold: {similarity_threshold} max_results: {max_results}")
+
+            rows = await self._get_pool().execute_prepared(statement_name, prepare, (search_terms, embedding_strs, similarity_threshold, max_results))
+            return self._group_by_term(rows, search_terms)
+
+        except Exception as e:
+            logger.error(f"Error performing batch vector search using function {function_name}: {str(e)}")
+            raise e
@@ -0,0 +1,182 @@
+"""
+Process-wide connection pool for the PGVector (AlloyDB) adapter.
+
+psycopg2 is a blocking driver, so every database call is dispatched to a dedicated
+thread pool sized to the connection pool.  This keeps the event loop free while a
+query is in flight and guarantees a worker never waits on an exhausted pool.
+"""
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import psycopg2
+from psycopg2 import sql
+from psycopg2.extras import RealDictCursor
+
+import settings
+from utils.custom_logger import getLogger
+
+LOGGER = getLogger(__name__)
+
+
+class _PooledConnection:
+    """A raw psycopg2 connection plus the bookkeeping the pool needs for it."""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.last_used = time.monotonic()
+        self.prepared: Set[str] = set()
+
+
+class PgVectorConnectionPool:
+    """
+    Async facade over a pool of psycopg2 connections.
+
+    Connections are opened on demand, kept open once idle and reused LIFO so the warmest connection
+    is handed out first.  A connection that sat idle longer than `healthcheck_interval` is
+    pinged before reuse and replaced if the server or network dropped it.  Statements run
+    through `execute_prepared` are PREPAREd once per connection and reused with EXECUTE.
+    """
+
+    def __init__(self, connection_params: Dict[str, Any], max_size: int, healthcheck_interval: float):
+        self.connection_params = connection_params
+        self.max_size = max_size
+        self.healthcheck_interval = healthcheck_interval
+        self.closed = False
+        self._idle: "queue.LifoQueue[_PooledConnection]" = queue.LifoQueue()
+        self._executor = ThreadPoolExecutor(max_workers=max_size, thread_name_prefix="pgvector")
+
+    def _connect(self) -> _PooledConnection:
+        return _PooledConnection(psycopg2.connect(**self.connection_params))
+
+    def _is_healthy(self, connection: _PooledConnection) -> bool:
+        if connection.raw.closed:
+            return False
+        if time.monotonic() - connection.last_used < self.healthcheck_interval:
+            return True
+
+        try:
+            cursor = connection.raw.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+            connection.raw.rollback()
+            return True
+        except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+            LOGGER.warning("PGVector pool: discarding unhealthy connection: %s", str(e))
+            return False
+
+    def _discard(self, connection: _PooledConnection):
+        try:
+            connection.raw.close()
+        except Exception:
+            pass
+
+    def _checkout(self) -> _PooledConnection:
+        # Executor workers are capped at max_size, so at most max_size connections are ever checked out
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if self._is_healthy(connection):
+                return connection
+            self._discard(connection)
+
+    def _checkin(self, connection: _PooledConnection):
+        if self.closed:
+            self._discard(connection)
+            return
+        connection.last_used = time.monotonic()
+        self._idle.put(connection)
+
+    def _run(self, statement_name: Optional[str], prepare: Optional[sql.Composable], query, params: Optional[Sequence[Any]]) -> List[Dict[str, Any]]:
+        connection = self._checkout()
+        try:
+            cursor = connection.raw.cursor(cursor_factory=RealDictCursor)
+            if statement_name and statement_name not in connection.prepared:
+                cursor.execute(prepare)
+                connection.prepared.add(statement_name)
+            cursor.execute(query, params)
+            results = [dict(row) for row in cursor.fetchall()]
+            cursor.close()
+            connection.raw.rollback()
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            self._discard(connection)
+            raise
+        except Exception:
+            try:
+                connection.raw.rollback()
+            except Exception:
+                self._discard(connection)
+                raise
+            self._checkin(connection)
+            raise
+        self._checkin(connection)
+        return results
+
+    async def execute(self, query, params: Optional[Sequence[Any]] = None) -> List[Dict[str, Any]]:
+        """Run an ad-hoc query on a pooled connection without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._run, None, None, query, params)
+
+    async def execute_prepared(self, statement_name: str, prepare: sql.Composable, params: Sequence[Any]) -> List[Dict[str, Any]]:
+        """
+        Execute a server-side prepared statement, preparing it on the connection first if needed.
+
+        Args:
+            statement_name: Name of the prepared statement; must identify `prepare` uniquely
+            prepare: The full `PREPARE <name> (...) AS ...` statement
+            params: Bind parameters passed to EXECUTE
+
+        Returns:
+            List of dictionaries containing the query results
+        """
+        placeholders = sql.SQL(", ").join(sql.Placeholder() * len(params))
+        query = sql.SQL("EXECUTE {} ({})").format(sql.Identifier(statement_name), placeholders)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._run, statement_name, prepare, query, tuple(params))
+
+    def close(self):
+        self.closed = True
+        self._executor.shutdown(wait=False)
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+_pools: Dict[Tuple, PgVectorConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(connection_params: Dict[str, Any]) -> PgVectorConnectionPool:
+    """Return the process-wide pool for the given connection parameters, creating it on first use."""
+    key = tuple(sorted(connection_params.items()))
+    pool = _pools.get(key)
+    if pool and not pool.closed:
+        return pool
+
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool.closed:
+            LOGGER.info("PGVector pool: creating pool for %s:%s (max=%s)",
+                        connection_params.get("host"), connection_params.get("port"), settings.PGVECTOR_POOL_MAX_SIZE)
+            pool = PgVectorConnectionPool(
+                connection_params,
+                max_size=settings.PGVECTOR_POOL_MAX_SIZE,
+                healthcheck_interval=settings.PGVECTOR_POOL_HEALTHCHECK_INTERVAL,
+            )
+            _pools[key] = pool
+        return pool
+
+
+def close_pools():
+    """Close every pool in the process.  Called on application shutdown."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
@@ -1,19 +1,28 @@
 import asyncio
 from functools import partial
 import io
-from typing import Optional
+import time
+from typing import Callable, Optional, Set, TypeVar
 
 #import pandas as pd
 from google.api_core import exceptions as google_exceptions
 from gcloud.aio.storage import Blob, Storage
 from google.cloud import storage 
 
+from model_metric import LatencyHistogram
 from models import Document
 from settings import GCP_PROJECT_ID
 from utils.custom_logger import getLogger
 
 LOGGER = getLogger(__name__)
 
+T = TypeVar("T")
+
+# Buckets found to exist by this process; they are not checked again
+_validated_buckets: Set[str] = set()
+
+STORAGE_LATENCY = LatencyHistogram("STORAGE::ELAPSEDTIME")
+
 
 class StorageAdapter:
     def __init__(self, storage_client: storage.Client = None):
@@ -21,33 +30,56 @@ class StorageAdapter:
 
     async def get_base_path(self, document:Document):
         return f"paperglass/documents/{document.app_id}/{document.tenant_id}/{document.patient_id}/{document.document_id}" 
+
+    async def _run(self, operation: str, bucket_name: str, func: Callable[[], T]) -> T:
+        """Run a blocking GCS call in the executor, recording its latency per operation"""
+        start_time = time.perf_counter()
+        success = False
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(None, func)
+            success = True
+            return result
+        finally:
+            STORAGE_LATENCY.observe(operation, time.perf_counter() - start_time, {
+                "bucket_name": bucket_name,
+                "success": success,
+            })
     
     def validate_bucket(self, bucket_name: str) -> bool:
-        """Validate if a bucket exists and is accessible"""
+        """Validate if a bucket exists and is accessible.  Only the first successful check per bucket calls GCS."""
+        if bucket_name in _validated_buckets:
+            return True
         try:
             bucket = self.storage_client.bucket(bucket_name)
             bucket.reload()
+            _validated_buckets.add(bucket_name)
             return True
         except google_exceptions.NotFound:
             print(f"Bucket {bucket_name} not found")
             return False
 
+    async def _validate_bucket_async(self, bucket_name: str) -> bool:
+        if bucket_name in _validated_buckets:
+            return True
+        return await self._run("validate_bucket", bucket_name, partial(self.validate_bucket, bucket_name))
+
     async def list_folder_entries(self, bucket_name, folder_path, extension):
-        if not self.validate_bucket(bucket_name):
+        if not await self._validate_bucket_async(bucket_name):
             return None
-        bucket = self.storage_client.get_bucket(bucket_name)
-        blobs = bucket.list_blobs(prefix=folder_path)
-        entries = [
-            f"{blob.name}" for blob in blobs if blob.name.endswith(extension)]
-        return entries
+
+        def _list():
+            blobs = self.storage_client.bucket(bucket_name).list_blobs(prefix=folder_path)
+            return [f"{blob.name}" for blob in blobs if blob.name.endswith(extension)]
+
+        return await self._run("list_folder_entries", bucket_name, _list)
 
     async def read_text(self, bucket_name, file_path):
         """Read content of a file from storage"""
         try:
-            if not self.validate_bucket(bucket_name):
+            if not await self._validate_bucket_async(bucket_name):
                 return None
-            blob = self.storage_client.get_bucket(bucket_name).blob(file_path)
-            return blob.download_as_text()
+            blob = self.storage_client.bucket(bucket_name).blob(file_path)
+            return await self._run("read_text", bucket_name, blob.download_as_text)
         except google_exceptions.NotFound:
             print(f"File {file_path} not found in bucket {bucket_name}")
             return None
@@ -58,46 +90,47 @@ class StorageAdapter:
             raise ValueError(f"The file '{file_path}' is not a PDF.")
 
         try:
-            if not self.validate_bucket(bucket_name):
+            if not await self._validate_bucket_async(bucket_name):
                 return None
-            blob = self.storage_client.get_bucket(bucket_name).blob(file_path)
-            # blob_content = blob.download_as_bytes()
-            # pdf_content = io.BytesIO(blob_content)
-            # bucket = self.sync_client.bucket(self.bucket_name)
-            # blob = bucket.blob(path)
-            return await asyncio.get_event_loop().run_in_executor(None, blob.download_as_bytes)
+            blob = self.storage_client.bucket(bucket_name).blob(file_path)
+            return await self._run("read_pdf", bucket_name, blob.download_as_bytes)
             
         except google_exceptions.NotFound:
             print(f"File {file_path} not found in bucket {bucket_name}")
             return None
 
+    async def read_range(self, bucket_name: str, file_path: str, start: int, end: Optional[int] = None) -> Optional[bytes]:
+        """
+        Read bytes start..end (inclusive; to the end of the file when end is None) of a file, e.g. the
+        trailer and cross-reference table of a large PDF without downloading all of it.  A negative start
+        reads the last -start bytes.
+        """
+        try:
+            if not await self._validate_bucket_async(bucket_name):
+                return None
+            blob = self.storage_client.bucket(bucket_name).blob(file_path)
+            return await self._run("read_range", bucket_name, partial(blob.download_as_bytes, start=start, end=end))
+        except google_exceptions.NotFound:
+            print(f"File {file_path} not found in bucket {bucket_name}")
+            return None
+
     async def write_text(self, bucket_name: str, path: str, content: str, content_type=None) -> bool:
         """Write content to a file in storage"""
-        if not self.validate_bucket(bucket_name):
+        if not await self._validate_bucket_async(bucket_name):
             return False
 
         bucket = self.storage_client.bucket(bucket_name)
         blob = bucket.blob(path)
-        # blob.upload_from_string(content)
         if not content_type:
-            await asyncio.get_event_loop().run_in_executor(
-                None,
-                partial(blob.upload_from_string, content),
-            )
+            await self._run("write_text", bucket_name, partial(blob.upload_from_string, content))
         else:
-            await asyncio.get_event_loop().run_in_executor(
-                None,
-                partial(blob.upload_from_string, content, content_type=content_type),
-            )
+            await self._run("write_text", bucket_name, partial(blob.upload_from_string, content, content_type=content_type))
         return True
 
     async def write_pdf(self, bucket_name, path, content: bytes) -> str:
         bucket = self.storage_client.bucket(bucket_name)
         blob = bucket.blob(path)
-        await asyncio.get_event_loop().run_in_executor(
-            None,
-            partial(blob.upload_from_string, content, content_type="application/pdf"),
-        )
+        await self._run("write_pdf", bucket_name, partial(blob.upload_from_string, content, content_type="application/pdf"))
         return self._gcs_uri(bucket_name, path)
 
     # def read_csv_df(self, bucket_name: str, blob_name: str) -> Optional[pd.DataFrame]:
@@ -39,6 +39,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def startup_event():
+    if settings.MEDDB_CATALOG_INDEX_ENABLED:
+        from adapters.pgvector_adapter import MedispanPgVectorAdapter
+        for catalog in [x.strip() for x in settings.MEDDB_CATALOG_INDEX_PRELOAD_CATALOGS.split(",") if x.strip()]:
+            try:
+                await MedispanPgVectorAdapter(app_id=None, catalog=catalog).load_catalog_index()
+            except Exception as e:
+                LOGGER.error("Error preloading catalog index for %s: %s", catalog, str(e))
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    from adapters.pgvector_pool import close_pools
+    close_pools()
+    from utils.pdf_splitter import shutdown_process_pool
+    shutdown_process_pool()
+
 def retry_logger(max_retry_count, logger):
     def decorator(func):
         @wraps(func)
@@ -541,3 +558,21 @@ async def medispan_loadtest_poke(request: Request, search_strategy: str = "alloy
     
     except Exception as e:
         return {"error": str(e)}
+
+
+@app.get("/api/medispan/index/memory")
+async def medispan_index_memory():
+    from adapters.medispan_catalog_index import memory_report
+    return {
+        "enabled": settings.MEDDB_CATALOG_INDEX_ENABLED,
+        "indexes": memory_report(),
+    }
+
+
+@app.get("/api/storage/latency")
+async def storage_latency():
+    from adapters.storage import STORAGE_LATENCY
+    return {
+        "metric_type": STORAGE_LATENCY.metric_type,
+        "operations": STORAGE_LATENCY.snapshot(),
+    }
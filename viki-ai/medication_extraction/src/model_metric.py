@@ -1,6 +1,7 @@
 from pydantic import BaseModel
+from bisect import bisect_left
 from enum import Enum
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, List, Optional
 import json
 
 from utils.custom_logger import CustomLogger
@@ -33,3 +34,45 @@ class Metric(BaseModel):
         
         extra = JsonUtil.clean(tags)        
         LOGGER.info(f"METRIC::{mt}", extra=extra)
+
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class LatencyHistogram:
+    """
+    Latency histogram per operation.  Observations are counted in process and served by snapshot() (see
+    /api/storage/latency); each one is also logged at DEBUG, tagged with its operation, elapsed_time and
+    latency_bucket, for tracing a single call.
+    """
+
+    def __init__(self, metric_type: str, buckets: Iterable[float] = DEFAULT_LATENCY_BUCKETS):
+        self.metric_type = metric_type
+        self.buckets = tuple(sorted(buckets))
+        self.labels = [f"le_{bound}" for bound in self.buckets] + ["le_inf"]
+        self.counts: Dict[str, List[int]] = {}
+        self.sums: Dict[str, float] = {}
+
+    def observe(self, operation: str, seconds: float, tags: Optional[Dict[str, Any]] = None):
+        index = bisect_left(self.buckets, seconds)
+        counts = self.counts.setdefault(operation, [0] * len(self.labels))
+        counts[index] += 1
+        self.sums[operation] = self.sums.get(operation, 0.0) + seconds
+
+        extra = dict(tags or {})
+        extra.update({
+            "operation": operation,
+            "elapsed_time": seconds,
+            "latency_bucket": self.labels[index],
+        })
+        LOGGER.debug(f"METRIC::{self.metric_type}:{operation}", extra=JsonUtil.clean(extra))
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            operation: {
+                "count": sum(counts),
+                "sum": self.sums[operation],
+                "buckets": dict(zip(self.labels, counts)),
+            }
+            for operation, counts in self.counts.items()
+        }
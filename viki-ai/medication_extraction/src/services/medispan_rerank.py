@@ -0,0 +1,99 @@
+"""
+Bulk reranker for Medispan search candidates.
+
+Produces the same ordering as MedispanMatchService._rerank_with_priority (form AND strength matches
+first, then strength only, then form only, then the rest, each group in search order), but each
+candidate's dosage form and strength numerics are normalized once and the candidates of every
+medication on a page are scored together in a single pass over flat column arrays.
+"""
+import re
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from models import MedicationValue, MedispanDrug
+
+NUMERIC_PATTERN = re.compile(r'\d+(?:\.\d+)?')
+
+# Priority groups, lowest sorts first
+PRIORITY_BOTH = 0
+PRIORITY_STRENGTH = 1
+PRIORITY_FORM = 2
+PRIORITY_NONE = 3
+
+CandidateFeatures = Tuple[Optional[str], FrozenSet[str]]
+
+
+def extract_numeric_components(strength_str: Optional[str]) -> FrozenSet[str]:
+    """Numeric components of a strength string, e.g. "2.5-10 MG" -> {"2.5", "10"}."""
+    if not strength_str:
+        return frozenset()
+    return frozenset(NUMERIC_PATTERN.findall(strength_str))
+
+
+class MedispanRerankEngine:
+    """
+    Ranks the candidate lists of many medications at once.  Candidate features are cached by
+    catalog row, so a drug returned for several medications on a page is normalized only once.
+    """
+
+    def __init__(self, form_enabled: bool, strength_enabled: bool, strength_ranking_eligible_forms: Iterable[str]):
+        self.form_enabled = form_enabled
+        self.strength_enabled = strength_enabled
+        self.eligible_forms = frozenset(form.lower() for form in strength_ranking_eligible_forms or [])
+        self._features: Dict[Tuple, CandidateFeatures] = {}
+
+    def _candidate_features(self, drug: MedispanDrug) -> CandidateFeatures:
+        key = (drug.id, drug.Dosage_Form, drug.Strength)
+        features = self._features.get(key)
+        if features is None:
+            features = (drug.Dosage_Form.lower() if drug.Dosage_Form else None, extract_numeric_components(drug.Strength))
+            self._features[key] = features
+        return features
+
+    def _query(self, medication: MedicationValue) -> CandidateFeatures:
+        """The form and strength numerics to match against, or None/empty when that check does not apply."""
+        form = medication.form.lower() if medication.form else None
+        strength_numbers = frozenset()
+        if self.strength_enabled and form and medication.strength and form in self.eligible_forms:
+            strength_numbers = extract_numeric_components(medication.strength)
+        return (form if self.form_enabled else None), strength_numbers
+
+    def rank(self, items: List[Tuple[List[MedispanDrug], MedicationValue]]) -> List[List[MedispanDrug]]:
+        """
+        Rerank the candidates of every medication.
+
+        Args:
+            items: One (candidates, extracted medication value) pair per medication
+
+        Returns:
+            The reranked candidates, one list per input pair in input order
+        """
+        # Flatten every candidate on the page into parallel columns
+        owners: List[int] = []
+        forms: List[Optional[str]] = []
+        strengths: List[FrozenSet[str]] = []
+        for owner, (candidates, _) in enumerate(items):
+            for drug in candidates:
+                form, strength_numbers = self._candidate_features(drug)
+                owners.append(owner)
+                forms.append(form)
+                strengths.append(strength_numbers)
+
+        queries = [self._query(medication) for _, medication in items]
+
+        # Score all candidates in one pass: a strength match outranks a form match
+        priorities = [
+            PRIORITY_NONE
+            - (2 if queries[owner][1] and not queries[owner][1].isdisjoint(strength_numbers) else 0)
+            - (1 if queries[owner][0] is not None and form == queries[owner][0] else 0)
+            for owner, form, strength_numbers in zip(owners, forms, strengths)
+        ]
+
+        # Stable sort per medication keeps search order within each priority group
+        ranked: List[List[MedispanDrug]] = []
+        offset = 0
+        for candidates, _ in items:
+            count = len(candidates)
+            order = sorted(range(count), key=lambda i: priorities[offset + i])
+            ranked.append([candidates[i] for i in order])
+            offset += count
+        return ranked
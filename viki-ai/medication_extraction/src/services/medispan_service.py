@@ -1,15 +1,19 @@
+import asyncio
 from copy import deepcopy
 import json
 import re
-from typing import List
+from typing import Dict, List
 
 from adapters.medispan_api import MedispanAPIAdapter
 from adapters.pgvector_adapter import MedispanPgVectorAdapter
 from adapters.firestore_vector_adapter import MedispanFirestoreVectorAdapter
 from adapters.circuit_breaker_adapter import CircuitBreakerAdapter
+from adapters.medispan_match_memo import get_memo
 from settings import STEP_MEDISPANMATCH_LLM_MODEL, MEDDB_MAX_RESULTS
+import settings
 
 from models import MedispanMatchConfig
+from services.medispan_rerank import MedispanRerankEngine
 from model_metric import Metric
 from prompts import PromptTemplates
 
@@ -28,6 +32,7 @@ class MedispanMatchService:
         self.tenant_id = tenant_id
         self.medispan_adapter_settings = medispan_adapter_settings
         self.medispan_model = medispan_model
+        self._rerank_engine = None
     
     def model(self):
         LOGGER.debug("Medispan Match model: %s", self.medispan_model or STEP_MEDISPANMATCH_LLM_MODEL)
@@ -52,9 +57,10 @@ class MedispanMatchService:
             "run_id": run_id,
         }
         if self.medispan_adapter_settings and (self.tenant_id in self.medispan_adapter_settings.v2_enabled_tenants or self.medispan_adapter_settings.v2_enabled_globally):
+            catalog = self.medispan_adapter_settings.catalog
             extra.update({
                 "adapter": self.medispan_adapter_settings.v2_repo,
-                "catalog": self.medispan_adapter_settings.catalog,
+                "catalog": catalog,
             })
             if self.medispan_adapter_settings.v2_repo == "alloydb":
                 medispan_port = MedispanPgVectorAdapter(app_id=app_id, catalog=self.medispan_adapter_settings.catalog)
@@ -70,9 +76,10 @@ class MedispanMatchService:
                 medispan_port = MedispanPgVectorAdapter(app_id=app_id, catalog=self.medispan_adapter_settings.catalog)
                 Metric.send("EXTRACTION::MEDDB::SEARCH::ADAPTER", branch="default(alloydb)", tags=extra)
         else:
+            catalog = "medispan"
             extra.update({
                 "adapter": "firestore-orig",
-                "catalog": "medispan"
+                "catalog": catalog
             })
             medispan_port = MedispanFireStoreVectorSearchAdapter()
             Metric.send("EXTRACTION::MEDDB::SEARCH::ADAPTER", branch="firestore-orig", tags=extra)
@@ -127,17 +134,12 @@ class MedispanMatchService:
         med_log_db = {}
 
         idx = 0
-        
-        for extracted_medication in extracted_medications:
-            
-            this_med_log_details = med_log_db.get(extracted_medication.id, {})
-            this_med_log_details["index"] = idx
-
-            medispan_matched_medication:MedispanMedicationValue = None
-            medispan_status = MedispanStatus.UNMATCHED
 
+        # Build the search term for every medication up front so the whole page is searched in bulk
+        medication_values = {}
+        for extracted_medication in extracted_medications:
             try:
-                extracted_medication_value = MedicationValue(
+                medication_values[extracted_medication.id] = MedicationValue(
                                                                 name=extracted_medication.medication.name,
                                                                 strength=extracted_medication.medication.strength,
                                                                 dosage=extracted_medication.medication.dosage,
@@ -149,95 +151,138 @@ class MedispanMatchService:
                                                                 end_date=extracted_medication.medication.end_date,
                                                                 discontinued_date=extracted_medication.medication.discontinued_date
                                                             )
-                #if not is_medispan_pg_vector:
-                search_term: str = extracted_medication_value.fully_qualified_name
-                
-                medispan_port_result: List[MedispanDrug] = await medispan_port.search_medications(search_term)
-                # If initial search does not return any results, try searching with just the first word of the medication name
-                
-                if not medispan_port_result:
-                    search_term = f"{extracted_medication_value.name.split(' ')[0]}"
-                    LOGGER.debug("MedispanMatching: Initial search for medication '%s' did not yield any results.  Trying search with just the first word of the medication name: '%s'", extracted_medication_value.fully_qualified_name, search_term, extra=extra)
-                    medispan_port_result: List[MedispanDrug] = await medispan_port.search_medications(search_term)
-                    this_med_log_details['medispan_search_term'] = search_term
-                else:
-                    this_med_log_details['medispan_search_term'] = extracted_medication_value.fully_qualified_name
-                # else:
-                #     # pgvector search path
-                #     # search by name will result in keyword search which is very effecient and possibility of better result
-                #     # assuming reranking will pick right values later
-                #     search_term = f"{extracted_medication_value.name}"
-                #     medispan_port_result: List[MedispanDrug] = await medispan_port.search_medications(search_term,
-                #                                                                                     dosage_form=extracted_medication_value.dosage, 
-                #                                                                                     route=extracted_medication_value.route)
-                #     if medispan_port_result:
-                #         this_med_log_details['medispan_search_term'] = search_term
-                #     else:
-                #         search_term: str = extracted_medication_value.fully_qualified_name
-                    
-                #         medispan_port_result: List[MedispanDrug] = await medispan_port.search_medications(search_term)
-                #         this_med_log_details['medispan_search_term'] = extracted_medication_value.fully_qualified_name
-
-                # Apply reranking if enabled and conditions are met
-                medispan_port_result = self.rerank_medications(medispan_port_result, search_term, extracted_medication_value)
-
-                # Apply limiting of results
-                medispan_port_result = self._limit_results(medispan_port_result)
-
-                if medispan_port_result:
-                    this_med_log_details['medispan_results'] = json.dumps([x.dict() for x in medispan_port_result], indent=2)
-                else:
-                    this_med_log_details['medispan_results'] = None
+            except Exception as e:
+                medication_values[extracted_medication.id] = e
+
+        # Reuse prior matches of the same medication from other pages and documents; only the rest is searched and matched
+        memo = get_memo()
+        memo_keys = {}
+        memo_hits = {}
+        if memo:
+            memo_keys = {
+                id: memo.key(f"{app_id}:{tenant_id}", catalog, self.model(), MedispanMatchService.prompt(), value)
+                for id, value in medication_values.items() if isinstance(value, MedicationValue)
+            }
+            memoized = await memo.get_many(memo_keys.values())
+            memo_hits = {id: memoized[key] for id, key in memo_keys.items() if key in memoized}
+            if memo_hits:
+                LOGGER.debug("MedispanMatching: Reusing %s memoized matches of %s medications", len(memo_hits), len(extracted_medications), extra=extra)
+        pending_medications = [x for x in extracted_medications if x.id not in memo_hits]
+        pending_values = {id: value for id, value in medication_values.items() if id not in memo_hits}
+        memo_updates = {}
+
+        if settings.MEDISPAN_MATCH_PIPELINE_ENABLED:
+            prompt_metadata = opMeta.dict()
+            prompt_metadata.update(extra)
+            medispan_status = MedispanStatus.UNMATCHED
 
-                opMeta.iteration = idx
+            filtered_medications, matching_context = await self._search_and_match_pipelined(
+                medispan_port, pending_medications, pending_values,
+                medispan_search_results, medispan_local_db, med_log_db,
+                prompt_metadata=prompt_metadata, extra=extra
+            )
+        else:
+            search_results = {}
+            search_error = None
+            try:
+                search_results = await self.search_medications_batch(medispan_port, [
+                    x.fully_qualified_name for x in pending_values.values() if isinstance(x, MedicationValue)
+                ])
+                # If the initial search does not return any results, try searching with just the first word of the medication name
+                fallback_terms = [
+                    x.name.split(' ')[0] for x in pending_values.values()
+                    if isinstance(x, MedicationValue) and not search_results.get(x.fully_qualified_name)
+                ]
+                if fallback_terms:
+                    LOGGER.debug("MedispanMatching: Initial search for %s medications did not yield any results.  Trying search with just the first word of the medication name", len(fallback_terms), extra=extra)
+                    search_results.update(await self.search_medications_batch(medispan_port, fallback_terms))
+            except Exception as e:
+                search_error = e
+
+            # Rerank the candidates of every medication on the page in one pass.  If that fails, each
+            # medication is reranked on its own below so an error only affects the medication that caused it.
+            ranked_results = {}
+            if not search_error:
+                page_items = {}
+                for id, value in pending_values.items():
+                    if not isinstance(value, MedicationValue):
+                        continue
+                    try:
+                        page_items[id] = (self._select_search_result(value, search_results)[1], value)
+                    except Exception:
+                        continue # The failed search is reported against the medication below
+                try:
+                    ranked_results = dict(zip(page_items.keys(), self.rerank_page(list(page_items.values()))))
+                except Exception as e:
+                    extra2 = {
+                        "error": exceptionToMap(e),
+                    }
+                    extra2.update(extra)
+                    LOGGER.warning('MedispanMatching: Page rerank failed, reranking medications individually: %s', str(e), extra=extra2)
 
-                medispan_result = {
-                    "id": extracted_medication.id,
-                    "index": idx,
-                    "medication_name": search_term,
-                    "medispan_options": [x.dict() for x in medispan_port_result]
-                }
-                medispan_search_results.append(medispan_result)
+            for extracted_medication in pending_medications:
+            
+                this_med_log_details = med_log_db.get(extracted_medication.id, {})
+                this_med_log_details["index"] = idx
 
-                # Populate local medispan db for later use
-                for medispan in medispan_port_result:                            
-                    medispan_local_db[medispan.id] = medispan
+                medispan_matched_medication:MedispanMedicationValue = None
+                medispan_status = MedispanStatus.UNMATCHED
 
-                med_log_db[extracted_medication.id] = this_med_log_details
+                try:
+                    extracted_medication_value = medication_values[extracted_medication.id]
+                    if isinstance(extracted_medication_value, Exception):
+                        raise extracted_medication_value
+                    if search_error:
+                        raise search_error
 
-                idx += 1
+                    medispan_result, medispan_port_result = self._build_search_result(extracted_medication, extracted_medication_value, idx,
+                                                                                      search_results, this_med_log_details,
+                                                                                      ranked_result=ranked_results.get(extracted_medication.id))
 
-            except Exception as e:
-                extra2 = {
-                    "error": exceptionToMap(e),
-                }
-                extra2.update(extra)
+                    opMeta.iteration = idx
+
+                    medispan_search_results.append(medispan_result)
+
+                    # Populate local medispan db for later use
+                    for medispan in medispan_port_result:                            
+                        medispan_local_db[medispan.id] = medispan
+
+                    med_log_db[extracted_medication.id] = this_med_log_details
+
+                    idx += 1
+
+                except Exception as e:
+                    extra2 = {
+                        "error": exceptionToMap(e),
+                    }
+                    extra2.update(extra)
                 
-                LOGGER.error('ExtractMedication: Error in searching medispan for medication %s: %s.', extracted_medication.medication.name, str(e), extra=extra2)
-                medispan_status = MedispanStatus.ERRORED
-                this_med_log_details['error'] = {"message": 'Error in searching medispan for medication: ' + str(extracted_medication)}
+                    LOGGER.error('ExtractMedication: Error in searching medispan for medication %s: %s.', extracted_medication.medication.name, str(e), extra=extra2)
+                    medispan_status = MedispanStatus.ERRORED
+                    this_med_log_details['error'] = {"message": 'Error in searching medispan for medication: ' + str(extracted_medication)}
                 
-                med_log_db[extracted_medication.id] = this_med_log_details
+                    med_log_db[extracted_medication.id] = this_med_log_details
 
-                idx += 1 # Needed for matching the LLM result back to the right medication.
-                continue
+                    idx += 1 # Needed for matching the LLM result back to the right medication.
+                    continue
 
-        # End of medication 1 loop -------------------------------------------------------------------------------------
+            # End of medication 1 loop -------------------------------------------------------------------------------------
+
+            # LLM Best Match Filter
+            matching_context = {}
+            LOGGER.debug("MedispanMatching: Applying LLM filter to medispan search results", extra=extra)
+            prompt_metadata = opMeta.dict()
+            prompt_metadata.update(extra)
+        
+            #Perform Medispan LLM Match
+            filtered_medications, matching_context = await self.medispan_matching(
+                prompt_template=MedispanMatchService.prompt(),
+                model=self.model(),
+                prompt_input=medispan_search_results,
+                metadata=prompt_metadata
+            )
 
-        # LLM Best Match Filter
-        matching_context = {}
         llm_result_db = {}
-        LOGGER.debug("MedispanMatching: Applying LLM filter to medispan search results", extra=extra)
-        prompt_metadata = opMeta.dict()
-        prompt_metadata.update(extra)
-        
-        #Perform Medispan LLM Match
-        filtered_medications, matching_context = await self.medispan_matching(
-            prompt_template=MedispanMatchService.prompt(),
-            model=self.model(),
-            prompt_input=medispan_search_results,
-            metadata=prompt_metadata
-        )
         for llm_result in filtered_medications:
             llm_result_db[llm_result["id"]] = llm_result
         
@@ -247,14 +292,24 @@ class MedispanMatchService:
         # Apply Medispan match to the extracted medications
         output_medications = []
         LOGGER.debug("MedispanMatching: Applying medispan match to extracted medications", extra=extra)
-        for extracted_medication in extracted_medications:                
+        for page_index, extracted_medication in enumerate(extracted_medications):
             this_med_log_details = med_log_db.get(extracted_medication.id, {})
+            # Log entries are ordered by the medication's position on the page, memo hits included
+            this_med_log_details["index"] = page_index
             try:
                 # Get the LLM result for this medication
                 llm_result = llm_result_db.get(extracted_medication.id)
+                memo_hit = memo_hits.get(extracted_medication.id)
+
+                if memo_hit:
+                    medispan_status, medispan_matched_medication = memo_hit
+                    extracted_medication.set_medispan_medication(medispan_matched_medication)
+                    extracted_medication.set_medispan_status(medispan_status)
+                    this_med_log_details["medispan_memo_hit"] = True
+                    this_med_log_details["medispan_filter_results"] = medispan_matched_medication.dict() if medispan_matched_medication else None
 
                 # If result then find the medispan medication and apply to 
-                if llm_result:
+                elif llm_result:
                     medispan_drug:MedispanDrug = medispan_local_db.get(llm_result["medispan_id"])
 
                     this_med_log_details['medispan_drug'] = medispan_drug.dict() if medispan_drug else None
@@ -278,6 +333,8 @@ class MedispanMatchService:
 
                         extracted_medication.set_medispan_medication(medispan_matched_medication)
                         extracted_medication.set_medispan_status(medispan_status)
+                        if extracted_medication.id in memo_keys:
+                            memo_updates[memo_keys[extracted_medication.id]] = (medispan_status, medispan_matched_medication)
                         
                         #uow.register_new(extracted_medication)
 
@@ -296,7 +353,7 @@ class MedispanMatchService:
             med_log_db[extracted_medication.id] = this_med_log_details
 
             extra2 = {
-                "index": idx,
+                "index": page_index,
                 "extracted_medication": extracted_medication.dict(),
             }
             extra2.update(extra)
@@ -305,10 +362,11 @@ class MedispanMatchService:
 
             output_medications.append(extracted_medication)
 
-            idx += 1
-
         # End of medication 2 loop -------------------------------------------------------------------------------------
 
+        if memo and memo_updates:
+            await memo.set_many(memo_updates)
+
         log_detail_list = [x for x in med_log_db.values()]
         log_detail_list = sorted(log_detail_list, key=lambda obj: obj["index"])
         
@@ -332,6 +390,154 @@ class MedispanMatchService:
         
         return output_medications,medispan_search_results
         
+    async def search_medications_batch(self, medispan_port, search_terms: List[str]) -> Dict[str, List[MedispanDrug]]:
+        """
+        Resolve many search terms against the medispan port, keyed by search term.
+        Ports without a native batch API are searched one term at a time, concurrently; a term whose
+        search fails maps to its exception so only the medications using that term are errored.
+        """
+        if not search_terms:
+            return {}
+        if hasattr(medispan_port, "search_medications_batch"):
+            return await medispan_port.search_medications_batch(search_terms)
+
+        unique_terms = list(dict.fromkeys(search_terms))
+        results = await asyncio.gather(*[medispan_port.search_medications(term) for term in unique_terms], return_exceptions=True)
+        return dict(zip(unique_terms, results))
+
+    def _select_search_result(self, extracted_medication_value: MedicationValue, search_results: Dict[str, List[MedispanDrug]]):
+        """
+        The search term and results for a medication, falling back to the first word of its name.
+        Raises the search error if the term's search failed.
+        """
+        search_term: str = extracted_medication_value.fully_qualified_name
+        medispan_port_result: List[MedispanDrug] = search_results.get(search_term)
+        
+        if not medispan_port_result:
+            search_term = f"{extracted_medication_value.name.split(' ')[0]}"
+            medispan_port_result: List[MedispanDrug] = search_results.get(search_term) or []
+        if isinstance(medispan_port_result, Exception):
+            raise medispan_port_result
+        return search_term, medispan_port_result
+
+    def _build_search_result(self, extracted_medication: ExtractedMedication, extracted_medication_value: MedicationValue, idx: int,
+                             search_results: Dict[str, List[MedispanDrug]], this_med_log_details: dict,
+                             ranked_result: List[MedispanDrug] = None):
+        """
+        Pick the search results for a medication, rerank and limit them (unless `ranked_result` was already
+        computed for the page), and build the medication's entry for the LLM match prompt.
+        """
+        search_term, medispan_port_result = self._select_search_result(extracted_medication_value, search_results)
+        this_med_log_details['medispan_search_term'] = search_term
+
+        # Apply reranking if enabled and conditions are met
+        if ranked_result is not None:
+            medispan_port_result = ranked_result
+        else:
+            medispan_port_result = self.rerank_medications(medispan_port_result, search_term, extracted_medication_value)
+
+        # Apply limiting of results
+        medispan_port_result = self._limit_results(medispan_port_result)
+
+        if medispan_port_result:
+            this_med_log_details['medispan_results'] = json.dumps([x.dict() for x in medispan_port_result], indent=2)
+        else:
+            this_med_log_details['medispan_results'] = None
+
+        medispan_result = {
+            "id": extracted_medication.id,
+            "index": idx,
+            "medication_name": search_term,
+            "medispan_options": [x.dict() for x in medispan_port_result]
+        }
+        return medispan_result, medispan_port_result
+
+    async def _search_and_match_pipelined(self, medispan_port, extracted_medications: List[ExtractedMedication], medication_values: dict,
+                                          medispan_search_results: list, medispan_local_db: dict, med_log_db: dict,
+                                          prompt_metadata: dict, extra: dict, batch_size=20):
+        """
+        Pipelined search -> rerank -> LLM match.  Every medication is searched concurrently (bounded by
+        MEDISPAN_MATCH_SEARCH_CONCURRENCY) and reranked as soon as its results arrive, and an LLM match
+        batch is started as soon as its `batch_size` medications are ready rather than after the whole
+        page has been searched.  Batches are filled in medication order, so the prompts are the same as
+        in the batched mode and repeat runs hit the LLM response cache.
+        """
+        semaphore = asyncio.Semaphore(max(1, settings.MEDISPAN_MATCH_SEARCH_CONCURRENCY))
+
+        async def search(idx: int, extracted_medication: ExtractedMedication):
+            this_med_log_details = med_log_db.get(extracted_medication.id, {})
+            this_med_log_details["index"] = idx
+            try:
+                extracted_medication_value = medication_values[extracted_medication.id]
+                if isinstance(extracted_medication_value, Exception):
+                    raise extracted_medication_value
+
+                async with semaphore:
+                    search_term = extracted_medication_value.fully_qualified_name
+                    search_results = {search_term: await medispan_port.search_medications(search_term)}
+                    # If the initial search does not return any results, try searching with just the first word of the medication name
+                    if not search_results[search_term]:
+                        fallback_term = extracted_medication_value.name.split(' ')[0]
+                        search_results[fallback_term] = await medispan_port.search_medications(fallback_term)
+
+                medispan_result, medispan_port_result = self._build_search_result(extracted_medication, extracted_medication_value, idx,
+                                                                                  search_results, this_med_log_details)
+                for medispan in medispan_port_result:
+                    medispan_local_db[medispan.id] = medispan
+                return medispan_result
+            except Exception as e:
+                extra2 = {
+                    "error": exceptionToMap(e),
+                }
+                extra2.update(extra)
+                LOGGER.error('ExtractMedication: Error in searching medispan for medication %s: %s.', extracted_medication.medication.name, str(e), extra=extra2)
+                this_med_log_details['error'] = {"message": 'Error in searching medispan for medication: ' + str(extracted_medication)}
+                return None
+            finally:
+                med_log_db[extracted_medication.id] = this_med_log_details
+
+        llm_tasks = []
+
+        def submit(batch):
+            metadata = dict(prompt_metadata, iteration=len(llm_tasks))
+            llm_tasks.append(asyncio.create_task(
+                self.medispanmatching_batch(MedispanMatchService.prompt(), self.model(), batch, prompt_adapter=StandardPromptAdapter(), metadata=metadata)
+            ))
+
+        search_tasks = [asyncio.ensure_future(search(idx, x)) for idx, x in enumerate(extracted_medications)]
+        pending = []
+        try:
+            # Searches run concurrently but are collected in medication order
+            for search_task in search_tasks:
+                medispan_result = await search_task
+                if medispan_result is None:
+                    continue
+                medispan_search_results.append(medispan_result)
+                pending.append(medispan_result)
+                if len(pending) >= batch_size:
+                    submit(pending)
+                    pending = []
+            if pending:
+                submit(pending)
+            batch_results = await asyncio.gather(*llm_tasks)
+        except BaseException:
+            for task in search_tasks + llm_tasks:
+                task.cancel()
+            raise
+
+        medispan_search_results.sort(key=lambda x: x["index"])
+
+        output = []
+        context = {
+            "batch_context": []
+        }
+        context.update(prompt_metadata)
+        for batch_index, (results, batch_context) in enumerate(batch_results):
+            output.extend(results)
+            batch_context["batch_index"] = batch_index
+            context["batch_context"].append(batch_context)
+        return output, context
+
     async def medispan_matching(self, prompt_template, model, prompt_input, batch_size=20, metadata={}):
         batches = self.chunk_array(prompt_input, batch_size)
 
@@ -547,11 +753,35 @@ class MedispanMatchService:
             return self._limit_results(medispan_port_result)
         
         # Perform comprehensive reranking with proper prioritization
-        result = self._rerank_with_priority(medispan_port_result, extracted_medication_value, form_enabled, strength_enabled)
+        result = self.rerank_engine().rank([(medispan_port_result, extracted_medication_value)])[0]
         
         # Apply result limiting
         return self._limit_results(result)
 
+    def rerank_engine(self) -> MedispanRerankEngine:
+        """The reranker for this service's configuration.  Candidate normalization is cached for the service's lifetime."""
+        if self._rerank_engine is None:
+            rerank_settings = self.medispan_adapter_settings.v2_settings.rerank_settings
+            self._rerank_engine = MedispanRerankEngine(rerank_settings.rerank_form_enabled,
+                                                       rerank_settings.rerank_strength_enabled,
+                                                       rerank_settings.strength_ranking_eligible_forms)
+        return self._rerank_engine
+
+    def rerank_page(self, items: List[tuple]) -> List[List[MedispanDrug]]:
+        """
+        Rerank and limit the search results of every medication on a page in one pass.
+        Same result as calling rerank_medications for each (medispan_port_result, extracted_medication_value) pair.
+        """
+        if (not self.medispan_adapter_settings or 
+            not self.medispan_adapter_settings.v2_settings or 
+            not self.medispan_adapter_settings.v2_settings.rerank_settings or
+            not self.medispan_adapter_settings.v2_settings.rerank_settings.enabled or
+            not (self.medispan_adapter_settings.v2_settings.rerank_settings.rerank_form_enabled or
+                 self.medispan_adapter_settings.v2_settings.rerank_settings.rerank_strength_enabled)):
+            return [self._limit_results(results) for results, _ in items]
+
+        return [self._limit_results(results) for results in self.rerank_engine().rank(items)]
+
     def rerank_medications_form(self, medispan_port_result: List[MedispanDrug], search_term: str, extracted_medication_value: MedicationValue) -> List[MedispanDrug]:
         """
         Rerank medications based on form matching.
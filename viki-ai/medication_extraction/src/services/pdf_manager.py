@@ -1,11 +1,11 @@
 import time
 from typing import List
 from settings import GCS_BUCKET_NAME
+import settings
 from models import Document, DocumentOperationStep, Page
 from adapters.storage import StorageAdapter
-import pypdf
-from io import BytesIO
 from utils.custom_logger import getLogger
+from utils.pdf_splitter import count_pages, split_pdf
 from model_metric import Metric
 
 LOGGER = getLogger(__name__)
@@ -18,46 +18,50 @@ class PDFManager:
        
 
     async def split_pages(self, document:Document, run_id:str)->List[Page]:
-        pages = []
         base_path = await self.storage_adapter.get_base_path(document)
-        # split pdf into pages
         raw_data = await self.storage_adapter.read_pdf(self.bucket, document.storage_uri.replace("gs://"+self.bucket+"/", ""))
-        pdf_reader = pypdf.PdfReader(BytesIO(raw_data))
-        
+        total_pages = count_pages(raw_data)
+
+        # split pdf into pages: pages are sliced in a process pool and uploaded as they are ready
         start_time = time.time()
-        for i in range(0, len(pdf_reader.pages), 1):
-            page_number = i + 1
-            page = pdf_reader.pages[i]
-            writer = pypdf.PdfWriter()
-            writer.add_page(page)
-            page_raw_data = BytesIO()
-            writer.write(page_raw_data)
-            page_raw_data.seek(0)
-            LOGGER.warning('Uploading page %d of document %s (%d pages)', page_number, document.document_id, len(pdf_reader.pages))
-            uri = await self.storage_adapter.write_pdf(self.bucket, f"{base_path}/{page_number}.pdf",page_raw_data.getvalue())
+
+        async def upload_page(page_number: int, total_pages: int, page_raw_data: bytes) -> Page:
+            page_start_time = time.time()
+            LOGGER.warning('Uploading page %d of document %s (%d pages)', page_number, document.document_id, total_pages)
+            uri = await self.storage_adapter.write_pdf(self.bucket, f"{base_path}/{page_number}.pdf", page_raw_data)
             LOGGER.warning('page uri: %s', uri)
-            pages.append(Page(storage_uri=uri, page_number=page_number, total_pages=len(pdf_reader.pages), run_id=run_id))
 
-            end_time = time.time()    
+            end_time = time.time()
             Metric.send(Metric.MetricType.DOCUMENT_PAGE_CREATED, {
-                "page_number":i, 
-                "page_count":len(pdf_reader.pages),
+                "page_number":page_number - 1,
+                "page_count":total_pages,
                 "elapsed_time":end_time-start_time,
+                "upload_time":end_time-page_start_time,
+                "page_size_bytes":len(page_raw_data),
                 "priority": document.priority.value,
                 "request": {
                     "document": document.dict(), 
                     "run_id": run_id
                 }
-            })  # New metric logging statement
+            })
+            return Page(storage_uri=uri, page_number=page_number, total_pages=total_pages, run_id=run_id)
+
+        pages = await split_pdf(
+            raw_data,
+            upload_page,
+            total_pages=total_pages,
+            workers=settings.PDF_SPLIT_WORKERS,
+            chunk_pages=settings.PDF_SPLIT_CHUNK_PAGES,
+            process_pool_min_pages=settings.PDF_SPLIT_PROCESS_POOL_MIN_PAGES,
+            upload_concurrency=settings.PDF_SPLIT_UPLOAD_CONCURRENCY,
+        )
 
         end_time = time.time()
         LOGGER.info("Step::%s completed",
                     DocumentOperationStep.SPLIT_PAGES,
                     extra={
-                            "page_count":len(pdf_reader.pages),
+                            "page_count":total_pages,
                             "elapsed_time":end_time-start_time,**document.dict()
                         }
                     )
         return pages
-    
-    
\ No newline at end of file
@@ -44,6 +44,10 @@ CLOUD_PROVIDER = getenv_or_die('CLOUD_PROVIDER')
 GCP_PROJECT_ID = getenv_or_die('GCP_PROJECT_ID')
 GCP_PUBSUB_PROJECT_ID = getenv_or_die('GCP_PUBSUB_PROJECT_ID')
 GCS_BUCKET_NAME = getenv_or_die('GCS_BUCKET_NAME')
+PDF_SPLIT_WORKERS = to_int(os.getenv('PDF_SPLIT_WORKERS', '0')) # Processes slicing pages; 0 uses the CPU count
+PDF_SPLIT_CHUNK_PAGES = to_int(os.getenv('PDF_SPLIT_CHUNK_PAGES', '8')) # Fewest pages per process pool job; large documents get one page range per worker
+PDF_SPLIT_PROCESS_POOL_MIN_PAGES = to_int(os.getenv('PDF_SPLIT_PROCESS_POOL_MIN_PAGES', '16')) # Smaller documents are sliced in a thread
+PDF_SPLIT_UPLOAD_CONCURRENCY = to_int(os.getenv('PDF_SPLIT_UPLOAD_CONCURRENCY', '16')) # Max concurrent page uploads
 GCP_LOCATION = getenv_or_die('GCP_LOCATION')
 GCP_LOCATION_2 = getenv_or_die('GCP_LOCATION_2')
 GCP_LOCATION_3 = getenv_or_die('GCP_LOCATION_3')
@@ -91,6 +95,16 @@ AUDIT_LOGGER_CLOUD_TASK_QUEUE_NAME = getenv_or_die('AUDIT_LOGGER_CLOUD_TASK_QUEU
 AUDIT_LOGGER_API_URL = getenv_or_die('AUDIT_LOGGER_API_URL')
 LOADTEST_LLM_EMULATOR_ENABLED = to_bool(os.getenv('LOADTEST_LLM_EMULATOR_ENABLED', 'false')) # Swaps out the LLM adapter for a dummy adapter
 LLM_PROMPT_AUDIT_ENABLED = to_bool(os.getenv('LLM_PROMPT_AUDIT_ENABLED', 'true')) # Logs the prompt to GCS
+LLM_PRECOUNT_TOKENS_ENABLED = to_bool(os.getenv('LLM_PRECOUNT_TOKENS_ENABLED', 'false')) # Calls count_tokens before each prompt instead of using the response usage_metadata
+LLM_RESPONSE_CACHE_ENABLED = to_bool(os.getenv('LLM_RESPONSE_CACHE_ENABLED', 'false')) # Reuse responses of identical temperature 0 prompts
+LLM_RESPONSE_CACHE_BACKEND = os.getenv('LLM_RESPONSE_CACHE_BACKEND', 'memory') # memory, disk or gcs
+LLM_RESPONSE_CACHE_STEPS = [step for step in to_list_of_strings(os.getenv('LLM_RESPONSE_CACHE_STEPS', '')) if step] # Prompt steps to cache (e.g. CLASSIFICATION,MEDICATIONS_EXTRACTION); empty caches all
+LLM_RESPONSE_CACHE_VERSION = os.getenv('LLM_RESPONSE_CACHE_VERSION', '1') # Bump to invalidate every cached response
+LLM_RESPONSE_CACHE_TTL = to_int(os.getenv('LLM_RESPONSE_CACHE_TTL', '604800')) # Seconds a cached response stays valid
+LLM_RESPONSE_CACHE_MEMORY_SIZE = to_int(os.getenv('LLM_RESPONSE_CACHE_MEMORY_SIZE', '1000')) # Max responses kept by the memory backend
+LLM_RESPONSE_CACHE_DIR = os.getenv('LLM_RESPONSE_CACHE_DIR', '/tmp/llm_response_cache') # Directory of the disk backend
+LLM_RESPONSE_CACHE_BUCKET = os.getenv('LLM_RESPONSE_CACHE_BUCKET', GCS_BUCKET_NAME) # Bucket of the gcs backend
+LLM_RESPONSE_CACHE_PREFIX = os.getenv('LLM_RESPONSE_CACHE_PREFIX', 'llm_response_cache') # Object prefix of the gcs backend
 CLASSIFY_ENABLED = to_bool(os.getenv('CLASSIFY_ENABLED', 'false')) # Enables the classify pipeline
 PIPELINE_RETRY_COUNT = to_int(os.getenv('PIPELINE_RETRY_COUNT', '3')) # Number of times to retry a pipeline
 
@@ -105,6 +119,13 @@ MEDDB_TOP_K = int(os.getenv('MEDDB_TOP_K', '20')) # Number of top results to ret
 MEDDB_MAX_RESULTS = int(os.getenv('MEDDB_MAX_RESULTS', '5')) # Maximum number of results to return from MedDB semantic search
 MEDDB_RERANK_STRENGTH_ENABLED = to_bool(os.getenv('MEDDB_RERANK_STRENGTH_ENABLED', 'false')) # Enables reranking of results based on strength
 MEDDB_RERANK_ELIGIBLE_FORMS = to_list_of_strings(os.getenv('MEDDB_RERANK_ELIGIBLE_FORMS', 'tablet,capsule,powder')) # Forms that are eligible for reranking based on strength
+MEDISPAN_MATCH_PIPELINE_ENABLED = to_bool(os.getenv('MEDISPAN_MATCH_PIPELINE_ENABLED', 'false')) # Search, rerank and LLM-match medications of a page concurrently instead of stage by stage
+MEDISPAN_MATCH_SEARCH_CONCURRENCY = to_int(os.getenv('MEDISPAN_MATCH_SEARCH_CONCURRENCY', '10')) # Max in-flight MedDB searches per page in pipelined mode
+MEDISPAN_MATCH_MEMO_ENABLED = to_bool(os.getenv('MEDISPAN_MATCH_MEMO_ENABLED', 'false')) # Reuse prior LLM Medispan matches for the same medication signature across pages and documents
+MEDISPAN_MATCH_MEMO_VERSION = os.getenv('MEDISPAN_MATCH_MEMO_VERSION', '1') # Bump to invalidate every memoized match
+MEDISPAN_MATCH_MEMO_TTL = to_int(os.getenv('MEDISPAN_MATCH_MEMO_TTL', '604800')) # Seconds a memoized match stays valid
+MEDISPAN_MATCH_MEMO_MEMORY_SIZE = to_int(os.getenv('MEDISPAN_MATCH_MEMO_MEMORY_SIZE', '10000')) # Max matches kept in the in-process LRU
+MEDISPAN_MATCH_MEMO_COLLECTION = os.getenv('MEDISPAN_MATCH_MEMO_COLLECTION', 'medispan_match_memo') # Firestore collection shared with paperglass
 
 LOGGING_CHATTY_LOGGERS = to_list_of_strings(os.getenv('LOGGING_CHATTY_LOGGERS', 'acachecontrol.cache,aiocache.base,urllib3.connectionpool')) #List of loggers that should be set to DEBUG level
 
@@ -124,10 +145,34 @@ PGVECTOR_SEARCH_FUNCTION_MERATIVE: str = os.getenv("PGVECTOR_SEARCH_FUNCTION_MER
 PGVECTOR_FORCE_ONLY_EMBEDDING_SEARCH: bool = to_bool(os.getenv("PGVECTOR_FORCE_ONLY_EMBEDDING_SEARCH", "true"))
 
 PGVECTOR_CONNECTION_TIMEOUT: int = int(os.getenv("PGVECTOR_CONNECTION_TIMEOUT", "2"))
+PGVECTOR_POOL_MAX_SIZE: int = int(os.getenv("PGVECTOR_POOL_MAX_SIZE", "10")) # Max connections (and worker threads) in the process-wide AlloyDB pool
+PGVECTOR_POOL_HEALTHCHECK_INTERVAL: float = float(os.getenv("PGVECTOR_POOL_HEALTHCHECK_INTERVAL", "30")) # Seconds a connection may sit idle before it is pinged on checkout
+MEDDB_CATALOG_INDEX_ENABLED: bool = to_bool(os.getenv("MEDDB_CATALOG_INDEX_ENABLED", "false")) # Answer keyword searches from an in-process catalog index instead of AlloyDB
+MEDDB_CATALOG_INDEX_PRELOAD_CATALOGS: str = os.getenv("MEDDB_CATALOG_INDEX_PRELOAD_CATALOGS", "medispan") # Comma separated catalogs loaded at startup
+MEDDB_CATALOG_INDEX_REFRESH_INTERVAL: float = float(os.getenv("MEDDB_CATALOG_INDEX_REFRESH_INTERVAL", "300")) # Seconds between catalog version checks
+
+CIRCUIT_BREAKER_WINDOW_SECONDS: float = float(os.getenv("CIRCUIT_BREAKER_WINDOW_SECONDS", "60")) # Rolling window for primary error rate and latency
+CIRCUIT_BREAKER_MIN_REQUESTS: int = int(os.getenv("CIRCUIT_BREAKER_MIN_REQUESTS", "1")) # Calls in the window before the error rate can trip the circuit
+CIRCUIT_BREAKER_ERROR_RATE_THRESHOLD: float = float(os.getenv("CIRCUIT_BREAKER_ERROR_RATE_THRESHOLD", "0")) # Error rate (0-1) that trips the circuit; 0 trips on any failure
+CIRCUIT_BREAKER_P95_LATENCY_THRESHOLD: float = float(os.getenv("CIRCUIT_BREAKER_P95_LATENCY_THRESHOLD", "0")) # Seconds; p95 primary latency that trips the circuit, 0 disables
+CIRCUIT_BREAKER_LATENCY_MIN_SAMPLES: int = int(os.getenv("CIRCUIT_BREAKER_LATENCY_MIN_SAMPLES", "20")) # Calls in the window before p95 latency can trip the circuit
+CIRCUIT_BREAKER_RECOVERY_PROBE_INTERVAL: float = float(os.getenv("CIRCUIT_BREAKER_RECOVERY_PROBE_INTERVAL", "60")) # Seconds the circuit stays open before a half-open probe
+CIRCUIT_BREAKER_STATE_STORE: str = os.getenv("CIRCUIT_BREAKER_STATE_STORE", "local") # local (per process) or firestore (shared across instances)
+CIRCUIT_BREAKER_STATE_COLLECTION: str = os.getenv("CIRCUIT_BREAKER_STATE_COLLECTION", "medication_extraction_circuit_breakers")
+CIRCUIT_BREAKER_STATE_SYNC_INTERVAL: float = float(os.getenv("CIRCUIT_BREAKER_STATE_SYNC_INTERVAL", "5")) # Seconds between reads of the shared state
+CIRCUIT_BREAKER_HEDGE_ENABLED: bool = to_bool(os.getenv("CIRCUIT_BREAKER_HEDGE_ENABLED", "false")) # Race the fallback when the primary exceeds the latency budget
+CIRCUIT_BREAKER_HEDGE_LATENCY_BUDGET: float = float(os.getenv("CIRCUIT_BREAKER_HEDGE_LATENCY_BUDGET", "1.5")) # Seconds to wait on the primary before hedging
 
 FIRESTOREVECTOR_COLLECTION_MEDISPAN: str = os.getenv("FIRESTOREVECTOR_COLLECTION_MEDISPAN", "meddb_medispan")
 FIRESTOREVECTOR_COLLECTION_MERATIVE: str = os.getenv("FIRESTOREVECTOR_COLLECTION_MERATIVE", "meddb_merative")
 
 GCP_EMBEDDING_MODEL: str = os.getenv("GCP_EMBEDDING_MODEL", "text-embedding-005")
+GCP_EMBEDDING_BATCH_SIZE: int = int(os.getenv("GCP_EMBEDDING_BATCH_SIZE", "100")) # Max texts sent in a single embed_content request
+EMBEDDINGS_CACHE_ENABLED: bool = to_bool(os.getenv("EMBEDDINGS_CACHE_ENABLED", "true"))
+EMBEDDINGS_CACHE_MEMORY_SIZE: int = int(os.getenv("EMBEDDINGS_CACHE_MEMORY_SIZE", "1000")) # Max embeddings kept in the in-process LRU (float32, ~3KB each at 768 dims); 0 disables it
+EMBEDDINGS_CACHE_STORE: str = os.getenv("EMBEDDINGS_CACHE_STORE", "none") # Persistent tier: none, local (sqlite file) or redis
+EMBEDDINGS_CACHE_LOCAL_PATH: str = os.getenv("EMBEDDINGS_CACHE_LOCAL_PATH", "/tmp/embeddings_cache.sqlite3")
+EMBEDDINGS_CACHE_REDIS_URL: str = os.getenv("EMBEDDINGS_CACHE_REDIS_URL", "redis://localhost:6379/0")
+EMBEDDINGS_CACHE_TTL: int = int(os.getenv("EMBEDDINGS_CACHE_TTL", "2592000")) # Seconds; redis store only, 0 disables expiry
 
 LLM_RESPONSE_INTERPRET_NOTJSON_ENABLED = to_bool(os.getenv('LLM_RESPONSE_INTERPRET_NOTJSON_ENABLED', 'true'))
\ No newline at end of file
@@ -0,0 +1,150 @@
+"""
+Parallel, streaming PDF page splitter.
+
+pypdf is pure Python and holds the GIL, so slicing a large document page by page on the event loop
+(or in a thread) serializes everything behind it.  Pages are sliced on a process pool, one contiguous
+page range per worker: every job is sent the whole document and parses it, so a job per few pages would
+ship and parse it over and over.  Each page is handed to the upload callback as soon as its range is
+done, with at most `upload_concurrency` uploads in flight.  Results are returned in page order.
+"""
+import asyncio
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from io import BytesIO
+from typing import Awaitable, Callable, List, Optional, Tuple, TypeVar
+
+import pypdf
+
+T = TypeVar("T")
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_workers = 0
+
+
+class PageSplitError(Exception):
+    """Slicing or uploading a page failed."""
+
+    def __init__(self, page_number: int, cause: BaseException):
+        super().__init__(f"Failed to process page {page_number}: {cause}")
+        self.page_number = page_number
+        self.cause = cause
+
+
+def count_pages(raw_data: bytes) -> int:
+    return len(pypdf.PdfReader(BytesIO(raw_data)).pages)
+
+
+def split_page_range(raw_data: bytes, start: int, end: int) -> List[Tuple[int, bytes]]:
+    """Slice pages [start, end) (0-based) into standalone single-page PDFs."""
+    reader = pypdf.PdfReader(BytesIO(raw_data))
+    pages = []
+    for index in range(start, end):
+        writer = pypdf.PdfWriter()
+        writer.add_page(reader.pages[index])
+        page_raw_data = BytesIO()
+        writer.write(page_raw_data)
+        pages.append((index, page_raw_data.getvalue()))
+    return pages
+
+
+def get_process_pool(workers: int = 0) -> ProcessPoolExecutor:
+    """The process-wide pool used to slice pages, created on first use."""
+    global _process_pool, _process_pool_workers
+    if _process_pool is None:
+        _process_pool_workers = workers or os.cpu_count() or 1
+        _process_pool = ProcessPoolExecutor(max_workers=_process_pool_workers)
+    return _process_pool
+
+
+def page_ranges(total_pages: int, jobs: int) -> List[Tuple[int, int]]:
+    """Split pages [0, total_pages) into at most `jobs` contiguous ranges of about equal size."""
+    jobs = max(1, min(jobs, total_pages))
+    size, larger = divmod(total_pages, jobs)
+    ranges = []
+    start = 0
+    for job in range(jobs):
+        end = start + size + (1 if job < larger else 0)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def shutdown_process_pool():
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+
+async def split_pdf(raw_data: bytes,
+                    upload: Callable[[int, int, bytes], Awaitable[T]],
+                    total_pages: Optional[int] = None,
+                    workers: int = 0,
+                    chunk_pages: int = 8,
+                    process_pool_min_pages: int = 16,
+                    upload_concurrency: int = 16) -> List[T]:
+    """
+    Split a PDF into single-page PDFs and upload them concurrently.
+
+    Args:
+        raw_data: The PDF document
+        upload: Called as upload(page_number, total_pages, page_bytes) for every page (1-based page numbers)
+        total_pages: Page count, if the caller already parsed the document
+        workers: Process pool size, 0 for the CPU count
+        chunk_pages: Fewest pages given to a process pool job, so short documents don't use every worker
+        process_pool_min_pages: Documents with fewer pages are sliced in a thread instead
+        upload_concurrency: Max uploads in flight
+
+    Returns:
+        The upload results in page order
+
+    Raises:
+        PageSplitError: If slicing or uploading any page fails
+    """
+    if total_pages is None:
+        total_pages = count_pages(raw_data)
+    if not total_pages:
+        return []
+
+    loop = asyncio.get_running_loop()
+    if total_pages >= process_pool_min_pages:
+        executor: Optional[Executor] = get_process_pool(workers)
+        # One range per worker, so each worker receives and parses the document once
+        jobs = min(_process_pool_workers, total_pages // max(1, chunk_pages))
+    else:
+        # Threads share the GIL, a single range parses the document once
+        executor = None
+        jobs = 1
+
+    async def slice_chunk(start: int, end: int) -> List[Tuple[int, bytes]]:
+        try:
+            return await loop.run_in_executor(executor, split_page_range, raw_data, start, end)
+        except Exception as e:
+            raise PageSplitError(start + 1, e) from e
+
+    chunks = [asyncio.ensure_future(slice_chunk(start, end)) for start, end in page_ranges(total_pages, jobs)]
+
+    semaphore = asyncio.Semaphore(max(1, upload_concurrency))
+    results: List[Optional[T]] = [None] * total_pages
+    uploads: List[asyncio.Task] = []
+
+    async def upload_page(index: int, page_bytes: bytes):
+        async with semaphore:
+            try:
+                results[index] = await upload(index + 1, total_pages, page_bytes)
+            except Exception as e:
+                raise PageSplitError(index + 1, e) from e
+
+    try:
+        for chunk in asyncio.as_completed(chunks):
+            for index, page_bytes in await chunk:
+                uploads.append(asyncio.create_task(upload_page(index, page_bytes)))
+        await asyncio.gather(*uploads)
+    except BaseException:
+        for task in uploads:
+            task.cancel()
+        for chunk in chunks:
+            chunk.cancel()
+        raise
+
+    return results
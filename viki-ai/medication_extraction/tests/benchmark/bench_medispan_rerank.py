@@ -0,0 +1,39 @@
+"""
+Micro-benchmark: per-medication reranking vs the bulk MedispanRerankEngine on a synthetic page.
+
+    set -a && . ./.env.local && set +a && PYTHONPATH=src:tests/unit python tests/benchmark/bench_medispan_rerank.py
+"""
+import random
+import timeit
+
+from test_medispan_rerank import make_service, random_page
+from services.medispan_rerank import MedispanRerankEngine
+
+MEDICATIONS_PER_PAGE = 40
+CANDIDATES_PER_MEDICATION = 20
+ROUNDS = 200
+
+
+def main():
+    eligible_forms = ["tablet", "capsule", "powder"]
+    service = make_service(True, True, eligible_forms)
+    items = random_page(random.Random(7), MEDICATIONS_PER_PAGE, CANDIDATES_PER_MEDICATION)
+
+    def per_medication():
+        for candidates, medication in items:
+            service._rerank_with_priority(candidates, medication, True, True)
+
+    def bulk():
+        MedispanRerankEngine(True, True, eligible_forms).rank(items)
+
+    # Each page gets a fresh engine, so normalization cost is included in every round
+    per_medication_time = min(timeit.repeat(per_medication, number=ROUNDS, repeat=5)) / ROUNDS
+    bulk_time = min(timeit.repeat(bulk, number=ROUNDS, repeat=5)) / ROUNDS
+
+    print(f"page: {MEDICATIONS_PER_PAGE} medications x {CANDIDATES_PER_MEDICATION} candidates")
+    print(f"per-medication rerank: {per_medication_time * 1000:.3f} ms/page")
+    print(f"bulk rerank engine:    {bulk_time * 1000:.3f} ms/page ({per_medication_time / bulk_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
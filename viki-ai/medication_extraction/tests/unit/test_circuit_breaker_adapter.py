@@ -2,6 +2,7 @@ import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
+import asyncio
 import pytest
 from datetime import datetime, timedelta
 from unittest.mock import AsyncMock, MagicMock, patch
@@ -14,6 +15,8 @@ def mock_adapters():
          patch('adapters.circuit_breaker_adapter.MedispanFirestoreVectorAdapter') as mock_fallback:
         mock_primary.return_value.search_medications = AsyncMock()
         mock_fallback.return_value.search_medications = AsyncMock()
+        mock_primary.return_value.search_medications_batch = AsyncMock()
+        mock_fallback.return_value.search_medications_batch = AsyncMock()
         yield mock_primary, mock_fallback
 
 @pytest.fixture
@@ -105,4 +108,172 @@ async def test_direct_fallback_when_failed(circuit_breaker, mock_adapters):
     await circuit_breaker.search_medications("test_term")
     
     mock_primary.return_value.search_medications.assert_not_called()
-    mock_fallback.return_value.search_medications.assert_called_once()
\ No newline at end of file
+    mock_fallback.return_value.search_medications.assert_called_once()
+@pytest.mark.asyncio
+async def test_batch_search_falls_back_and_trips_circuit(circuit_breaker, mock_adapters):
+    """Test that a failed primary batch search is served by the fallback and opens the circuit"""
+    mock_primary, mock_fallback = mock_adapters
+    mock_primary.return_value.search_medications_batch.side_effect = Exception("Primary failed")
+    test_results = {"term1": [MagicMock()], "term2": []}
+    mock_fallback.return_value.search_medications_batch.return_value = test_results
+
+    results = await circuit_breaker.search_medications_batch(["term1", "term2"])
+
+    assert results == test_results
+    mock_fallback.return_value.search_medications_batch.assert_called_once_with(["term1", "term2"])
+    assert circuit_breaker._states[circuit_breaker.instance_key]["is_failed"]
+
+@pytest.mark.asyncio
+async def test_error_rate_window_requires_min_requests(circuit_breaker, mock_adapters):
+    """A single failure among enough successes does not trip the circuit"""
+    mock_primary, _ = mock_adapters
+    mock_primary.return_value.search_medications.side_effect = [[], [], [], Exception("Primary failed")]
+
+    with patch('settings.CIRCUIT_BREAKER_MIN_REQUESTS', 4), patch('settings.CIRCUIT_BREAKER_ERROR_RATE_THRESHOLD', 0.5):
+        for _ in range(4):
+            await circuit_breaker.search_medications("test_term")
+
+    assert not circuit_breaker._states[circuit_breaker.instance_key]["is_failed"]
+
+@pytest.mark.asyncio
+async def test_default_settings_trip_on_first_failure(circuit_breaker, mock_adapters):
+    """With the default settings a failure trips the circuit even after a run of successes"""
+    mock_primary, _ = mock_adapters
+    mock_primary.return_value.search_medications.side_effect = [[], [], [], Exception("Primary failed")]
+
+    for _ in range(3):
+        await circuit_breaker.search_medications("test_term")
+    assert not circuit_breaker._states[circuit_breaker.instance_key]["is_failed"]
+
+    await circuit_breaker.search_medications("test_term")
+    assert circuit_breaker._states[circuit_breaker.instance_key]["is_failed"]
+
+@pytest.mark.asyncio
+async def test_p95_latency_trips_circuit(circuit_breaker, mock_adapters):
+    mock_primary, mock_fallback = mock_adapters
+    async def slow_primary(term):
+        await asyncio.sleep(0.01)
+        return []
+
+    mock_primary.return_value.search_medications.side_effect = slow_primary
+
+    with patch('settings.CIRCUIT_BREAKER_P95_LATENCY_THRESHOLD', 0.005), \
+         patch('settings.CIRCUIT_BREAKER_LATENCY_MIN_SAMPLES', 3):
+        for _ in range(3):
+            await circuit_breaker.search_medications("test_term")
+
+    assert circuit_breaker._states[circuit_breaker.instance_key]["is_failed"]
+    mock_fallback.return_value.search_medications.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_half_open_allows_single_probe(circuit_breaker, mock_adapters):
+    mock_primary, mock_fallback = mock_adapters
+    circuit_breaker._set_state(True, now_utc() - RECOVERY_PROBE_INTERVAL - timedelta(seconds=1))
+
+    async def slow_primary(term):
+        await asyncio.sleep(0.01)
+        raise Exception("Still down")
+
+    mock_primary.return_value.search_medications.side_effect = slow_primary
+    mock_fallback.return_value.search_medications.return_value = []
+
+    await asyncio.gather(*[circuit_breaker.search_medications("test_term") for _ in range(3)])
+
+    # One probe reached the primary and failed, re-opening the circuit with a fresh failure time
+    assert mock_primary.return_value.search_medications.call_count == 1
+    assert mock_fallback.return_value.search_medications.call_count == 3
+    is_failed, last_failure = circuit_breaker._get_state()
+    assert is_failed and now_utc() - last_failure < RECOVERY_PROBE_INTERVAL
+
+@pytest.mark.asyncio
+async def test_adopts_shared_state(circuit_breaker, mock_adapters):
+    """A trip recorded by another instance opens the circuit here"""
+    mock_primary, mock_fallback = mock_adapters
+    store = MagicMock()
+    store.get = AsyncMock(return_value={"is_failed": True, "last_failure": now_utc(), "updated_at": now_utc()})
+    store.set = AsyncMock()
+
+    with patch.object(CircuitBreakerAdapter, '_store', store), patch.object(CircuitBreakerAdapter, '_store_initialized', True):
+        await circuit_breaker.search_medications("test_term")
+
+    mock_primary.return_value.search_medications.assert_not_called()
+    mock_fallback.return_value.search_medications.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_trip_is_published_to_shared_store(circuit_breaker, mock_adapters):
+    mock_primary, _ = mock_adapters
+    mock_primary.return_value.search_medications.side_effect = Exception("Primary failed")
+    store = MagicMock()
+    store.get = AsyncMock(return_value=None)
+    store.set = AsyncMock()
+
+    with patch.object(CircuitBreakerAdapter, '_store', store), patch.object(CircuitBreakerAdapter, '_store_initialized', True):
+        await circuit_breaker.search_medications("test_term")
+
+    store.set.assert_awaited_once()
+    assert store.set.await_args.args[1]["is_failed"]
+
+@pytest.mark.asyncio
+async def test_hedged_read_takes_faster_fallback(circuit_breaker, mock_adapters):
+    mock_primary, mock_fallback = mock_adapters
+    primary_cancelled = asyncio.Event()
+
+    async def slow_primary(term):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            primary_cancelled.set()
+            raise
+
+    mock_primary.return_value.search_medications.side_effect = slow_primary
+    fallback_results = [MagicMock()]
+    mock_fallback.return_value.search_medications.return_value = fallback_results
+
+    with patch('settings.CIRCUIT_BREAKER_HEDGE_ENABLED', True), patch('settings.CIRCUIT_BREAKER_HEDGE_LATENCY_BUDGET', 0.01):
+        results = await circuit_breaker.search_medications("test_term")
+        await asyncio.sleep(0)
+
+    assert results == fallback_results
+    assert primary_cancelled.is_set()
+    # The primary lost the hedge, which counts as a failure (and trips with the default settings)
+    assert circuit_breaker._states[circuit_breaker.instance_key]["window"].error_rate() == 1
+    assert circuit_breaker._states[circuit_breaker.instance_key]["is_failed"]
+
+@pytest.mark.asyncio
+async def test_stalled_primary_opens_circuit_while_hedging(circuit_breaker, mock_adapters):
+    """Hedge losses count against the primary, so a stalled primary still trips the error rate"""
+    mock_primary, mock_fallback = mock_adapters
+    answers = iter([False, True, True, True])
+
+    async def primary(term):
+        if next(answers):
+            await asyncio.sleep(10)
+        return []
+
+    mock_primary.return_value.search_medications.side_effect = primary
+    mock_fallback.return_value.search_medications.return_value = []
+
+    with patch('settings.CIRCUIT_BREAKER_HEDGE_ENABLED', True), patch('settings.CIRCUIT_BREAKER_HEDGE_LATENCY_BUDGET', 0.01), \
+         patch('settings.CIRCUIT_BREAKER_MIN_REQUESTS', 4), patch('settings.CIRCUIT_BREAKER_ERROR_RATE_THRESHOLD', 0.75):
+        for _ in range(3):
+            await circuit_breaker.search_medications("test_term")
+        assert not circuit_breaker._states[circuit_breaker.instance_key]["is_failed"]
+
+        await circuit_breaker.search_medications("test_term")
+
+    window = circuit_breaker._states[circuit_breaker.instance_key]["window"]
+    assert window.error_rate() == 0.75
+    assert circuit_breaker._states[circuit_breaker.instance_key]["is_failed"]
+    assert mock_fallback.return_value.search_medications.call_count == 3
+
+@pytest.mark.asyncio
+async def test_hedged_read_uses_fast_primary(circuit_breaker, mock_adapters):
+    mock_primary, mock_fallback = mock_adapters
+    primary_results = [MagicMock()]
+    mock_primary.return_value.search_medications.return_value = primary_results
+
+    with patch('settings.CIRCUIT_BREAKER_HEDGE_ENABLED', True), patch('settings.CIRCUIT_BREAKER_HEDGE_LATENCY_BUDGET', 1):
+        results = await circuit_breaker.search_medications("test_term")
+
+    assert results == primary_results
+    mock_fallback.return_value.search_medications.assert_not_called()
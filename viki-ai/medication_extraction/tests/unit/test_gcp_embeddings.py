@@ -0,0 +1,88 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import adapters.gcp_embeddings as gcp_embeddings
+from adapters.embeddings_cache import EmbeddingsCache, LocalEmbeddingsStore, as_float32, cache_key, normalize_text
+
+
+def _embed_response(contents):
+    return SimpleNamespace(embeddings=[SimpleNamespace(values=[float(len(text)), 1.0]) for text in contents])
+
+
+@pytest.fixture
+def mock_client():
+    client = MagicMock()
+    client.aio.models.embed_content = AsyncMock(side_effect=lambda model, contents: _embed_response(contents))
+    with (
+        patch.object(gcp_embeddings, "_cache", None),
+        patch.object(gcp_embeddings, "get_client", return_value=client),
+        patch("settings.EMBEDDINGS_CACHE_ENABLED", True),
+        patch("settings.EMBEDDINGS_CACHE_STORE", "none"),
+    ):
+        yield client
+
+
+def test_normalize_text():
+    assert normalize_text("  Metoprolol\tTartrate \n25 MG ") == "metoprolol tartrate 25 mg"
+    assert cache_key("m", normalize_text("Aspirin 81")) == cache_key("m", normalize_text("aspirin  81"))
+    assert cache_key("m1", "aspirin") != cache_key("m2", "aspirin")
+
+
+@pytest.mark.asyncio
+async def test_get_embeddings_batch_batches_and_caches(mock_client):
+    with patch("settings.GCP_EMBEDDING_BATCH_SIZE", 2):
+        first = await gcp_embeddings.get_embeddings_batch(["aspirin", "Aspirin ", "lisinopril", "metformin"], "model", "project", "location")
+        second = await gcp_embeddings.get_embeddings_batch(["ASPIRIN", "metformin"], "model", "project", "location")
+
+    # Three unique texts in batches of two; the second call is served entirely from the cache
+    assert mock_client.aio.models.embed_content.await_count == 2
+    assert mock_client.aio.models.embed_content.await_args_list[0].kwargs["contents"] == ["aspirin", "lisinopril"]
+    assert first == [[7.0, 1.0], [7.0, 1.0], [10.0, 1.0], [9.0, 1.0]]
+    assert second == [[7.0, 1.0], [9.0, 1.0]]
+    assert gcp_embeddings.get_cache().stats == {"memory_hits": 2, "store_hits": 0, "misses": 3}
+
+
+@pytest.mark.asyncio
+async def test_get_embeddings_single_text(mock_client):
+    assert await gcp_embeddings.get_embeddings("aspirin", "model", "project", "location") == [7.0, 1.0]
+
+
+@pytest.mark.asyncio
+async def test_cache_reads_through_to_local_store(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    await EmbeddingsCache(10, LocalEmbeddingsStore(path)).set_many({"a": [0.5, 0.25]})
+
+    # A fresh cache (e.g. after a restart) finds the entry in the persistent store
+    cache = EmbeddingsCache(10, LocalEmbeddingsStore(path))
+    assert await cache.get_many(["a", "b"]) == {"a": [0.5, 0.25]}
+    assert await cache.get_many(["a"]) == {"a": [0.5, 0.25]}
+    assert cache.stats == {"memory_hits": 1, "store_hits": 1, "misses": 1}
+
+
+@pytest.mark.asyncio
+async def test_cache_tiers_agree_on_float32_precision(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    writer = EmbeddingsCache(10, LocalEmbeddingsStore(path))
+    await writer.set_many({"a": [0.1, 0.2]})
+
+    from_memory = await writer.get_many(["a"])
+    from_store = await EmbeddingsCache(10, LocalEmbeddingsStore(path)).get_many(["a"])
+
+    assert from_memory == from_store == {"a": as_float32([0.1, 0.2])}
+    assert writer._memory["a"].typecode == "f"
+
+
+@pytest.mark.asyncio
+async def test_cache_lru_eviction_and_store_failure():
+    store = MagicMock()
+    store.get_many = AsyncMock(side_effect=Exception("unavailable"))
+    store.set_many = AsyncMock(side_effect=Exception("unavailable"))
+    cache = EmbeddingsCache(2, store)
+
+    await cache.set_many({"a": [1.0], "b": [2.0]})
+    await cache.get_many(["a"])
+    await cache.set_many({"c": [3.0]})
+
+    # "b" was least recently used; store errors are treated as misses
+    assert await cache.get_many(["a", "b", "c"]) == {"a": [1.0], "c": [3.0]}
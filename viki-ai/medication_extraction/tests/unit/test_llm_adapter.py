@@ -232,4 +232,112 @@ def mock_response():
 #             "test-model",
 #             sample_text_input,
 #             mock_response
-#         )
\ No newline at end of file
+#         )
+
+@pytest.fixture
+def genai_prompt_adapter():
+    with patch('adapters.llm.StorageAdapter'), \
+         patch('adapters.llm.CloudTaskAdapter'), \
+         patch('adapters.llm.GooglePubSubAdapter'), \
+         patch('adapters.llm.genai.Client') as mock_client_class, \
+         patch('adapters.llm.LLM_PROMPT_AUDIT_ENABLED', True), \
+         patch('adapters.llm.LOADTEST_LLM_EMULATOR_ENABLED', False):
+        mock_client = MagicMock()
+        mock_client.aio.models.count_tokens = AsyncMock(return_value=MagicMock(total_tokens=42))
+        mock_client.aio.models.generate_content = AsyncMock(return_value=MagicMock(
+            text='{"ok": true}',
+            candidates=[MagicMock(finish_reason="STOP")],
+            usage_metadata=MagicMock(prompt_token_count=120, candidates_token_count=7)
+        ))
+        mock_client_class.return_value = mock_client
+
+        adapter = StandardPromptAdapter(project_id="test-project", location="test-location")
+        adapter.audit_prompt = AsyncMock()
+        yield adapter, mock_client
+
+
+@pytest.mark.asyncio
+async def test_multi_modal_predict_2_takes_tokens_from_usage_metadata(genai_prompt_adapter, sample_text_input):
+    adapter, mock_client = genai_prompt_adapter
+
+    result = await adapter.multi_modal_predict_2(items=sample_text_input, model="gemini-2.0-flash")
+
+    assert result == '{"ok": true}'
+    mock_client.aio.models.count_tokens.assert_not_called()
+    prompt_stats = adapter.audit_prompt.call_args.kwargs["prompt_stats"]
+    assert prompt_stats.billing_total_tokens == 120
+    assert prompt_stats.billing_output_tokens == 7
+    latency = prompt_stats.latency
+    assert latency is not None
+    assert 0 <= latency.queue_time <= latency.total_time
+    assert 0 <= latency.first_byte_time <= latency.total_time
+
+
+@pytest.mark.asyncio
+async def test_multi_modal_predict_2_precounts_tokens_when_enabled(genai_prompt_adapter, sample_text_input):
+    adapter, mock_client = genai_prompt_adapter
+
+    with patch('adapters.llm.LLM_PRECOUNT_TOKENS_ENABLED', True):
+        await adapter.multi_modal_predict_2(items=sample_text_input, model="gemini-2.0-flash")
+
+    mock_client.aio.models.count_tokens.assert_awaited_once()
+    prompt_stats = adapter.audit_prompt.call_args.kwargs["prompt_stats"]
+    assert prompt_stats.billing_total_tokens == 42
+    assert prompt_stats.billing_output_tokens == 7
+
+
+@pytest.mark.asyncio
+async def test_multi_modal_predict_2_reuses_cached_response(genai_prompt_adapter, sample_text_input):
+    from adapters.llm_cache import LLMResponseCache, MemoryLLMResponseCacheBackend
+
+    adapter, mock_client = genai_prompt_adapter
+    cache = LLMResponseCache(MemoryLLMResponseCacheBackend())
+    metadata = {"step": "MEDICATIONS_EXTRACTION"}
+
+    with patch('adapters.llm.get_response_cache', return_value=cache):
+        first = await adapter.multi_modal_predict_2(items=sample_text_input, model="gemini-2.0-flash", metadata=metadata)
+        second = await adapter.multi_modal_predict_2(items=sample_text_input, model="gemini-2.0-flash", metadata=metadata)
+        # A different prompt is not served from the cache
+        await adapter.multi_modal_predict_2(items=["Other prompt"], model="gemini-2.0-flash", metadata=metadata)
+
+    assert first == second == '{"ok": true}'
+    assert mock_client.aio.models.generate_content.await_count == 2
+    assert cache.stats == {"hits": 1, "misses": 2}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("text, finish_reason", [
+    ('{"ok": tr', "MAX_TOKENS"),
+    ('{"ok": tr', "STOP"),
+    ('{"ok": true}', "SAFETY"),
+])
+async def test_multi_modal_predict_2_does_not_cache_incomplete_responses(genai_prompt_adapter, sample_text_input, text, finish_reason):
+    from adapters.llm_cache import LLMResponseCache, MemoryLLMResponseCacheBackend
+
+    adapter, mock_client = genai_prompt_adapter
+    mock_client.aio.models.generate_content.return_value.text = text
+    mock_client.aio.models.generate_content.return_value.candidates = [MagicMock(finish_reason=finish_reason)]
+    cache = LLMResponseCache(MemoryLLMResponseCacheBackend())
+
+    with patch('adapters.llm.get_response_cache', return_value=cache):
+        await adapter.multi_modal_predict_2(items=sample_text_input, model="gemini-2.0-flash")
+        await adapter.multi_modal_predict_2(items=sample_text_input, model="gemini-2.0-flash")
+
+    assert mock_client.aio.models.generate_content.await_count == 2
+    assert cache.stats == {"hits": 0, "misses": 2}
+
+
+@pytest.mark.asyncio
+async def test_multi_modal_predict_2_does_not_cache_sampled_prompts(genai_prompt_adapter, sample_text_input):
+    from adapters.llm_cache import LLMResponseCache, MemoryLLMResponseCacheBackend
+
+    adapter, mock_client = genai_prompt_adapter
+    adapter.temperature = 0.7
+    cache = LLMResponseCache(MemoryLLMResponseCacheBackend())
+
+    with patch('adapters.llm.get_response_cache', return_value=cache):
+        await adapter.multi_modal_predict_2(items=sample_text_input, model="gemini-2.0-flash")
+        await adapter.multi_modal_predict_2(items=sample_text_input, model="gemini-2.0-flash")
+
+    assert mock_client.aio.models.generate_content.await_count == 2
+    assert cache.stats == {"hits": 0, "misses": 0}
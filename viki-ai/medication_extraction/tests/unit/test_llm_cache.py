@@ -0,0 +1,100 @@
+import time
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from adapters.llm_cache import (
+    DiskLLMResponseCacheBackend,
+    LLMResponseCache,
+    MemoryLLMResponseCacheBackend,
+    is_cacheable_response,
+)
+
+CONFIG = {"max_output_tokens": 8192, "temperature": 0.0, "top_p": 0.95, "response_mime_type": "application/json"}
+ITEMS = ["Extract the medications", ("gs://bucket/page/1.pdf", "application/pdf")]
+
+
+def test_key_depends_on_every_input():
+    cache = LLMResponseCache(MemoryLLMResponseCacheBackend())
+    key = cache.key("model-a", "system", {"type": "OBJECT"}, CONFIG, ITEMS)
+    assert key == cache.key("model-a", "system", {"type": "OBJECT"}, dict(CONFIG), list(ITEMS))
+    assert key != cache.key("model-b", "system", {"type": "OBJECT"}, CONFIG, ITEMS)
+    assert key != cache.key("model-a", "other system", {"type": "OBJECT"}, CONFIG, ITEMS)
+    assert key != cache.key("model-a", "system", {"type": "ARRAY"}, CONFIG, ITEMS)
+    assert key != cache.key("model-a", "system", {"type": "OBJECT"}, {**CONFIG, "max_output_tokens": 100}, ITEMS)
+    assert key != cache.key("model-a", "system", {"type": "OBJECT"}, CONFIG, ["Extract the medications", ("gs://bucket/page/2.pdf", "application/pdf")])
+    assert key != cache.key("model-a", "system", {"type": "OBJECT"}, CONFIG, ["Extract the medications", (b"%PDF-1", "application/pdf")])
+    assert key != LLMResponseCache(MemoryLLMResponseCacheBackend(), version="2").key("model-a", "system", {"type": "OBJECT"}, CONFIG, ITEMS)
+
+
+@pytest.mark.asyncio
+async def test_get_returns_stored_response_until_it_expires():
+    cache = LLMResponseCache(MemoryLLMResponseCacheBackend(), ttl=60)
+    key = cache.key("model-a", None, None, CONFIG, ITEMS)
+    assert await cache.get(key) is None
+
+    await cache.set(key, '{"medications": []}', usage_metadata={"prompt_token_count": 10}, model="model-a")
+    record = await cache.get(key)
+    assert record["text"] == '{"medications": []}'
+    assert record["usage_metadata"] == {"prompt_token_count": 10}
+
+    with patch("adapters.llm_cache.time.time", return_value=time.time() + 61):
+        assert await cache.get(key) is None
+    assert cache.stats == {"hits": 1, "misses": 2}
+
+
+@pytest.mark.asyncio
+async def test_empty_response_is_not_cached():
+    cache = LLMResponseCache(MemoryLLMResponseCacheBackend())
+    await cache.set("key", "")
+    assert await cache.get("key") is None
+
+
+@pytest.mark.asyncio
+async def test_backend_errors_count_as_misses():
+    backend = MemoryLLMResponseCacheBackend()
+    backend.get = AsyncMock(side_effect=Exception("unavailable"))
+    backend.set = AsyncMock(side_effect=Exception("unavailable"))
+    cache = LLMResponseCache(backend)
+
+    await cache.set("key", "text")
+    assert await cache.get("key") is None
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryLLMResponseCacheBackend(max_size=2)
+    await backend.set("a", {"text": "a"})
+    await backend.set("b", {"text": "b"})
+    await backend.get("a")
+    await backend.set("c", {"text": "c"})
+    assert await backend.get("b") is None
+    assert await backend.get("a") == {"text": "a"}
+
+
+@pytest.mark.asyncio
+async def test_disk_backend_round_trip(tmp_path):
+    cache = LLMResponseCache(DiskLLMResponseCacheBackend(str(tmp_path / "cache")))
+    await cache.set("key", "text")
+    assert (await LLMResponseCache(DiskLLMResponseCacheBackend(str(tmp_path / "cache"))).get("key"))["text"] == "text"
+    assert await cache.get("other") is None
+
+
+def test_steps_restrict_caching():
+    assert LLMResponseCache(MemoryLLMResponseCacheBackend()).is_enabled_for("CLASSIFICATION")
+    cache = LLMResponseCache(MemoryLLMResponseCacheBackend(), steps=["MEDICATIONS_EXTRACTION"])
+    assert cache.is_enabled_for("MEDICATIONS_EXTRACTION")
+    assert not cache.is_enabled_for("CLASSIFICATION")
+    assert not cache.is_enabled_for(None)
+
+
+def test_only_complete_responses_are_cacheable():
+    def response(text, finish_reason):
+        return MagicMock(text=text, candidates=[MagicMock(finish_reason=finish_reason)])
+
+    assert is_cacheable_response(response('{"medications": []}', "STOP"), "application/json")
+    assert is_cacheable_response(response("plain text", "STOP"), "text/plain")
+    assert not is_cacheable_response(response('{"medications": [', "MAX_TOKENS"), "application/json")
+    assert not is_cacheable_response(response('{"medications": [', "STOP"), "application/json")
+    assert not is_cacheable_response(response("", "STOP"), "text/plain")
+    assert not is_cacheable_response(MagicMock(text="plain text", candidates=[]), "text/plain")
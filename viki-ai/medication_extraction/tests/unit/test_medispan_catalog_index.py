@@ -0,0 +1,64 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from adapters.medispan_catalog_index import MedispanCatalogIndex, MedispanCatalogIndexHolder
+
+ROWS = [
+    {"id": 1, "namedescription": "Aspirin 81 MG Tablet", "genericname": "Aspirin", "route": "Oral", "dosageform": "Tablet"},
+    {"id": 2, "namedescription": "Aspirin 325 MG Suppository", "genericname": "Aspirin", "route": "Rectal", "dosageform": "Suppository"},
+    {"id": 3, "namedescription": "Metoprolol Tartrate 25 MG Tablet", "genericname": "Metoprolol", "route": "Oral", "dosageform": "Tablet, Film Coated"},
+    {"id": 4, "namedescription": "Lasix 40 MG Tablet", "genericname": "Furosemide", "route": "Oral", "dosageform": "Tablet"},
+]
+
+
+@pytest.fixture
+def index():
+    return MedispanCatalogIndex(ROWS, version="v1")
+
+
+def test_search_matches_substring_case_insensitively(index):
+    assert [x["id"] for x in index.search("ASPIRIN")] == [1, 2]
+    assert [x["id"] for x in index.search("rin 32")] == [2]
+    assert [x["id"] for x in index.search("mg")] == [1, 2, 3, 4]
+    assert index.search("ibuprofen") == []
+    # Terms shorter than a trigram are scanned
+    assert [x["id"] for x in index.search("81")] == [1]
+
+
+def test_search_applies_facets_and_limit(index):
+    assert [x["id"] for x in index.search("tablet", dosage_form="film")] == [3]
+    assert [x["id"] for x in index.search("aspirin", route="rectal")] == [2]
+    assert [x["id"] for x in index.search("tablet", dosage_form="tablet", route="oral", limit=2)] == [1, 3]
+    assert index.search("aspirin")[0] == {"id": 1, "namedescription": "Aspirin 81 MG Tablet", "genericname": "Aspirin",
+                                          "route": "Oral", "strength": None, "strengthunit": None, "dosageform": "Tablet"}
+
+
+def test_memory_report(index):
+    report = index.memory_report()
+    assert report["row_count"] == 4
+    assert report["route_count"] == 2
+    assert report["total_bytes"] == report["rows_bytes"] + report["names_bytes"] + report["postings_bytes"] + report["facets_bytes"]
+
+
+@pytest.mark.asyncio
+async def test_holder_reloads_on_version_change():
+    pool = MagicMock()
+    version = [{"row_count": 4, "max_xmin": 1200, "checksum": 987654321}]
+    pool.execute = AsyncMock(side_effect=[version, ROWS, version, [dict(version[0], row_count=1, max_xmin=1300)], ROWS[:1]])
+    holder = MedispanCatalogIndexHolder("medispan", refresh_interval=300)
+
+    with patch("adapters.medispan_catalog_index.Metric"):
+        await holder.refresh(pool)
+        first = holder.index
+        await holder.refresh(pool)
+        assert holder.index is first
+        await holder.refresh(pool)
+
+    assert holder.index is not first
+    assert len(holder.index) == 1
+    assert holder.index.version == "medispan:1:1300:987654321"
+    assert pool.execute.await_count == 5
+    # The version comes from the rows, not from per-instance statistics
+    version_query = repr(pool.execute.await_args_list[0].args[0])
+    assert "xmin" in version_query and "hashtextextended" in version_query
+    assert "pg_stat" not in version_query
@@ -0,0 +1,77 @@
+import pytest
+from datetime import timedelta
+from unittest.mock import AsyncMock, patch
+
+from adapters.medispan_match_memo import MedispanMatchMemo, medication_signature
+from models import MedicationValue, MedispanMedicationValue, MedispanStatus
+from utils.date import now_utc
+
+MEDICATION = MedicationValue(name="Lasix", strength="40 mg", form="Tablet", route="Oral")
+MATCH = MedispanMedicationValue(medispan_id="123", name="Furosemide", strength="40 MG", form="Tablet", route="Oral")
+
+
+class FakeStore:
+    def __init__(self):
+        self.records = {}
+
+    async def get_many(self, keys):
+        return {key: self.records[key] for key in keys if key in self.records}
+
+    async def set_many(self, records):
+        self.records.update(records)
+
+
+def test_signature_normalizes_case_and_whitespace():
+    other = MedicationValue(name="  LASIX ", strength="40  MG", form="tablet", route="oral", frequency="daily")
+    assert medication_signature(other) == medication_signature(MEDICATION) == "lasix|40 mg|tablet|oral"
+
+
+def test_key_depends_on_scope_catalog_model_prompt_and_version():
+    memo = MedispanMatchMemo()
+    key = memo.key("app:tenant", "medispan", "model-a", "prompt", MEDICATION)
+    assert key == memo.key("app:tenant", "medispan", "model-a", "prompt", MEDICATION.copy(update={"name": "lasix"}))
+    assert key != memo.key("app:other", "medispan", "model-a", "prompt", MEDICATION)
+    assert key != memo.key("app:tenant", "merative", "model-a", "prompt", MEDICATION)
+    assert key != memo.key("app:tenant", "medispan", "model-b", "prompt", MEDICATION)
+    assert key != memo.key("app:tenant", "medispan", "model-a", "prompt v2", MEDICATION)
+    assert key != MedispanMatchMemo(version="2").key("app:tenant", "medispan", "model-a", "prompt", MEDICATION)
+
+
+@pytest.mark.asyncio
+async def test_shared_store_serves_other_instances():
+    store = FakeStore()
+    writer, reader = MedispanMatchMemo(store), MedispanMatchMemo(store)
+    key = writer.key("app:tenant", "medispan", "model", "prompt", MEDICATION)
+
+    await writer.set_many({key: (MedispanStatus.MATCHED, MATCH)})
+
+    assert await reader.get_many([key]) == {key: (MedispanStatus.MATCHED, MATCH)}
+    assert await reader.get_many([key]) == {key: (MedispanStatus.MATCHED, MATCH)}
+    assert reader.stats == {"memory_hits": 1, "store_hits": 1, "misses": 0}
+
+
+@pytest.mark.asyncio
+async def test_expired_and_other_version_entries_are_misses():
+    store = FakeStore()
+    memo = MedispanMatchMemo(store, ttl=60)
+    key = memo.key("app:tenant", "medispan", "model", "prompt", MEDICATION)
+    await memo.set_many({key: (MedispanStatus.MATCHED, MATCH)})
+
+    later = now_utc() + timedelta(seconds=61)
+    with patch("adapters.medispan_match_memo.now_utc", return_value=later):
+        assert await memo.get_many([key]) == {}
+
+    store.records[key]["expires_at"] = later
+    assert await MedispanMatchMemo(store, version="2").get_many([key]) == {}
+
+
+@pytest.mark.asyncio
+async def test_only_matches_are_memoized_and_store_errors_are_misses():
+    store = FakeStore()
+    memo = MedispanMatchMemo(store)
+    await memo.set_many({"unmatched": (MedispanStatus.UNMATCHED, None), "errored": (MedispanStatus.ERRORED, None)})
+    assert store.records == {}
+
+    store.get_many = AsyncMock(side_effect=Exception("unavailable"))
+    assert await memo.get_many(["a"]) == {}
+    assert memo.stats["misses"] == 1
@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+from models import MedicationValue, MedispanDrug, MedispanMatchConfig
+from services.medispan_rerank import MedispanRerankEngine, extract_numeric_components
+from services.medispan_service import MedispanMatchService
+
+FORMS = ["tablet", "Tablet", "capsule", "powder", "injection", "solution", None, ""]
+STRENGTHS = ["10", "5", "2.5", "10-325", "0.5 MG/ML", "100 UNIT/ML", "mg only", None, ""]
+
+
+def random_page(rng: random.Random, medication_count: int, candidate_count: int):
+    items = []
+    for m in range(medication_count):
+        candidates = [
+            MedispanDrug(
+                id=str(rng.randrange(candidate_count * 2)),
+                NameDescription=f"Drug {m}-{c}",
+                GenericName="Drug",
+                Route="Oral",
+                Strength=rng.choice(STRENGTHS),
+                Dosage_Form=rng.choice(FORMS) or "",
+            )
+            for c in range(rng.randrange(candidate_count + 1))
+        ]
+        medication = MedicationValue(name=f"Drug {m}", strength=rng.choice(STRENGTHS + ["10 mg", "2.5mg/5ml"]), form=rng.choice(FORMS))
+        items.append((candidates, medication))
+    return items
+
+
+def make_service(form_enabled, strength_enabled, eligible_forms):
+    config = MedispanMatchConfig(
+        v2_enabled_globally=True,
+        v2_settings=MedispanMatchConfig.MedispanMatchV2Settings(
+            total_results=1000,
+            rerank_settings=MedispanMatchConfig.RerankSettings(
+                enabled=True,
+                rerank_strength_enabled=strength_enabled,
+                rerank_form_enabled=form_enabled,
+                strength_ranking_eligible_forms=eligible_forms
+            )
+        )
+    )
+    return MedispanMatchService("test_tenant", config)
+
+
+def test_extract_numeric_components():
+    assert extract_numeric_components("2.5-10 MG") == {"2.5", "10"}
+    assert extract_numeric_components(None) == frozenset()
+
+
+@pytest.mark.parametrize("form_enabled,strength_enabled", [(True, True), (True, False), (False, True), (False, False)])
+@pytest.mark.parametrize("eligible_forms", [["tablet", "capsule", "powder"], ["TABLET"], []])
+def test_rank_matches_rerank_with_priority(form_enabled, strength_enabled, eligible_forms):
+    """The engine orders every medication's candidates exactly like the per-medication reranker"""
+    service = make_service(form_enabled, strength_enabled, eligible_forms)
+    engine = MedispanRerankEngine(form_enabled, strength_enabled, eligible_forms)
+    rng = random.Random(1234)
+
+    for _ in range(20):
+        items = random_page(rng, medication_count=15, candidate_count=12)
+        expected = [service._rerank_with_priority(candidates, medication, form_enabled, strength_enabled) for candidates, medication in items]
+        assert [[id(x) for x in ranked] for ranked in engine.rank(items)] == [[id(x) for x in ranked] for ranked in expected]
+
+
+def test_rerank_page_orders_each_medication():
+    """Both form and strength, then strength only, then form only, then the rest; limited to total_results"""
+    service = make_service(True, True, ["tablet", "capsule"])
+    service.medispan_adapter_settings.v2_settings.total_results = 3
+
+    def drug(id, form, strength):
+        return MedispanDrug(id=id, NameDescription=f"Drug {id}", GenericName="Drug", Route="Oral", Strength=strength, Dosage_Form=form)
+
+    items = [
+        ([drug("A", "capsule", "10"), drug("B", "tablet", "5"), drug("C", "tablet", "10"), drug("D", "powder", "20")],
+         MedicationValue(name="Drug", strength="10 mg", form="tablet")),
+        ([drug("E", "tablet", "5"), drug("F", "capsule", "5")],
+         MedicationValue(name="Drug", strength="5 mg", form="capsule")),
+        ([], MedicationValue(name="Drug", strength="5 mg", form="capsule")),
+    ]
+
+    assert [[x.id for x in ranked] for ranked in service.rerank_page(items)] == [["C", "A", "B"], ["F", "E"], []]
@@ -1,6 +1,7 @@
 import pytest
 from unittest.mock import MagicMock, Mock, patch, AsyncMock
 from datetime import datetime
+import asyncio
 import json
 import sys
 
@@ -599,3 +600,237 @@ def test_limit_results_when_reranking_disabled():
     # Should maintain original order (first 2 items)
     assert reranked[0].id == "1"
     assert reranked[1].id == "2"
+
+@pytest.mark.asyncio
+async def test_run_searches_page_in_batches(service, extracted_medication, medispan_drug):
+    """All medications on a page are searched in one batch, with a second batch only for first-word fallbacks"""
+    second_medication = extracted_medication.copy(update={"id": "test_id_2", "medication": MedicationValue(name="Unknown Drug", strength="5mg", form="tablet", route="oral")})
+    mock_port = MagicMock()
+    mock_port.search_medications_batch = AsyncMock(side_effect=[
+        {"Test Med 10mg tablet oral": [medispan_drug], "Unknown Drug 5mg tablet oral": []},
+        {"Unknown": []},
+    ])
+
+    with patch('services.medispan_service.MedispanFireStoreVectorSearchAdapter', return_value=mock_port), \
+         patch.object(service, 'medispan_matching', AsyncMock(return_value=([{"id": "test_id_1", "medispan_id": "12345"}], {}))):
+        medications, search_results = await service.run(
+            app_id="test_app",
+            tenant_id="test_tenant",
+            patient_id="test_patient",
+            document_id="test_doc",
+            page_number=1,
+            run_id="test_run",
+            extracted_medications_raw=[extracted_medication, second_medication]
+        )
+
+    assert mock_port.search_medications_batch.await_count == 2
+    mock_port.search_medications_batch.assert_any_await(["Test Med 10mg tablet oral", "Unknown Drug 5mg tablet oral"])
+    mock_port.search_medications_batch.assert_any_await(["Unknown"])
+    assert [x["medication_name"] for x in search_results] == ["Test Med 10mg tablet oral", "Unknown"]
+    assert medications[0].medispan_id == "12345"
+    assert medications[1].medispan_id is None
+
+@pytest.mark.asyncio
+async def test_run_errors_only_the_medication_whose_search_failed(service, extracted_medication, medispan_drug):
+    """Ports without a batch API are searched per term; one failing term errors only its medication"""
+    second_medication = extracted_medication.copy(update={"id": "test_id_2", "medication": MedicationValue(name="Unknown Drug", strength="5mg", form="tablet", route="oral")})
+    mock_port = MagicMock(spec=["search_medications"])
+
+    async def search_medications(term):
+        if term == "Unknown Drug 5mg tablet oral":
+            raise Exception("search failed")
+        return [medispan_drug]
+
+    mock_port.search_medications = AsyncMock(side_effect=search_medications)
+
+    with patch('services.medispan_service.MedispanFireStoreVectorSearchAdapter', return_value=mock_port), \
+         patch.object(service, 'medispan_matching', AsyncMock(return_value=([{"id": "test_id_1", "medispan_id": "12345"}], {}))):
+        medications, search_results = await service.run(
+            app_id="test_app",
+            tenant_id="test_tenant",
+            patient_id="test_patient",
+            document_id="test_doc",
+            page_number=1,
+            run_id="test_run",
+            extracted_medications_raw=[extracted_medication, second_medication]
+        )
+
+    assert [x["id"] for x in search_results] == ["test_id_1"]
+    assert medications[0].medispan_id == "12345"
+    assert medications[0].medispan_status == MedispanStatus.MATCHED
+    assert medications[1].medispan_id is None
+
+@pytest.mark.asyncio
+async def test_run_page_rerank_failure_only_errors_the_failing_medication(service, extracted_medication, medispan_drug):
+    """If the page rerank fails, medications are reranked one by one and only the one that fails is errored"""
+    second_medication = extracted_medication.copy(update={"id": "test_id_2", "medication": MedicationValue(name="Other Drug", strength="5mg", form="tablet", route="oral")})
+    mock_port = MagicMock()
+    mock_port.search_medications_batch = AsyncMock(return_value={
+        "Test Med 10mg tablet oral": [medispan_drug],
+        "Other Drug 5mg tablet oral": [medispan_drug],
+    })
+
+    def rerank_medications(results, search_term, value):
+        if value.name == "Other Drug":
+            raise ValueError("bad strength")
+        return results
+
+    with patch('services.medispan_service.MedispanFireStoreVectorSearchAdapter', return_value=mock_port), \
+         patch.object(service, 'rerank_page', side_effect=ValueError("bad strength")), \
+         patch.object(service, 'rerank_medications', side_effect=rerank_medications), \
+         patch.object(service, 'medispan_matching', AsyncMock(return_value=([{"id": "test_id_1", "medispan_id": "12345"}], {}))) as mock_matching:
+        medications, search_results = await service.run(
+            app_id="test_app",
+            tenant_id="test_tenant",
+            patient_id="test_patient",
+            document_id="test_doc",
+            page_number=1,
+            run_id="test_run",
+            extracted_medications_raw=[extracted_medication, second_medication]
+        )
+
+    assert [x["id"] for x in mock_matching.await_args.kwargs["prompt_input"]] == ["test_id_1"]
+    assert medications[0].medispan_id == "12345"
+    assert medications[1].medispan_id is None
+
+@pytest.mark.asyncio
+async def test_run_pipelined_matches_each_medication(service, extracted_medication, medispan_drug):
+    """Pipelined mode searches each medication on its own and produces the same matches as the batched mode"""
+    second_medication = extracted_medication.copy(update={"id": "test_id_2", "medication": MedicationValue(name="Unknown Drug", strength="5mg", form="tablet", route="oral")})
+    mock_port = MagicMock(spec=["search_medications"])
+    mock_port.search_medications = AsyncMock(side_effect=lambda term: [medispan_drug] if term == "Test Med 10mg tablet oral" else [])
+
+    async def match_batch(prompt_template, model, prompt_input, prompt_adapter, metadata={}):
+        return [{"id": x["id"], "index": x["index"], "medispan_id": "12345" if x["medispan_options"] else None} for x in prompt_input], {}
+
+    with patch('settings.MEDISPAN_MATCH_PIPELINE_ENABLED', True), \
+         patch('services.medispan_service.MedispanFireStoreVectorSearchAdapter', return_value=mock_port), \
+         patch('services.medispan_service.StandardPromptAdapter'), \
+         patch.object(service, 'medispanmatching_batch', AsyncMock(side_effect=match_batch)) as mock_match_batch:
+        medications, search_results = await service.run(
+            app_id="test_app",
+            tenant_id="test_tenant",
+            patient_id="test_patient",
+            document_id="test_doc",
+            page_number=1,
+            run_id="test_run",
+            extracted_medications_raw=[extracted_medication, second_medication]
+        )
+
+    assert sorted(x.args[0] for x in mock_port.search_medications.await_args_list) == ["Test Med 10mg tablet oral", "Unknown", "Unknown Drug 5mg tablet oral"]
+    assert mock_match_batch.await_count == 1
+    assert [x["medication_name"] for x in search_results] == ["Test Med 10mg tablet oral", "Unknown"]
+    assert medications[0].medispan_id == "12345"
+    assert medications[1].medispan_id is None
+
+@pytest.mark.asyncio
+async def test_search_and_match_pipelined_bounds_searches_and_streams_batches(service, extracted_medication, medispan_drug):
+    medications = [extracted_medication.copy(update={"id": f"test_id_{i}"}) for i in range(5)]
+    medication_values = {x.id: x.medication for x in medications}
+    in_flight = 0
+    max_in_flight = 0
+
+    async def search_medications(term):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0)
+        in_flight -= 1
+        return [medispan_drug]
+
+    mock_port = MagicMock()
+    mock_port.search_medications = AsyncMock(side_effect=search_medications)
+    batch_sizes = []
+
+    async def match_batch(prompt_template, model, prompt_input, prompt_adapter, metadata={}):
+        batch_sizes.append(len(prompt_input))
+        return [{"id": x["id"], "medispan_id": "12345"} for x in prompt_input], {}
+
+    search_results, med_log_db = [], {}
+    with patch('settings.MEDISPAN_MATCH_SEARCH_CONCURRENCY', 2), \
+         patch('services.medispan_service.StandardPromptAdapter'), \
+         patch.object(service, 'medispanmatching_batch', AsyncMock(side_effect=match_batch)):
+        output, context = await service._search_and_match_pipelined(mock_port, medications, medication_values, search_results, {}, med_log_db,
+                                                                    prompt_metadata={}, extra={}, batch_size=2)
+
+    assert max_in_flight == 2
+    assert batch_sizes == [2, 2, 1]
+    assert [x["index"] for x in search_results] == [0, 1, 2, 3, 4]
+    assert sorted(x["id"] for x in output) == sorted(x.id for x in medications)
+    assert [x["batch_index"] for x in context["batch_context"]] == [0, 1, 2]
+
+@pytest.mark.asyncio
+async def test_search_and_match_pipelined_batches_in_medication_order(service, extracted_medication, medispan_drug):
+    """Searches finishing out of order still produce the same LLM batches as the batched mode"""
+    medications = [extracted_medication.copy(update={"id": f"test_id_{i}"}) for i in range(5)]
+    medication_values = {x.id: x.medication.copy(update={"name": f"Med{i}"}) for i, x in enumerate(medications)}
+
+    async def search_medications(term):
+        # Later medications finish first
+        await asyncio.sleep(0.001 * (5 - int(term[3])))
+        return [medispan_drug]
+
+    mock_port = MagicMock()
+    mock_port.search_medications = AsyncMock(side_effect=search_medications)
+    batches = []
+
+    async def match_batch(prompt_template, model, prompt_input, prompt_adapter, metadata={}):
+        batches.append([x["id"] for x in prompt_input])
+        return [{"id": x["id"], "medispan_id": "12345"} for x in prompt_input], {}
+
+    with patch('services.medispan_service.StandardPromptAdapter'), \
+         patch.object(service, 'medispanmatching_batch', AsyncMock(side_effect=match_batch)):
+        await service._search_and_match_pipelined(mock_port, medications, medication_values, [], {}, {},
+                                                  prompt_metadata={}, extra={}, batch_size=2)
+
+    assert batches == [["test_id_0", "test_id_1"], ["test_id_2", "test_id_3"], ["test_id_4"]]
+
+@pytest.mark.asyncio
+async def test_run_reuses_memoized_match_across_documents(service, extracted_medication, medispan_drug):
+    """A medication matched once is served from the memo on later documents without searching or matching again"""
+    from adapters.medispan_match_memo import MedispanMatchMemo
+
+    memo = MedispanMatchMemo()
+    mock_port = MagicMock()
+    mock_port.search_medications_batch = AsyncMock(return_value={"Test Med 10mg tablet oral": [medispan_drug]})
+    mock_matching = AsyncMock(return_value=([{"id": "test_id_1", "medispan_id": "12345"}], {}))
+
+    with patch('services.medispan_service.get_memo', return_value=memo), \
+         patch('services.medispan_service.MedispanFireStoreVectorSearchAdapter', return_value=mock_port), \
+         patch.object(service, 'medispan_matching', mock_matching):
+        first, _ = await service.run("test_app", "test_tenant", "test_patient", "test_doc", 1, "test_run", [extracted_medication])
+        repeat = extracted_medication.copy(update={"id": "test_id_2", "document_id": "other_doc",
+                                                   "medication": MedicationValue(name="TEST  med", strength="10MG", form="Tablet", route="oral")})
+        second, search_results = await service.run("test_app", "test_tenant", "test_patient", "other_doc", 3, "test_run", [repeat])
+
+    assert first[0].medispan_id == "12345"
+    assert second[0].medispan_id == "12345"
+    assert second[0].medispan_status == MedispanStatus.MATCHED
+    assert second[0].medispan_medication == first[0].medispan_medication
+    assert search_results == []
+    assert mock_port.search_medications_batch.await_count == 1
+    assert mock_matching.await_args.kwargs["prompt_input"] == []
+
+@pytest.mark.asyncio
+async def test_run_logs_memo_hits_at_their_page_position(service, extracted_medication, medispan_drug):
+    """A memo hit ahead of a searched medication keeps its own position in the page's log entries"""
+    from adapters.medispan_match_memo import MedispanMatchMemo
+
+    memo = MedispanMatchMemo()
+    mock_port = MagicMock()
+    mock_port.search_medications_batch = AsyncMock(return_value={"Test Med 10mg tablet oral": [medispan_drug], "Other Drug 5mg tablet oral": [medispan_drug]})
+    mock_matching = AsyncMock(side_effect=lambda **kwargs: ([{"id": x["id"], "medispan_id": "12345"} for x in kwargs["prompt_input"]], {}))
+
+    with patch('services.medispan_service.get_memo', return_value=memo), \
+         patch('services.medispan_service.MedispanFireStoreVectorSearchAdapter', return_value=mock_port), \
+         patch.object(service, 'medispan_matching', mock_matching):
+        await service.run("test_app", "test_tenant", "test_patient", "test_doc", 1, "test_run", [extracted_medication])
+
+        repeat = extracted_medication.copy(update={"id": "test_id_2"})
+        other = extracted_medication.copy(update={"id": "test_id_3", "medication": MedicationValue(name="Other Drug", strength="5mg", form="tablet", route="oral")})
+        with patch('services.medispan_service.LOGGER') as mock_logger:
+            await service.run("test_app", "test_tenant", "test_patient", "other_doc", 1, "test_run", [repeat, other])
+
+    logged = [(x.kwargs["extra"]["extracted_medication"]["id"], x.kwargs["extra"]["index"])
+              for x in mock_logger.warning.call_args_list if x.args[0] == "ExtractedMedication: %s"]
+    assert logged == [("test_id_2", 0), ("test_id_3", 1)]
@@ -75,4 +75,22 @@ def test_custom_metric_type():
         mock_logger.info.assert_called_once_with(
             f"METRIC::{custom_metric}",
             extra={"status": "success"}
-        )
\ No newline at end of file
+        )
+def test_latency_histogram(clean_tags):
+    from model_metric import LatencyHistogram
+
+    histogram = LatencyHistogram("STORAGE::ELAPSEDTIME", buckets=(0.1, 1.0))
+    with patch('model_metric.LOGGER') as mock_logger:
+        histogram.observe("read_pdf", 0.05, {"bucket_name": "test-bucket"})
+        histogram.observe("read_pdf", 0.5)
+        histogram.observe("read_pdf", 3.0)
+
+        mock_logger.info.assert_not_called()
+        mock_logger.debug.assert_called_with(
+            "METRIC::STORAGE::ELAPSEDTIME:read_pdf",
+            extra={"operation": "read_pdf", "elapsed_time": 3.0, "latency_bucket": "le_inf"}
+        )
+
+    assert histogram.snapshot() == {
+        "read_pdf": {"count": 3, "sum": 3.55, "buckets": {"le_0.1": 1, "le_1.0": 1, "le_inf": 1}}
+    }
@@ -0,0 +1,51 @@
+import pytest
+from io import BytesIO
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pypdf
+
+from models import Document
+from services.pdf_manager import PDFManager
+from utils.date import now_utc
+from utils.pdf_splitter import shutdown_process_pool
+
+
+def make_pdf(page_count: int) -> bytes:
+    writer = pypdf.PdfWriter()
+    for i in range(page_count):
+        writer.add_blank_page(width=100 + i, height=200)
+    data = BytesIO()
+    writer.write(data)
+    return data.getvalue()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("process_pool_min_pages", [1, 100])
+async def test_split_pages_uploads_every_page_in_order(process_pool_min_pages):
+    document = Document(app_id="test-app", tenant_id="test-tenant", patient_id="test-patient", document_id="test-doc",
+                        storage_uri="gs://test-bucket/test.pdf", created_at=now_utc(), priority="default")
+    storage = MagicMock()
+    storage.get_base_path = AsyncMock(return_value="base")
+    storage.read_pdf = AsyncMock(return_value=make_pdf(5))
+    uploaded = {}
+
+    async def write_pdf(bucket, path, content):
+        uploaded[path] = int(pypdf.PdfReader(BytesIO(content)).pages[0].mediabox.width)
+        return f"gs://{bucket}/{path}"
+
+    storage.write_pdf = AsyncMock(side_effect=write_pdf)
+
+    with patch('services.pdf_manager.StorageAdapter', return_value=storage), \
+         patch('services.pdf_manager.Metric') as mock_metric, \
+         patch('settings.PDF_SPLIT_CHUNK_PAGES', 2), \
+         patch('settings.PDF_SPLIT_PROCESS_POOL_MIN_PAGES', process_pool_min_pages):
+        try:
+            pages = await PDFManager().split_pages(document, "test-run")
+        finally:
+            shutdown_process_pool()
+
+    assert [x.page_number for x in pages] == [1, 2, 3, 4, 5]
+    assert all(x.total_pages == 5 and x.run_id == "test-run" for x in pages)
+    assert pages[0].storage_uri.endswith("base/1.pdf")
+    assert uploaded == {f"base/{i + 1}.pdf": 100 + i for i in range(5)}
+    assert mock_metric.send.call_count == 5
@@ -2,11 +2,21 @@ import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
+import psycopg2
 import pytest
 from unittest.mock import MagicMock, patch
 from src.adapters.pgvector_adapter import MedispanPgVectorAdapter
+from adapters.pgvector_pool import PgVectorConnectionPool, close_pools
 from src import settings
 
+
+@pytest.fixture(autouse=True)
+def reset_pools():
+    close_pools()
+    yield
+    close_pools()
+
+
 @pytest.fixture
 def mock_db_connection():
     with patch('psycopg2.connect') as mock_connect:
@@ -16,10 +26,12 @@ def mock_db_connection():
         mock_connect.return_value = mock_connection
         yield mock_connect, mock_connection, mock_cursor
 
+
 @pytest.fixture
 def adapter():
     return MedispanPgVectorAdapter(app_id="test", catalog="medispan")
 
+
 def test_init(adapter):
     assert adapter.app_id == "test"
     assert adapter.catalog == "medispan"
@@ -33,11 +45,13 @@ def test_init(adapter):
         "connect_timeout": settings.PGVECTOR_CONNECTION_TIMEOUT
     }
 
+
 def test_get_catalog_id(adapter):
     assert adapter._get_catalog_id("test") == "medispan"
     adapter.catalog = "merative"
     assert adapter._get_catalog_id("test") == "merative"
 
+
 def test_get_tablename(adapter):
     assert adapter._get_tablename() == settings.PGVECTOR_TABLE_MEDISPAN
     adapter.catalog = "merative"
@@ -45,6 +59,7 @@ def test_get_tablename(adapter):
     adapter.catalog = "unknown"
     assert adapter._get_tablename() == settings.PGVECTOR_TABLE_MEDISPAN
 
+
 def test_get_functionname(adapter):
     assert adapter._get_functionname() == settings.PGVECTOR_SEARCH_FUNCTION_MEDISPAN
     adapter.catalog = "merative"
@@ -52,6 +67,7 @@ def test_get_functionname(adapter):
     adapter.catalog = "unknown"
     assert adapter._get_functionname() == settings.PGVECTOR_SEARCH_FUNCTION_MEDISPAN
 
+
 @pytest.mark.asyncio
 async def test_keyword_search(adapter, mock_db_connection):
     _, _, mock_cursor = mock_db_connection
@@ -63,6 +79,25 @@ async def test_keyword_search(adapter, mock_db_connection):
     assert len(results) == 1
     assert results[0]["id"] == "1"
 
+    # Search terms are bound as parameters, never interpolated into the statement
+    assert mock_cursor.execute.call_args_list[-1].args[1] == ("test", "tablet", "oral", 15)
+
+
+@pytest.mark.asyncio
+async def test_keyword_search_prepares_once_per_connection(adapter, mock_db_connection):
+    mock_connect, mock_connection, mock_cursor = mock_db_connection
+    mock_connection.closed = 0
+    mock_cursor.fetchall.return_value = []
+
+    await adapter.keyword_search("aspirin")
+    await adapter.keyword_search("metoprolol", "tablet")
+
+    assert mock_connect.call_count == 1
+    # PREPARE + EXECUTE for the first call, EXECUTE only for the second
+    assert mock_cursor.execute.call_count == 3
+    assert mock_cursor.execute.call_args_list[-1].args[1] == ("metoprolol", "tablet", None, 15)
+
+
 @pytest.mark.asyncio
 async def test_search_by_vector(adapter, mock_db_connection):
     _, _, mock_cursor = mock_db_connection
@@ -74,6 +109,8 @@ async def test_search_by_vector(adapter, mock_db_connection):
     results = await adapter.search_by_vector(embedding, similarity_threshold=0.7, max_results=5)
     assert len(results) == 1
     assert results[0]["id"] == "1"
+    assert mock_cursor.execute.call_args_list[-1].args[1] == ("[0.1,0.2,0.3]", 0.7, 5)
+
 
 @pytest.mark.asyncio
 async def test_execute_query(adapter, mock_db_connection):
@@ -84,6 +121,7 @@ async def test_execute_query(adapter, mock_db_connection):
     assert len(results) == 1
     assert results[0]["id"] == "1"
 
+
 @pytest.mark.asyncio
 async def test_execute_query_error(adapter):
     with patch('psycopg2.connect') as mock_connect:
@@ -91,6 +129,7 @@ async def test_execute_query_error(adapter):
         with pytest.raises(Exception):
             await adapter.execute_query("SELECT * FROM table")
 
+
 @pytest.mark.asyncio
 async def test_search_medications_keyword_match(adapter, mock_db_connection):
     _, _, mock_cursor = mock_db_connection
@@ -112,6 +151,7 @@ async def test_search_medications_keyword_match(adapter, mock_db_connection):
         assert str(results[0].id) == "1"
         assert results[0].NameDescription == "Test Drug"
 
+
 @pytest.mark.asyncio
 async def test_search_medications_vector_search(adapter, mock_db_connection):
     _, _, mock_cursor = mock_db_connection
@@ -143,4 +183,83 @@ async def test_search_medications_vector_search(adapter, mock_db_connection):
         assert len(results) == 1
         assert str(results[0].id) == "1"
         assert results[0].NameDescription == "Test Drug"
-        mock_get_embeddings.assert_called_once()
\ No newline at end of file
+        mock_get_embeddings.assert_called_once()
+
+
+def test_pool_reuses_healthy_connection(mock_db_connection):
+    mock_connect, mock_connection, _ = mock_db_connection
+    mock_connection.closed = 0
+    pool = PgVectorConnectionPool({"host": "localhost"}, max_size=2, healthcheck_interval=30)
+
+    connection = pool._checkout()
+    pool._checkin(connection)
+
+    assert pool._checkout() is connection
+    assert mock_connect.call_count == 1
+    pool.close()
+
+
+def test_pool_replaces_dead_connection(mock_db_connection):
+    mock_connect, mock_connection, mock_cursor = mock_db_connection
+    mock_connection.closed = 0
+    pool = PgVectorConnectionPool({"host": "localhost"}, max_size=2, healthcheck_interval=0)
+
+    connection = pool._checkout()
+    pool._checkin(connection)
+
+    # Idle past the health check interval and the ping fails
+    mock_cursor.execute.side_effect = psycopg2.OperationalError("server closed the connection")
+    replacement = pool._checkout()
+
+    assert replacement is not connection
+    assert mock_connect.call_count == 2
+    mock_connection.close.assert_called_once()
+    pool.close()
+
+
+@pytest.mark.asyncio
+async def test_search_medications_batch_keyword_then_vector(adapter, mock_db_connection):
+    _, mock_connection, mock_cursor = mock_db_connection
+    mock_connection.closed = 0
+    mock_cursor.fetchall.side_effect = [
+        # Keyword pass: only "aspirin" has a hit
+        [{"batch_search_term": "aspirin", "id": "1", "namedescription": "Aspirin 81 MG Tablet", "genericname": "Aspirin", "dosageform": "tablet"}],
+        # Vector pass for the remaining term
+        [{"batch_search_term": "metoprolol", "id": "2", "namedescription": "Metoprolol Tartrate 25 MG Tablet", "genericname": "Metoprolol", "dosageform": "tablet"}],
+    ]
+
+    with (
+        patch('settings.PGVECTOR_FORCE_ONLY_EMBEDDING_SEARCH', False),
+        patch('adapters.gcp_embeddings.get_embeddings_batch', return_value=[[0.1, 0.2]]) as mock_get_embeddings
+    ):
+        results = await adapter.search_medications_batch(["aspirin", "metoprolol", "aspirin"])
+
+    assert list(results.keys()) == ["aspirin", "metoprolol"]
+    assert [x.id for x in results["aspirin"]] == ["1"]
+    assert [x.id for x in results["metoprolol"]] == ["2"]
+    # Only the keyword miss is embedded, and each pass is a single EXECUTE
+    assert mock_get_embeddings.call_args.args[0] == ["metoprolol"]
+    executes = [c for c in mock_cursor.execute.call_args_list if len(c.args) > 1]
+    assert executes[0].args[1] == (["aspirin", "metoprolol"], 15)
+    assert executes[1].args[1] == (["metoprolol"], ["[0.1,0.2]"], settings.MEDDB_SIMILARIY_THRESHOLD, settings.MEDDB_TOP_K)
+
+
+@pytest.mark.asyncio
+async def test_keyword_search_uses_catalog_index(adapter, mock_db_connection):
+    from adapters.medispan_catalog_index import MedispanCatalogIndex, get_index_holder
+
+    mock_connect, _, _ = mock_db_connection
+    holder = get_index_holder(settings.PGVECTOR_TABLE_MEDISPAN)
+    rows = [{"id": "1", "namedescription": "Aspirin 81 MG Tablet", "route": "Oral", "dosageform": "Tablet"}]
+
+    with (
+        patch('settings.MEDDB_CATALOG_INDEX_ENABLED', True),
+        patch.object(holder, 'index', MedispanCatalogIndex(rows)),
+        patch.object(holder, '_last_checked', float('inf')),
+    ):
+        results = await adapter.keyword_search("aspirin", dosage_form="tablet")
+        batch = await adapter.keyword_search_batch(["aspirin", "lisinopril"])
+
+    assert [x["id"] for x in results] == ["1"]
+    assert {term: [x["id"] for x in rows] for term, rows in batch.items()} == {"aspirin": ["1"], "lisinopril": []}
+    mock_connect.assert_not_called()
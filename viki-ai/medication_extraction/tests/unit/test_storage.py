@@ -0,0 +1,65 @@
+import pytest
+from unittest.mock import MagicMock, patch
+
+from google.api_core import exceptions as google_exceptions
+
+import adapters.storage
+from adapters.storage import StorageAdapter
+
+
+@pytest.fixture
+def client():
+    adapters.storage._validated_buckets.clear()
+    client = MagicMock()
+    blob = client.bucket.return_value.blob.return_value
+    blob.download_as_text.return_value = "content"
+    blob.download_as_bytes.return_value = b"%%EOF"
+    with patch('adapters.storage.STORAGE_LATENCY') as mock_latency:
+        client.latency = mock_latency
+        yield client
+    adapters.storage._validated_buckets.clear()
+
+
+@pytest.mark.asyncio
+async def test_bucket_is_validated_once(client):
+    storage = StorageAdapter(client)
+
+    assert await storage.read_text("test-bucket", "a.json") == "content"
+    assert await storage.write_text("test-bucket", "b.json", "content")
+    assert await StorageAdapter(client).read_text("test-bucket", "c.json") == "content"
+
+    client.bucket.return_value.reload.assert_called_once()
+    client.get_bucket.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_missing_bucket_is_not_memoized(client):
+    client.bucket.return_value.reload.side_effect = google_exceptions.NotFound("missing")
+    storage = StorageAdapter(client)
+
+    assert await storage.read_text("test-bucket", "a.json") is None
+    assert await storage.read_text("test-bucket", "a.json") is None
+    assert client.bucket.return_value.reload.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_read_range(client):
+    storage = StorageAdapter(client)
+    blob = client.bucket.return_value.blob.return_value
+
+    assert await storage.read_range("test-bucket", "test.pdf", -1024) == b"%%EOF"
+    blob.download_as_bytes.assert_called_once_with(start=-1024, end=None)
+
+    await storage.read_range("test-bucket", "test.pdf", 0, 1023)
+    blob.download_as_bytes.assert_called_with(start=0, end=1023)
+
+
+@pytest.mark.asyncio
+async def test_operations_record_latency(client):
+    storage = StorageAdapter(client)
+
+    await storage.read_pdf("test-bucket", "test.pdf")
+
+    operations = [c.args[0] for c in client.latency.observe.call_args_list]
+    assert operations == ["validate_bucket", "read_pdf"]
+    assert client.latency.observe.call_args.args[2] == {"bucket_name": "test-bucket", "success": True}
@@ -24,6 +24,10 @@ class Metric(BaseModel):
         HHH_ATTACHMENT_METADATA_MISSING = "HHH::ATTACHMENT_METADATA_MISSING"
         HHH_AUTH = "HHH::AUTH"
 
+        MEDISPAN_CACHE_LOOKUP = "MEDISPAN::CACHE::LOOKUP"
+        MEDISPAN_CACHE_EVICTION = "MEDISPAN::CACHE::EVICTION"
+        MEDISPAN_CACHE_UPSTREAM = "MEDISPAN::CACHE::UPSTREAM"
+
         
     @classmethod
     def send(cls, metricType: str|MetricType, tags: Dict[str, Any], branch: str = None):
@@ -1,7 +1,7 @@
 import asyncio
 from datetime import datetime, timedelta
 import json
-from typing import Dict, List, Optional, Tuple, Type, Any
+from typing import Dict, List, Optional, Set, Tuple, Type, Any
 from json import loads
 from itertools import chain
 from functools import partial
@@ -1090,6 +1090,29 @@ class FirestoreQueryAdapter(IQueryPort):
                     unique_medications.append(medication)
             return unique_medications
         
+    async def get_extracted_medications_by_operation_instance_id_and_page(self, document_id:str, operation_instance_id:str, page_number:int) -> List[ExtractedMedication]:
+        thisSpanName = "get_extracted_medications_by_page"
+        with await self.opentelemetry.getSpan(thisSpanName) as span:
+            ref = self.extracted_medication_v2_ref.where("document_id",'==',document_id).where('document_operation_instance_id','==',operation_instance_id).where('page_number','==',page_number)
+            docs = await ref.get()
+
+            medications= [ExtractedMedication(**doc.to_dict()) for doc in docs]
+
+            # Same de-duplication as get_extracted_medications_by_operation_instance_id, scoped to one page
+            unique_medications = []
+            for medication in medications:
+                if len([x for x in unique_medications if x.resolved_medication.matches(medication.resolved_medication)]) == 0:
+                    unique_medications.append(medication)
+            return unique_medications
+
+    async def get_extracted_medication_ids_by_operation_instance_id_and_page(self, document_id:str, operation_instance_id:str, page_number:int) -> Set[str]:
+        thisSpanName = "get_extracted_medication_ids_by_page"
+        with await self.opentelemetry.getSpan(thisSpanName) as span:
+            # Project no fields: only the document ids (which are the medication ids) are read
+            ref = self.extracted_medication_v2_ref.where("document_id",'==',document_id).where('document_operation_instance_id','==',operation_instance_id).where('page_number','==',page_number).select([])
+            docs = await ref.get()
+            return {doc.id for doc in docs}
+
     async def get_extracted_conditions_by_operation_instance_id(self, document_id:str, operation_instance_id:str) -> List[ExtractedConditions]:
         thisSpanName = "get_extracted_conditions"
         with await self.opentelemetry.getSpan(thisSpanName) as span:
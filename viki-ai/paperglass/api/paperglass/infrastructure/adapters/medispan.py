@@ -1,6 +1,10 @@
-from typing import Dict, List
+import asyncio
+from collections import OrderedDict
+from datetime import timedelta
+import hashlib
+import time
+from typing import Dict, List, Optional, Tuple
 import json
-import uuid
 
 import aiohttp
 import aiocache
@@ -9,7 +13,17 @@ from ..ports import IMedispanPort
 
 from google.cloud import firestore
 
-from ...settings import MEDISPAN_API_URL, MEDISPAN_AUTH_URL, MEDISPAN_PAGE_SIZE
+from ...settings import (
+    MEDISPAN_API_URL,
+    MEDISPAN_AUTH_URL,
+    MEDISPAN_PAGE_SIZE,
+    MEDISPAN_CACHE_MEMORY_SIZE,
+    MEDISPAN_CACHE_MEMORY_TTL,
+    MEDISPAN_CACHE_NEGATIVE_TTL,
+    MEDISPAN_CACHE_TTL,
+)
+from ...domain.model_metric import Metric
+from ...domain.time import now_utc
 
 from ...log import getLogger
 LOGGER = getLogger(__name__)
@@ -85,35 +99,137 @@ class MedispanAdapter(IMedispanPort):
 
 
 class MedispanCachedAdapter(MedispanAdapter):
-    
-    def __init__(self, client_id: str, client_secret: str):
+    """
+    Medispan API search behind two cache levels: a bounded in-process LRU in front of the Firestore
+    "medispan_cache" collection.  Concurrent lookups of the same term share a single Firestore read and
+    upstream call, and terms with no results are remembered in-process for MEDISPAN_CACHE_NEGATIVE_TTL.
+    """
+
+    COLLECTION = "medispan_cache"
+
+    def __init__(self, client_id: str, client_secret: str, max_size: int = MEDISPAN_CACHE_MEMORY_SIZE,
+                 memory_ttl: int = MEDISPAN_CACHE_MEMORY_TTL, negative_ttl: int = MEDISPAN_CACHE_NEGATIVE_TTL,
+                 ttl: int = MEDISPAN_CACHE_TTL):
         super().__init__(client_id, client_secret)
         self.db_client = firestore.AsyncClient()
+        self.max_size = max_size
+        self.memory_ttl = memory_ttl
+        self.negative_ttl = negative_ttl
+        self.ttl = timedelta(seconds=ttl)
+        self._entries: "OrderedDict[str, Tuple[float, List[IMedispanPort.Drug]]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.stats = {"lookups": 0, "memory_hits": 0, "negative_hits": 0, "store_hits": 0, "coalesced": 0,
+                      "upstream_calls": 0, "evictions": 0}
+
+    def _send_metric(self, metric_type: Metric.MetricType, branch: str, search_term: str, **tags):
+        hits = self.stats["memory_hits"] + self.stats["negative_hits"] + self.stats["store_hits"] + self.stats["coalesced"]
+        tags.update({
+            "search_term": search_term,
+            "hit_rate": hits / self.stats["lookups"] if self.stats["lookups"] else 0.0,
+            "cache_size": len(self._entries),
+        })
+        tags.update(self.stats)
+        Metric.send(metric_type, tags=tags, branch=branch)
+
+    def _get_memory_item(self, search_term: str) -> Optional[List[IMedispanPort.Drug]]:
+        entry = self._entries.get(search_term)
+        if not entry:
+            return None
+        expires_at, medications = entry
+        if expires_at <= time.monotonic():
+            del self._entries[search_term]
+            return None
+        self._entries.move_to_end(search_term)
+        return medications
+
+    def _set_memory_item(self, search_term: str, medications: List[IMedispanPort.Drug]):
+        ttl = self.memory_ttl if medications else self.negative_ttl
+        self._entries[search_term] = (time.monotonic() + ttl, medications)
+        self._entries.move_to_end(search_term)
+        evicted = 0
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            evicted += 1
+        if evicted:
+            self.stats["evictions"] += evicted
+            self._send_metric(Metric.MetricType.MEDISPAN_CACHE_EVICTION, "lru", search_term, evicted=evicted)
 
     async def search_medications(self, search_term: str) -> List[dict]:
-        medications,cache_exists = await self._get_cache_item(search_term)
-        if not cache_exists:
-            LOGGER.info('Results not cached.  Fetching medications from Medispan...')
-            medications = await super().search_medications(search_term)
-            await self._save_cache_item(search_term, medications)
+        self.stats["lookups"] += 1
+        medications = self._get_memory_item(search_term)
+        if medications is not None:
+            branch = "memory_hit" if medications else "negative_hit"
+            self.stats[branch + "s"] += 1
+            self._send_metric(Metric.MetricType.MEDISPAN_CACHE_LOOKUP, branch, search_term)
+            return medications
+
+        task = self._inflight.get(search_term)
+        if task:
+            self.stats["coalesced"] += 1
+            self._send_metric(Metric.MetricType.MEDISPAN_CACHE_LOOKUP, "coalesced", search_term)
+        else:
+            task = asyncio.ensure_future(self._load(search_term))
+            self._inflight[search_term] = task
+            task.add_done_callback(lambda _: self._inflight.pop(search_term, None))
+        # Shielded so a cancelled caller does not cancel the lookup other callers are waiting on
+        return await asyncio.shield(task)
+
+    async def _load(self, search_term: str) -> List[IMedispanPort.Drug]:
+        medications, cache_exists = await self._get_cache_item(search_term)
+        if cache_exists:
+            self.stats["store_hits"] += 1
+            self._send_metric(Metric.MetricType.MEDISPAN_CACHE_LOOKUP, "store_hit", search_term)
+            LOGGER.debug("Medispan results found in cache: %s", medications)
         else:
-            LOGGER.info("Medispan results found in cache: %s", medications)
+            LOGGER.info('Results not cached.  Fetching medications from Medispan...')
+            self.stats["upstream_calls"] += 1
+            try:
+                medications = await super().search_medications(search_term)
+            except Exception:
+                self._send_metric(Metric.MetricType.MEDISPAN_CACHE_UPSTREAM, "error", search_term)
+                raise
+            self._send_metric(Metric.MetricType.MEDISPAN_CACHE_UPSTREAM, "success", search_term, result_count=len(medications))
+            if medications:
+                await self._save_cache_item(search_term, medications)
+        self._set_memory_item(search_term, medications)
         return medications
-    
-    async def _get_cache_item(self, search_term):
-        cache_exists = False
-        docs = await self.db_client.collection("medispan_cache").where("search_term", "==", search_term).get()
-        if docs:
-            cache_exists = True
-        results = [await self.to_drug_model(doc.to_dict().get("medication_suggestions")) for doc in docs if doc and doc.to_dict().get("medication_suggestions")] if docs else None
-        if results:
-            return results[0],cache_exists
-        return None,cache_exists
+
+    @classmethod
+    def _cache_item_id(cls, search_term: str) -> str:
+        return hashlib.sha256(search_term.encode("utf-8")).hexdigest()
+
+    async def _get_cache_item(self, search_term) -> Tuple[Optional[List[IMedispanPort.Drug]], bool]:
+        """Persisted non-empty results for the term, if any and not expired."""
+        try:
+            snapshot = await self.db_client.collection(self.COLLECTION).document(self._cache_item_id(search_term)).get()
+            docs = [snapshot] if snapshot.exists else []
+            if not docs:
+                # Entries written before ids were derived from the search term
+                docs = await self.db_client.collection(self.COLLECTION).where("search_term", "==", search_term).limit(1).get()
+        except Exception as e:
+            LOGGER.warning("Error reading medispan cache for search term %s: %s", search_term, str(e))
+            return None, False
+
+        for doc in docs:
+            item = doc.to_dict() or {}
+            expires_at = item.get("expires_at")
+            if expires_at and expires_at <= now_utc():
+                continue
+            medications = await self.to_drug_model(item.get("medication_suggestions"))
+            if medications:
+                return medications, True
+        return None, False
 
     async def _save_cache_item(self, search_term, medications):
-        id = uuid.uuid4().hex
-        await self.db_client.collection("medispan_cache").document(id).set({"search_term":search_term,
-                                                                            "medication_suggestions":[x.dict() for x in medications]})
+        id = self._cache_item_id(search_term)
+        created_at = now_utc()
+        try:
+            await self.db_client.collection(self.COLLECTION).document(id).set({"search_term": search_term,
+                                                                              "medication_suggestions": [x.dict() for x in medications],
+                                                                              "created_at": created_at,
+                                                                              "expires_at": created_at + self.ttl})
+        except Exception as e:
+            LOGGER.warning("Error writing medispan cache for search term %s: %s", search_term, str(e))
         return id
     
     async def to_drug_model(self, medications:List[Dict]):
@@ -121,4 +237,4 @@ class MedispanCachedAdapter(MedispanAdapter):
         if not  medications:
             return None
         
-        return [self.Drug(**drug) for drug in medications if drug]
\ No newline at end of file
+        return [self.Drug(**drug) for drug in medications if drug]
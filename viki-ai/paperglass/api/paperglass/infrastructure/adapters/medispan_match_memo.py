@@ -0,0 +1,125 @@
+"""
+Cross-document memo of Medispan match results.
+
+The Firestore collection and key scheme are shared with medication_extraction
+(medication_extraction/src/adapters/medispan_match_memo.py) so either service can reuse a match the other
+made; keep the two in step.
+"""
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import hashlib
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from google.cloud.firestore import AsyncClient as AsyncFirestoreClient
+
+from paperglass.domain.time import now_utc
+from paperglass.domain.values import MedicationValue, MedispanMedicationValue, MedispanStatus
+from paperglass.infrastructure.ports import IMedispanMatchMemoPort
+
+from paperglass.log import getLogger
+LOGGER = getLogger(__name__)
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+# Only confirmed matches are memoized: an unmatched result may come from a malformed LLM response
+MEMOIZED_STATUSES = frozenset([MedispanStatus.MATCHED])
+
+
+def normalize(value: Optional[str]) -> str:
+    return WHITESPACE_PATTERN.sub(" ", value or "").strip().lower()
+
+
+def medication_signature(medication: MedicationValue) -> str:
+    """Normalized name|strength|form|route of an extracted medication."""
+    return "|".join(normalize(x) for x in (medication.name, medication.strength, medication.form, medication.route))
+
+
+def prompt_version(prompt_template: str) -> str:
+    return hashlib.sha256((prompt_template or "").encode("utf-8")).hexdigest()[:16]
+
+
+def memo_key(version: str, scope: str, catalog: str, model: str, prompt_template: str, signature: str) -> str:
+    value = "|".join([version, scope, catalog or "", model or "", prompt_version(prompt_template), signature])
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+class MedispanMatchMemoAdapter(IMedispanMatchMemoPort):
+    """
+    In-process LRU in front of one Firestore document per memo key.  Entries expire after `ttl` seconds
+    (a TTL policy on `expires_at` lets Firestore purge them) and a different `version` invalidates them
+    all.  Firestore errors are logged and count as misses.
+    """
+
+    def __init__(self, db_name: str, collection: str, max_size: int = 10000, ttl: int = 604800, version: str = "1"):
+        self.db = AsyncFirestoreClient(database=db_name)
+        self.collection = collection
+        self.max_size = max_size
+        self.ttl = timedelta(seconds=ttl)
+        self.version = version
+        self._entries: "OrderedDict[str, Tuple[datetime, Tuple[MedispanStatus, Optional[MedispanMedicationValue]]]]" = OrderedDict()
+
+    def key(self, scope: str, catalog: str, model: str, prompt_template: str, medication: MedicationValue) -> str:
+        return memo_key(self.version, scope, catalog, model, prompt_template, medication_signature(medication))
+
+    def _remember(self, key: str, expires_at: datetime, entry: Tuple[MedispanStatus, Optional[MedispanMedicationValue]]):
+        self._entries[key] = (expires_at, entry)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _from_record(self, record: Dict[str, Any]):
+        expires_at = record.get("expires_at")
+        if record.get("memo_version") != self.version or not expires_at or expires_at <= now_utc():
+            return None
+        medication = record.get("medispan_medication")
+        return expires_at, (MedispanStatus(record["medispan_status"]),
+                            MedispanMedicationValue(**medication) if medication else None)
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Tuple[MedispanStatus, Optional[MedispanMedicationValue]]]:
+        now = now_utc()
+        found = {}
+        missing = []
+        for key in dict.fromkeys(keys):
+            cached = self._entries.get(key)
+            if cached and cached[0] > now:
+                self._entries.move_to_end(key)
+                found[key] = cached[1]
+            else:
+                self._entries.pop(key, None)
+                missing.append(key)
+
+        if missing:
+            try:
+                references = [self.db.collection(self.collection).document(key) for key in missing]
+                async for snapshot in self.db.get_all(references):
+                    if not snapshot.exists:
+                        continue
+                    value = self._from_record(snapshot.to_dict())
+                    if value:
+                        self._remember(snapshot.id, *value)
+                        found[snapshot.id] = value[1]
+            except Exception as e:
+                LOGGER.warning("Medispan match memo: error reading %s: %s", self.collection, str(e))
+        return found
+
+    async def set_many(self, entries: Dict[str, Tuple[MedispanStatus, Optional[MedispanMedicationValue]]]):
+        entries = {key: entry for key, entry in entries.items() if entry[0] in MEMOIZED_STATUSES}
+        if not entries:
+            return
+        created_at = now_utc()
+        expires_at = created_at + self.ttl
+        batch = self.db.batch()
+        for key, (status, medication) in entries.items():
+            self._remember(key, expires_at, (status, medication))
+            batch.set(self.db.collection(self.collection).document(key), {
+                "memo_version": self.version,
+                "medispan_status": status.value,
+                "medispan_medication": medication.dict() if medication else None,
+                "created_at": created_at,
+                "expires_at": expires_at,
+            })
+        try:
+            await batch.commit()
+        except Exception as e:
+            LOGGER.warning("Medispan match memo: error writing %s: %s", self.collection, str(e))
@@ -7,6 +7,7 @@ from paperglass.infrastructure.adapters.medispan_api_search_filter import Medisp
 from paperglass.infrastructure.adapters.medispan_llm_filter import MedispanLLMFilterAdapter
 from paperglass.infrastructure.adapters.external_medications import HHHAdapter
 from paperglass.infrastructure.adapters.medispan import MedispanAdapter, MedispanCachedAdapter
+from paperglass.infrastructure.adapters.medispan_match_memo import MedispanMatchMemoAdapter
 from paperglass.infrastructure.adapters.medispan_vector_search import MedispanVectorSearchAdapter
 from paperglass.infrastructure.adapters.medispan_firestore_vector_search import MedispanFireStoreVectorSearchAdapter
 from paperglass.infrastructure.adapters.settings import SettingsAdapter
@@ -49,6 +50,10 @@ from ..settings import (
     MEDISPAN_CLIENT_ID,
     MEDISPAN_CLIENT_SECRET,
     MEDISPAN_FILTER_STRATEGY,
+    MEDISPAN_MATCH_MEMO_COLLECTION,
+    MEDISPAN_MATCH_MEMO_MEMORY_SIZE,
+    MEDISPAN_MATCH_MEMO_TTL,
+    MEDISPAN_MATCH_MEMO_VERSION,
     MEDISPAN_STRATEGY,
     VECTOR_SEARCH_PROVIDER,
     GCP_VECTOR_SEARCH_INDEX_NAME,
@@ -81,6 +86,7 @@ from .ports import (
     IEmbeddingsAdapter,
     IHHHAdapter,
     IFhirStoreAdapter,
+    IMedispanMatchMemoPort,
     IMedispanPort,
     IPromptAdapter,
     IQueryPort,
@@ -164,6 +170,11 @@ elif MEDISPAN_STRATEGY == MedispanStrategy.MEDISPAN_CACHED.value:
 else:
     di[IMedispanPort] = lambda _: MedispanAdapter(MEDISPAN_CLIENT_ID, MEDISPAN_CLIENT_SECRET)
 
+di[IMedispanMatchMemoPort] = lambda _: MedispanMatchMemoAdapter(GCP_FIRESTORE_DB, MEDISPAN_MATCH_MEMO_COLLECTION,
+                                                                max_size=MEDISPAN_MATCH_MEMO_MEMORY_SIZE,
+                                                                ttl=MEDISPAN_MATCH_MEMO_TTL,
+                                                                version=MEDISPAN_MATCH_MEMO_VERSION)
+
 if MEDISPAN_FILTER_STRATEGY == FilterStrategy.LLM:
     di[IRelevancyFilterPort] = lambda di: MedispanLLMFilterAdapter()
 elif MEDISPAN_FILTER_STRATEGY == FilterStrategy.LOGIC:
@@ -1,5 +1,6 @@
+import asyncio
 from contextlib import AbstractAsyncContextManager
-from typing import Dict, List, Optional, Tuple, Type, TypeVar, Union, Any
+from typing import Dict, List, Optional, Set, Tuple, Type, TypeVar, Union, Any
 from datetime import datetime
 
 from pydantic import BaseModel
@@ -14,7 +15,7 @@ from paperglass.domain.model_testing import E2ETestCase, E2ETestCaseSummaryResul
 from paperglass.domain.model_entities import EntitySchemaAggregate
 
 from ..domain.models_common import Code
-from ..domain.values import AnnotationType,ConfigurationTest, DocumentSettings, HostAttachment, HostMedicationAddModel, HostFreeformMedicationAddModel, HostMedication, HostMedicationUpdateModel, OCRType,ImportedMedication, PageText
+from ..domain.values import AnnotationType,ConfigurationTest, DocumentSettings, HostAttachment, HostMedicationAddModel, HostFreeformMedicationAddModel, HostMedication, HostMedicationUpdateModel, OCRType,ImportedMedication, PageText, MedicationValue, MedispanMedicationValue, MedispanStatus
 
 from ..settings import MULTIMODAL_MODEL
 
@@ -302,6 +303,12 @@ class IQueryPort:
     async def get_extracted_medications_by_operation_instance_id(self, document_id:str, operation_instance_id:str) -> List[ExtractedMedication]:
         raise NotImplementedError
 
+    async def get_extracted_medications_by_operation_instance_id_and_page(self, document_id:str, operation_instance_id:str, page_number:int) -> List[ExtractedMedication]:
+        raise NotImplementedError
+
+    async def get_extracted_medication_ids_by_operation_instance_id_and_page(self, document_id:str, operation_instance_id:str, page_number:int) -> Set[str]:
+        raise NotImplementedError
+
     async def get_evidences_by_document(self, document_id: str,execution_id:str) -> List[dict]:
         raise NotImplementedError
 
@@ -542,6 +549,31 @@ class IMedispanPort:
     async def search_medications(self, search_term: str, strict_match:bool) -> List[MedispanDrug]:
         raise NotImplementedError
 
+    async def search_medications_batch(self, search_terms: List[str]) -> Dict[str, List[MedispanDrug]]:
+        """
+        Resolve many search terms at once, keyed by search term.  Adapters backed by a store that
+        supports multi-term queries should override this; the default searches each distinct term
+        concurrently, and a term whose search fails maps to its exception rather than failing the batch.
+        """
+        unique_terms = list(dict.fromkeys(search_terms))
+        results = await asyncio.gather(*[self.search_medications(term) for term in unique_terms], return_exceptions=True)
+        return dict(zip(unique_terms, results))
+
+class IMedispanMatchMemoPort:
+    """
+    Cross-document memo of Medispan match results, keyed by the normalized name/strength/form/route of
+    the extracted medication plus catalog, model and prompt.  Values are (status, matched medication).
+    """
+
+    def key(self, scope: str, catalog: str, model: str, prompt_template: str, medication: MedicationValue) -> str:
+        raise NotImplementedError
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Tuple[MedispanStatus, Optional[MedispanMedicationValue]]]:
+        raise NotImplementedError
+
+    async def set_many(self, entries: Dict[str, Tuple[MedispanStatus, Optional[MedispanMedicationValue]]]):
+        raise NotImplementedError
+
 class IApplicationIntegration:
 
     async def start(self, integration_project_name, json_payload, trigger_id):
@@ -84,6 +84,10 @@ MEDISPAN_LLM_SCORING_ENABLED = to_bool(os.getenv('MEDISPAN_LLM_SCORING_ENABLED',
 MEDISPAN_LLM_OPTIMIZEPROMPT_ENABLED = to_bool(os.getenv('MEDISPAN_LLM_OPTIMIZEPROMPT_ENABLED', 'true'))
 MEDISPAN_LLM_SCORING_FOR_USER_ADDED_ENABLED = to_bool(os.getenv('MEDISPAN_LLM_SCORING_FOR_USER_ADDED_ENABLED', 'false'))
 MEDISPAN_TOKEN_BACKOFF = to_list_of_strings(os.getenv("MEDISPAN_TOKEN_BACKOFF","(IR),(ER),(CR),(SR)"))
+MEDISPAN_CACHE_MEMORY_SIZE = to_int(os.getenv('MEDISPAN_CACHE_MEMORY_SIZE', '5000'))  # Max search terms kept in the in-process LRU of the medispan-cached strategy
+MEDISPAN_CACHE_MEMORY_TTL = to_int(os.getenv('MEDISPAN_CACHE_MEMORY_TTL', '3600'))  # Seconds a search result stays in the in-process LRU
+MEDISPAN_CACHE_NEGATIVE_TTL = to_int(os.getenv('MEDISPAN_CACHE_NEGATIVE_TTL', '300'))  # Seconds an empty search result is remembered in-process
+MEDISPAN_CACHE_TTL = to_int(os.getenv('MEDISPAN_CACHE_TTL', '2592000'))  # Seconds a search result persisted in Firestore stays valid
 
 MEDISPAN_VECTOR_SEARCH_PROJECT_ID = getenv_or_die("MEDISPAN_VECTOR_SEARCH_PROJECT_ID")
 MEDISPAN_VECTOR_SEARCH_REGION = os.getenv('MEDISPAN_VECTOR_SEARCH_REGION', "us-central1")
@@ -98,6 +102,11 @@ MEDICATION_STRENGTH_EXTRACTION_REGEX = os.getenv("MEDICATION_STRENGTH_EXTRACTION
 MEDICATION_MATCHING_THRESHOLD = to_double(os.getenv("MEDICATION_MATCHING_THRESHOLD", "0.9"))
 MEDICATION_MATCHING_BATCH_SIZE = to_int(os.getenv("MEDICATION_MATCHING_BATCH_SIZE", "20"))
 MEDICATION_MATCHING_VERSION = os.getenv("MEDICATION_MATCHING_VERSION", "2")
+MEDISPAN_MATCH_MEMO_ENABLED = to_bool(os.getenv("MEDISPAN_MATCH_MEMO_ENABLED", "false"))  # Reuse prior LLM Medispan matches for the same medication signature across pages and documents
+MEDISPAN_MATCH_MEMO_VERSION = os.getenv("MEDISPAN_MATCH_MEMO_VERSION", "1")  # Bump to invalidate every memoized match
+MEDISPAN_MATCH_MEMO_TTL = to_int(os.getenv("MEDISPAN_MATCH_MEMO_TTL", "604800"))  # Seconds a memoized match stays valid
+MEDISPAN_MATCH_MEMO_MEMORY_SIZE = to_int(os.getenv("MEDISPAN_MATCH_MEMO_MEMORY_SIZE", "10000"))  # Max matches kept in the in-process LRU
+MEDISPAN_MATCH_MEMO_COLLECTION = os.getenv("MEDISPAN_MATCH_MEMO_COLLECTION", "medispan_match_memo")  # Firestore collection shared with medication_extraction
 
 MEDICAL_SUMMARIZATION_API_URL = os.getenv('MEDICAL_SUMMARIZATION_API_URL', "https://healthcare.googleapis.com/v1alpha2/projects/viki-dev-app-wsky/locations/us-central1/services/medlm:summarizeClinicalRecords")
 MEDICAL_SUMMARIZATION_CONFIDENCE_THRESHOLD = to_double(os.getenv("MEDICAL_SUMMARIZATION_CONFIDENCE_THRESHOLD", "0.2"))
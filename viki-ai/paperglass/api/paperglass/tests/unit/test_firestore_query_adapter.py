@@ -0,0 +1,81 @@
+"""
+Unit tests for the page-scoped extracted medication queries of FirestoreQueryAdapter.
+"""
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from paperglass.domain.models import ExtractedMedication
+from paperglass.domain.values import MedicationValue, MedispanStatus
+from paperglass.infrastructure.adapters.google import FirestoreQueryAdapter
+
+
+def make_medication(name: str, page_number: int = 2) -> ExtractedMedication:
+    return ExtractedMedication.create(app_id="app", tenant_id="tenant", patient_id="patient", document_id="doc-1",
+                                      page_id=f"page-{page_number}", document_reference="ref", page_number=page_number,
+                                      extracted_medication_value=MedicationValue(name=name, strength="10 mg", form="tablet", route="oral"),
+                                      medispan_medication=None, medispan_status=MedispanStatus.NONE, medispan_id=None)
+
+
+def make_doc(medication: ExtractedMedication) -> MagicMock:
+    doc = MagicMock()
+    doc.id = medication.id
+    doc.to_dict.return_value = medication.dict()
+    return doc
+
+
+@pytest.fixture
+def adapter():
+    # Skip __init__ so no Firestore client is created
+    adapter = FirestoreQueryAdapter.__new__(FirestoreQueryAdapter)
+    adapter.opentelemetry = MagicMock()
+    adapter.opentelemetry.getSpan = AsyncMock(return_value=MagicMock())
+    adapter.extracted_medication_v2_ref = MagicMock()
+    return adapter
+
+
+def filters(query_mock: MagicMock) -> list:
+    """The (field, op, value) filters applied through a chain of .where() calls."""
+    applied = []
+    ref = query_mock
+    while ref.where.call_args is not None:
+        applied.append(ref.where.call_args.args)
+        ref = ref.where.return_value
+    return applied
+
+
+@pytest.mark.asyncio
+async def test_get_extracted_medications_by_page_filters_and_deduplicates(adapter):
+    aspirin, duplicate_aspirin, lisinopril = make_medication("Aspirin"), make_medication("Aspirin"), make_medication("Lisinopril")
+    query = adapter.extracted_medication_v2_ref.where.return_value.where.return_value.where.return_value
+    query.get = AsyncMock(return_value=[make_doc(aspirin), make_doc(duplicate_aspirin), make_doc(lisinopril)])
+
+    medications = await adapter.get_extracted_medications_by_operation_instance_id_and_page("doc-1", "instance-1", 2)
+
+    assert filters(adapter.extracted_medication_v2_ref) == [
+        ("document_id", "==", "doc-1"),
+        ("document_operation_instance_id", "==", "instance-1"),
+        ("page_number", "==", 2),
+    ]
+    assert [x.id for x in medications] == [aspirin.id, lisinopril.id]
+
+
+@pytest.mark.asyncio
+async def test_get_extracted_medication_ids_by_page_projects_only_ids(adapter):
+    aspirin, lisinopril = make_medication("Aspirin"), make_medication("Lisinopril")
+    page_query = adapter.extracted_medication_v2_ref.where.return_value.where.return_value.where.return_value
+    docs = [make_doc(aspirin), make_doc(lisinopril)]
+    page_query.select.return_value.get = AsyncMock(return_value=docs)
+
+    ids = await adapter.get_extracted_medication_ids_by_operation_instance_id_and_page("doc-1", "instance-1", 2)
+
+    assert filters(adapter.extracted_medication_v2_ref) == [
+        ("document_id", "==", "doc-1"),
+        ("document_operation_instance_id", "==", "instance-1"),
+        ("page_number", "==", 2),
+    ]
+    page_query.select.assert_called_once_with([])
+    assert ids == {aspirin.id, lisinopril.id}
+    for doc in docs:
+        doc.to_dict.assert_not_called()
@@ -0,0 +1,104 @@
+"""
+Unit tests for the in-process caching of MedispanCachedAdapter.
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from paperglass.infrastructure.adapters.medispan import MedispanAdapter, MedispanCachedAdapter
+
+
+def make_drug(id: str) -> MedispanAdapter.Drug:
+    return MedispanAdapter.Drug(id=id, brand_name=id, generic_name=id, full_name=id, route="oral", form="tablet",
+                                strength=MedispanAdapter.Drug.Strength(value="10", unit="mg"), package=None)
+
+
+@pytest.fixture
+def upstream():
+    with patch("paperglass.infrastructure.adapters.medispan.firestore.AsyncClient"), \
+         patch("paperglass.infrastructure.adapters.medispan.Metric.send"), \
+         patch.object(MedispanAdapter, "search_medications", new_callable=AsyncMock) as search_medications:
+        yield search_medications
+
+
+def make_adapter(**kwargs) -> MedispanCachedAdapter:
+    adapter = MedispanCachedAdapter("client-id", "client-secret", **kwargs)
+    # Nothing persisted in Firestore
+    adapter._get_cache_item = AsyncMock(return_value=(None, False))
+    adapter._save_cache_item = AsyncMock()
+    return adapter
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_lookups_share_one_upstream_call(upstream):
+    release = asyncio.Event()
+
+    async def slow_search(search_term):
+        await release.wait()
+        return [make_drug("1")]
+
+    upstream.side_effect = slow_search
+    adapter = make_adapter()
+
+    lookups = [asyncio.ensure_future(adapter.search_medications("aspirin")) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*lookups)
+
+    assert upstream.await_count == 1
+    adapter._get_cache_item.assert_awaited_once_with("aspirin")
+    assert all(result[0].id == "1" for result in results)
+    assert adapter.stats["coalesced"] == 4
+    assert adapter._inflight == {}
+
+
+@pytest.mark.asyncio
+async def test_lru_evicts_least_recently_used_at_capacity(upstream):
+    upstream.side_effect = lambda search_term: [make_drug(search_term)]
+    adapter = make_adapter(max_size=2)
+
+    await adapter.search_medications("aspirin")
+    await adapter.search_medications("lisinopril")
+    await adapter.search_medications("aspirin")  # Most recently used again
+    await adapter.search_medications("metoprolol")
+
+    assert list(adapter._entries.keys()) == ["aspirin", "metoprolol"]
+    assert adapter.stats["evictions"] == 1
+
+    await adapter.search_medications("aspirin")
+    assert upstream.await_count == 3
+    await adapter.search_medications("lisinopril")
+    assert upstream.await_count == 4
+
+
+@pytest.mark.asyncio
+async def test_negative_results_expire_after_negative_ttl(upstream):
+    upstream.return_value = []
+    adapter = make_adapter(memory_ttl=3600, negative_ttl=300)
+
+    with patch("paperglass.infrastructure.adapters.medispan.time.monotonic", return_value=1000.0):
+        assert await adapter.search_medications("unknown") == []
+        assert await adapter.search_medications("unknown") == []
+    assert upstream.await_count == 1
+    assert adapter.stats["negative_hits"] == 1
+    adapter._save_cache_item.assert_not_awaited()
+
+    with patch("paperglass.infrastructure.adapters.medispan.time.monotonic", return_value=1301.0):
+        await adapter.search_medications("unknown")
+    assert upstream.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_positive_results_outlive_negative_ttl(upstream):
+    upstream.return_value = [make_drug("1")]
+    adapter = make_adapter(memory_ttl=3600, negative_ttl=300)
+
+    with patch("paperglass.infrastructure.adapters.medispan.time.monotonic", return_value=1000.0):
+        await adapter.search_medications("aspirin")
+    with patch("paperglass.infrastructure.adapters.medispan.time.monotonic", return_value=1301.0):
+        await adapter.search_medications("aspirin")
+
+    assert upstream.await_count == 1
+    adapter._save_cache_item.assert_awaited_once()
@@ -0,0 +1,40 @@
+"""
+Unit tests for the default IMedispanPort batch search.
+"""
+
+import pytest
+
+from paperglass.domain.models import MedispanDrug
+from paperglass.infrastructure.ports import IMedispanPort
+
+
+class FlakyMedispanPort(IMedispanPort):
+    def __init__(self):
+        self.searched = []
+
+    async def search_medications(self, search_term: str, strict_match: bool = False):
+        self.searched.append(search_term)
+        if search_term == "broken":
+            raise IMedispanPort.Error("search failed")
+        return [MedispanDrug(id="1", NameDescription=search_term, GenericName=search_term, Route="oral", Strength="10", Dosage_Form="tablet")]
+
+
+@pytest.mark.asyncio
+async def test_search_medications_batch_searches_each_term_once():
+    port = FlakyMedispanPort()
+
+    results = await port.search_medications_batch(["aspirin", "lisinopril", "aspirin"])
+
+    assert sorted(port.searched) == ["aspirin", "lisinopril"]
+    assert list(results.keys()) == ["aspirin", "lisinopril"]
+    assert results["aspirin"][0].NameDescription == "aspirin"
+
+
+@pytest.mark.asyncio
+async def test_search_medications_batch_keeps_other_terms_when_one_fails():
+    port = FlakyMedispanPort()
+
+    results = await port.search_medications_batch(["aspirin", "broken"])
+
+    assert results["aspirin"][0].id == "1"
+    assert isinstance(results["broken"], IMedispanPort.Error)
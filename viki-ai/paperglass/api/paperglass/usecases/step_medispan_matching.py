@@ -7,6 +7,8 @@ from paperglass.settings import (
     MEDISPAN_LLM_SCORING_ENABLED,
     MEDICATION_MATCHING_VERSION,
     MEDICATION_MATCHING_BATCH_SIZE,
+    MEDICATION_CATALOG_DEFAULT,
+    MEDISPAN_MATCH_MEMO_ENABLED,
 )
 from paperglass.domain.utils.array_utils import chunk_array, split_tuple_object
 from paperglass.domain.utils.exception_utils import exceptionToMap
@@ -42,7 +44,8 @@ from paperglass.infrastructure.ports import (
     IMedispanPort,
     IPromptAdapter,
     IRelevancyFilterPort,
-    IQueryPort
+    IQueryPort,
+    IMedispanMatchMemoPort,
 )
 
 from paperglass.log import getLogger, labels, CustomLogger
@@ -298,7 +301,8 @@ class StepMedispanMatchingAdapter_v2(IStepMedispanMatching):
                              prompt_adapter:IPromptAdapter,
                              medispan_port:IMedispanPort,
                              relevancy_filter_adapter:IRelevancyFilterPort,
-                             query:IQueryPort
+                             query:IQueryPort,
+                             medispan_match_memo:IMedispanMatchMemoPort
                              ) -> List[ExtractedMedication]:
         
         LOGGER.debug("MedispanMatching: Running MedispanMatchingAdapter_v2")
@@ -336,11 +340,8 @@ class StepMedispanMatchingAdapter_v2(IStepMedispanMatching):
 
             LOGGER.debug('ExtractMedication: Extracting medication for documentId %s from page %s', command.document_id, command.page_number, extra=extra)
             success_log_exists, log =  await does_success_operation_instance_exist(command.document_id, command.document_operation_instance_id,command.page_number,command.step_id)
-            existing_extracted_medications = []
-            existing_extracted_medications = await query.get_extracted_medications_by_operation_instance_id(command.document_id, command.document_operation_instance_id)
-            existing_extracted_medications = [x for x in existing_extracted_medications if x and x.page_number == command.page_number]
             if success_log_exists and not command.is_test:
-                return existing_extracted_medications
+                return await query.get_extracted_medications_by_operation_instance_id_and_page(command.document_id, command.document_operation_instance_id, command.page_number)
 
             if not command.extracted_medications:
                 LOGGER.debug("MedispanMatching: Extracted medications for document %s page %s is %s.  No matching to perform.  Returning input as result", command.document_id, command.page_number, command.extracted_medications, extra=extra)
@@ -377,14 +378,64 @@ class StepMedispanMatchingAdapter_v2(IStepMedispanMatching):
 
             idx = 0
             
-            new_extracted_medication = []
             # check for any new medication that has not been processed
-            for med in command.extracted_medications:
-                is_existing_medication = True if len([x for x in existing_extracted_medications if x.id == med.id]) > 0 else False
-                if not is_existing_medication:
-                    new_extracted_medication.append(med)
+            existing_extracted_medication_ids = await query.get_extracted_medication_ids_by_operation_instance_id_and_page(command.document_id, command.document_operation_instance_id, command.page_number)
+            new_extracted_medication = [med for med in command.extracted_medications if med.id not in existing_extracted_medication_ids]
             
+            # Build the search term for every new medication up front so the whole page is searched in bulk
+            medication_values = {}
             for extracted_medication in new_extracted_medication:
+                try:
+                    medication_values[extracted_medication.id] = MedicationValue(
+                                                                    name=extracted_medication.medication.name,
+                                                                    strength=extracted_medication.medication.strength,
+                                                                    dosage=extracted_medication.medication.dosage,
+                                                                    route=extracted_medication.medication.route,
+                                                                    frequency=extracted_medication.medication.frequency,
+                                                                    instructions=extracted_medication.medication.instructions or extracted_medication.medication.frequency, # HHH maps frequency to instrutions
+                                                                    form = extracted_medication.medication.form,
+                                                                    start_date=extracted_medication.medication.start_date,
+                                                                    end_date=extracted_medication.medication.end_date,
+                                                                    discontinued_date=extracted_medication.medication.discontinued_date
+                                                                )
+                except Exception as e:
+                    medication_values[extracted_medication.id] = e
+
+            # Reuse prior matches of the same medication from other pages and documents; only the rest is searched and matched
+            memo_keys = {}
+            memo_hits = {}
+            if MEDISPAN_MATCH_MEMO_ENABLED:
+                memo_keys = {
+                    id: medispan_match_memo.key(f"{command.app_id}:{command.tenant_id}", MEDICATION_CATALOG_DEFAULT, command.model, command.prompt, value)
+                    for id, value in medication_values.items() if isinstance(value, MedicationValue)
+                }
+                memoized = await medispan_match_memo.get_many(list(memo_keys.values()))
+                memo_hits = {id: memoized[key] for id, key in memo_keys.items() if key in memoized}
+                if memo_hits:
+                    LOGGER.debug("MedispanMatching: Reusing %s memoized matches of %s medications", len(memo_hits), len(new_extracted_medication), extra=extra)
+            pending_medications = [x for x in new_extracted_medication if x.id not in memo_hits]
+            pending_values = {id: value for id, value in medication_values.items() if id not in memo_hits}
+            memo_updates = {}
+
+            search_results = {}
+            search_error = None
+            with await opentelemetry.getSpan(thisSpanName + ":medispan_search_batch") as span1:
+                try:
+                    search_terms = [x.fully_qualified_name for x in pending_values.values() if isinstance(x, MedicationValue)]
+                    if search_terms:
+                        search_results = await medispan_port.search_medications_batch(search_terms)
+                    # If initial search does not return any results, try searching with just the first word of the medication name
+                    fallback_terms = [
+                        x.name.split(' ')[0] for x in pending_values.values()
+                        if isinstance(x, MedicationValue) and not search_results.get(x.fully_qualified_name)
+                    ]
+                    if fallback_terms:
+                        LOGGER.debug("MedispanMatching: Initial search for %s medications did not yield any results.  Trying search with just the first word of the medication name", len(fallback_terms), extra=extra)
+                        search_results.update(await medispan_port.search_medications_batch(fallback_terms))
+                except Exception as e:
+                    search_error = e
+
+            for extracted_medication in pending_medications:
                 
                 this_med_log_details = med_log_db.get(extracted_medication.id, {})
                 this_med_log_details["index"] = idx
@@ -394,30 +445,23 @@ class StepMedispanMatchingAdapter_v2(IStepMedispanMatching):
                     medispan_status = MedispanStatus.UNMATCHED
 
                     try:
-                        extracted_medication_value = MedicationValue(
-                                                                        name=extracted_medication.medication.name,
-                                                                        strength=extracted_medication.medication.strength,
-                                                                        dosage=extracted_medication.medication.dosage,
-                                                                        route=extracted_medication.medication.route,
-                                                                        frequency=extracted_medication.medication.frequency,
-                                                                        instructions=extracted_medication.medication.instructions or extracted_medication.medication.frequency, # HHH maps frequency to instrutions
-                                                                        form = extracted_medication.medication.form,
-                                                                        start_date=extracted_medication.medication.start_date,
-                                                                        end_date=extracted_medication.medication.end_date,
-                                                                        discontinued_date=extracted_medication.medication.discontinued_date
-                                                                    )
+                        extracted_medication_value = medication_values[extracted_medication.id]
+                        if isinstance(extracted_medication_value, Exception):
+                            raise extracted_medication_value
+                        if search_error:
+                            raise search_error
 
                         search_term: str = extracted_medication_value.fully_qualified_name
 
-                        medispan_port_result: List[MedispanDrug] = await medispan_port.search_medications(search_term)
-                        # If initial search does not return any results, try searching with just the first word of the medication name
+                        medispan_port_result: List[MedispanDrug] = search_results.get(search_term)
                         if not medispan_port_result:
                             search_term = f"{extracted_medication_value.name.split(' ')[0]}"
-                            LOGGER.debug("MedispanMatching: Initial search for medication '%s' did not yield any results.  Trying search with just the first word of the medication name: '%s'", extracted_medication_value.fully_qualified_name, search_term, extra=extra)
-                            medispan_port_result: List[MedispanDrug] = await medispan_port.search_medications(search_term)
+                            medispan_port_result: List[MedispanDrug] = search_results.get(search_term) or []
                             this_med_log_details['medispan_search_term'] = search_term
                         else:
                             this_med_log_details['medispan_search_term'] = extracted_medication_value.fully_qualified_name
+                        if isinstance(medispan_port_result, Exception):
+                            raise medispan_port_result
 
                         if medispan_port_result:
                             this_med_log_details['medispan_results'] = json.dumps([x.dict() for x in medispan_port_result], indent=2)
@@ -478,14 +522,28 @@ class StepMedispanMatchingAdapter_v2(IStepMedispanMatching):
             output_medications = []
             LOGGER.debug("MedispanMatching: Applying medispan match to extracted medications", extra=extra)
             with await opentelemetry.getSpan(thisSpanName + ":medispan_apply") as span1:
-                for extracted_medication in new_extracted_medication:                
+                for page_index, extracted_medication in enumerate(new_extracted_medication):
                     this_med_log_details = med_log_db.get(extracted_medication.id, {})
+                    # Log entries are ordered by the medication's position on the page, memo hits included
+                    this_med_log_details["index"] = page_index
                     try:
                         # Get the LLM result for this medication
                         llm_result = llm_result_db.get(extracted_medication.id)
+                        memo_hit = memo_hits.get(extracted_medication.id)
+
+                        if memo_hit:
+                            medispan_status, medispan_matched_medication = memo_hit
+                            extracted_medication.set_medispan_medication(medispan_matched_medication)
+                            extracted_medication.set_medispan_status(medispan_status)
+
+                            extracted_medication.execution_id = command.execution_id
+                            extracted_medication.document_operation_instance_id = command.document_operation_instance_id
+
+                            this_med_log_details["medispan_memo_hit"] = True
+                            this_med_log_details["medispan_filter_results"] = medispan_matched_medication.dict() if medispan_matched_medication else None
 
                         # If result then find the medispan medication and apply to 
-                        if llm_result:
+                        elif llm_result:
                             medispan_drug:MedispanDrug = medispan_local_db.get(llm_result["medispan_id"])
 
                             this_med_log_details['medispan_drug'] = medispan_drug.dict() if medispan_drug else None
@@ -512,6 +570,8 @@ class StepMedispanMatchingAdapter_v2(IStepMedispanMatching):
 
                                 extracted_medication.execution_id = command.execution_id
                                 extracted_medication.document_operation_instance_id = command.document_operation_instance_id
+                                if extracted_medication.id in memo_keys:
+                                    memo_updates[memo_keys[extracted_medication.id]] = (medispan_status, medispan_matched_medication)
                                 
                                 #uow.register_new(extracted_medication)
 
@@ -530,7 +590,7 @@ class StepMedispanMatchingAdapter_v2(IStepMedispanMatching):
                     med_log_db[extracted_medication.id] = this_med_log_details
 
                     extra2 = {
-                        "index": idx,
+                        "index": page_index,
                         "extracted_medication": extracted_medication.dict(),
                     }
                     extra2.update(extra)
@@ -539,10 +599,11 @@ class StepMedispanMatchingAdapter_v2(IStepMedispanMatching):
 
                     output_medications.append(extracted_medication)
 
-                    idx += 1
-
             # End of medication 2 loop -------------------------------------------------------------------------------------
 
+            if memo_updates:
+                await medispan_match_memo.set_many(memo_updates)
+
             log_detail_list = [x for x in med_log_db.values()]
             log_detail_list = sorted(log_detail_list, key=lambda obj: obj["index"])
             
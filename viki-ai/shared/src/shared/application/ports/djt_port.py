@@ -6,7 +6,7 @@ following hexagonal architecture principles.
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Protocol
+from typing import Dict, Any, List, Protocol, Tuple
 from shared.domain.models.djt_models import PipelineStatusUpdate
 
 
@@ -50,6 +50,22 @@ class DJTPort(Protocol):
         """
         ...
 
+    async def pipeline_status_updates(self, job_id: str, updates: List[Tuple[str, PipelineStatusUpdate]]) -> Dict[str, Any]:
+        """
+        Update several pipeline statuses of a job in one request.
+        
+        Args:
+            job_id: The job ID (used as run_id)
+            updates: (pipeline_id, PipelineStatusUpdate) pairs, in the order they happened
+            
+        Returns:
+            Dictionary containing the batch response, with the stored pipelines in the order of the updates
+            
+        Raises:
+            Exception: If there's an error communicating with the DJT service
+        """
+        ...
+
     async def create_job(self, job_id: str, job_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Create a new job in the distributed job tracking service.
@@ -6,9 +6,10 @@ including authentication for cloud environments. This is a shared implementation
 that can be used across all services.
 """
 
+import asyncio
 import httpx
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from shared.domain.models.djt_models import PipelineStatusUpdate
 from shared.application.ports.djt_port import DJTPort
 from shared.infrastructure.utils.exception import exceptionToMap
@@ -16,6 +17,9 @@ from viki_shared.utils.gcp_auth import get_service_account_identity_token
 
 logger = logging.getLogger(__name__)
 
+# Most updates the DJT batch status endpoint takes in one request
+MAX_PIPELINE_STATUS_BATCH = 500
+
 class DistributedJobTracking(DJTPort):
     """Adapter for interacting with the Distributed Job Tracking service."""
     
@@ -223,6 +227,99 @@ class DistributedJobTracking(DJTPort):
             logger.error(f"Unexpected error calling DJT API for pipeline status update: job_id: {job_id}, pipeline_id: {pipeline_id}", extra)
             raise Exception(f"Error communicating with distributed job tracking service: {str(e)}")
 
+    async def pipeline_status_updates(self, job_id: str, updates: List[Tuple[str, PipelineStatusUpdate]]) -> Dict[str, Any]:
+        """
+        Update several pipeline statuses of a job in one request.
+        
+        DJT applies the updates in order in one Redis transaction and checks the run's completion once.
+        More than MAX_PIPELINE_STATUS_BATCH updates are sent as consecutive requests of at most that many.
+        Against a DJT without the batch endpoint (404/405) the updates are sent one by one.
+        
+        Args:
+            job_id: The job ID (used as run_id)
+            updates: (pipeline_id, PipelineStatusUpdate) pairs, in the order they happened
+            
+        Returns:
+            Dictionary containing the batch response, with the stored pipelines in the order of the updates
+            
+        Raises:
+            Exception: If there's an error communicating with the DJT service
+        """
+        if len(updates) > MAX_PIPELINE_STATUS_BATCH:
+            pipelines = []
+            for start in range(0, len(updates), MAX_PIPELINE_STATUS_BATCH):
+                result = await self.pipeline_status_updates(job_id, updates[start:start + MAX_PIPELINE_STATUS_BATCH])
+                pipelines.extend(result.get("pipelines", []))
+            return {"pipelines": pipelines}
+        
+        extra = {
+            "job_id": job_id,
+            "update_count": len(updates),
+            "djt_base_url": self.base_url,
+            "cloud_provider": self.cloud_provider,
+        }
+        
+        try:
+            # Construct the URL for the DJT API
+            url = f"{self.base_url}/api/v1/jobs/{job_id}/pipelines/status"
+            
+            logger.info(f"Updating {len(updates)} pipeline statuses for job_id: {job_id}", extra)
+            
+            # Get headers with conditional authentication
+            headers = await self._get_headers()
+
+            body = {
+                "updates": [{**pipeline_data.model_dump(), "pipeline_id": pipeline_id} for pipeline_id, pipeline_data in updates]
+            }
+            
+            # Make HTTP request to distributed job tracking service
+            timeout = httpx.Timeout(self.timeout, read=self.timeout)
+            async with httpx.AsyncClient(timeout=timeout) as client:
+                response = await client.post(url, headers=headers, json=body)
+                
+                # Check for successful response
+                if response.status_code == 200:
+                    try:
+                        result = await response.json()
+                    except TypeError:
+                        # Handle case where json() returns dict directly instead of coroutine
+                        result = response.json()
+                    logger.debug(f"Successfully updated {len(updates)} pipeline statuses for job_id: {job_id}", extra)
+                    return result
+                elif response.status_code in [404, 405]:
+                    # DJT without the batch endpoint
+                    logger.warning(f"DJT API has no batch status endpoint, sending {len(updates)} updates one by one: job_id: {job_id}", extra=extra)
+                    pipelines = []
+                    for pipeline_id, pipeline_data in updates:
+                        result = await self.pipeline_status_update(job_id, pipeline_id, pipeline_data)
+                        pipelines.append(result.get("pipeline"))
+                    return {"pipelines": pipelines}
+                else:
+                    # Log the error and raise an exception with the status code
+                    error_detail = f"DJT API returned status {response.status_code}: {response.text}"
+                    extra.update({"status_code": response.status_code, "response_text": response.text})
+                    logger.warning(f"DJT API error for batch pipeline status update: job_id: {job_id}", extra=extra)
+                    
+                    # Create an exception that preserves the original status code
+                    error = Exception(error_detail)
+                    error.status_code = response.status_code
+                    error.response_text = response.text
+                    raise error
+                    
+        except httpx.RequestError as e:
+            extra.update({"error": exceptionToMap(e)})
+            logger.error(f"Network error when calling DJT API for batch pipeline status update: job_id: {job_id}", extra)
+            raise Exception(f"Unable to connect to distributed job tracking service: {str(e)}")
+        except Exception as e:
+            # If it's already our custom exception with status_code, re-raise it
+            if hasattr(e, 'status_code'):
+                raise e
+            
+            # Otherwise, log and wrap as a generic error
+            extra.update({"error": exceptionToMap(e)})
+            logger.error(f"Unexpected error calling DJT API for batch pipeline status update: job_id: {job_id}", extra)
+            raise Exception(f"Error communicating with distributed job tracking service: {str(e)}")
+
     async def create_job(self, job_id: str, job_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Create a new job in the distributed job tracking service.
@@ -373,6 +470,99 @@ class DistributedJobTracking(DJTPort):
             raise Exception(f"Error during DJT service health check: {str(e)}")
 
 
+class PipelineStatusBuffer:
+    """
+    Coalesces pipeline status updates into batch requests.
+    
+    Updates are queued per job and sent with pipeline_status_updates() when a job has max_updates queued, or
+    flush_interval_ms after the first update queued since the last flush.  Batches of a job are sent one after
+    the other in the order the updates were added.  Sending is fire-and-forget: failures are logged, not raised
+    to add().  Call flush() (or close()) before shutdown so queued updates are not lost; used as an async context
+    manager, the buffer is flushed when the block exits, e.g. at the end of a request.
+    """
+    
+    def __init__(self, client: DJTPort, max_updates: int = 50, flush_interval_ms: int = 200):
+        """
+        Args:
+            client: DJT client used to send the batches
+            max_updates: Number of queued updates of a job that triggers sending them, at most
+                MAX_PIPELINE_STATUS_BATCH
+            flush_interval_ms: Longest time an update waits in the buffer
+        """
+        self.client = client
+        self.max_updates = min(max(1, max_updates), MAX_PIPELINE_STATUS_BATCH)
+        self.flush_interval_ms = flush_interval_ms
+        self._pending: Dict[str, List[Tuple[str, PipelineStatusUpdate]]] = {}
+        self._sending: Dict[str, "asyncio.Task[None]"] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+    
+    async def add(self, job_id: str, pipeline_id: str, pipeline_data: PipelineStatusUpdate) -> None:
+        """
+        Queue a pipeline status update.  Waits for the job's batch to be sent when the update fills it.
+        """
+        updates = self._pending.setdefault(job_id, [])
+        updates.append((pipeline_id, pipeline_data))
+        if len(updates) >= self.max_updates:
+            await self._flush_job(job_id)
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.flush_interval_ms / 1000, self._on_timer)
+    
+    def _on_timer(self) -> None:
+        self._timer = None
+        for job_id in list(self._pending):
+            self._start_send(job_id)
+    
+    def _start_send(self, job_id: str) -> Optional["asyncio.Task[None]"]:
+        updates = self._pending.pop(job_id, None)
+        if not updates:
+            return None
+        task = asyncio.ensure_future(self._send(job_id, updates, self._sending.get(job_id)))
+        self._sending[job_id] = task
+        task.add_done_callback(lambda done: self._forget_send(job_id, done))
+        return task
+    
+    def _forget_send(self, job_id: str, task: "asyncio.Task[None]") -> None:
+        if self._sending.get(job_id) is task:
+            del self._sending[job_id]
+    
+    async def _send(self, job_id: str, updates: List[Tuple[str, PipelineStatusUpdate]], previous: Optional["asyncio.Task[None]"]) -> None:
+        if previous is not None:
+            # Keep the job's batches in order
+            await asyncio.wait([previous])
+        try:
+            await self.client.pipeline_status_updates(job_id, updates)
+        except Exception as e:
+            logger.error(f"Failed to send {len(updates)} buffered pipeline status updates for job_id: {job_id}", extra={
+                "job_id": job_id,
+                "update_count": len(updates),
+                "error": exceptionToMap(e)
+            })
+    
+    async def _flush_job(self, job_id: str) -> None:
+        task = self._start_send(job_id)
+        if task is not None:
+            await task
+    
+    async def flush(self) -> None:
+        """Send every queued update and wait for all batches in flight."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for job_id in list(self._pending):
+            self._start_send(job_id)
+        if self._sending:
+            await asyncio.wait(list(self._sending.values()))
+    
+    async def close(self) -> None:
+        await self.flush()
+    
+    async def __aenter__(self) -> "PipelineStatusBuffer":
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+
 # Factory function for easy instantiation
 def get_djt_client(base_url: str, cloud_provider: str, timeout: float = 30.0) -> DistributedJobTracking:
     """
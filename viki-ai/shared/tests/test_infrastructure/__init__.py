@@ -0,0 +1 @@
+"""Tests for infrastructure module."""
\ No newline at end of file
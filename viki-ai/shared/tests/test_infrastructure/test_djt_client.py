@@ -0,0 +1,159 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock, patch, AsyncMock
+
+from shared.domain.models.djt_models import PipelineStatus, PipelineStatusUpdate
+from shared.infrastructure.adapters.djt_client import (
+    DistributedJobTracking,
+    MAX_PIPELINE_STATUS_BATCH,
+    PipelineStatusBuffer,
+)
+
+
+class FakeDJTClient:
+    """Records the batches sent; the first `failures` batches fail."""
+
+    def __init__(self, failures: int = 0, delays=None):
+        self.batches = []
+        self.failures = failures
+        self.delays = list(delays or [])
+
+    async def pipeline_status_updates(self, job_id, updates):
+        await asyncio.sleep(self.delays.pop(0) if self.delays else 0)
+        if self.failures:
+            self.failures -= 1
+            raise Exception("DJT unavailable")
+        self.batches.append((job_id, [(pipeline_id, update.page_number) for pipeline_id, update in updates]))
+        return {"pipelines": []}
+
+
+def status_update(page_number=None) -> PipelineStatusUpdate:
+    return PipelineStatusUpdate(
+        status=PipelineStatus.COMPLETED,
+        page_number=page_number,
+        app_id="test_app",
+        tenant_id="test_tenant",
+        patient_id="test_patient",
+        document_id="test_document",
+        pages=1000
+    )
+
+
+@pytest.mark.asyncio
+async def test_buffer_sends_full_batch():
+    """Test that a job's updates are sent as soon as max_updates are queued."""
+    client = FakeDJTClient()
+    buffer = PipelineStatusBuffer(client, max_updates=3, flush_interval_ms=60000)
+
+    for page in (1, 2, 3):
+        await buffer.add("run-1", "extract", status_update(page))
+
+    assert client.batches == [("run-1", [("extract", 1), ("extract", 2), ("extract", 3)])]
+    await buffer.close()
+
+
+@pytest.mark.asyncio
+async def test_buffer_sends_after_interval_per_job():
+    """Test that queued updates are sent after flush_interval_ms, one batch per job."""
+    client = FakeDJTClient()
+    buffer = PipelineStatusBuffer(client, max_updates=50, flush_interval_ms=10)
+
+    await buffer.add("run-1", "extract", status_update(1))
+    await buffer.add("run-2", "extract", status_update(1))
+    await buffer.add("run-1", "extract", status_update(None))
+    assert client.batches == []
+
+    await asyncio.sleep(0.05)
+
+    assert sorted(client.batches) == [
+        ("run-1", [("extract", 1), ("extract", None)]),
+        ("run-2", [("extract", 1)])
+    ]
+    await buffer.close()
+
+
+@pytest.mark.asyncio
+async def test_buffer_keeps_batches_of_a_job_in_order():
+    """Test that a batch waits for the previous batch of its job to be sent."""
+    # The first batch is slower than the second
+    client = FakeDJTClient(delays=[0.05, 0])
+    buffer = PipelineStatusBuffer(client, max_updates=2, flush_interval_ms=60000)
+
+    await buffer.add("run-1", "extract", status_update(1))
+    first = asyncio.create_task(buffer.add("run-1", "extract", status_update(2)))
+    await asyncio.sleep(0)
+    await buffer.add("run-1", "extract", status_update(3))
+    await buffer.add("run-1", "extract", status_update(4))
+    await first
+
+    assert [pages for _, pages in client.batches] == [
+        [("extract", 1), ("extract", 2)],
+        [("extract", 3), ("extract", 4)]
+    ]
+    await buffer.close()
+
+
+@pytest.mark.asyncio
+async def test_buffer_flush_sends_queued_updates_and_logs_failures():
+    """Test that flush sends everything queued and a failed batch doesn't stop the others."""
+    client = FakeDJTClient(failures=1)
+    buffer = PipelineStatusBuffer(client, max_updates=50, flush_interval_ms=60000)
+
+    await buffer.add("run-1", "extract", status_update(1))
+    await buffer.add("run-2", "extract", status_update(1))
+    await buffer.flush()
+
+    assert len(client.batches) == 1
+    await buffer.add("run-1", "extract", status_update(2))
+    await buffer.close()
+    assert len(client.batches) == 2
+
+
+@pytest.mark.asyncio
+async def test_buffer_batches_stay_within_the_endpoint_limit():
+    """Test that max_updates is capped at what the batch endpoint accepts."""
+    client = FakeDJTClient()
+    buffer = PipelineStatusBuffer(client, max_updates=10000, flush_interval_ms=60000)
+    assert buffer.max_updates == MAX_PIPELINE_STATUS_BATCH
+
+    for page in range(1, MAX_PIPELINE_STATUS_BATCH + 2):
+        await buffer.add("run-1", "extract", status_update(page))
+    await buffer.close()
+
+    assert [len(pages) for _, pages in client.batches] == [MAX_PIPELINE_STATUS_BATCH, 1]
+
+
+@pytest.mark.asyncio
+async def test_buffer_scope_sends_everything_when_it_exits():
+    """Test that a buffer used as a context manager (e.g. for one request) is flushed when the block exits."""
+    client = FakeDJTClient()
+
+    async with PipelineStatusBuffer(client, max_updates=50, flush_interval_ms=60000) as buffer:
+        await buffer.add("run-1", "extract", status_update(1))
+        await buffer.add("run-1", "extract", status_update(None))
+        assert client.batches == []
+
+    assert client.batches == [("run-1", [("extract", 1), ("extract", None)])]
+
+
+@pytest.mark.asyncio
+@patch('shared.infrastructure.adapters.djt_client.httpx.AsyncClient')
+async def test_pipeline_status_updates_are_sent_in_batches_the_endpoint_accepts(mock_client):
+    """Test that more updates than the endpoint takes are sent as consecutive requests, in order."""
+    async def post(url, headers, json):
+        response = MagicMock(status_code=200)
+        response.json.return_value = {"pipelines": [{"page_number": update["page_number"]} for update in json["updates"]]}
+        return response
+
+    mock_client_instance = AsyncMock()
+    mock_client_instance.post.side_effect = post
+    mock_client.return_value.__aenter__.return_value = mock_client_instance
+
+    client = DistributedJobTracking(base_url="http://test-djt-api", cloud_provider="local")
+    updates = [("extract", status_update(page)) for page in range(1, MAX_PIPELINE_STATUS_BATCH + 3)]
+
+    result = await client.pipeline_status_updates("run-1", updates)
+
+    batch_sizes = [len(call.kwargs["json"]["updates"]) for call in mock_client_instance.post.call_args_list]
+    assert batch_sizes == [MAX_PIPELINE_STATUS_BATCH, 2]
+    assert [pipeline["page_number"] for pipeline in result["pipelines"]] == list(range(1, MAX_PIPELINE_STATUS_BATCH + 3))